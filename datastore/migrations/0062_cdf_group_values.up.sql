@@ -0,0 +1,125 @@
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_cdf_forecast_group_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN start TIMESTAMP, IN end TIMESTAMP)
+COMMENT 'Read the values of all constant values of a cdf forecast group. Constant values without values between start and end have a single row with a NULL timestamp'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = UUID_TO_BIN(strid, 1);
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'read_values'));
+    IF allowed THEN
+        SELECT singles.constant_value, vals.timestamp, vals.value
+        FROM arbiter_data.cdf_forecasts_singles AS singles
+        LEFT JOIN arbiter_data.cdf_forecasts_values AS vals
+            ON vals.id = singles.id AND vals.timestamp BETWEEN start AND end
+        WHERE singles.cdf_forecast_group_id = binid;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read cdf forecast group values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_cdf_forecast_group_values TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_cdf_forecast_group_values TO 'apiuser'@'%';
+
+
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_cdf_forecast_group_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with cv (constant value), ts, and v keys into cdf_forecasts_values for the constant values of a cdf forecast group'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = UUID_TO_BIN(strid, 1);
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        IF EXISTS (
+            SELECT 1 FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                cv FLOAT PATH '$.cv' ERROR ON EMPTY ERROR ON ERROR)
+            ) AS jsoncvs
+            LEFT JOIN arbiter_data.cdf_forecasts_singles AS singles
+                ON singles.cdf_forecast_group_id = binid AND singles.constant_value = jsoncvs.cv
+            WHERE singles.id IS NULL
+        ) THEN
+            SIGNAL SQLSTATE '22032' SET MESSAGE_TEXT = 'Data contains a constant value that is not in the cdf forecast group',
+            MYSQL_ERRNO = 3140;
+        END IF;
+        INSERT INTO arbiter_data.cdf_forecasts_values (id, timestamp, value)
+            SELECT singles.id, jsonvals.timestamp, jsonvals.value
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                cv FLOAT PATH '$.cv' ERROR ON EMPTY ERROR ON ERROR,
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR)
+            ) AS jsonvals
+            JOIN arbiter_data.cdf_forecasts_singles AS singles
+                ON singles.cdf_forecast_group_id = binid AND singles.constant_value = jsonvals.cv
+        ON DUPLICATE KEY UPDATE value=jsonvals.value;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write cdf forecast group values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT SELECT (constant_value) ON arbiter_data.cdf_forecasts_singles TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_group_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_group_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE read_metadata_for_value_write;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_metadata_for_value_write (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN object_type VARCHAR(32), IN start TIMESTAMP)
+COMMENT 'Read the necessary metadata/values to allow proper validation of data being written'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    DECLARE groupid BINARY(16);
+    DECLARE il INT;
+    DECLARE previous_time TIMESTAMP;
+    DECLARE extra TEXT;
+    DECLARE is_event BOOLEAN;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    IF object_type IN ('observations', 'forecasts') THEN
+        SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    ELSEIF object_type = 'cdf_forecasts' THEN
+        SET groupid = (SELECT cdf_forecast_group_id FROM cdf_forecasts_singles WHERE id = binid);
+        SET allowed = (SELECT can_user_perform_action(auth0id, groupid, 'write_values'));
+    ELSEIF object_type = 'cdf_forecasts_groups' THEN
+        SET groupid = binid;
+        SET allowed = (SELECT can_user_perform_action(auth0id, groupid, 'write_values'));
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Invalid object_type for "read metadata for value write"',
+        MYSQL_ERRNO = 1146;
+    END IF;
+
+    IF allowed THEN
+        IF object_type = 'observations' THEN
+            SELECT interval_length, extra_parameters, variable = 'event' INTO il, extra, is_event FROM arbiter_data.observations WHERE id = binid;
+            SET previous_time = (SELECT MAX(timestamp) FROM arbiter_data.observations_values WHERE id = binid AND timestamp < start);
+        ELSEIF object_type = 'forecasts' THEN
+            SELECT interval_length, extra_parameters, variable = 'event' INTO il, extra, is_event FROM arbiter_data.forecasts WHERE id = binid;
+            SET previous_time = (SELECT MAX(timestamp) FROM arbiter_data.forecasts_values WHERE id = binid AND timestamp < start);
+        ELSEIF object_type = 'cdf_forecasts' THEN
+            SELECT interval_length, extra_parameters, variable = 'event' INTO il, extra, is_event FROM arbiter_data.cdf_forecasts_groups WHERE id = groupid;
+            SET previous_time = (SELECT MAX(timestamp) FROM arbiter_data.cdf_forecasts_values WHERE id = binid AND timestamp < start);
+        ELSEIF object_type = 'cdf_forecasts_groups' THEN
+            SELECT interval_length, extra_parameters, variable = 'event' INTO il, extra, is_event FROM arbiter_data.cdf_forecasts_groups WHERE id = groupid;
+            SET previous_time = (
+                SELECT MAX(vals.timestamp) FROM arbiter_data.cdf_forecasts_values AS vals
+                JOIN arbiter_data.cdf_forecasts_singles AS singles ON vals.id = singles.id
+                WHERE singles.cdf_forecast_group_id = groupid AND vals.timestamp < start);
+        END IF;
+        IF ISNULL(il) THEN
+            -- interval length will only be null if the object doesn't actually exist in the proper table
+            SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read metadata for value write"',
+            MYSQL_ERRNO = 1142;
+        END IF;
+        SELECT il as interval_length, previous_time, extra as extra_parameters, is_event;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read metadata for value write"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE read_metadata_for_value_write TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE read_metadata_for_value_write TO 'apiuser'@'%';
@@ -0,0 +1,45 @@
+DROP PROCEDURE store_observation_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_observation_values (
+    IN auth0id VARCHAR(32), strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with time, value, quality_flag keys into observation_values'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        INSERT INTO arbiter_data.observations_values (id, timestamp, value, quality_flag)
+            SELECT binid, timestamp, value, quality_flag
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR,
+                quality_flag SMALLINT UNSIGNED PATH '$.qf' ERROR ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE value=jsonvals.value,
+            quality_flag=jsonvals.quality_flag;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write observation values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+    select allowed;
+END;
+
+GRANT EXECUTE ON PROCEDURE store_observation_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE store_observation_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_aggregate_value_blocks;
+DROP PROCEDURE read_materialized_aggregate_values;
+DROP PROCEDURE read_aggregate_value_blocks;
+DROP FUNCTION can_user_read_aggregate_inputs;
+DROP TRIGGER invalidate_aggregate_values_on_aggregate_update;
+DROP TRIGGER invalidate_aggregate_values_on_mapping_delete;
+DROP TRIGGER invalidate_aggregate_values_on_mapping_update;
+DROP TRIGGER invalidate_aggregate_values_on_mapping_insert;
+DROP PROCEDURE invalidate_aggregate_values_for_observation;
+DROP PROCEDURE invalidate_aggregate_values;
+DROP TABLE aggregate_value_versions;
+DROP TABLE aggregate_value_blocks;
+DROP TABLE aggregate_values;
+DROP USER 'aggvalues'@'localhost';
@@ -0,0 +1,257 @@
+CREATE USER 'aggvalues'@'localhost' IDENTIFIED WITH caching_sha2_password as '$A$005$THISISACOMBINATIONOFINVALIDSALTANDPASSWORDTHATMUSTNEVERBRBEUSED' ACCOUNT LOCK;
+
+-- Aggregate values are computed from the values of many observations by the API.
+-- Computed values are stored here in blocks of whole intervals so that reads only
+-- need a range scan. aggregate_value_blocks records which blocks are valid and the
+-- range of observation values each block was computed from. Blocks are removed
+-- when observation values in that range change, or when the observations of the
+-- aggregate change, so they will be computed again on the next read.
+CREATE TABLE arbiter_data.aggregate_values (
+    id BINARY(16) NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
+    value FLOAT,
+    quality_flag SMALLINT UNSIGNED NOT NULL,
+
+    PRIMARY KEY (id, timestamp),
+    FOREIGN KEY (id)
+        REFERENCES aggregates(id)
+        ON DELETE CASCADE ON UPDATE RESTRICT
+) ENGINE=INNODB ENCRYPTION='Y' ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE arbiter_data.aggregate_value_blocks (
+    aggregate_id BINARY(16) NOT NULL,
+    block_start TIMESTAMP NOT NULL,
+    block_end TIMESTAMP NOT NULL,
+    -- observation values between raw_start and raw_end are used in the block
+    raw_start TIMESTAMP NOT NULL,
+    raw_end TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (aggregate_id, block_start),
+    FOREIGN KEY (aggregate_id)
+        REFERENCES aggregates(id)
+        ON DELETE CASCADE ON UPDATE RESTRICT
+) ENGINE=INNODB ENCRYPTION='Y' ROW_FORMAT=COMPRESSED;
+
+-- version is incremented on every invalidation so that blocks computed
+-- from values read before an invalidation are not stored as valid
+CREATE TABLE arbiter_data.aggregate_value_versions (
+    aggregate_id BINARY(16) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (aggregate_id),
+    FOREIGN KEY (aggregate_id)
+        REFERENCES aggregates(id)
+        ON DELETE CASCADE ON UPDATE RESTRICT
+) ENGINE=INNODB ENCRYPTION='Y' ROW_FORMAT=COMPRESSED;
+
+
+GRANT SELECT (aggregate_id, observation_id), TRIGGER ON arbiter_data.aggregate_observation_mapping TO 'aggvalues'@'localhost';
+GRANT TRIGGER ON arbiter_data.aggregates TO 'aggvalues'@'localhost';
+GRANT SELECT, INSERT, UPDATE ON arbiter_data.aggregate_value_versions TO 'aggvalues'@'localhost';
+GRANT SELECT, DELETE ON arbiter_data.aggregate_value_blocks TO 'aggvalues'@'localhost';
+
+
+CREATE DEFINER = 'aggvalues'@'localhost' PROCEDURE arbiter_data.invalidate_aggregate_values (
+    aggid BINARY(16), start TIMESTAMP, end TIMESTAMP)
+COMMENT 'Remove the computed value blocks of the aggregate that use observation values between start and end'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    -- version first so that a concurrent store_aggregate_value_blocks holding
+    -- the version row commits before the blocks are removed
+    INSERT INTO arbiter_data.aggregate_value_versions (aggregate_id, version) VALUES (aggid, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+    DELETE FROM arbiter_data.aggregate_value_blocks
+    WHERE aggregate_id = aggid AND raw_start <= end AND raw_end >= start;
+END;
+GRANT EXECUTE ON PROCEDURE arbiter_data.invalidate_aggregate_values TO 'aggvalues'@'localhost';
+
+
+CREATE DEFINER = 'aggvalues'@'localhost' PROCEDURE arbiter_data.invalidate_aggregate_values_for_observation (
+    obsid BINARY(16), start TIMESTAMP, end TIMESTAMP)
+COMMENT 'Remove the computed value blocks of all aggregates of the observation that use values between start and end'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    INSERT INTO arbiter_data.aggregate_value_versions (aggregate_id, version)
+        SELECT aggregate_id, 1 FROM arbiter_data.aggregate_observation_mapping
+        WHERE observation_id = obsid
+    ON DUPLICATE KEY UPDATE version = version + 1;
+    DELETE blocks FROM arbiter_data.aggregate_value_blocks AS blocks
+    JOIN arbiter_data.aggregate_observation_mapping AS aom ON blocks.aggregate_id = aom.aggregate_id
+    WHERE aom.observation_id = obsid AND blocks.raw_start <= end AND blocks.raw_end >= start;
+END;
+GRANT EXECUTE ON PROCEDURE arbiter_data.invalidate_aggregate_values_for_observation TO 'aggvalues'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.invalidate_aggregate_values_for_observation TO 'insert_objects'@'localhost';
+
+
+CREATE DEFINER = 'aggvalues'@'localhost' TRIGGER invalidate_aggregate_values_on_mapping_insert AFTER INSERT ON arbiter_data.aggregate_observation_mapping
+FOR EACH ROW
+CALL arbiter_data.invalidate_aggregate_values(NEW.aggregate_id, TIMESTAMP('1970-01-01 00:00:01'), TIMESTAMP('2038-01-19 03:14:07'));
+
+-- also covers observation deletion, see record_observation_deletion_in_aggregate_mapping
+CREATE DEFINER = 'aggvalues'@'localhost' TRIGGER invalidate_aggregate_values_on_mapping_update AFTER UPDATE ON arbiter_data.aggregate_observation_mapping
+FOR EACH ROW
+CALL arbiter_data.invalidate_aggregate_values(NEW.aggregate_id, TIMESTAMP('1970-01-01 00:00:01'), TIMESTAMP('2038-01-19 03:14:07'));
+
+CREATE DEFINER = 'aggvalues'@'localhost' TRIGGER invalidate_aggregate_values_on_mapping_delete AFTER DELETE ON arbiter_data.aggregate_observation_mapping
+FOR EACH ROW
+CALL arbiter_data.invalidate_aggregate_values(OLD.aggregate_id, TIMESTAMP('1970-01-01 00:00:01'), TIMESTAMP('2038-01-19 03:14:07'));
+
+CREATE DEFINER = 'aggvalues'@'localhost' TRIGGER invalidate_aggregate_values_on_aggregate_update AFTER UPDATE ON arbiter_data.aggregates
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.timezone <=> NEW.timezone AND OLD.interval_length <=> NEW.interval_length
+            AND OLD.interval_label <=> NEW.interval_label AND OLD.aggregate_type <=> NEW.aggregate_type) THEN
+        CALL arbiter_data.invalidate_aggregate_values(NEW.id, TIMESTAMP('1970-01-01 00:00:01'), TIMESTAMP('2038-01-19 03:14:07'));
+    END IF;
+END;
+-- foreign keys take care of deletion
+
+
+CREATE DEFINER = 'select_objects'@'localhost' FUNCTION can_user_read_aggregate_inputs (
+    auth0id VARCHAR(32), aggid BINARY(16))
+RETURNS BOOLEAN
+COMMENT 'Can the user read the values of the aggregate and every observation that has not been deleted in it'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    RETURN can_user_perform_action(auth0id, aggid, 'read_values') AND NOT EXISTS(
+        SELECT 1 FROM arbiter_data.aggregate_observation_mapping
+        WHERE aggregate_id = aggid AND observation_deleted_at IS NULL
+        AND NOT can_user_perform_action(auth0id, observation_id, 'read_values'));
+END;
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_read_aggregate_inputs TO 'select_objects'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_read_aggregate_inputs TO 'insert_objects'@'localhost';
+GRANT SELECT ON arbiter_data.aggregate_value_blocks TO 'select_objects'@'localhost';
+GRANT SELECT ON arbiter_data.aggregate_value_versions TO 'select_objects'@'localhost';
+GRANT SELECT ON arbiter_data.aggregate_values TO 'select_objects'@'localhost';
+
+
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_aggregate_value_blocks (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN start TIMESTAMP, IN end TIMESTAMP)
+COMMENT 'Read the version and start of the valid computed value blocks of the aggregate between start and end. No rows are returned if the user can not read the values of every observation'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    SET binid = UUID_TO_BIN(strid, 1);
+    IF can_user_perform_action(auth0id, binid, 'read_values') THEN
+        IF can_user_read_aggregate_inputs(auth0id, binid) THEN
+            SELECT vers.version, blocks.block_start
+            FROM (SELECT IFNULL((SELECT version FROM arbiter_data.aggregate_value_versions
+                                 WHERE aggregate_id = binid), 0) AS version) AS vers
+            LEFT JOIN arbiter_data.aggregate_value_blocks AS blocks
+                ON blocks.aggregate_id = binid AND blocks.block_start BETWEEN start AND end;
+        ELSE
+            SELECT NULL AS version, NULL AS block_start FROM DUAL WHERE FALSE;
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read aggregate value blocks"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+GRANT EXECUTE ON PROCEDURE read_aggregate_value_blocks TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE read_aggregate_value_blocks TO 'apiuser'@'%';
+
+
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_materialized_aggregate_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN start TIMESTAMP, IN end TIMESTAMP)
+COMMENT 'Read the computed values of the aggregate between start and end'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    SET binid = UUID_TO_BIN(strid, 1);
+    IF can_user_read_aggregate_inputs(auth0id, binid) THEN
+        SELECT timestamp, value, quality_flag FROM arbiter_data.aggregate_values
+        WHERE id = binid AND timestamp BETWEEN start AND end;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read materialized aggregate values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+GRANT EXECUTE ON PROCEDURE read_materialized_aggregate_values TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE read_materialized_aggregate_values TO 'apiuser'@'%';
+
+
+GRANT SELECT, INSERT, UPDATE ON arbiter_data.aggregate_values TO 'insert_objects'@'localhost';
+GRANT SELECT, INSERT, UPDATE ON arbiter_data.aggregate_value_blocks TO 'insert_objects'@'localhost';
+GRANT SELECT, INSERT, UPDATE ON arbiter_data.aggregate_value_versions TO 'insert_objects'@'localhost';
+
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_aggregate_value_blocks (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN readversion BIGINT UNSIGNED, IN blocks JSON, IN data JSON)
+COMMENT 'Store computed aggregate values, a JSON object array with ts, v, and qf keys, and mark the blocks, a JSON object array with start, end, raw_start, and raw_end keys, as valid if the aggregate has not been invalidated since readversion'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE currentversion BIGINT UNSIGNED;
+    SET binid = UUID_TO_BIN(strid, 1);
+    IF can_user_read_aggregate_inputs(auth0id, binid) THEN
+        INSERT INTO arbiter_data.aggregate_values (id, timestamp, value, quality_flag)
+            SELECT binid, timestamp, value, quality_flag
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR,
+                quality_flag SMALLINT UNSIGNED PATH '$.qf' ERROR ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE value=jsonvals.value, quality_flag=jsonvals.quality_flag;
+
+        -- lock the version until commit, see invalidate_aggregate_values
+        INSERT INTO arbiter_data.aggregate_value_versions (aggregate_id, version) VALUES (binid, 0)
+        ON DUPLICATE KEY UPDATE version = version;
+        SET currentversion = (SELECT version FROM arbiter_data.aggregate_value_versions
+                              WHERE aggregate_id = binid FOR UPDATE);
+        IF currentversion = readversion THEN
+            INSERT INTO arbiter_data.aggregate_value_blocks (aggregate_id, block_start, block_end, raw_start, raw_end)
+                SELECT binid, block_start, block_end, raw_start, raw_end
+                FROM JSON_TABLE(blocks, '$[*]' COLUMNS (
+                    block_start TIMESTAMP PATH '$.start' ERROR ON EMPTY ERROR ON ERROR,
+                    block_end TIMESTAMP PATH '$.end' ERROR ON EMPTY ERROR ON ERROR,
+                    raw_start TIMESTAMP PATH '$.raw_start' ERROR ON EMPTY ERROR ON ERROR,
+                    raw_end TIMESTAMP PATH '$.raw_end' ERROR ON EMPTY ERROR ON ERROR)
+                ) as jsonblocks
+            ON DUPLICATE KEY UPDATE block_end=jsonblocks.block_end, raw_start=jsonblocks.raw_start,
+                raw_end=jsonblocks.raw_end, created_at=CURRENT_TIMESTAMP();
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "store aggregate value blocks"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+GRANT EXECUTE ON PROCEDURE store_aggregate_value_blocks TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE store_aggregate_value_blocks TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_observation_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_observation_values (
+    IN auth0id VARCHAR(32), strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with time, value, quality_flag keys into observation_values'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    DECLARE mints TIMESTAMP;
+    DECLARE maxts TIMESTAMP;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        INSERT INTO arbiter_data.observations_values (id, timestamp, value, quality_flag)
+            SELECT binid, timestamp, value, quality_flag
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR,
+                quality_flag SMALLINT UNSIGNED PATH '$.qf' ERROR ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE value=jsonvals.value,
+            quality_flag=jsonvals.quality_flag;
+        IF EXISTS (SELECT 1 FROM arbiter_data.aggregate_observation_mapping WHERE observation_id = binid) THEN
+            SELECT MIN(timestamp), MAX(timestamp) INTO mints, maxts
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (timestamp TIMESTAMP PATH '$.ts')) as jsonvals;
+            CALL arbiter_data.invalidate_aggregate_values_for_observation(binid, mints, maxts);
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write observation values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+    select allowed;
+END;
+
+GRANT EXECUTE ON PROCEDURE store_observation_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE store_observation_values TO 'apiuser'@'%';
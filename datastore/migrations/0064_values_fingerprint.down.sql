@@ -0,0 +1 @@
+DROP PROCEDURE read_values_fingerprint;
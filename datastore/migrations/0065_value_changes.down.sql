@@ -0,0 +1,4 @@
+DROP PROCEDURE read_value_changes;
+ALTER TABLE arbiter_data.cdf_forecasts_values DROP KEY modified_at_idx, DROP COLUMN modified_at;
+ALTER TABLE arbiter_data.forecasts_values DROP KEY modified_at_idx, DROP COLUMN modified_at;
+ALTER TABLE arbiter_data.observations_values DROP KEY modified_at_idx, DROP COLUMN modified_at;
@@ -0,0 +1,74 @@
+-- record when each value was last stored with a different value or
+-- quality flag so clients can read only the values changed since their
+-- last read. The secondary index also holds the primary key, so changes
+-- are read in (modified_at, timestamp) order from the index.
+ALTER TABLE arbiter_data.observations_values
+    ADD COLUMN modified_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY modified_at_idx (id, modified_at);
+ALTER TABLE arbiter_data.forecasts_values
+    ADD COLUMN modified_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY modified_at_idx (id, modified_at);
+ALTER TABLE arbiter_data.cdf_forecasts_values
+    ADD COLUMN modified_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY modified_at_idx (id, modified_at);
+
+
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_value_changes (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN object_type VARCHAR(32),
+    IN since_modified BIGINT UNSIGNED, IN since_timestamp TIMESTAMP, IN lim INT,
+    IN delay INT)
+COMMENT 'Read up to lim values of an object modified after since_modified, in microseconds since the epoch, and since_timestamp, and at least delay seconds ago'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    DECLARE since DATETIME(6);
+    DECLARE upto TIMESTAMP(6);
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    IF object_type = 'observations' THEN
+        SET allowed = is_read_observation_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'forecasts' THEN
+        SET allowed = is_read_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts' THEN
+        SET allowed = is_read_cdf_forecast_values_allowed(auth0id, binid);
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Invalid object_type for "read value changes"',
+        MYSQL_ERRNO = 1146;
+    END IF;
+
+    IF allowed THEN
+        SET since = FROM_UNIXTIME(since_modified DIV 1000000) + INTERVAL (since_modified MOD 1000000) MICROSECOND;
+        -- modified_at is set when a store statement begins, so values
+        -- from statements that may not be committed yet are left for a
+        -- later read rather than being skipped by the next cursor
+        SET upto = CURRENT_TIMESTAMP(6) - INTERVAL delay SECOND;
+        IF object_type = 'observations' THEN
+            SELECT timestamp, value, quality_flag,
+                CAST(UNIX_TIMESTAMP(modified_at) * 1000000 AS UNSIGNED) as modified
+            FROM arbiter_data.observations_values
+            WHERE id = binid AND (modified_at, timestamp) > (since, since_timestamp)
+                AND modified_at <= upto
+            ORDER BY modified_at, timestamp LIMIT lim;
+        ELSEIF object_type = 'forecasts' THEN
+            SELECT timestamp, value,
+                CAST(UNIX_TIMESTAMP(modified_at) * 1000000 AS UNSIGNED) as modified
+            FROM arbiter_data.forecasts_values
+            WHERE id = binid AND (modified_at, timestamp) > (since, since_timestamp)
+                AND modified_at <= upto
+            ORDER BY modified_at, timestamp LIMIT lim;
+        ELSE
+            SELECT timestamp, value,
+                CAST(UNIX_TIMESTAMP(modified_at) * 1000000 AS UNSIGNED) as modified
+            FROM arbiter_data.cdf_forecasts_values
+            WHERE id = binid AND (modified_at, timestamp) > (since, since_timestamp)
+                AND modified_at <= upto
+            ORDER BY modified_at, timestamp LIMIT lim;
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read value changes"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_value_changes TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_value_changes TO 'apiuser'@'%';
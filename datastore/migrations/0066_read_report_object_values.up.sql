@@ -0,0 +1,25 @@
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_report_object_values (
+IN auth0id VARCHAR(32), IN strid CHAR(36), IN str_object_id CHAR(36))
+COMMENT 'Read the processed report values of one object in a report'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE bin_object_id BINARY(16);
+    DECLARE allowed boolean DEFAULT FALSE;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    SET bin_object_id = (SELECT UUID_TO_BIN(str_object_id, 1));
+    SET allowed = can_user_perform_action(auth0id, binid, 'read_values') AND
+        is_read_values_any_allowed(auth0id, bin_object_id);
+    IF allowed THEN
+        SELECT BIN_TO_UUID(id,1) as id, BIN_TO_UUID(object_id, 1) as object_id,
+            processed_values
+        FROM arbiter_data.report_values WHERE report_id = binid AND
+            object_id = bin_object_id;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read report object values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_report_object_values TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_report_object_values TO 'apiuser'@'%';
@@ -0,0 +1 @@
+DROP PROCEDURE read_report_metadata;
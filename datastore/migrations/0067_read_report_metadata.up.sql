@@ -0,0 +1,21 @@
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_report_metadata (
+IN auth0id VARCHAR(32), IN strid CHAR(36))
+COMMENT 'Read report metadata without the raw report'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'read'));
+    IF allowed THEN
+        SELECT BIN_TO_UUID(id, 1) as report_id, get_organization_name(organization_id) as provider,
+            name, report_parameters, status, created_at, modified_at
+        FROM arbiter_data.reports where id = binid;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read report"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_report_metadata TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_report_metadata TO 'apiuser'@'%';
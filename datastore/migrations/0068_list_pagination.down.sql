@@ -0,0 +1,69 @@
+DROP PROCEDURE list_observations;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_observations (IN auth0id VARCHAR(32))
+COMMENT 'List all observations and associated metadata that the user can read'
+READS SQL DATA SQL SECURITY DEFINER
+SELECT BIN_TO_UUID(id, 1) as observation_id, get_organization_name(organization_id) as provider,
+    BIN_TO_UUID(site_id, 1) as site_id, name, variable, interval_label, interval_length, interval_value_type,
+    uncertainty, extra_parameters, created_at, modified_at
+FROM observations WHERE id in (
+    SELECT object_id from user_objects WHERE auth0_id = auth0id AND object_type = 'observations');
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_observations TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_observations TO 'apiuser'@'%';
+
+
+DROP PROCEDURE list_forecasts;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_forecasts (IN auth0id VARCHAR(32))
+COMMENT 'List all forecasts and associated metadata that the user can read'
+READS SQL DATA SQL SECURITY DEFINER
+SELECT BIN_TO_UUID(id, 1) as forecast_id, get_organization_name(organization_id) as provider,
+    BIN_TO_UUID(site_id, 1) as site_id, BIN_TO_UUID(aggregate_id, 1) as aggregate_id,
+    name, variable, issue_time_of_day, lead_time_to_start,
+    interval_label, interval_length, run_length, interval_value_type, extra_parameters,
+    created_at, modified_at
+FROM forecasts WHERE id in (
+    SELECT object_id from user_objects WHERE auth0_id = auth0id AND object_type = 'forecasts');
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_forecasts TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_forecasts TO 'apiuser'@'%';
+
+
+DROP PROCEDURE list_cdf_forecasts_groups;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_cdf_forecasts_groups (IN auth0id VARCHAR(32))
+COMMENT 'List all cdf forecast groups and associated metadata that the user can read'
+READS SQL DATA SQL SECURITY DEFINER
+SELECT BIN_TO_UUID(id, 1) as forecast_id,
+       get_organization_name(organization_id) as provider,
+       BIN_TO_UUID(site_id, 1) as site_id,
+       BIN_TO_UUID(aggregate_id, 1) as aggregate_id,
+       name, variable, issue_time_of_day, lead_time_to_start,
+       interval_label, interval_length, run_length,
+       interval_value_type, extra_parameters, axis,
+       created_at, modified_at,
+       get_constant_values(id) as constant_values
+       FROM cdf_forecasts_groups WHERE id in (
+           SELECT object_id from user_objects WHERE auth0_id = auth0id AND object_type = 'cdf_forecasts');
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_cdf_forecasts_groups TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_cdf_forecasts_groups TO 'apiuser'@'%';
+
+
+DROP PROCEDURE list_cdf_forecasts_singles;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_cdf_forecasts_singles (IN auth0id VARCHAR(32))
+COMMENT 'List all cdf forecast singletons and associated metadata that the user can read'
+READS SQL DATA SQL SECURITY DEFINER
+SELECT BIN_TO_UUID(cfs.id, 1) as forecast_id, get_organization_name(cfg.organization_id) as provider,
+       BIN_TO_UUID(cfg.site_id, 1) as site_id, BIN_TO_UUID(cfg.aggregate_id, 1) as aggregate_id,
+       BIN_TO_UUID(cfs.cdf_forecast_group_id, 1) as parent,
+       cfg.name as name, cfg.variable as variable,
+       cfg.issue_time_of_day as issue_time_of_day, cfg.lead_time_to_start as lead_time_to_start,
+       cfg.interval_label as interval_label, cfg.interval_length as interval_length,
+       cfg.run_length as run_length, cfg.interval_value_type as interval_value_type,
+       cfg.extra_parameters as extra_parameters, cfg.axis as axis, cfs.created_at as created_at,
+       cfs.constant_value as constant_value
+FROM cdf_forecasts_groups as cfg, cdf_forecasts_singles as cfs WHERE cfg.id in (
+     SELECT object_id from user_objects WHERE auth0_id = auth0id AND object_type = 'cdf_forecasts')
+AND cfs.cdf_forecast_group_id = cfg.id;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_cdf_forecasts_singles TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_cdf_forecasts_singles TO 'apiuser'@'%';
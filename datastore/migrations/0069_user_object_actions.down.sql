@@ -0,0 +1,76 @@
+CREATE OR REPLACE VIEW user_objects AS
+SELECT users.auth0_id as auth0_id, pom.object_id as object_id, permissions.object_type as object_type FROM permission_object_mapping as pom, users, permissions WHERE pom.permission_id IN (
+    SELECT permission_id FROM role_permission_mapping WHERE role_id IN (
+        SELECT role_id FROM user_role_mapping WHERE user_id = users.id
+    )
+) AND pom.permission_id = permissions.id AND permissions.action = 'read';
+
+
+DROP FUNCTION can_user_perform_action;
+CREATE DEFINER = 'select_rbac'@'localhost' FUNCTION can_user_perform_action (auth0id VARCHAR(32), objectid BINARY(16), theaction VARCHAR(32))
+RETURNS BOOLEAN
+COMMENT 'Can the user perform the action on the object?'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE isin BOOL DEFAULT 0;
+    DECLARE uid BINARY(16);
+    SELECT id INTO uid FROM users WHERE auth0_id = auth0id;
+    SET isin = (
+        SELECT 1 FROM permission_object_mapping WHERE permission_id IN (
+            SELECT permission_id FROM role_permission_mapping WHERE role_id IN (
+                SELECT role_id FROM user_role_mapping WHERE user_id = uid
+            )
+        ) AND permission_id IN (
+            SELECT id FROM permissions WHERE action = theaction
+        ) AND object_id = objectid LIMIT 1
+    );
+    IF isin IS NOT NULL AND isin THEN
+       RETURN TRUE;
+    ELSE
+        RETURN FALSE;
+    END IF;
+END;
+
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'select_rbac'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'select_objects'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'delete_objects'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'insert_rbac'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'delete_rbac'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'update_objects'@'localhost';
+
+
+DROP PROCEDURE list_objects_user_can_read;
+CREATE DEFINER = 'select_rbac'@'localhost' PROCEDURE list_objects_user_can_read (IN auth0id VARCHAR(32), IN objtype VARCHAR(32))
+COMMENT 'List the objects a user can read'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE uid BINARY(16);
+    SELECT id INTO uid FROM users WHERE auth0_id = auth0id;
+    SELECT object_id FROM permission_object_mapping WHERE permission_id IN (
+        SELECT permission_id FROM role_permission_mapping WHERE role_id IN (
+           SELECT role_id FROM user_role_mapping WHERE user_id = uid
+         )
+    ) AND permission_id IN (
+        SELECT id FROM permissions WHERE action = 'read' AND object_type = objtype
+    );
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_objects_user_can_read TO 'select_rbac'@'localhost';
+
+
+DROP TRIGGER remove_user_object_actions_on_organizations_delete;
+DROP TRIGGER remove_user_object_actions_on_permissions_delete;
+DROP TRIGGER remove_user_object_actions_on_roles_delete;
+DROP TRIGGER remove_user_object_actions_on_users_delete;
+DROP TRIGGER remove_user_object_actions_on_permission_object_delete;
+DROP TRIGGER add_user_object_actions_on_permission_object_insert;
+DROP TRIGGER remove_user_object_actions_on_role_permission_delete;
+DROP TRIGGER add_user_object_actions_on_role_permission_insert;
+DROP TRIGGER remove_user_object_actions_on_user_role_delete;
+DROP TRIGGER add_user_object_actions_on_user_role_insert;
+REVOKE SELECT, TRIGGER ON arbiter_data.organizations FROM 'permission_trig'@'localhost';
+REVOKE TRIGGER ON arbiter_data.permission_object_mapping FROM 'permission_trig'@'localhost';
+REVOKE SELECT, TRIGGER ON arbiter_data.role_permission_mapping FROM 'permission_trig'@'localhost';
+REVOKE SELECT, TRIGGER ON arbiter_data.user_role_mapping FROM 'permission_trig'@'localhost';
+DROP TABLE arbiter_data.user_object_actions;
@@ -0,0 +1,139 @@
+-- materialize the user -> role -> permission -> object paths so the rbac
+-- functions check a single index instead of resolving the mappings on
+-- every call. Each row is one path, so removing a mapping only removes
+-- the paths through it and any other path granting the same action on
+-- the object remains.
+CREATE TABLE arbiter_data.user_object_actions (
+  user_id BINARY(16) NOT NULL,
+  object_id BINARY(16) NOT NULL,
+  action VARCHAR(32) NOT NULL,
+  object_type VARCHAR(32) NOT NULL,
+  role_id BINARY(16) NOT NULL,
+  permission_id BINARY(16) NOT NULL,
+
+  PRIMARY KEY (user_id, object_id, action, role_id, permission_id),
+  KEY (user_id, action, object_type),
+  KEY (role_id, permission_id),
+  KEY (permission_id, object_id)
+) ENGINE=INNODB ENCRYPTION='Y' ROW_FORMAT=COMPRESSED;
+
+
+INSERT INTO arbiter_data.user_object_actions (
+    user_id, object_id, action, object_type, role_id, permission_id)
+SELECT urm.user_id, pom.object_id, perm.action, perm.object_type, urm.role_id, perm.id
+FROM arbiter_data.user_role_mapping as urm
+JOIN arbiter_data.role_permission_mapping as rpm ON rpm.role_id = urm.role_id
+JOIN arbiter_data.permissions as perm ON perm.id = rpm.permission_id
+JOIN arbiter_data.permission_object_mapping as pom ON pom.permission_id = perm.id;
+
+
+GRANT SELECT, INSERT, DELETE ON arbiter_data.user_object_actions TO 'permission_trig'@'localhost';
+GRANT SELECT, TRIGGER ON arbiter_data.user_role_mapping TO 'permission_trig'@'localhost';
+GRANT SELECT, TRIGGER ON arbiter_data.role_permission_mapping TO 'permission_trig'@'localhost';
+GRANT TRIGGER ON arbiter_data.permission_object_mapping TO 'permission_trig'@'localhost';
+GRANT SELECT, TRIGGER ON arbiter_data.organizations TO 'permission_trig'@'localhost';
+
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER add_user_object_actions_on_user_role_insert AFTER INSERT ON arbiter_data.user_role_mapping
+FOR EACH ROW
+INSERT INTO arbiter_data.user_object_actions (
+    user_id, object_id, action, object_type, role_id, permission_id)
+SELECT NEW.user_id, pom.object_id, perm.action, perm.object_type, NEW.role_id, perm.id
+FROM arbiter_data.role_permission_mapping as rpm
+JOIN arbiter_data.permissions as perm ON perm.id = rpm.permission_id
+JOIN arbiter_data.permission_object_mapping as pom ON pom.permission_id = perm.id
+WHERE rpm.role_id = NEW.role_id;
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER remove_user_object_actions_on_user_role_delete AFTER DELETE ON arbiter_data.user_role_mapping
+FOR EACH ROW
+DELETE FROM arbiter_data.user_object_actions WHERE user_id = OLD.user_id AND role_id = OLD.role_id;
+
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER add_user_object_actions_on_role_permission_insert AFTER INSERT ON arbiter_data.role_permission_mapping
+FOR EACH ROW
+INSERT INTO arbiter_data.user_object_actions (
+    user_id, object_id, action, object_type, role_id, permission_id)
+SELECT urm.user_id, pom.object_id, perm.action, perm.object_type, NEW.role_id, NEW.permission_id
+FROM arbiter_data.user_role_mapping as urm
+JOIN arbiter_data.permissions as perm ON perm.id = NEW.permission_id
+JOIN arbiter_data.permission_object_mapping as pom ON pom.permission_id = NEW.permission_id
+WHERE urm.role_id = NEW.role_id;
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER remove_user_object_actions_on_role_permission_delete AFTER DELETE ON arbiter_data.role_permission_mapping
+FOR EACH ROW
+DELETE FROM arbiter_data.user_object_actions WHERE role_id = OLD.role_id AND permission_id = OLD.permission_id;
+
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER add_user_object_actions_on_permission_object_insert AFTER INSERT ON arbiter_data.permission_object_mapping
+FOR EACH ROW
+INSERT INTO arbiter_data.user_object_actions (
+    user_id, object_id, action, object_type, role_id, permission_id)
+SELECT urm.user_id, NEW.object_id, perm.action, perm.object_type, rpm.role_id, NEW.permission_id
+FROM arbiter_data.role_permission_mapping as rpm
+JOIN arbiter_data.user_role_mapping as urm ON urm.role_id = rpm.role_id
+JOIN arbiter_data.permissions as perm ON perm.id = NEW.permission_id
+WHERE rpm.permission_id = NEW.permission_id;
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER remove_user_object_actions_on_permission_object_delete AFTER DELETE ON arbiter_data.permission_object_mapping
+FOR EACH ROW
+DELETE FROM arbiter_data.user_object_actions WHERE permission_id = OLD.permission_id AND object_id = OLD.object_id;
+
+
+-- the mappings of deleted users, roles and permissions are removed by
+-- foreign key cascades, which do not activate the triggers above
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER remove_user_object_actions_on_users_delete AFTER DELETE ON arbiter_data.users
+FOR EACH ROW DELETE FROM arbiter_data.user_object_actions WHERE user_id = OLD.id;
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER remove_user_object_actions_on_roles_delete AFTER DELETE ON arbiter_data.roles
+FOR EACH ROW DELETE FROM arbiter_data.user_object_actions WHERE role_id = OLD.id;
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER remove_user_object_actions_on_permissions_delete AFTER DELETE ON arbiter_data.permissions
+FOR EACH ROW DELETE FROM arbiter_data.user_object_actions WHERE permission_id = OLD.id;
+
+CREATE DEFINER = 'permission_trig'@'localhost' TRIGGER remove_user_object_actions_on_organizations_delete BEFORE DELETE ON arbiter_data.organizations
+FOR EACH ROW
+BEGIN
+    DELETE FROM arbiter_data.user_object_actions WHERE user_id IN (
+        SELECT id FROM arbiter_data.users WHERE organization_id = OLD.id);
+    DELETE FROM arbiter_data.user_object_actions WHERE role_id IN (
+        SELECT id FROM arbiter_data.roles WHERE organization_id = OLD.id);
+    DELETE FROM arbiter_data.user_object_actions WHERE permission_id IN (
+        SELECT id FROM arbiter_data.permissions WHERE organization_id = OLD.id);
+END;
+
+
+DROP PROCEDURE list_objects_user_can_read;
+CREATE DEFINER = 'select_rbac'@'localhost' PROCEDURE list_objects_user_can_read (IN auth0id VARCHAR(32), IN objtype VARCHAR(32))
+COMMENT 'List the objects a user can read'
+READS SQL DATA SQL SECURITY DEFINER
+SELECT DISTINCT object_id FROM arbiter_data.user_object_actions
+WHERE user_id = (SELECT id FROM arbiter_data.users WHERE auth0_id = auth0id)
+    AND action = 'read' AND object_type = objtype;
+
+
+DROP FUNCTION can_user_perform_action;
+CREATE DEFINER = 'select_rbac'@'localhost' FUNCTION can_user_perform_action (auth0id VARCHAR(32), objectid BINARY(16), theaction VARCHAR(32))
+RETURNS BOOLEAN
+COMMENT 'Can the user perform the action on the object?'
+READS SQL DATA SQL SECURITY DEFINER
+RETURN EXISTS(
+    SELECT 1 FROM arbiter_data.user_object_actions
+    WHERE user_id = (SELECT id FROM arbiter_data.users WHERE auth0_id = auth0id)
+        AND object_id = objectid AND action = theaction);
+
+
+CREATE OR REPLACE VIEW user_objects AS
+SELECT users.auth0_id as auth0_id, uoa.object_id as object_id, uoa.object_type as object_type
+FROM arbiter_data.user_object_actions as uoa, arbiter_data.users as users
+WHERE uoa.user_id = users.id AND uoa.action = 'read';
+
+
+GRANT SELECT ON arbiter_data.user_object_actions TO 'select_rbac'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_objects_user_can_read TO 'select_rbac'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'select_rbac'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'select_objects'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'delete_objects'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'insert_rbac'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'delete_rbac'@'localhost';
+GRANT EXECUTE ON FUNCTION arbiter_data.can_user_perform_action TO 'update_objects'@'localhost';
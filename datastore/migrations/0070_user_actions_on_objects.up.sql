@@ -0,0 +1,59 @@
+-- resolve the actions a user can take on many objects with one lookup
+-- of the user_object_actions index instead of one call per object
+CREATE DEFINER = 'select_rbac'@'localhost' PROCEDURE get_user_actions_on_objects(
+    IN auth0id VARCHAR(32), IN strobjectids JSON)
+COMMENT 'Get the actions the user can take on each object in a JSON array of uuids'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE userid BINARY(16);
+    SET userid = (SELECT id FROM users WHERE auth0_id = auth0id);
+
+    SELECT BIN_TO_UUID(uoa.object_id, 1) as object_id,
+        JSON_KEYS(JSON_OBJECTAGG(uoa.action, '')) as actions
+    FROM JSON_TABLE(strobjectids, '$[*]' COLUMNS (strid CHAR(36) PATH '$')) as ids
+    JOIN arbiter_data.user_object_actions as uoa
+        ON uoa.user_id = userid AND uoa.object_id = UUID_TO_BIN(ids.strid, 1)
+    GROUP BY uoa.object_id;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.get_user_actions_on_objects TO 'select_rbac'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.get_user_actions_on_objects TO 'apiuser'@'%';
+
+
+DROP PROCEDURE get_user_actions_on_object;
+CREATE DEFINER = 'select_rbac'@'localhost' PROCEDURE get_user_actions_on_object(
+    IN auth0id VARCHAR(32), IN strobjectid CHAR(36))
+COMMENT 'Get a list of all of the actions the user can take on an object.'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE userid BINARY(16);
+    DECLARE objectid BINARY(16);
+    SET userid = (SELECT id FROM users WHERE auth0_id = auth0id);
+    SET objectid = UUID_TO_BIN(strobjectid, 1);
+
+    SELECT perm.action from permissions as perm WHERE perm.id IN (
+        SELECT permission_id FROM arbiter_data.user_object_actions
+        WHERE user_id = userid AND object_id = objectid);
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.get_user_actions_on_object TO 'select_rbac'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.get_user_actions_on_object TO 'apiuser'@'%';
+
+
+DROP PROCEDURE list_actions_on_all_objects_of_type;
+CREATE DEFINER = 'select_rbac'@'localhost' PROCEDURE list_actions_on_all_objects_of_type(
+    IN auth0id VARCHAR(32), IN objecttype VARCHAR(32))
+COMMENT 'List the uuids and actions users can take on all objects of a given type'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE userid BINARY(16);
+    SET userid = (SELECT id FROM users WHERE auth0_id = auth0id);
+
+    SELECT BIN_TO_UUID(object_id, 1) as object_id, JSON_KEYS(JSON_OBJECTAGG(action, '')) as actions
+    FROM arbiter_data.user_object_actions
+    WHERE user_id = userid AND object_type = objecttype
+    GROUP BY object_id;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_actions_on_all_objects_of_type TO 'select_rbac'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_actions_on_all_objects_of_type TO 'apiuser'@'%';
@@ -0,0 +1,55 @@
+DROP PROCEDURE read_values_fingerprint;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_values_fingerprint (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN object_type VARCHAR(32), IN start TIMESTAMP, IN end TIMESTAMP)
+COMMENT 'Read the number, latest timestamp, and a checksum of the values of an object between start and end'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    IF object_type = 'observations' THEN
+        SET allowed = is_read_observation_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'forecasts' THEN
+        SET allowed = is_read_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts' THEN
+        SET allowed = is_read_cdf_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts_groups' THEN
+        SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'read_values'));
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Invalid object_type for "read values fingerprint"',
+        MYSQL_ERRNO = 1146;
+    END IF;
+
+    IF allowed THEN
+        -- the checksum changes when any value or quality flag is
+        -- rewritten, which the count and latest timestamp miss
+        IF object_type = 'observations' THEN
+            SELECT COUNT(*) as count, MAX(timestamp) as latest,
+                BIT_XOR(CRC32(CONCAT_WS(',', timestamp, value, quality_flag))) as checksum
+            FROM arbiter_data.observations_values WHERE id = binid AND timestamp BETWEEN start AND end;
+        ELSEIF object_type = 'forecasts' THEN
+            SELECT COUNT(*) as count, MAX(timestamp) as latest,
+                BIT_XOR(CRC32(CONCAT_WS(',', timestamp, value))) as checksum
+            FROM arbiter_data.forecasts_values WHERE id = binid AND timestamp BETWEEN start AND end;
+        ELSEIF object_type = 'cdf_forecasts' THEN
+            SELECT COUNT(*) as count, MAX(timestamp) as latest,
+                BIT_XOR(CRC32(CONCAT_WS(',', timestamp, value))) as checksum
+            FROM arbiter_data.cdf_forecasts_values WHERE id = binid AND timestamp BETWEEN start AND end;
+        ELSE
+            -- constant values without values are included in the checksum
+            -- as they are columns of the response
+            SELECT COUNT(vals.timestamp) as count, MAX(vals.timestamp) as latest,
+                BIT_XOR(CRC32(CONCAT_WS(',', singles.constant_value, vals.timestamp, vals.value))) as checksum
+            FROM arbiter_data.cdf_forecasts_singles AS singles
+            LEFT JOIN arbiter_data.cdf_forecasts_values AS vals
+                ON vals.id = singles.id AND vals.timestamp BETWEEN start AND end
+            WHERE singles.cdf_forecast_group_id = binid;
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read values fingerprint"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_values_fingerprint TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_values_fingerprint TO 'apiuser'@'%';
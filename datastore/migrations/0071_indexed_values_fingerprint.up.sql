@@ -0,0 +1,65 @@
+-- summarize the values with aggregates read from indexes instead of
+-- a checksum of every value, which scanned the whole requested range
+-- before each response
+DROP PROCEDURE read_values_fingerprint;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_values_fingerprint (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN object_type VARCHAR(32), IN start TIMESTAMP, IN end TIMESTAMP)
+COMMENT 'Read the number, first and latest timestamps of the values of an object between start and end, and when any value of the object was last modified'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    IF object_type = 'observations' THEN
+        SET allowed = is_read_observation_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'forecasts' THEN
+        SET allowed = is_read_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts' THEN
+        SET allowed = is_read_cdf_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts_groups' THEN
+        SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'read_values'));
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Invalid object_type for "read values fingerprint"',
+        MYSQL_ERRNO = 1146;
+    END IF;
+
+    IF allowed THEN
+        -- count, first and latest are read from the primary key range
+        -- and modified from the end of modified_at_idx, instead of
+        -- reading every value. Changes to values anywhere in the object
+        -- change modified, which is enough to validate a response
+        IF object_type = 'observations' THEN
+            SELECT COUNT(*) as count, MIN(timestamp) as first, MAX(timestamp) as latest,
+                (SELECT MAX(modified_at) FROM arbiter_data.observations_values WHERE id = binid) as modified
+            FROM arbiter_data.observations_values WHERE id = binid AND timestamp BETWEEN start AND end;
+        ELSEIF object_type = 'forecasts' THEN
+            SELECT COUNT(*) as count, MIN(timestamp) as first, MAX(timestamp) as latest,
+                (SELECT MAX(modified_at) FROM arbiter_data.forecasts_values WHERE id = binid) as modified
+            FROM arbiter_data.forecasts_values WHERE id = binid AND timestamp BETWEEN start AND end;
+        ELSEIF object_type = 'cdf_forecasts' THEN
+            SELECT COUNT(*) as count, MIN(timestamp) as first, MAX(timestamp) as latest,
+                (SELECT MAX(modified_at) FROM arbiter_data.cdf_forecasts_values WHERE id = binid) as modified
+            FROM arbiter_data.cdf_forecasts_values WHERE id = binid AND timestamp BETWEEN start AND end;
+        ELSE
+            -- the constant values of a group do not change after it is
+            -- created, so only the values of each single are summarized
+            SELECT CAST(SUM(vals.count) AS UNSIGNED) as count, MIN(vals.first) as first, MAX(vals.latest) as latest,
+                MAX(vals.modified) as modified
+            FROM (
+                SELECT COUNT(v.timestamp) as count, MIN(v.timestamp) as first, MAX(v.timestamp) as latest,
+                    (SELECT MAX(modified_at) FROM arbiter_data.cdf_forecasts_values WHERE id = singles.id) as modified
+                FROM arbiter_data.cdf_forecasts_singles AS singles
+                LEFT JOIN arbiter_data.cdf_forecasts_values AS v
+                    ON v.id = singles.id AND v.timestamp BETWEEN start AND end
+                WHERE singles.cdf_forecast_group_id = binid
+                GROUP BY singles.id
+            ) AS vals;
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read values fingerprint"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_values_fingerprint TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_values_fingerprint TO 'apiuser'@'%';
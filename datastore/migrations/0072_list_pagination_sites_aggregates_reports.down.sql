@@ -0,0 +1,48 @@
+DROP PROCEDURE list_sites;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_sites (IN auth0id VARCHAR(32))
+COMMENT 'List all sites and associated metadata that the user can read'
+READS SQL DATA SQL SECURITY DEFINER
+SELECT BIN_TO_UUID(id, 1) as site_id, get_organization_name(organization_id) as provider,
+    name, latitude, longitude, elevation, timezone, extra_parameters, ac_capacity, dc_capacity,
+    temperature_coefficient, tracking_type, surface_tilt, surface_azimuth, axis_tilt,
+    axis_azimuth, ground_coverage_ratio, backtrack, max_rotation_angle,
+    dc_loss_factor, ac_loss_factor, created_at, modified_at,
+    IFNULL(
+        (SELECT JSON_ARRAYAGG(zone) FROM arbiter_data.site_zone_mapping WHERE site_id = id),
+        JSON_ARRAY()
+    ) AS climate_zones
+FROM arbiter_data.sites WHERE id in (
+    SELECT object_id from user_objects WHERE auth0_id = auth0id AND object_type = 'sites');
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_sites TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_sites TO 'apiuser'@'%';
+
+
+DROP PROCEDURE list_aggregates;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_aggregates (IN auth0id VARCHAR(32))
+COMMENT 'List all aggregate metadata the user can read'
+READS SQL DATA SQL SECURITY DEFINER
+SELECT BIN_TO_UUID(id, 1) as aggregate_id,
+    get_organization_name(organization_id) as provider,
+    name, description, variable,  timezone, interval_label,
+    interval_length, 'interval_mean' as interval_value_type, aggregate_type,
+    extra_parameters, created_at, modified_at,
+    get_aggregate_observations(id) as observations
+    FROM arbiter_data.aggregates WHERE id IN (
+        SELECT object_id from user_objects WHERE auth0_id = auth0id
+        AND object_type = 'aggregates');
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_aggregates TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_aggregates TO 'apiuser'@'%';
+
+
+DROP PROCEDURE list_reports;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_reports (IN auth0id VARCHAR(32))
+READS SQL DATA SQL SECURITY DEFINER
+    SELECT BIN_TO_UUID(id, 1) as report_id, get_organization_name(organization_id) as provider,
+        name, report_parameters, status, created_at, modified_at
+    FROM arbiter_data.reports WHERE id in (
+        SELECT object_id from user_objects where auth0_id = auth0id AND object_type = 'reports');
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_reports TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_reports TO 'apiuser'@'%';
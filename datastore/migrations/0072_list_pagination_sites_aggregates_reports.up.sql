@@ -0,0 +1,90 @@
+-- page the site, aggregate and report lists like the observation and
+-- forecast lists in 0068. Objects are ordered by id so the last id of
+-- a page is the cursor for the next one. A NULL filter matches all
+-- objects and a NULL lim returns all remaining objects.
+DROP PROCEDURE list_sites;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_sites (
+    IN auth0id VARCHAR(32), IN after_strid CHAR(36), IN lim INT UNSIGNED)
+COMMENT 'List up to lim sites and associated metadata that the user can read after after_strid'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE after_binid BINARY(16) DEFAULT NULL;
+    IF after_strid IS NOT NULL THEN
+        SET after_binid = UUID_TO_BIN(after_strid, 1);
+    END IF;
+    IF lim IS NULL THEN
+        SET lim = 4294967295;
+    END IF;
+    SELECT BIN_TO_UUID(id, 1) as site_id, get_organization_name(organization_id) as provider,
+        name, latitude, longitude, elevation, timezone, extra_parameters, ac_capacity, dc_capacity,
+        temperature_coefficient, tracking_type, surface_tilt, surface_azimuth, axis_tilt,
+        axis_azimuth, ground_coverage_ratio, backtrack, max_rotation_angle,
+        dc_loss_factor, ac_loss_factor, created_at, modified_at,
+        IFNULL(
+            (SELECT JSON_ARRAYAGG(zone) FROM arbiter_data.site_zone_mapping WHERE site_id = id),
+            JSON_ARRAY()
+        ) AS climate_zones
+    FROM arbiter_data.sites WHERE id in (
+        SELECT object_id from user_objects WHERE auth0_id = auth0id AND object_type = 'sites')
+        AND (after_binid IS NULL OR id > after_binid)
+    ORDER BY id LIMIT lim;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_sites TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_sites TO 'apiuser'@'%';
+
+
+DROP PROCEDURE list_aggregates;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_aggregates (
+    IN auth0id VARCHAR(32), IN var VARCHAR(32), IN after_strid CHAR(36),
+    IN lim INT UNSIGNED)
+COMMENT 'List up to lim aggregates and associated metadata that the user can read after after_strid'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE after_binid BINARY(16) DEFAULT NULL;
+    IF after_strid IS NOT NULL THEN
+        SET after_binid = UUID_TO_BIN(after_strid, 1);
+    END IF;
+    IF lim IS NULL THEN
+        SET lim = 4294967295;
+    END IF;
+    SELECT BIN_TO_UUID(id, 1) as aggregate_id,
+        get_organization_name(organization_id) as provider,
+        name, description, variable,  timezone, interval_label,
+        interval_length, 'interval_mean' as interval_value_type, aggregate_type,
+        extra_parameters, created_at, modified_at,
+        get_aggregate_observations(id) as observations
+    FROM arbiter_data.aggregates WHERE id IN (
+        SELECT object_id from user_objects WHERE auth0_id = auth0id AND object_type = 'aggregates')
+        AND (var IS NULL OR variable = var)
+        AND (after_binid IS NULL OR id > after_binid)
+    ORDER BY id LIMIT lim;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_aggregates TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_aggregates TO 'apiuser'@'%';
+
+
+DROP PROCEDURE list_reports;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE list_reports (
+    IN auth0id VARCHAR(32), IN after_strid CHAR(36), IN lim INT UNSIGNED)
+COMMENT 'List up to lim reports that the user can read after after_strid'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE after_binid BINARY(16) DEFAULT NULL;
+    IF after_strid IS NOT NULL THEN
+        SET after_binid = UUID_TO_BIN(after_strid, 1);
+    END IF;
+    IF lim IS NULL THEN
+        SET lim = 4294967295;
+    END IF;
+    SELECT BIN_TO_UUID(id, 1) as report_id, get_organization_name(organization_id) as provider,
+        name, report_parameters, status, created_at, modified_at
+    FROM arbiter_data.reports WHERE id in (
+        SELECT object_id from user_objects where auth0_id = auth0id AND object_type = 'reports')
+        AND (after_binid IS NULL OR id > after_binid)
+    ORDER BY id LIMIT lim;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_reports TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.list_reports TO 'apiuser'@'%';
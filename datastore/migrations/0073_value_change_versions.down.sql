@@ -0,0 +1,209 @@
+DROP PROCEDURE read_value_changes;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_value_changes (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN object_type VARCHAR(32),
+    IN since_modified BIGINT UNSIGNED, IN since_timestamp TIMESTAMP, IN lim INT,
+    IN delay INT)
+COMMENT 'Read up to lim values of an object modified after since_modified, in microseconds since the epoch, and since_timestamp, and at least delay seconds ago'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    DECLARE since DATETIME(6);
+    DECLARE upto TIMESTAMP(6);
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    IF object_type = 'observations' THEN
+        SET allowed = is_read_observation_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'forecasts' THEN
+        SET allowed = is_read_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts' THEN
+        SET allowed = is_read_cdf_forecast_values_allowed(auth0id, binid);
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Invalid object_type for "read value changes"',
+        MYSQL_ERRNO = 1146;
+    END IF;
+
+    IF allowed THEN
+        SET since = FROM_UNIXTIME(since_modified DIV 1000000) + INTERVAL (since_modified MOD 1000000) MICROSECOND;
+        -- modified_at is set when a store statement begins, so values
+        -- from statements that may not be committed yet are left for a
+        -- later read rather than being skipped by the next cursor
+        SET upto = CURRENT_TIMESTAMP(6) - INTERVAL delay SECOND;
+        IF object_type = 'observations' THEN
+            SELECT timestamp, value, quality_flag,
+                CAST(UNIX_TIMESTAMP(modified_at) * 1000000 AS UNSIGNED) as modified
+            FROM arbiter_data.observations_values
+            WHERE id = binid AND (modified_at, timestamp) > (since, since_timestamp)
+                AND modified_at <= upto
+            ORDER BY modified_at, timestamp LIMIT lim;
+        ELSEIF object_type = 'forecasts' THEN
+            SELECT timestamp, value,
+                CAST(UNIX_TIMESTAMP(modified_at) * 1000000 AS UNSIGNED) as modified
+            FROM arbiter_data.forecasts_values
+            WHERE id = binid AND (modified_at, timestamp) > (since, since_timestamp)
+                AND modified_at <= upto
+            ORDER BY modified_at, timestamp LIMIT lim;
+        ELSE
+            SELECT timestamp, value,
+                CAST(UNIX_TIMESTAMP(modified_at) * 1000000 AS UNSIGNED) as modified
+            FROM arbiter_data.cdf_forecasts_values
+            WHERE id = binid AND (modified_at, timestamp) > (since, since_timestamp)
+                AND modified_at <= upto
+            ORDER BY modified_at, timestamp LIMIT lim;
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read value changes"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_value_changes TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_value_changes TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_cdf_forecast_group_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_cdf_forecast_group_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with cv (constant value), ts, and v keys into cdf_forecasts_values for the constant values of a cdf forecast group'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = UUID_TO_BIN(strid, 1);
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        IF EXISTS (
+            SELECT 1 FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                cv FLOAT PATH '$.cv' ERROR ON EMPTY ERROR ON ERROR)
+            ) AS jsoncvs
+            LEFT JOIN arbiter_data.cdf_forecasts_singles AS singles
+                ON singles.cdf_forecast_group_id = binid AND singles.constant_value = jsoncvs.cv
+            WHERE singles.id IS NULL
+        ) THEN
+            SIGNAL SQLSTATE '22032' SET MESSAGE_TEXT = 'Data contains a constant value that is not in the cdf forecast group',
+            MYSQL_ERRNO = 3140;
+        END IF;
+        INSERT INTO arbiter_data.cdf_forecasts_values (id, timestamp, value)
+            SELECT singles.id, jsonvals.timestamp, jsonvals.value
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                cv FLOAT PATH '$.cv' ERROR ON EMPTY ERROR ON ERROR,
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR)
+            ) AS jsonvals
+            JOIN arbiter_data.cdf_forecasts_singles AS singles
+                ON singles.cdf_forecast_group_id = binid AND singles.constant_value = jsonvals.cv
+        ON DUPLICATE KEY UPDATE value=jsonvals.value;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write cdf forecast group values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT SELECT (constant_value) ON arbiter_data.cdf_forecasts_singles TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_group_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_group_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_cdf_forecast_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_cdf_forecast_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with timestamp and value keys into cdf_forecast_values'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE groupid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = UUID_TO_BIN(strid, 1);
+    SET groupid = (SELECT cdf_forecast_group_id FROM cdf_forecasts_singles WHERE id = binid);
+    SET allowed = (SELECT can_user_perform_action(auth0id, groupid, 'write_values'));
+    IF allowed THEN
+        INSERT INTO arbiter_data.cdf_forecasts_values (id, timestamp, value)
+            SELECT binid, timestamp, value
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE value=jsonvals.value;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write cdf forecast values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_forecast_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_forecast_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with timestamp and value keys into forecast_values'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        INSERT INTO arbiter_data.forecasts_values (id, timestamp, value)
+            SELECT binid, timestamp, value
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+               timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+               value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE value=jsonvals.value;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write forecast values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_forecast_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_forecast_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_observation_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_observation_values (
+    IN auth0id VARCHAR(32), strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with time, value, quality_flag keys into observation_values'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    DECLARE mints TIMESTAMP;
+    DECLARE maxts TIMESTAMP;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        INSERT INTO arbiter_data.observations_values (id, timestamp, value, quality_flag)
+            SELECT binid, timestamp, value, quality_flag
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR,
+                quality_flag SMALLINT UNSIGNED PATH '$.qf' ERROR ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE value=jsonvals.value,
+            quality_flag=jsonvals.quality_flag;
+        IF EXISTS (SELECT 1 FROM arbiter_data.aggregate_observation_mapping WHERE observation_id = binid) THEN
+            SELECT MIN(timestamp), MAX(timestamp) INTO mints, maxts
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (timestamp TIMESTAMP PATH '$.ts')) as jsonvals;
+            CALL arbiter_data.invalidate_aggregate_values_for_observation(binid, mints, maxts);
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write observation values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+    select allowed;
+END;
+
+GRANT EXECUTE ON PROCEDURE store_observation_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE store_observation_values TO 'apiuser'@'%';
+
+
+REVOKE SELECT (value, change_version) ON arbiter_data.cdf_forecasts_values FROM 'insert_objects'@'localhost';
+REVOKE SELECT (value, change_version) ON arbiter_data.forecasts_values FROM 'insert_objects'@'localhost';
+REVOKE SELECT (value, quality_flag, change_version) ON arbiter_data.observations_values FROM 'insert_objects'@'localhost';
+ALTER TABLE arbiter_data.cdf_forecasts_values DROP KEY change_version_idx, DROP COLUMN change_version;
+ALTER TABLE arbiter_data.forecasts_values DROP KEY change_version_idx, DROP COLUMN change_version;
+ALTER TABLE arbiter_data.observations_values DROP KEY change_version_idx, DROP COLUMN change_version;
+REVOKE SELECT, INSERT, UPDATE ON arbiter_data.value_versions FROM 'insert_objects'@'localhost';
+DROP TABLE arbiter_data.value_versions;
@@ -0,0 +1,257 @@
+-- Changes were ordered by modified_at, the time a store statement began,
+-- so the values of a store that committed after a later store were older
+-- than a cursor that had already passed them. Each store now takes the
+-- next version of the object first and holds the lock on that row until
+-- it commits, so the stores of an object commit in version order and a
+-- cursor at a version has seen every change of the earlier versions.
+-- Objects are not referenced by a foreign key as the versions of
+-- observations, forecasts and cdf forecast constant values share the table.
+CREATE TABLE arbiter_data.value_versions (
+    id BINARY(16) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (id)
+) ENGINE=INNODB ENCRYPTION='Y' ROW_FORMAT=COMPRESSED;
+
+-- the version of the store that last changed the value or quality flag.
+-- The secondary index also holds the primary key, so changes are read
+-- in (change_version, timestamp) order from the index
+ALTER TABLE arbiter_data.observations_values
+    ADD COLUMN change_version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    ADD KEY change_version_idx (id, change_version);
+ALTER TABLE arbiter_data.forecasts_values
+    ADD COLUMN change_version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    ADD KEY change_version_idx (id, change_version);
+ALTER TABLE arbiter_data.cdf_forecasts_values
+    ADD COLUMN change_version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    ADD KEY change_version_idx (id, change_version);
+
+GRANT SELECT, INSERT, UPDATE ON arbiter_data.value_versions TO 'insert_objects'@'localhost';
+-- the stores compare the stored values to only version changed values
+GRANT SELECT (value, quality_flag, change_version) ON arbiter_data.observations_values TO 'insert_objects'@'localhost';
+GRANT SELECT (value, change_version) ON arbiter_data.forecasts_values TO 'insert_objects'@'localhost';
+GRANT SELECT (value, change_version) ON arbiter_data.cdf_forecasts_values TO 'insert_objects'@'localhost';
+
+
+DROP PROCEDURE store_observation_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_observation_values (
+    IN auth0id VARCHAR(32), strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with time, value, quality_flag keys into observation_values'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    DECLARE mints TIMESTAMP;
+    DECLARE maxts TIMESTAMP;
+    DECLARE vers BIGINT UNSIGNED;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        INSERT INTO arbiter_data.value_versions (id, version) VALUES (binid, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+        SET vers = (SELECT version FROM arbiter_data.value_versions WHERE id = binid);
+        -- change_version is compared before value and quality_flag are updated
+        INSERT INTO arbiter_data.observations_values (id, timestamp, value, quality_flag, change_version)
+            SELECT binid, timestamp, value, quality_flag, vers
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR,
+                quality_flag SMALLINT UNSIGNED PATH '$.qf' ERROR ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE
+            change_version=IF(observations_values.value <=> jsonvals.value
+                              AND observations_values.quality_flag = jsonvals.quality_flag,
+                              observations_values.change_version, vers),
+            value=jsonvals.value,
+            quality_flag=jsonvals.quality_flag;
+        IF EXISTS (SELECT 1 FROM arbiter_data.aggregate_observation_mapping WHERE observation_id = binid) THEN
+            SELECT MIN(timestamp), MAX(timestamp) INTO mints, maxts
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (timestamp TIMESTAMP PATH '$.ts')) as jsonvals;
+            CALL arbiter_data.invalidate_aggregate_values_for_observation(binid, mints, maxts);
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write observation values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+    select allowed;
+END;
+GRANT EXECUTE ON PROCEDURE store_observation_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE store_observation_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_forecast_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_forecast_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with timestamp and value keys into forecast_values'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    DECLARE vers BIGINT UNSIGNED;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        INSERT INTO arbiter_data.value_versions (id, version) VALUES (binid, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+        SET vers = (SELECT version FROM arbiter_data.value_versions WHERE id = binid);
+        INSERT INTO arbiter_data.forecasts_values (id, timestamp, value, change_version)
+            SELECT binid, timestamp, value, vers
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+               timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+               value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE
+            change_version=IF(forecasts_values.value <=> jsonvals.value,
+                              forecasts_values.change_version, vers),
+            value=jsonvals.value;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write forecast values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_forecast_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_forecast_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_cdf_forecast_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_cdf_forecast_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with timestamp and value keys into cdf_forecast_values'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE groupid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    DECLARE vers BIGINT UNSIGNED;
+    SET binid = UUID_TO_BIN(strid, 1);
+    SET groupid = (SELECT cdf_forecast_group_id FROM cdf_forecasts_singles WHERE id = binid);
+    SET allowed = (SELECT can_user_perform_action(auth0id, groupid, 'write_values'));
+    IF allowed THEN
+        INSERT INTO arbiter_data.value_versions (id, version) VALUES (binid, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+        SET vers = (SELECT version FROM arbiter_data.value_versions WHERE id = binid);
+        INSERT INTO arbiter_data.cdf_forecasts_values (id, timestamp, value, change_version)
+            SELECT binid, timestamp, value, vers
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR)
+            ) as jsonvals
+        ON DUPLICATE KEY UPDATE
+            change_version=IF(cdf_forecasts_values.value <=> jsonvals.value,
+                              cdf_forecasts_values.change_version, vers),
+            value=jsonvals.value;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write cdf forecast values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE store_cdf_forecast_group_values;
+CREATE DEFINER = 'insert_objects'@'localhost' PROCEDURE store_cdf_forecast_group_values (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN data JSON)
+COMMENT 'Store a JSON object array with cv (constant value), ts, and v keys into cdf_forecasts_values for the constant values of a cdf forecast group'
+MODIFIES SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = UUID_TO_BIN(strid, 1);
+    SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'write_values'));
+    IF allowed THEN
+        IF EXISTS (
+            SELECT 1 FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                cv FLOAT PATH '$.cv' ERROR ON EMPTY ERROR ON ERROR)
+            ) AS jsoncvs
+            LEFT JOIN arbiter_data.cdf_forecasts_singles AS singles
+                ON singles.cdf_forecast_group_id = binid AND singles.constant_value = jsoncvs.cv
+            WHERE singles.id IS NULL
+        ) THEN
+            SIGNAL SQLSTATE '22032' SET MESSAGE_TEXT = 'Data contains a constant value that is not in the cdf forecast group',
+            MYSQL_ERRNO = 3140;
+        END IF;
+        -- every constant value of the group takes a new version, in
+        -- primary key order so concurrent stores lock them in the same order
+        INSERT INTO arbiter_data.value_versions (id, version)
+            SELECT id, 1 FROM arbiter_data.cdf_forecasts_singles
+            WHERE cdf_forecast_group_id = binid ORDER BY id
+        ON DUPLICATE KEY UPDATE version = version + 1;
+        INSERT INTO arbiter_data.cdf_forecasts_values (id, timestamp, value, change_version)
+            SELECT singles.id, jsonvals.timestamp, jsonvals.value, versions.version
+            FROM JSON_TABLE(data, '$[*]' COLUMNS (
+                cv FLOAT PATH '$.cv' ERROR ON EMPTY ERROR ON ERROR,
+                timestamp TIMESTAMP PATH '$.ts' ERROR ON EMPTY ERROR ON ERROR,
+                value FLOAT PATH '$.v' NULL ON EMPTY ERROR ON ERROR)
+            ) AS jsonvals
+            JOIN arbiter_data.cdf_forecasts_singles AS singles
+                ON singles.cdf_forecast_group_id = binid AND singles.constant_value = jsonvals.cv
+            JOIN arbiter_data.value_versions AS versions ON versions.id = singles.id
+        ON DUPLICATE KEY UPDATE
+            change_version=IF(cdf_forecasts_values.value <=> jsonvals.value,
+                              cdf_forecasts_values.change_version, versions.version),
+            value=jsonvals.value;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "write cdf forecast group values"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_group_values TO 'insert_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.store_cdf_forecast_group_values TO 'apiuser'@'%';
+
+
+DROP PROCEDURE read_value_changes;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_value_changes (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN object_type VARCHAR(32),
+    IN since_version BIGINT UNSIGNED, IN since_timestamp TIMESTAMP, IN lim INT)
+COMMENT 'Read up to lim values of an object changed by stores after the store with version since_version, or after since_timestamp by that store'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    IF object_type = 'observations' THEN
+        SET allowed = is_read_observation_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'forecasts' THEN
+        SET allowed = is_read_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts' THEN
+        SET allowed = is_read_cdf_forecast_values_allowed(auth0id, binid);
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Invalid object_type for "read value changes"',
+        MYSQL_ERRNO = 1146;
+    END IF;
+
+    IF allowed THEN
+        -- the row comparison (change_version, timestamp) > (...) is not
+        -- used to limit the range read from change_version_idx, so the
+        -- lower bound on change_version is given separately
+        IF object_type = 'observations' THEN
+            SELECT timestamp, value, quality_flag, change_version
+            FROM arbiter_data.observations_values
+            WHERE id = binid AND change_version >= since_version
+                AND (change_version > since_version OR timestamp > since_timestamp)
+            ORDER BY change_version, timestamp LIMIT lim;
+        ELSEIF object_type = 'forecasts' THEN
+            SELECT timestamp, value, change_version
+            FROM arbiter_data.forecasts_values
+            WHERE id = binid AND change_version >= since_version
+                AND (change_version > since_version OR timestamp > since_timestamp)
+            ORDER BY change_version, timestamp LIMIT lim;
+        ELSE
+            SELECT timestamp, value, change_version
+            FROM arbiter_data.cdf_forecasts_values
+            WHERE id = binid AND change_version >= since_version
+                AND (change_version > since_version OR timestamp > since_timestamp)
+            ORDER BY change_version, timestamp LIMIT lim;
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read value changes"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_value_changes TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_value_changes TO 'apiuser'@'%';
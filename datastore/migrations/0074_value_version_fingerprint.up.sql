@@ -0,0 +1,53 @@
+-- summarize the values with the versions of the stores instead of the
+-- latest modified_at. modified_at is set when a store statement begins,
+-- so a store that began before and committed after a read could leave
+-- modified_at unchanged and the response of that read valid. The
+-- version of an object is committed with its values
+DROP PROCEDURE read_values_fingerprint;
+CREATE DEFINER = 'select_objects'@'localhost' PROCEDURE read_values_fingerprint (
+    IN auth0id VARCHAR(32), IN strid CHAR(36), IN object_type VARCHAR(32))
+COMMENT 'Read the version of the last store of the values of an object, or the number of constant values and the sum of their versions for a cdf forecast group'
+READS SQL DATA SQL SECURITY DEFINER
+BEGIN
+    DECLARE binid BINARY(16);
+    DECLARE allowed BOOLEAN DEFAULT FALSE;
+    SET binid = (SELECT UUID_TO_BIN(strid, 1));
+    IF object_type = 'observations' THEN
+        SET allowed = is_read_observation_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'forecasts' THEN
+        SET allowed = is_read_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts' THEN
+        SET allowed = is_read_cdf_forecast_values_allowed(auth0id, binid);
+    ELSEIF object_type = 'cdf_forecasts_groups' THEN
+        SET allowed = (SELECT can_user_perform_action(auth0id, binid, 'read_values'));
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Invalid object_type for "read values fingerprint"',
+        MYSQL_ERRNO = 1146;
+    END IF;
+
+    IF allowed THEN
+        IF object_type = 'cdf_forecasts_groups' THEN
+            -- versions only increase, so the sum changes with every store
+            -- of any constant value
+            SELECT COUNT(*) as count, CAST(IFNULL(SUM(vers.version), 0) AS UNSIGNED) as version
+            FROM arbiter_data.cdf_forecasts_singles AS singles
+            LEFT JOIN arbiter_data.value_versions AS vers ON vers.id = singles.id
+            WHERE singles.cdf_forecast_group_id = binid;
+        ELSE
+            SELECT IFNULL((SELECT version FROM arbiter_data.value_versions
+                           WHERE id = binid), 0) as version;
+        END IF;
+    ELSE
+        SIGNAL SQLSTATE '42000' SET MESSAGE_TEXT = 'Access denied to user on "read values fingerprint"',
+        MYSQL_ERRNO = 1142;
+    END IF;
+END;
+
+GRANT SELECT ON arbiter_data.value_versions TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_values_fingerprint TO 'select_objects'@'localhost';
+GRANT EXECUTE ON PROCEDURE arbiter_data.read_values_fingerprint TO 'apiuser'@'%';
+
+-- modified_at is no longer read by any procedure
+ALTER TABLE arbiter_data.observations_values DROP KEY modified_at_idx, DROP COLUMN modified_at;
+ALTER TABLE arbiter_data.forecasts_values DROP KEY modified_at_idx, DROP COLUMN modified_at;
+ALTER TABLE arbiter_data.cdf_forecasts_values DROP KEY modified_at_idx, DROP COLUMN modified_at;
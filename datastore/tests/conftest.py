@@ -9,6 +9,26 @@ import pytest
 import pymysql
 
 
+def pytest_addoption(parser):
+    parser.addoption('--run-benchmarks', action='store_true', default=False,
+                     help='run the tests marked as benchmarks')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'benchmark: throughput comparison, only run with '
+        '--run-benchmarks')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-benchmarks'):
+        return
+    skip = pytest.mark.skip(reason='need --run-benchmarks to run')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(scope='session')
 def connection():
     connection = pymysql.connect(
@@ -0,0 +1,135 @@
+"""
+Benchmarks comparing the rbac checks on the user_object_actions index
+with the nested subqueries they replaced, on a synthetic organization
+with many objects. Only run with ``pytest --run-benchmarks``. Results
+are printed (use ``-s``) and recorded as junitxml properties.
+"""
+import time
+
+
+import pytest
+
+
+from conftest import newuuid
+
+
+pytestmark = pytest.mark.benchmark
+
+
+NOBJECTS = 10000
+NUSERS = 10
+
+
+# the body of can_user_perform_action before user_object_actions,
+# evaluated once per object like the function was
+OLD_CAN_PERFORM = """
+SELECT SUM(IFNULL((
+    SELECT 1 FROM permission_object_mapping WHERE permission_id IN (
+        SELECT permission_id FROM role_permission_mapping WHERE role_id IN (
+            SELECT role_id FROM user_role_mapping WHERE user_id = (
+                SELECT id FROM users WHERE auth0_id = %(auth0id)s)
+        )
+    ) AND permission_id IN (
+        SELECT id FROM permissions WHERE action = %(action)s
+    ) AND object_id = objs.object_id LIMIT 1
+), 0)) FROM permission_object_mapping as objs
+WHERE objs.permission_id = %(permission_id)s
+"""
+NEW_CAN_PERFORM = """
+SELECT SUM(can_user_perform_action(%(auth0id)s, objs.object_id, %(action)s))
+FROM permission_object_mapping as objs
+WHERE objs.permission_id = %(permission_id)s
+"""
+OLD_LIST = """
+SELECT object_id FROM permission_object_mapping WHERE permission_id IN (
+    SELECT permission_id FROM role_permission_mapping WHERE role_id IN (
+        SELECT role_id FROM user_role_mapping WHERE user_id = (
+            SELECT id FROM users WHERE auth0_id = %s)
+    )
+) AND permission_id IN (
+    SELECT id FROM permissions WHERE action = 'read' AND object_type = %s
+)
+"""
+
+
+def _best_time(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _report(record_property, name, nobjects, old, new):
+    record_property(f'{name}_old_objects_per_s', nobjects / old)
+    record_property(f'{name}_new_objects_per_s', nobjects / new)
+    print(f'\n{name} ({nobjects} objects): {nobjects / old:,.0f} objects/s '
+          f'-> {nobjects / new:,.0f} objects/s ({old / new:.1f}x)')
+
+
+@pytest.fixture()
+def synthetic_org(cursor, new_organization, new_user, new_role,
+                  new_permission):
+    """An organization with NOBJECTS observations and NUSERS users that
+    can read them. The first user also has the roles that grant
+    read_values and update on the observations."""
+    org = new_organization()
+    users = [new_user(org=org) for _ in range(NUSERS)]
+    roles = [new_role(org=org) for _ in range(3)]
+    perms = [new_permission(action, 'observations', False, org=org)
+             for action in ('read', 'read_values', 'update')]
+    objects = [newuuid() for _ in range(NOBJECTS)]
+    cursor.executemany(
+        'INSERT INTO permission_object_mapping (permission_id, object_id)'
+        ' VALUES (%s, %s)',
+        [(perm['id'], obj) for perm in perms for obj in objects])
+    # every role reads, one also reads values and one updates
+    cursor.executemany(
+        'INSERT INTO role_permission_mapping (role_id, permission_id) '
+        'VALUES (%s, %s)',
+        [(role['id'], perms[0]['id']) for role in roles] +
+        [(roles[1]['id'], perms[1]['id']), (roles[2]['id'], perms[2]['id'])])
+    cursor.executemany(
+        'INSERT INTO user_role_mapping (user_id, role_id) VALUES (%s, %s)',
+        [(users[0]['id'], role['id']) for role in roles[1:]] +
+        [(user['id'], roles[0]['id']) for user in users])
+    return users[0], perms
+
+
+@pytest.mark.parametrize('action', ['read', 'read_values'])
+def test_can_user_perform_action(cursor, synthetic_org, record_property,
+                                 action):
+    user, perms = synthetic_org
+    args = {'auth0id': user['auth0_id'], 'action': action,
+            'permission_id': perms[0]['id']}
+
+    def run(query):
+        cursor.execute(query, args)
+        return cursor.fetchone()[0]
+
+    assert run(OLD_CAN_PERFORM) == run(NEW_CAN_PERFORM) == NOBJECTS
+    old = _best_time(lambda: run(OLD_CAN_PERFORM))
+    new = _best_time(lambda: run(NEW_CAN_PERFORM))
+    _report(record_property, f'can_user_perform_action_{action}', NOBJECTS,
+            old, new)
+
+
+def test_list_objects_user_can_read(cursor, synthetic_org, record_property):
+    user, _ = synthetic_org
+
+    def old_list():
+        cursor.execute(OLD_LIST, (user['auth0_id'], 'observations'))
+        return {r[0] for r in cursor.fetchall()}
+
+    def new_list():
+        cursor.callproc('list_objects_user_can_read',
+                        (user['auth0_id'], 'observations'))
+        return {r[0] for r in cursor.fetchall()}
+
+    assert old_list() == new_list()
+    assert len(new_list()) == NOBJECTS
+    old = _best_time(old_list)
+    new = _best_time(new_list)
+    _report(record_property, 'list_objects_user_can_read', NOBJECTS,
+            old, new)
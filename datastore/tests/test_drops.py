@@ -36,7 +36,7 @@ def test_drop_org(cursor, valueset_org, test):
     'users', 'roles', 'permissions', 'sites',
     'forecasts', 'permission_object_mapping',
     'user_role_mapping', 'role_permission_mapping',
-    'cdf_forecasts_groups', 'reports', 'aggregates'])
+    'user_object_actions', 'cdf_forecasts_groups', 'reports', 'aggregates'])
 def test_drop_all_orgs_all_tables(cursor, valueset_org, test):
     cursor.execute('DELETE FROM organizations')
     assert check_table_for_org(cursor, None, test) == 0
@@ -360,7 +360,8 @@ def test_store_observation_values(cursor, allow_write_values,
     auth0id, obsid, obsbinid, testobs, expected = observation_values
     cursor.callproc('store_observation_values', (auth0id, obsid, testobs))
     cursor.execute(
-        'SELECT * FROM arbiter_data.observations_values WHERE id = %s AND'
+        'SELECT id, timestamp, value, quality_flag'
+        ' FROM arbiter_data.observations_values WHERE id = %s AND'
         ' timestamp > CURRENT_TIMESTAMP()',
         obsbinid)
     res = cursor.fetchall()
@@ -395,7 +396,8 @@ def test_store_observation_values_duplicates(cursor, allow_write_values,
     # first insert
     cursor.callproc('store_observation_values', (auth0id, obsid, testobs))
     cursor.execute(
-        'SELECT * FROM arbiter_data.observations_values WHERE id = %s AND'
+        'SELECT id, timestamp, value, quality_flag'
+        ' FROM arbiter_data.observations_values WHERE id = %s AND'
         ' timestamp > CURRENT_TIMESTAMP()',
         obsbinid)
     res = cursor.fetchall()
@@ -410,13 +412,37 @@ def test_store_observation_values_duplicates(cursor, allow_write_values,
          for r in alt])
     cursor.callproc('store_observation_values', (auth0id, obsid, nextobs))
     cursor.execute(
-        'SELECT * FROM arbiter_data.observations_values WHERE id = %s AND'
+        'SELECT id, timestamp, value, quality_flag'
+        ' FROM arbiter_data.observations_values WHERE id = %s AND'
         ' timestamp > CURRENT_TIMESTAMP()',
         obsbinid)
     res = cursor.fetchall()
     assert res == tuple(alt)
 
 
+def test_store_observation_values_change_version(cursor, allow_write_values,
+                                                 observation_values):
+    auth0id, obsid, obsbinid, testobs, expected = observation_values
+    cursor.callproc('store_observation_values', (auth0id, obsid, testobs))
+    # only the changed values take the version of the second store
+    changed = json.loads(testobs)
+    changed[3]['qf'] += 1
+    changed[5]['v'] += 1
+    cursor.callproc('store_observation_values',
+                    (auth0id, obsid, json.dumps(changed)))
+    cursor.execute(
+        'SELECT version FROM arbiter_data.value_versions WHERE id = %s',
+        obsbinid)
+    version = cursor.fetchone()[0]
+    cursor.execute(
+        'SELECT change_version FROM arbiter_data.observations_values'
+        ' WHERE id = %s AND timestamp > CURRENT_TIMESTAMP()'
+        ' ORDER BY timestamp', obsbinid)
+    res = [r[0] for r in cursor.fetchall()]
+    assert res == [version if i in (3, 5) else version - 1
+                   for i in range(len(expected))]
+
+
 def test_store_observation_values_cant_write(cursor, observation_values):
     auth0id, obsid, obsbinid, testobs, expected = observation_values
     with pytest.raises(pymysql.err.OperationalError) as e:
@@ -454,7 +480,8 @@ def test_store_forecast_values(cursor, allow_write_values,
     auth0id, fxid, fxbinid, testfx, expected = forecast_values
     cursor.callproc('store_forecast_values', (auth0id, fxid, testfx))
     cursor.execute(
-        'SELECT * FROM arbiter_data.forecasts_values WHERE id = %s AND'
+        'SELECT id, timestamp, value'
+        ' FROM arbiter_data.forecasts_values WHERE id = %s AND'
         ' timestamp > CURRENT_TIMESTAMP()',
         fxbinid)
     res = cursor.fetchall()
@@ -486,7 +513,8 @@ def test_store_forecast_values_duplicates(cursor, allow_write_values,
     # first insert
     cursor.callproc('store_forecast_values', (auth0id, fxid, testfx))
     cursor.execute(
-        'SELECT * FROM arbiter_data.forecasts_values WHERE id = %s AND'
+        'SELECT id, timestamp, value'
+        ' FROM arbiter_data.forecasts_values WHERE id = %s AND'
         ' timestamp > CURRENT_TIMESTAMP()',
         fxbinid)
     res = cursor.fetchall()
@@ -501,7 +529,8 @@ def test_store_forecast_values_duplicates(cursor, allow_write_values,
           'v': r[2]} for r in alt])
     cursor.callproc('store_forecast_values', (auth0id, fxid, nextfx))
     cursor.execute(
-        'SELECT * FROM arbiter_data.forecasts_values WHERE id = %s AND'
+        'SELECT id, timestamp, value'
+        ' FROM arbiter_data.forecasts_values WHERE id = %s AND'
         ' timestamp > CURRENT_TIMESTAMP()',
         fxbinid)
     res = cursor.fetchall()
@@ -686,6 +715,80 @@ def test_store_cdf_forecast_values(
     assert res == tuple(expected)
 
 
+@pytest.fixture()
+def cdf_group_values(insertuser):
+    auth0id = insertuser[0]['auth0_id']
+    group = insertuser[6]
+    expected = []
+    start = dt.datetime.utcnow().replace(microsecond=0)
+    for strid, cv in group['constant_values'].items():
+        binid = uuid_to_bin(uuid.UUID(strid))
+        now = start
+        for i in range(10):
+            now += dt.timedelta(minutes=5)
+            expected.append(
+                (binid, cv, now, float(random.randint(0, 100))))
+    testfx = json.dumps(
+        [{'cv': r[1], 'ts': r[2].strftime('%Y-%m-%dT%H:%M:%S'),
+          'v': r[3]} for r in expected])
+    return auth0id, group['strid'], testfx, expected
+
+
+def test_store_cdf_forecast_group_values(
+        cursor, allow_write_values, cdf_group_values):
+    auth0id, groupid, testfx, expected = cdf_group_values
+    cursor.callproc('store_cdf_forecast_group_values',
+                    (auth0id, groupid, testfx))
+    for binid, _, _, _ in expected[::10]:
+        cursor.execute(
+            'SELECT id, timestamp, value '
+            'FROM arbiter_data.cdf_forecasts_values WHERE id = %s'
+            ' AND timestamp > CURRENT_TIMESTAMP()',
+            binid)
+        res = cursor.fetchall()
+        assert res == tuple((r[0], r[2], r[3]) for r in expected
+                            if r[0] == binid)
+
+
+def test_store_cdf_forecast_group_values_change_version(
+        cursor, allow_write_values, cdf_group_values):
+    auth0id, groupid, testfx, expected = cdf_group_values
+    cursor.callproc('store_cdf_forecast_group_values',
+                    (auth0id, groupid, testfx))
+    cursor.callproc('store_cdf_forecast_group_values',
+                    (auth0id, groupid, testfx))
+    for binid, _, _, _ in expected[::10]:
+        cursor.execute(
+            'SELECT version FROM arbiter_data.value_versions WHERE id = %s',
+            binid)
+        assert cursor.fetchone() == (2,)
+        # the second store did not change any value
+        cursor.execute(
+            'SELECT DISTINCT change_version FROM '
+            'arbiter_data.cdf_forecasts_values WHERE id = %s'
+            ' AND timestamp > CURRENT_TIMESTAMP()', binid)
+        assert cursor.fetchall() == ((1,),)
+
+
+def test_store_cdf_forecast_group_values_unknown_constant_value(
+        cursor, allow_write_values, cdf_group_values):
+    auth0id, groupid, _, _ = cdf_group_values
+    bad = '[{"cv": -1234.5, "ts": "2020-01-01T00:00:00", "v": 1.0}]'
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('store_cdf_forecast_group_values',
+                        (auth0id, groupid, bad))
+    assert e.value.args[0] == 3140
+
+
+def test_store_cdf_forecast_group_values_denied(
+        cursor, cdf_group_values):
+    auth0id, groupid, testfx, _ = cdf_group_values
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('store_cdf_forecast_group_values',
+                        (auth0id, groupid, testfx))
+    assert e.value.args[0] == 1142
+
+
 def test_store_cdf_forecast_values_null(cursor, allow_write_values,
                                         cdf_forecast_values):
     auth0id, fxid, fxbinid, testfx, expected = cdf_forecast_values
@@ -113,7 +113,7 @@ def test_list_sites(dictcursor, twosets, new_site):
     for site in sites: site['climate_zones'] = '[]'  # NOQA
     sites += [new_site(org=org, latitude=32, longitude=-110)]
     sites[-1]['climate_zone'] = '["Reference Region 3"]'
-    dictcursor.callproc('list_sites', (authid,))
+    dictcursor.callproc('list_sites', (authid, None, None))
     res = dictcursor.fetchall()
     assert [str(bin_to_uuid(site['id'])) for site in sites] == [
         r['site_id'] for r in res]
@@ -151,7 +151,8 @@ def test_list_climate_zones(dictcursor, new_climzone):
 def test_list_forecasts(dictcursor, twosets):
     authid = twosets[0]['auth0_id']
     fxs = twosets[4]
-    dictcursor.callproc('list_forecasts', (authid,))
+    dictcursor.callproc('list_forecasts',
+                        (authid, None, None, None, None, None))
     res = dictcursor.fetchall()
     assert res[0]['site_id'] is not None
     assert res[0]['aggregate_id'] is None
@@ -168,7 +169,7 @@ def test_list_forecasts(dictcursor, twosets):
 def test_list_observations(dictcursor, twosets):
     authid = twosets[0]['auth0_id']
     obs = twosets[5]
-    dictcursor.callproc('list_observations', (authid,))
+    dictcursor.callproc('list_observations', (authid, None, None, None, None))
     res = dictcursor.fetchall()
     assert ([str(bin_to_uuid(ob['id'])) for ob in obs] ==
             [r['observation_id'] for r in res])
@@ -181,7 +182,8 @@ def test_list_observations(dictcursor, twosets):
 def test_list_cdf_forecast_groups(dictcursor, twosets):
     authid = twosets[0]['auth0_id']
     cdf = twosets[6]
-    dictcursor.callproc('list_cdf_forecasts_groups', (authid,))
+    dictcursor.callproc('list_cdf_forecasts_groups',
+                        (authid, None, None, None, None, None))
     res = dictcursor.fetchall()
     assert res[0]['site_id'] is not None
     assert res[0]['aggregate_id'] is None
@@ -199,7 +201,8 @@ def test_list_cdf_forecast_groups_no_singles(dictcursor, twosets):
     authid = twosets[0]['auth0_id']
     cdf = twosets[6]
     dictcursor.execute('DELETE FROM cdf_forecasts_singles')
-    dictcursor.callproc('list_cdf_forecasts_groups', (authid,))
+    dictcursor.callproc('list_cdf_forecasts_groups',
+                        (authid, None, None, None, None, None))
     res = dictcursor.fetchall()
     assert ([str(bin_to_uuid(fx['id'])) for fx in cdf] ==
             [r['forecast_id'] for r in res])
@@ -212,7 +215,8 @@ def test_list_cdf_forecast_groups_no_singles(dictcursor, twosets):
 def test_list_cdf_forecast_singles(dictcursor, twosets):
     authid = twosets[0]['auth0_id']
     cdf = twosets[6]
-    dictcursor.callproc('list_cdf_forecasts_singles', (authid,))
+    dictcursor.callproc('list_cdf_forecasts_singles',
+                        (authid, None, None, None, None))
     res = dictcursor.fetchall()
     input_ids = [b for a in cdf for b in list(a['constant_values'].keys())]
     assert input_ids == [r['forecast_id'] for r in res]
@@ -224,10 +228,90 @@ def test_list_cdf_forecast_singles(dictcursor, twosets):
                                      'constant_values')))
 
 
+@pytest.mark.parametrize('proc,key,nargs', [
+    ('list_observations', 'observation_id', 3),
+    ('list_forecasts', 'forecast_id', 4),
+    ('list_cdf_forecasts_groups', 'forecast_id', 4),
+    ('list_cdf_forecasts_singles', 'forecast_id', 3),
+    ('list_sites', 'site_id', 1),
+    ('list_aggregates', 'aggregate_id', 2),
+    ('list_reports', 'report_id', 1),
+])
+def test_list_pages(dictcursor, twosets, proc, key, nargs):
+    authid = twosets[0]['auth0_id']
+    filters = (None,) * (nargs - 1)
+    dictcursor.callproc(proc, (authid, *filters, None, None))
+    expected = [r[key] for r in dictcursor.fetchall()]
+    assert len(expected) > 1
+    pages = []
+    after = None
+    while True:
+        dictcursor.callproc(proc, (authid, *filters, after, 1))
+        res = dictcursor.fetchall()
+        if not res:
+            break
+        assert len(res) == 1
+        after = res[0][key]
+        pages.append(after)
+    assert pages == expected
+
+
+@pytest.mark.parametrize('var,num', [('power', 4), ('ghi', 0)])
+def test_list_observations_filter(dictcursor, twosets, var, num):
+    authid = twosets[0]['auth0_id']
+    site = twosets[3][0]
+    dictcursor.callproc('list_observations', (authid, None, var, None, None))
+    assert len(dictcursor.fetchall()) == num
+    dictcursor.callproc('list_observations',
+                        (authid, str(bin_to_uuid(site['id'])), var, None,
+                         None))
+    res = dictcursor.fetchall()
+    assert len(res) == num // 2
+    assert all(r['site_id'] == str(bin_to_uuid(site['id'])) for r in res)
+
+
+@pytest.mark.parametrize('proc', ['list_forecasts',
+                                  'list_cdf_forecasts_groups'])
+def test_list_forecasts_filter(dictcursor, twosets, proc):
+    authid = twosets[0]['auth0_id']
+    fxs = twosets[4] if proc == 'list_forecasts' else twosets[6]
+    for fx in fxs:
+        site_id = fx['site_id'] and str(bin_to_uuid(fx['site_id']))
+        agg_id = fx['aggregate_id'] and str(bin_to_uuid(fx['aggregate_id']))
+        dictcursor.callproc(proc, (authid, site_id, agg_id, None, None, None))
+        res = dictcursor.fetchall()
+        assert [r['forecast_id'] for r in res] == [
+            str(bin_to_uuid(fx['id']))]
+    dictcursor.callproc(proc, (authid, None, None, 'ghi', None, None))
+    assert dictcursor.fetchall() == ()
+
+
+def test_list_aggregates_filter(dictcursor, twosets):
+    authid = twosets[0]['auth0_id']
+    dictcursor.callproc('list_aggregates', (authid, 'power', None, None))
+    res = dictcursor.fetchall()
+    assert len(res) == 2
+    assert all(r['variable'] == 'power' for r in res)
+    dictcursor.callproc('list_aggregates', (authid, 'ghi', None, None))
+    assert dictcursor.fetchall() == ()
+
+
+def test_list_cdf_forecast_singles_filter(dictcursor, twosets):
+    authid = twosets[0]['auth0_id']
+    cdf = twosets[6][1]
+    dictcursor.callproc('list_cdf_forecasts_singles',
+                        (authid, str(bin_to_uuid(cdf['id'])), None, None,
+                         None))
+    res = dictcursor.fetchall()
+    assert [r['forecast_id'] for r in res] == list(
+        cdf['constant_values'].keys())
+    assert {r['parent'] for r in res} == {str(bin_to_uuid(cdf['id']))}
+
+
 def test_list_reports(dictcursor, twosets):
     authid = twosets[0]['auth0_id']
     reports = twosets[7]
-    dictcursor.callproc('list_reports', (authid,))
+    dictcursor.callproc('list_reports', (authid, None, None))
     res = dictcursor.fetchall()
     assert ([str(bin_to_uuid(rep['id'])) for rep in reports] ==
             [r['report_id'] for r in res])
@@ -241,7 +325,7 @@ def test_list_reports(dictcursor, twosets):
 def test_list_aggregates(dictcursor, twosets):
     authid = twosets[0]['auth0_id']
     agg = twosets[9]
-    dictcursor.callproc('list_aggregates', (authid, ))
+    dictcursor.callproc('list_aggregates', (authid, None, None, None))
     res = dictcursor.fetchall()
     assert ([str(bin_to_uuid(a['id'])) for a in agg] ==
             [r['aggregate_id'] for r in res])
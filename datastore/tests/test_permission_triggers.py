@@ -150,6 +150,97 @@ def test_object_mapping_remove_obj(cursor, action, getfcn, new_permission,
     assert cursor.fetchone() is None
 
 
+def _user_object_paths(cursor):
+    """The user_object_actions rows and the same paths resolved from the
+    mapping tables"""
+    cursor.execute(
+        'SELECT user_id, object_id, action, object_type, role_id, '
+        'permission_id FROM user_object_actions')
+    index = set(cursor.fetchall())
+    cursor.execute(
+        'SELECT urm.user_id, pom.object_id, perm.action, perm.object_type, '
+        'urm.role_id, perm.id FROM user_role_mapping as urm '
+        'JOIN role_permission_mapping as rpm ON rpm.role_id = urm.role_id '
+        'JOIN permissions as perm ON perm.id = rpm.permission_id '
+        'JOIN permission_object_mapping as pom '
+        'ON pom.permission_id = perm.id')
+    return index, set(cursor.fetchall())
+
+
+@pytest.fixture()
+def user_object_setup(cursor, new_organization, new_user, new_role,
+                      new_permission, new_observation):
+    org = new_organization()
+    users = [new_user(org=org) for _ in range(2)]
+    roles = [new_role(org=org) for _ in range(2)]
+    perms = [new_permission('read', 'observations', False, org=org),
+             new_permission('read', 'observations', True, org=org),
+             new_permission('update', 'observations', False, org=org)]
+    obs = [new_observation(org=org) for _ in range(2)]
+    cursor.executemany(
+        'INSERT INTO permission_object_mapping (permission_id, object_id)'
+        ' VALUES (%s, %s)',
+        [(perms[0]['id'], obs[0]['id']), (perms[2]['id'], obs[1]['id'])])
+    cursor.executemany(
+        'INSERT INTO role_permission_mapping (role_id, permission_id) '
+        'VALUES (%s, %s)', [(roles[0]['id'], perms[0]['id']),
+                            (roles[0]['id'], perms[2]['id']),
+                            (roles[1]['id'], perms[1]['id'])])
+    cursor.executemany(
+        'INSERT INTO user_role_mapping (user_id, role_id) VALUES (%s, %s)',
+        [(users[0]['id'], roles[0]['id']), (users[0]['id'], roles[1]['id']),
+         (users[1]['id'], roles[1]['id'])])
+    return users, roles, perms, obs
+
+
+def test_user_object_actions_insert(cursor, user_object_setup):
+    users, roles, perms, obs = user_object_setup
+    index, expected = _user_object_paths(cursor)
+    assert index == expected
+    # read on obs[0] through both roles
+    cursor.execute(
+        'SELECT COUNT(*) FROM user_object_actions WHERE user_id = %s AND '
+        'object_id = %s AND action = "read"', (users[0]['id'], obs[0]['id']))
+    assert cursor.fetchone()[0] == 2
+
+
+@pytest.mark.parametrize('statement,args', [
+    ('DELETE FROM user_role_mapping WHERE user_id = %s AND role_id = %s',
+     lambda u, r, p, o: (u[0]['id'], r[1]['id'])),
+    ('DELETE FROM role_permission_mapping WHERE role_id = %s AND '
+     'permission_id = %s', lambda u, r, p, o: (r[0]['id'], p[0]['id'])),
+    ('DELETE FROM permission_object_mapping WHERE permission_id = %s AND '
+     'object_id = %s', lambda u, r, p, o: (p[1]['id'], o[0]['id'])),
+    ('DELETE FROM observations WHERE id = %s',
+     lambda u, r, p, o: (o[0]['id'],)),
+    ('DELETE FROM users WHERE id = %s', lambda u, r, p, o: (u[0]['id'],)),
+    ('DELETE FROM roles WHERE id = %s', lambda u, r, p, o: (r[1]['id'],)),
+    ('DELETE FROM permissions WHERE id = %s',
+     lambda u, r, p, o: (p[2]['id'],)),
+])
+def test_user_object_actions_delete(cursor, user_object_setup, statement,
+                                    args):
+    before, _ = _user_object_paths(cursor)
+    cursor.execute(statement, args(*user_object_setup))
+    index, expected = _user_object_paths(cursor)
+    assert index == expected
+    assert len(index) < len(before)
+
+
+def test_user_object_actions_other_path(cursor, user_object_setup):
+    """Access through another role remains after a role is removed"""
+    users, roles, perms, obs = user_object_setup
+    cursor.execute(
+        'DELETE FROM user_role_mapping WHERE user_id = %s AND role_id = %s',
+        (users[0]['id'], roles[0]['id']))
+    cursor.execute('SELECT can_user_perform_action(%s, %s, "read")',
+                   (users[0]['auth0_id'], obs[0]['id']))
+    assert cursor.fetchone()[0] == 1
+    cursor.execute('SELECT can_user_perform_action(%s, %s, "update")',
+                   (users[0]['auth0_id'], obs[1]['id']))
+    assert cursor.fetchone()[0] == 0
+
+
 # Note: This test depends on the create_default_user_role
 # function found in 0024_framework_admin.up.sql
 def test_update_user_perm_on_org_change(
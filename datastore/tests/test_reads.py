@@ -9,7 +9,7 @@ import pytest
 import pymysql
 
 
-from conftest import bin_to_uuid
+from conftest import bin_to_uuid, newuuid
 
 
 @pytest.fixture()
@@ -310,6 +310,153 @@ def test_read_observation_values_denied_can_read_meta(
     assert e.value.args[0] == 1142
 
 
+def test_read_values_fingerprint(cursor, obs_values, insertuser,
+                                 allow_read_observation_values):
+    auth0id, obsid, vals, start, end = obs_values(insertuser[3]['strid'])
+    cursor.callproc('read_values_fingerprint',
+                    (auth0id, obsid, 'observations'))
+    # values stored before they were versioned
+    assert cursor.fetchone() == (0,)
+    cursor.execute(
+        'INSERT INTO value_versions (id, version) '
+        'VALUES (UUID_TO_BIN(%s, 1), 3)', obsid)
+    cursor.callproc('read_values_fingerprint',
+                    (auth0id, obsid, 'observations'))
+    assert cursor.fetchone() == (3,)
+
+
+def test_read_values_fingerprint_forecast(cursor, fx_values,
+                                          allow_read_forecast_values):
+    auth0id, fxid, vals, start, end = fx_values
+    cursor.execute(
+        'INSERT INTO value_versions (id, version) '
+        'VALUES (UUID_TO_BIN(%s, 1), 2)', fxid)
+    cursor.callproc('read_values_fingerprint',
+                    (auth0id, fxid, 'forecasts'))
+    assert cursor.fetchone() == (2,)
+
+
+def test_read_values_fingerprint_cdf_group(cursor, insertuser,
+                                           allow_read_cdf_forecast_values):
+    auth0id = insertuser[0]['auth0_id']
+    forecast = insertuser[6]
+    singles = list(forecast['constant_values'].keys())
+    cursor.callproc('read_values_fingerprint',
+                    (auth0id, forecast['strid'], 'cdf_forecasts_groups'))
+    assert cursor.fetchone() == (len(singles), 0)
+    cursor.execute(
+        'INSERT INTO value_versions (id, version) '
+        'VALUES (UUID_TO_BIN(%s, 1), 4)', singles[1])
+    cursor.callproc('read_values_fingerprint',
+                    (auth0id, forecast['strid'], 'cdf_forecasts_groups'))
+    assert cursor.fetchone() == (len(singles), 4)
+
+
+def test_read_values_fingerprint_denied(cursor, obs_values, insertuser,
+                                        allow_read_forecast_values):
+    auth0id, obsid, vals, start, end = obs_values(insertuser[3]['strid'])
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_values_fingerprint',
+                        (auth0id, obsid, 'observations'))
+    assert e.value.args[0] == 1142
+    # the object must be of the type requested
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_values_fingerprint',
+                        (auth0id, obsid, 'forecasts'))
+    assert e.value.args[0] == 1142
+
+
+def test_read_values_fingerprint_bad_type(cursor, obs_values, insertuser):
+    auth0id, obsid, vals, start, end = obs_values(insertuser[3]['strid'])
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_values_fingerprint',
+                        (auth0id, obsid, 'sites'))
+    assert e.value.args[0] == 1146
+
+
+EPOCH = dt.datetime(1970, 1, 1, 0, 0, 1)
+
+
+def test_read_value_changes(cursor, obs_values, insertuser,
+                            allow_read_observation_values):
+    auth0id, obsid, vals, start, end = obs_values(insertuser[3]['strid'])
+    cursor.callproc('read_value_changes',
+                    (auth0id, obsid, 'observations', 0, EPOCH, 100))
+    res = cursor.fetchall()
+    assert [r[:3] for r in res] == [v[1:] for v in vals]
+    since = (res[-1][3], res[-1][0])
+    cursor.callproc('read_value_changes',
+                    (auth0id, obsid, 'observations', *since, 100))
+    assert cursor.fetchall() == ()
+    # a later store rewriting a flag of an older value is a change
+    cursor.execute(
+        'UPDATE observations_values SET quality_flag = 1, '
+        'change_version = 1 WHERE id = UUID_TO_BIN(%s, 1) AND '
+        'timestamp = %s', (obsid, vals[3][1]))
+    cursor.callproc('read_value_changes',
+                    (auth0id, obsid, 'observations', *since, 100))
+    res = cursor.fetchall()
+    assert res == ((vals[3][1], vals[3][2], 1, 1),)
+
+
+def test_read_value_changes_limit(cursor, obs_values, insertuser,
+                                  allow_read_observation_values):
+    auth0id, obsid, vals, start, end = obs_values(insertuser[3]['strid'])
+    since = (0, EPOCH)
+    read = []
+    for _ in range(3):
+        cursor.callproc('read_value_changes',
+                        (auth0id, obsid, 'observations', *since, 4))
+        res = cursor.fetchall()
+        read += [r[0] for r in res]
+        since = (res[-1][3], res[-1][0])
+    # values stored together share a version and are paged by timestamp
+    assert read == [v[1] for v in vals]
+
+
+def test_read_value_changes_version_order(cursor, obs_values, insertuser,
+                                          allow_read_observation_values):
+    auth0id, obsid, vals, start, end = obs_values(insertuser[3]['strid'])
+    cursor.execute(
+        'UPDATE observations_values SET change_version = 2 WHERE '
+        'id = UUID_TO_BIN(%s, 1) AND timestamp = %s', (obsid, vals[0][1]))
+    cursor.execute(
+        'UPDATE observations_values SET change_version = 1 WHERE '
+        'id = UUID_TO_BIN(%s, 1) AND timestamp = %s', (obsid, vals[-1][1]))
+    cursor.callproc('read_value_changes',
+                    (auth0id, obsid, 'observations', 0, EPOCH, 100))
+    res = cursor.fetchall()
+    assert [r[0] for r in res] == (
+        [v[1] for v in vals[1:-1]] + [vals[-1][1], vals[0][1]])
+    assert [r[3] for r in res[-2:]] == [1, 2]
+
+
+def test_read_value_changes_forecast(cursor, fx_values,
+                                     allow_read_forecast_values):
+    auth0id, fxid, vals, start, end = fx_values
+    cursor.callproc('read_value_changes',
+                    (auth0id, fxid, 'forecasts', 0, EPOCH, 100))
+    res = cursor.fetchall()
+    assert [r[:2] for r in res] == [v[1:] for v in vals]
+
+
+def test_read_value_changes_denied(cursor, obs_values, insertuser,
+                                   allow_read_forecast_values):
+    auth0id, obsid, vals, start, end = obs_values(insertuser[3]['strid'])
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_value_changes',
+                        (auth0id, obsid, 'observations', 0, EPOCH, 100))
+    assert e.value.args[0] == 1142
+
+
+def test_read_value_changes_bad_type(cursor, obs_values, insertuser):
+    auth0id, obsid, vals, start, end = obs_values(insertuser[3]['strid'])
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_value_changes', (
+            auth0id, obsid, 'cdf_forecasts_groups', 0, EPOCH, 100))
+    assert e.value.args[0] == 1146
+
+
 @pytest.fixture()
 def fx_values(cursor, insertuser):
     auth0id = insertuser[0]['auth0_id']
@@ -532,6 +679,60 @@ def test_read_cdf_forecast_values_denied_can_read_meta(
     assert e.value.args[0] == 1142
 
 
+@pytest.fixture()
+def cdf_group_values(cursor, insertuser):
+    auth0id = insertuser[0]['auth0_id']
+    forecast = insertuser[6]
+    start = dt.datetime(2020, 1, 30, 12, 28, 20)
+    # no values for the last constant value
+    vals = tuple([
+        (forecast['constant_values'][strid], start + dt.timedelta(minutes=i),
+         float(random.randint(0, 100)))
+        for strid in list(forecast['constant_values'].keys())[:-1]
+        for i in range(10)])
+    cv_ids = {v: k for k, v in forecast['constant_values'].items()}
+    cursor.executemany(
+        'INSERT INTO cdf_forecasts_values (id, timestamp, value) '
+        'VALUES (UUID_TO_BIN(%s, 1), %s, %s)',
+        [(cv_ids[cv], ts, v) for cv, ts, v in vals])
+    start = dt.datetime(2020, 1, 30, 12, 20)
+    end = dt.datetime(2020, 1, 30, 12, 40)
+    empty = list(forecast['constant_values'].values())[-1]
+    return auth0id, forecast['strid'], vals, empty, start, end
+
+
+def test_read_cdf_forecast_group_values(cursor, cdf_group_values,
+                                        allow_read_cdf_forecast_values):
+    auth0id, groupid, vals, empty, start, end = cdf_group_values
+    cursor.callproc('read_cdf_forecast_group_values',
+                    (auth0id, groupid, start, end))
+    res = cursor.fetchall()
+    assert sorted([r for r in res if r[1] is not None]) == sorted(vals)
+    assert [r for r in res if r[1] is None] == [(empty, None, None)]
+
+
+def test_read_cdf_forecast_group_values_time_limits(
+        cursor, cdf_group_values, allow_read_cdf_forecast_values):
+    auth0id, groupid, vals, empty, _, _ = cdf_group_values
+    start = dt.datetime(2020, 1, 30, 12, 30)
+    end = dt.datetime(2020, 1, 30, 12, 35)
+    cursor.callproc('read_cdf_forecast_group_values',
+                    (auth0id, groupid, start, end))
+    res = cursor.fetchall()
+    assert sorted([r for r in res if r[1] is not None]) == sorted(
+        [v for v in vals if start <= v[1] <= end])
+
+
+def test_read_cdf_forecast_group_values_denied(
+        cursor, cdf_group_values, allow_read_cdf_forecasts,
+        allow_read_forecast_values):
+    auth0id, groupid, vals, empty, start, end = cdf_group_values
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_cdf_forecast_group_values',
+                        (auth0id, groupid, start, end))
+    assert e.value.args[0] == 1142
+
+
 @pytest.fixture()
 def allow_read_users(add_perm):
     add_perm('read', 'users')
@@ -720,6 +921,28 @@ def test_read_report_denied(dictcursor, new_report, valueset, insertuser):
     assert e.value.args[0] == 1142
 
 
+def test_read_report_metadata(
+        dictcursor, valueset, new_report, allow_read_reports, insertuser):
+    user = insertuser[0]
+    report = insertuser[7]
+    args = (user['auth0_id'], str(bin_to_uuid(report['id'])))
+    dictcursor.callproc('read_report', args)
+    expected = dictcursor.fetchall()[0]
+    del expected['raw_report']
+    dictcursor.callproc('read_report_metadata', args)
+    assert dictcursor.fetchall()[0] == expected
+
+
+def test_read_report_metadata_denied(dictcursor, new_report, valueset,
+                                     insertuser):
+    user = insertuser[0]
+    report = new_report()
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        dictcursor.callproc('read_report_metadata', (
+            user['auth0_id'], str(bin_to_uuid(report['id']))))
+    assert e.value.args[0] == 1142
+
+
 def test_read_report_values(
         dictcursor, valueset, new_report, allow_read_reports,
         allow_read_observations, allow_read_observation_values,
@@ -808,6 +1031,59 @@ def test_read_report_values_denied(
     assert e.value.args[0] == 1142
 
 
+def test_read_report_object_values(
+        dictcursor, valueset, new_report, allow_read_reports,
+        allow_read_observation_values, allow_read_forecast_values,
+        allow_read_report_values, insertuser):
+    user = insertuser[0]
+    report = insertuser[7]
+    object_pairs = json.loads(report['report_parameters'])['object_pairs']
+    obs_id = object_pairs[0][0]
+    dictcursor.callproc(
+        'read_report_values',
+        (user['auth0_id'], str(bin_to_uuid(report['id'])))
+    )
+    expected = [r for r in dictcursor.fetchall() if r['object_id'] == obs_id]
+    dictcursor.callproc(
+        'read_report_object_values',
+        (user['auth0_id'], str(bin_to_uuid(report['id'])), obs_id)
+    )
+    res = dictcursor.fetchall()
+    assert len(res) > 0
+    assert list(res) == expected
+
+
+def test_read_report_object_values_no_data_access(
+        dictcursor, valueset, new_report, allow_read_reports,
+        allow_read_observation_values, allow_read_report_values,
+        insertuser):
+    user = insertuser[0]
+    report = insertuser[7]
+    object_pairs = json.loads(report['report_parameters'])['object_pairs']
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        dictcursor.callproc(
+            'read_report_object_values',
+            (user['auth0_id'], str(bin_to_uuid(report['id'])),
+             object_pairs[0][1])
+        )
+    assert e.value.args[0] == 1142
+
+
+def test_read_report_object_values_denied(
+        dictcursor, valueset, new_report, allow_read_observation_values,
+        insertuser):
+    user = insertuser[0]
+    report = insertuser[7]
+    object_pairs = json.loads(report['report_parameters'])['object_pairs']
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        dictcursor.callproc(
+            'read_report_object_values',
+            (user['auth0_id'], str(bin_to_uuid(report['id'])),
+             object_pairs[0][0])
+        )
+    assert e.value.args[0] == 1142
+
+
 def test_read_aggregate(
         dictcursor, allow_read_aggregates, insertuser):
     org = insertuser[4]
@@ -1019,6 +1295,141 @@ def test_read_aggregate_values_time_limits(
     assert res == tuple(nvals)
 
 
+AGG_BLOCK = {'start': '2020-01-30T00:00:00', 'end': '2020-01-30T23:45:00',
+             'raw_start': '2020-01-29T23:45:00',
+             'raw_end': '2020-01-30T23:45:00'}
+AGG_BLOCK_VALUES = [{'ts': '2020-01-30T12:30:00', 'v': 1.0, 'qf': 0},
+                    {'ts': '2020-01-30T12:45:00', 'qf': 2}]
+
+
+@pytest.fixture()
+def stored_agg_block(cursor, allow_read_aggregate_values,
+                     allow_read_observation_values, agg_values):
+    agg, auth0id, *_ = agg_values
+    aggid = str(bin_to_uuid(agg['id']))
+    cursor.callproc('store_aggregate_value_blocks', (
+        auth0id, aggid, 0, json.dumps([AGG_BLOCK]),
+        json.dumps(AGG_BLOCK_VALUES)))
+    return agg, auth0id, aggid
+
+
+def _agg_blocks(cursor, auth0id, aggid):
+    cursor.callproc('read_aggregate_value_blocks', (
+        auth0id, aggid, dt.datetime(2020, 1, 1), dt.datetime(2020, 2, 1)))
+    return cursor.fetchall()
+
+
+def test_read_aggregate_value_blocks_none(
+        cursor, allow_read_aggregate_values,
+        allow_read_observation_values, agg_values):
+    agg, auth0id, *_ = agg_values
+    assert _agg_blocks(cursor, auth0id, str(bin_to_uuid(agg['id']))) == (
+        (0, None),)
+
+
+def test_store_and_read_aggregate_value_blocks(cursor, stored_agg_block):
+    agg, auth0id, aggid = stored_agg_block
+    assert _agg_blocks(cursor, auth0id, aggid) == (
+        (0, dt.datetime(2020, 1, 30)),)
+    cursor.callproc('read_materialized_aggregate_values', (
+        auth0id, aggid, dt.datetime(2020, 1, 30, 12, 30),
+        dt.datetime(2020, 1, 30, 13)))
+    assert cursor.fetchall() == (
+        (dt.datetime(2020, 1, 30, 12, 30), 1.0, 0),
+        (dt.datetime(2020, 1, 30, 12, 45), None, 2))
+
+
+def test_store_aggregate_value_blocks_old_version(
+        cursor, allow_read_aggregate_values,
+        allow_read_observation_values, agg_values):
+    agg, auth0id, *_ = agg_values
+    aggid = str(bin_to_uuid(agg['id']))
+    cursor.execute(
+        'INSERT INTO aggregate_value_versions (aggregate_id, version) '
+        'VALUES (%s, 2)', agg['id'])
+    cursor.callproc('store_aggregate_value_blocks', (
+        auth0id, aggid, 1, json.dumps([AGG_BLOCK]),
+        json.dumps(AGG_BLOCK_VALUES)))
+    assert _agg_blocks(cursor, auth0id, aggid) == ((2, None),)
+    # values are still stored, they are overwritten when the block
+    # is computed again
+    cursor.execute('SELECT COUNT(*) FROM aggregate_values WHERE id = %s',
+                   agg['id'])
+    assert cursor.fetchone()[0] == 2
+
+
+def test_read_aggregate_value_blocks_obs_unreadable(
+        cursor, stored_agg_block, agg_values):
+    agg, auth0id, aggid = stored_agg_block
+    perm = agg_values[-1]
+    cursor.execute('DELETE FROM permission_object_mapping WHERE '
+                   'permission_id = %s', perm['id'])
+    assert _agg_blocks(cursor, auth0id, aggid) == ()
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_materialized_aggregate_values', (
+            auth0id, aggid, dt.datetime(2020, 1, 30),
+            dt.datetime(2020, 1, 31)))
+    assert e.value.args[0] == 1142
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('store_aggregate_value_blocks', (
+            auth0id, aggid, 0, json.dumps([AGG_BLOCK]),
+            json.dumps(AGG_BLOCK_VALUES)))
+    assert e.value.args[0] == 1142
+
+
+def test_read_aggregate_value_blocks_denied(cursor, agg_values):
+    agg, auth0id, *_ = agg_values
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        _agg_blocks(cursor, auth0id, str(bin_to_uuid(agg['id'])))
+    assert e.value.args[0] == 1142
+
+
+@pytest.mark.parametrize('ts,invalid', [
+    ('2020-01-30T06:00:00', True),
+    ('2020-01-29T23:45:00', True),
+    ('2020-01-29T23:40:00', False),
+    ('2020-01-31T00:00:00', False),
+])
+def test_store_observation_values_invalidates_aggregate_blocks(
+        cursor, stored_agg_block, agg_values, allow_write_values, ts,
+        invalid):
+    agg, auth0id, aggid = stored_agg_block
+    obsid = agg_values[5][0]
+    cursor.callproc('store_observation_values', (
+        auth0id, obsid, json.dumps([{'ts': ts, 'v': 1.0, 'qf': 0}])))
+    if invalid:
+        assert _agg_blocks(cursor, auth0id, aggid) == ((1, None),)
+    else:
+        assert _agg_blocks(cursor, auth0id, aggid) == (
+            (1, dt.datetime(2020, 1, 30)),)
+
+
+@pytest.mark.parametrize('stmt', [
+    "UPDATE aggregate_observation_mapping SET effective_until = "
+    "TIMESTAMP('2020-01-30 12:30') WHERE aggregate_id = %s",
+    "DELETE FROM aggregate_observation_mapping WHERE aggregate_id = %s "
+    "LIMIT 1",
+    "INSERT INTO aggregate_observation_mapping (aggregate_id, "
+    "observation_id, _incr) SELECT aggregate_id, observation_id, 1 FROM "
+    "aggregate_observation_mapping WHERE aggregate_id = %s LIMIT 1",
+    "UPDATE aggregates SET timezone = 'UTC' WHERE id = %s",
+])
+def test_aggregate_changes_invalidate_aggregate_blocks(
+        cursor, stored_agg_block, stmt):
+    agg, auth0id, aggid = stored_agg_block
+    cursor.execute(stmt, agg['id'])
+    assert _agg_blocks(cursor, auth0id, aggid) == ((1, None),)
+
+
+def test_aggregate_description_change_keeps_aggregate_blocks(
+        cursor, stored_agg_block):
+    agg, auth0id, aggid = stored_agg_block
+    cursor.execute("UPDATE aggregates SET description = 'new' WHERE id = %s",
+                   agg['id'])
+    assert _agg_blocks(cursor, auth0id, aggid) == (
+        (0, dt.datetime(2020, 1, 30)),)
+
+
 def test_read_aggregate_values_removed(
         cursor, allow_read_aggregate_values, allow_read_observation_values,
         obs_values, new_aggregate, new_observation, user_org_role):
@@ -1585,6 +1996,48 @@ def test_read_metadata_for_value_write_cdf_fx_is_event(
     assert res['is_event'] == 1
 
 
+def test_read_metadata_for_value_write_cdf_group(
+        dictcursor, insertuser, allow_write_values):
+    time_ = dt.datetime(2019, 9, 30, 12, 45)
+    cdf_ids = list(insertuser.cdf['constant_values'].keys())
+    dictcursor.executemany(
+        'INSERT INTO cdf_forecasts_values (id, timestamp, value) VALUES'
+        ' (UUID_TO_BIN(%s, 1), %s, %s)',
+        [(cdf_ids[0], time_ - dt.timedelta(minutes=5), 0),
+         (cdf_ids[1], time_, 0),
+         (cdf_ids[1], time_ + dt.timedelta(hours=1), 0)])
+    dictcursor.callproc('read_metadata_for_value_write',
+                        (insertuser.auth0id, insertuser.cdf['strid'],
+                         'cdf_forecasts_groups',
+                         '2019-09-30 13:00'))
+    res = dictcursor.fetchone()
+    assert isinstance(res['interval_length'], int)
+    assert res['previous_time'] == time_
+    assert isinstance(res['extra_parameters'], str)
+    assert res['is_event'] == 0
+
+
+def test_read_metadata_for_value_write_cdf_group_no_write(
+        cursor, insertuser):
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_metadata_for_value_write',
+                        (insertuser.auth0id, insertuser.cdf['strid'],
+                         'cdf_forecasts_groups',
+                         '2019-09-30 12:00'))
+    assert e.value.args[0] == 1142
+
+
+def test_read_metadata_for_value_write_cdf_group_single_id(
+        cursor, insertuser, allow_write_values):
+    cdf_id = list(insertuser.cdf['constant_values'].keys())[0]
+    with pytest.raises(pymysql.err.OperationalError) as e:
+        cursor.callproc('read_metadata_for_value_write',
+                        (insertuser.auth0id, cdf_id,
+                         'cdf_forecasts_groups',
+                         '2019-09-30 12:00'))
+    assert e.value.args[0] == 1142
+
+
 def test_read_metadata_for_value_write_invalid(cursor, insertuser):
     with pytest.raises(pymysql.err.ProgrammingError) as e:
         cursor.callproc('read_metadata_for_value_write',
@@ -1726,6 +2179,25 @@ def test_get_user_actions_on_object_after_removal(
         assert action not in [x['action'] for x in actions]
 
 
+def test_get_user_actions_on_objects(
+        dictcursor, user_org_role, new_role, new_forecast, add_perm):
+    user, org, _ = user_org_role
+    auth0id = user['auth0_id']
+    role_id = bin_to_uuid(new_role(org=org)['id'])
+    forecast_id = bin_to_uuid(new_forecast(org=org)['id'])
+    new_forecast(org=org)
+    add_perm('read', 'roles')
+    add_perm('update', 'roles')
+    add_perm('read_values', 'forecasts')
+
+    dictcursor.callproc('get_user_actions_on_objects', (
+        auth0id, json.dumps([role_id, forecast_id, bin_to_uuid(newuuid())])))
+    result = {r['object_id']: sorted(json.loads(r['actions']))
+              for r in dictcursor.fetchall()}
+    assert result == {role_id: ['read', 'update'],
+                      forecast_id: ['read_values']}
+
+
 def test_read_latest_observation_values(cursor, obs_values, insertuser,
                                         allow_read_observation_values):
     auth0id, obsid, vals, *_ = obs_values(insertuser[3]['strid'])
@@ -13,7 +13,9 @@ EXTRAS_REQUIRE = {
     'test': ['pytest', 'pytest-cov', 'pytest-mock', 'flake8'],
     'cli': ['click'],
     'queue': ['rq', 'redis', 'rq_scheduler'],
-    'metrics': ['prometheus-flask-exporter']
+    'metrics': ['prometheus-flask-exporter'],
+    'arrow': ['pyarrow'],
+    'fastjson': ['orjson']
 }
 EXTRAS_REQUIRE['all'] = [
     vv for v in EXTRAS_REQUIRE.values() for vv in v]
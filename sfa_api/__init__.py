@@ -15,7 +15,8 @@ from sentry_sdk.integrations.flask import FlaskIntegration  # NOQA
 
 from sfa_api.spec import spec  # NOQA
 from sfa_api.error_handlers import register_error_handlers  # NOQA
-from sfa_api.utils.auth import requires_auth  # NOQA
+from sfa_api.utils.auth import requires_auth, JWKSProvider  # NOQA
+from sfa_api.utils.cache import TTLCache  # NOQA
 from sfa_api.utils.url_converters import (  # NOQA
     UUIDStringConverter, ZoneStringConverter)
 
@@ -40,6 +41,15 @@ def create_app(config_name='ProductionConfig'):
         app.config.from_envvar('REDIS_SETTINGS')
     ma.init_app(app)
     register_error_handlers(app)
+    app.extensions['user_exists_cache'] = TTLCache(
+        maxsize=app.config['USER_CACHE_SIZE'],
+        ttl=app.config['USER_CACHE_TTL'])
+    app.extensions['token_cache'] = TTLCache(
+        maxsize=app.config['TOKEN_CACHE_SIZE'],
+        ttl=app.config['TOKEN_CACHE_TTL'])
+    app.extensions['jwks'] = JWKSProvider(
+        app.config['JWKS_URL'], path=app.config['JWT_KEY_FILE'],
+        refresh_interval=app.config['JWKS_REFRESH_INTERVAL'])
     redoc_script = f"https://cdn.jsdelivr.net/npm/redoc@{app.config['REDOC_VERSION']}/bundles/redoc.standalone.js"  # NOQA
     talisman.init_app(app,
                       content_security_policy={
@@ -68,10 +78,11 @@ def create_app(config_name='ProductionConfig'):
     from sfa_api.aggregates import agg_blp
     from sfa_api.zones import zone_blp
     from sfa_api.outages import outage_blp
+    from sfa_api.values import values_blp
 
     for blp in (obs_blp, forecast_blp, site_blp, user_blp, user_email_blp,
                 role_blp, permission_blp, reports_blp, agg_blp, zone_blp,
-                outage_blp):
+                outage_blp, values_blp):
         blp.before_request(protect_endpoint)
         app.register_blueprint(blp)
 
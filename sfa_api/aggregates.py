@@ -10,8 +10,17 @@ from solarforecastarbiter.utils import compute_aggregate
 
 
 from sfa_api import spec
-from sfa_api.utils.request_handling import validate_start_end
+from sfa_api.utils.request_handling import (validate_list_parameters,
+                                            validate_start_end)
 from sfa_api.utils.errors import BadAPIRequest, BaseAPIException
+from sfa_api.utils.response_handling import (BINARY_MIMETYPES,
+                                             dump_many,
+                                             make_binary_response,
+                                             make_conditional_json,
+                                             make_conditional_response,
+                                             make_etag,
+                                             make_page_response,
+                                             values_mimetypes)
 from sfa_api.utils.storage import get_storage
 from sfa_api.schema import (AggregateSchema,
                             AggregatePostSchema,
@@ -22,6 +31,136 @@ from sfa_api.schema import (AggregateSchema,
                             CDFForecastGroupSchema)
 
 
+def _observation_value_range(index_start, index_end, interval_length,
+                             interval_label):
+    """The range of observation values that are aggregated into the
+    intervals labeled from index_start to index_end"""
+    # Create a timedelta to add/substract from end/start to get data
+    # outside of start/end when aggregating
+    interval_offset = interval_length - pd.Timedelta('1ns')
+    if interval_label == 'ending':
+        # include all values in the first interval
+        return index_start - interval_offset, index_end
+    else:
+        # include all values in the final interval
+        return index_start, index_end + interval_offset
+
+
+def _compute_aggregate_values(storage, aggregate_id, aggregate,
+                              index_start, index_end):
+    """Compute the aggregate values for the intervals labeled from
+    index_start to index_end from the values of the observations"""
+    interval_length = f"{aggregate['interval_length']}min"
+    interval_label = aggregate['interval_label']
+    timezone = aggregate['timezone']
+    start, end = _observation_value_range(
+        index_start, index_end, pd.Timedelta(interval_length), interval_label)
+    indv_obs = storage.read_aggregate_values(aggregate_id, start, end)
+
+    request_index = pd.date_range(
+        index_start.tz_convert(timezone),
+        index_end.tz_convert(timezone),
+        freq=interval_length,
+    )
+
+    try:
+        return compute_aggregate(
+            indv_obs, interval_length, interval_label, timezone,
+            aggregate['aggregate_type'], aggregate['observations'],
+            request_index)
+    except (KeyError, ValueError) as err:
+        raise BaseAPIException(422, values=str(err))
+
+
+def _value_block_length(interval_length):
+    """Blocks of computed aggregate values are a whole number of
+    intervals and about a day long"""
+    return interval_length * max(1, pd.Timedelta('1d') // interval_length)
+
+
+def _contiguous_blocks(block_starts, block_length):
+    """Split a sorted list of block starts into lists of
+    consecutive blocks"""
+    runs = []
+    for block_start in block_starts:
+        if runs and runs[-1][-1] + block_length == block_start:
+            runs[-1].append(block_start)
+        else:
+            runs.append([block_start])
+    return runs
+
+
+def _value_block_starts(aggregate, index_start, index_end):
+    """The start of each block of computed aggregate values that
+    includes intervals labeled from index_start to index_end"""
+    block_length = _value_block_length(
+        pd.Timedelta(f"{aggregate['interval_length']}min"))
+    return pd.date_range(index_start.floor(block_length),
+                         index_end.floor(block_length),
+                         freq=block_length)
+
+
+def _read_aggregate_value_blocks(storage, aggregate_id, aggregate,
+                                 index_start, index_end):
+    """Read the version of the computed values of the aggregate and
+    which blocks are valid for the intervals from index_start to
+    index_end, see storage_interface.read_aggregate_value_blocks"""
+    block_starts = _value_block_starts(aggregate, index_start, index_end)
+    return storage.read_aggregate_value_blocks(
+        aggregate_id, block_starts[0], block_starts[-1])
+
+
+def _read_aggregate_values(storage, aggregate_id, aggregate,
+                           index_start, index_end, blocks):
+    """Read the aggregate values for the intervals labeled from
+    index_start to index_end given the blocks returned by
+    _read_aggregate_value_blocks.
+
+    Values are computed from the observation values once per block
+    of intervals and stored. Stored blocks are removed by the database
+    when the observation values they were computed from change, so
+    after the first read of a block only the stored values are read.
+    Values are computed for just the requested intervals, without
+    storing them, if the user cannot read every observation in the
+    aggregate or the values of a whole block cannot be computed.
+    """
+    interval_length = pd.Timedelta(f"{aggregate['interval_length']}min")
+    interval_label = aggregate['interval_label']
+    block_length = _value_block_length(interval_length)
+    block_starts = _value_block_starts(aggregate, index_start, index_end)
+    if blocks is None:
+        return _compute_aggregate_values(
+            storage, aggregate_id, aggregate, index_start, index_end)
+
+    version, valid_blocks = blocks
+    missing = [bs for bs in block_starts if bs not in valid_blocks]
+    for run in _contiguous_blocks(missing, block_length):
+        run_end = run[-1] + block_length - interval_length
+        try:
+            computed = _compute_aggregate_values(
+                storage, aggregate_id, aggregate, run[0], run_end)
+        except BaseAPIException:
+            # e.g. no observation values in a future block
+            return _compute_aggregate_values(
+                storage, aggregate_id, aggregate, index_start, index_end)
+        new_blocks = []
+        for block_start in run:
+            block_end = block_start + block_length - interval_length
+            raw_start, raw_end = _observation_value_range(
+                block_start, block_end, interval_length, interval_label)
+            new_blocks.append({'start': block_start, 'end': block_end,
+                               'raw_start': raw_start, 'raw_end': raw_end})
+        storage.store_aggregate_value_blocks(
+            aggregate_id, version, new_blocks, computed)
+
+    request_index = pd.date_range(
+        index_start, index_end, freq=interval_length
+    ).tz_convert(aggregate['timezone'])
+    values = storage.read_materialized_aggregate_values(
+        aggregate_id, index_start, index_end)
+    return values.tz_convert(aggregate['timezone']).reindex(request_index)
+
+
 class AllAggregatesView(MethodView):
     def get(self, *args):
         """
@@ -30,21 +169,37 @@ class AllAggregatesView(MethodView):
         description: List all aggregates that the user has access to.
         tags:
           - Aggregates
+        parameters:
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: A list of aggregates
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/AggregateMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        aggregates = storage.list_aggregates()
-        return jsonify(AggregateSchema(many=True).dump(aggregates))
+        aggregates = storage.list_aggregates(**params)
+        return make_page_response(
+            dump_many(AggregateSchema, aggregates),
+            params['limit'], 'aggregate_id')
 
     def post(self, *args):
         """
@@ -118,7 +273,7 @@ class AggregateView(MethodView):
         """
         storage = get_storage()
         aggregate = storage.read_aggregate(aggregate_id)
-        return jsonify(AggregateLinksSchema().dump(aggregate))
+        return make_conditional_json(AggregateLinksSchema().dump(aggregate))
 
     def delete(self, aggregate_id, *args):
         """
@@ -169,7 +324,15 @@ class AggregateValuesView(MethodView):
                   timestamp,value,quality_flag
                   2018-10-29T12:00:00Z,32.93,0
                   2018-10-29T13:00:00Z,25.17,0
+              application/vnd.apache.arrow.stream:
+                schema:
+                  $ref: '#/components/schemas/ArrowValues'
+              application/vnd.apache.parquet:
+                schema:
+                  $ref: '#/components/schemas/ParquetValues'
 
+          304:
+            $ref: '#/components/responses/304-NotModified'
           400:
             $ref: '#/components/responses/400-TimerangeTooLarge'
           401:
@@ -183,48 +346,35 @@ class AggregateValuesView(MethodView):
         storage = get_storage()
         aggregate = storage.read_aggregate(aggregate_id)
 
-        interval_length = f"{aggregate['interval_length']}min"
-        interval_label = aggregate['interval_label']
-        timezone = aggregate['timezone']
-
-        # Create a timedelta to add/substract from end/start to get data
-        # outside of start/end when aggregating
-        interval_offset = pd.Timedelta(interval_length) - pd.Timedelta('1ns')
-
-        if interval_label == 'ending':
+        interval_length = pd.Timedelta(f"{aggregate['interval_length']}min")
+        if aggregate['interval_label'] == 'ending':
             index_start = start.ceil(interval_length)
             index_end = end.ceil(interval_length)
-
-            # adjust start to include all values in the previous interval
-            start = index_start - interval_offset
-            end = index_end
         else:
             index_start = start.floor(interval_length)
             index_end = end.floor(interval_length)
-
-            # adjust end to include all values in the final interval
-            end = index_end + interval_offset
-            start = index_start
-
-        indv_obs = storage.read_aggregate_values(aggregate_id, start, end)
-
-        request_index = pd.date_range(
-            index_start.tz_convert(timezone),
-            index_end.tz_convert(timezone),
-            freq=interval_length,
-        )
-
-        # compute agg
-        try:
-            values = compute_aggregate(
-                indv_obs, interval_length, interval_label, timezone,
-                aggregate['aggregate_type'], aggregate['observations'],
-                request_index)
-        except (KeyError, ValueError) as err:
-            raise BaseAPIException(422, values=str(err))
-        accepts = request.accept_mimetypes.best_match(['application/json',
-                                                       'text/csv'])
-        if accepts == 'application/json':
+        accepts = request.accept_mimetypes.best_match(values_mimetypes())
+        blocks = _read_aggregate_value_blocks(
+            storage, aggregate_id, aggregate, index_start, index_end)
+        make = partial(self._values_response, aggregate_id, aggregate,
+                       index_start, index_end, accepts, blocks)
+        if blocks is None:
+            # values are computed without a version to compare
+            return make()
+        etag = make_etag(blocks[0], aggregate['modified_at'], index_start,
+                         index_end, accepts)
+        return make_conditional_response(etag, make)
+
+    def _values_response(self, aggregate_id, aggregate, index_start,
+                         index_end, accepts, blocks):
+        values = _read_aggregate_values(
+            get_storage(), aggregate_id, aggregate, index_start, index_end,
+            blocks)
+        if accepts in BINARY_MIMETYPES:
+            return make_binary_response(
+                values, accepts, {'aggregate_id': aggregate_id},
+                columns=['value', 'quality_flag'])
+        elif accepts == 'application/json':
             values.index.name = 'timestamp'
             data = AggregateValuesSchema().dump(
                 {"aggregate_id": aggregate_id, "values": values})
@@ -266,7 +416,7 @@ class AggregateMetadataView(MethodView):
         """
         storage = get_storage()
         aggregate = storage.read_aggregate(aggregate_id)
-        return jsonify(AggregateSchema().dump(aggregate))
+        return make_conditional_json(AggregateSchema().dump(aggregate))
 
     def _check_post_for_errs(self, aggregate_id, agg_observations, storage):
         errors = defaultdict(partial(defaultdict, dict))
@@ -386,23 +536,39 @@ class AggregateForecasts(MethodView):
         - Aggregates
         parameters:
         - aggregate_id
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: Successfully retrieved aggregate forecasts.
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/ForecastMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
           404:
              $ref: '#/components/responses/404-NotFound'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        forecasts = storage.list_forecasts(aggregate_id=aggregate_id)
-        return jsonify(ForecastSchema(many=True).dump(forecasts))
+        forecasts = storage.list_forecasts(aggregate_id=aggregate_id,
+                                           **params)
+        return make_page_response(
+            dump_many(ForecastSchema, forecasts),
+            params['limit'], 'forecast_id')
 
 
 class AggregateCDFForecastGroups(MethodView):
@@ -417,23 +583,39 @@ class AggregateCDFForecastGroups(MethodView):
         - Aggregates
         parameters:
         - aggregate_id
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: Successfully retrieved aggregate cdf forecast groups.
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/CDFForecastGroupMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
           404:
              $ref: '#/components/responses/404-NotFound'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        forecasts = storage.list_cdf_forecast_groups(aggregate_id=aggregate_id)
-        return jsonify(CDFForecastGroupSchema(many=True).dump(forecasts))
+        forecasts = storage.list_cdf_forecast_groups(
+            aggregate_id=aggregate_id, **params)
+        return make_page_response(
+            dump_many(CDFForecastGroupSchema, forecasts),
+            params['limit'], 'forecast_id')
 
 
 class AggregateObservationView(MethodView):
@@ -2,7 +2,6 @@ import os
 
 
 import pandas as pd
-import requests
 
 
 from sfa_api import __version__
@@ -16,8 +15,21 @@ class Config(object):
     AUTH0_CLIENT_ID = os.getenv('AUTH0_CLIENT_ID', '')
     AUTH0_CLIENT_SECRET = os.getenv('AUTH0_CLIENT_SECRET', '')
     AUTH0_REDIS_DB = os.getenv('AUTH0_REDIS_DB', 1)
-    JWT_KEY = requests.get(
-        AUTH0_BASE_URL + '/.well-known/jwks.json').json()
+    # seconds before the Auth0 management token expires to replace it
+    AUTH0_TOKEN_REFRESH_MARGIN = float(
+        os.getenv('AUTH0_TOKEN_REFRESH_MARGIN', 300))
+    # maximum concurrent requests to Auth0 when looking up many emails
+    AUTH0_EMAIL_WORKERS = int(os.getenv('AUTH0_EMAIL_WORKERS', 8))
+    # connections to Auth0 kept alive and default request timeout
+    AUTH0_POOL_SIZE = int(os.getenv('AUTH0_POOL_SIZE', 10))
+    AUTH0_REQUEST_TIMEOUT = float(os.getenv('AUTH0_REQUEST_TIMEOUT', 10))
+    # the JWKS is loaded when first needed from JWT_KEY_FILE, if set,
+    # or JWKS_URL and reloaded every JWKS_REFRESH_INTERVAL seconds.
+    # Setting JWT_KEY overrides both.
+    JWKS_URL = AUTH0_BASE_URL + '/.well-known/jwks.json'
+    JWT_KEY_FILE = os.getenv('JWT_KEY_FILE', None)
+    JWKS_REFRESH_INTERVAL = float(os.getenv('JWKS_REFRESH_INTERVAL', 3600))
+    JWT_KEY = None
     MYSQL_HOST = os.getenv('MYSQL_HOST', '127.0.0.1')
     MYSQL_PORT = os.getenv('MYSQL_PORT', '3306')
     MYSQL_USER = os.getenv('MYSQL_USER', None)
@@ -33,6 +45,27 @@ class Config(object):
                                         200000))
     MAX_DATA_RANGE_DAYS = pd.Timedelta(os.getenv('MAX_DATA_RANGE_DAYS', '366')
                                        + ' days')
+    # maximum number of objects returned by one page of a list request
+    MAX_LIST_LIMIT = int(os.getenv('MAX_LIST_LIMIT', 10000))
+    # maximum number of objects in a single batch values request
+    MAX_BATCH_OBJECTS = int(os.getenv('MAX_BATCH_OBJECTS', 500))
+    # maximum total days of data, summed over the objects, in a single
+    # batch values request, as all of the values are held in memory
+    MAX_BATCH_DATA_RANGE_DAYS = pd.Timedelta(
+        os.getenv('MAX_BATCH_DATA_RANGE_DAYS', '3660') + ' days')
+    # number of rows read from the database at a time when streaming values
+    STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 10000))
+    # how long and how many users are remembered to exist
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 4096))
+    # maximum time and number of verified access tokens to remember
+    TOKEN_CACHE_TTL = float(os.getenv('TOKEN_CACHE_TTL', 300))
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
+    # seconds values read from the database are cached in redis,
+    # 0 disables the cache
+    VALUE_CACHE_TTL = float(os.getenv('VALUE_CACHE_TTL', 300))
+    # maximum number of changed values returned by one request
+    MAX_VALUE_CHANGES = int(os.getenv('MAX_VALUE_CHANGES', 100000))
 
 
 class ProductionConfig(Config):
@@ -55,6 +88,8 @@ class TestingConfig(Config):
     USE_FAKE_REDIS = True
     AUTH0_CLIENT_ID = 'clientid'
     AUTH0_CLIENT_SECRET = 'secret'
+    # tests roll back database changes that a shared cache would keep
+    VALUE_CACHE_TTL = 0
 
 
 class AdminTestConfig(TestingConfig):
@@ -23,6 +23,27 @@ from sfa_api.schema import (
 
 BASE_URL = 'https://localhost'
 
+
+def pytest_addoption(parser):
+    parser.addoption('--run-benchmarks', action='store_true', default=False,
+                     help='run the tests marked as benchmarks')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'benchmark: throughput comparison, only run with '
+        '--run-benchmarks')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-benchmarks'):
+        return
+    skip = pytest.mark.skip(reason='need --run-benchmarks to run')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
 # Strings of formatted field options for error checking
 # e.g. provides "interval_mean, instantaneous, ..." so
 # f'Must be one of: {interval_value_types}.' can be checked
@@ -323,6 +344,19 @@ def copy_update(json, key, value):
     return new_json
 
 
+def list_pages(api, url, key):
+    """Read every page of a list endpoint by following the Link headers
+    and return the pages of object ids."""
+    pages = []
+    while url is not None:
+        res = api.get(url, base_url=BASE_URL)
+        assert res.status_code == 200
+        pages.append([obj[key] for obj in res.json])
+        link = res.headers.get('Link')
+        url = link[1:-len('>; rel="next"')] if link else None
+    return pages
+
+
 @pytest.fixture()
 def user_id():
     return '0c90950a-7cca-11e9-a81f-54bf64606445'
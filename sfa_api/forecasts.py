@@ -1,12 +1,14 @@
 from functools import partial
 
-from flask import Blueprint, request, jsonify, make_response, url_for
+from flask import (Blueprint, request, jsonify, make_response, url_for,
+                   current_app)
 from flask.views import MethodView
 from marshmallow import ValidationError
 
 
 from sfa_api import spec
 from sfa_api.schema import (ForecastValuesSchema,
+                            ForecastValueChangesSchema,
                             ForecastSchema,
                             ForecastPostSchema,
                             ForecastLinksSchema,
@@ -14,8 +16,10 @@ from sfa_api.schema import (ForecastValuesSchema,
                             ForecastUpdateSchema,
                             CDFForecastGroupPostSchema,
                             CDFForecastGroupSchema,
+                            CDFForecastGroupValuesSchema,
                             CDFForecastSchema,
                             CDFForecastValuesSchema,
+                            CDFForecastValueChangesSchema,
                             CDFForecastTimeRangeSchema,
                             ForecastGapSchema,
                             CDFForecastGapSchema,
@@ -24,11 +28,31 @@ from sfa_api.schema import (ForecastValuesSchema,
 from sfa_api.utils.errors import BadAPIRequest
 from sfa_api.utils.storage import get_storage
 from sfa_api.utils.request_handling import (validate_parsable_values,
+                                            validate_parsable_cdf_group_values,
+                                            validate_parsable_values_batch,
                                             validate_start_end,
+                                            validate_since_limit,
                                             validate_index_period,
                                             validate_event_data,
                                             validate_forecast_values,
+                                            validate_list_parameters,
                                             restrict_forecast_upload_window)
+from sfa_api.utils.response_handling import (ARROW_MIMETYPE,
+                                             BINARY_MIMETYPES,
+                                             PARQUET_MIMETYPE,
+                                             format_value_cursor,
+                                             dump_many,
+                                             make_binary_response,
+                                             make_conditional_json,
+                                             make_conditional_response,
+                                             make_etag,
+                                             make_page_response,
+                                             make_streaming_response,
+                                             prime_chunks,
+                                             stream_arrow_values,
+                                             stream_csv_values,
+                                             stream_json_values,
+                                             values_mimetypes)
 
 
 class AllForecastsView(MethodView):
@@ -38,21 +62,37 @@ class AllForecastsView(MethodView):
         summary: List forecasts
         tags:
         - Forecasts
+        parameters:
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: Forecasts sucessfully retrieved.
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/ForecastMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        forecasts = storage.list_forecasts()
-        return jsonify(ForecastSchema(many=True).dump(forecasts))
+        forecasts = storage.list_forecasts(**params)
+        return make_page_response(
+            dump_many(ForecastSchema, forecasts),
+            params['limit'], 'forecast_id')
 
     def post(self, *args):
         """
@@ -131,7 +171,7 @@ class ForecastView(MethodView):
         """
         storage = get_storage()
         forecast = storage.read_forecast(forecast_id)
-        return jsonify(ForecastLinksSchema().dump(forecast))
+        return make_conditional_json(ForecastLinksSchema().dump(forecast))
 
     def delete(self, forecast_id, *args):
         """
@@ -167,6 +207,7 @@ class ForecastValuesView(MethodView):
         - forecast_id
         - start_time
         - end_time
+        - stream
         - accepts
         responses:
           200:
@@ -182,6 +223,14 @@ class ForecastValuesView(MethodView):
                   timestamp,value
                   2018-10-29T12:00:00Z,32.93
                   2018-10-29T13:00:00Z,25.17
+              application/vnd.apache.arrow.stream:
+                schema:
+                  $ref: '#/components/schemas/ArrowValues'
+              application/vnd.apache.parquet:
+                schema:
+                  $ref: '#/components/schemas/ParquetValues'
+          304:
+            $ref: '#/components/responses/304-NotModified'
           400:
             $ref: '#/components/responses/400-TimerangeTooLarge'
           401:
@@ -191,10 +240,26 @@ class ForecastValuesView(MethodView):
         """
         start, end = validate_start_end()
         storage = get_storage()
-        values = storage.read_forecast_values(forecast_id, start, end)
-        accepts = request.accept_mimetypes.best_match(['application/json',
-                                                       'text/csv'])
-        if accepts == 'application/json':
+        accepts = request.accept_mimetypes.best_match(values_mimetypes())
+        stream = 'stream' in request.args and accepts != PARQUET_MIMETYPE
+        fingerprint = storage.read_values_fingerprint(
+            forecast_id, 'forecasts')
+        etag = make_etag(fingerprint, start, end, accepts, stream)
+        return make_conditional_response(etag, partial(
+            self._values_response, forecast_id, start, end, accepts,
+            stream, fingerprint))
+
+    def _values_response(self, forecast_id, start, end, accepts, stream,
+                         fingerprint):
+        if stream:
+            return self._stream(forecast_id, start, end, accepts)
+        storage = get_storage()
+        values = storage.read_forecast_values(
+            forecast_id, start, end, fingerprint=fingerprint)
+        if accepts in BINARY_MIMETYPES:
+            return make_binary_response(
+                values, accepts, {'forecast_id': forecast_id})
+        elif accepts == 'application/json':
             data = ForecastValuesSchema().dump({"forecast_id": forecast_id,
                                                 "values": values})
             return jsonify(data)
@@ -210,6 +275,26 @@ class ForecastValuesView(MethodView):
             response.mimetype = 'text/csv'
             return response
 
+    def _stream(self, forecast_id, start, end, accepts):
+        storage = get_storage()
+        chunks = prime_chunks(storage.read_forecast_values_chunks(
+            forecast_id, start, end,
+            chunksize=current_app.config['STREAM_CHUNK_SIZE']))
+        if accepts == ARROW_MIMETYPE:
+            values = stream_arrow_values({'forecast_id': forecast_id}, chunks)
+        elif accepts == 'application/json':
+            values = stream_json_values(
+                ForecastValuesSchema(), {'forecast_id': forecast_id}, chunks)
+        else:
+            accepts = 'text/csv'
+            meta_url = url_for('forecasts.metadata',
+                               forecast_id=forecast_id,
+                               _external=True)
+            csv_header = (f'# forecast_id: {forecast_id}\n'
+                          f'# metadata: {meta_url}\n')
+            values = stream_csv_values(csv_header, chunks)
+        return make_streaming_response(values, accepts)
+
     def post(self, forecast_id, *args):
         """
         ---
@@ -237,6 +322,12 @@ class ForecastValuesView(MethodView):
                 2018-10-29T12:00:00Z,32.93
                 2018-10-29T13:00:00Z,25.17
                 2018-10-29T14:00:00Z,  # this value is NaN
+            application/vnd.apache.arrow.stream:
+              schema:
+                $ref: '#/components/schemas/ArrowValues'
+            application/vnd.apache.parquet:
+              schema:
+                $ref: '#/components/schemas/ParquetValues'
         responses:
           201:
             $ref: '#/components/responses/201-Created'
@@ -300,6 +391,44 @@ class ForecastLatestView(MethodView):
         return jsonify(data)
 
 
+class ForecastValueChangesView(MethodView):
+    def get(self, forecast_id, *args):
+        """
+        ---
+        summary: Get changed Forecast data.
+        description: |
+          Get the Forecast values that were stored or changed after
+          the values of a previous response, in the order they changed.
+        tags:
+        - Forecasts
+        parameters:
+          - forecast_id
+          - since
+          - value_changes_limit
+        responses:
+          200:
+            description: Changed Forecast values retrieved successfully.
+            content:
+              application/json:
+                schema:
+                  $ref: '#/components/schemas/ForecastValueChanges'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+          404:
+            $ref: '#/components/responses/404-NotFound'
+        """
+        since, limit = validate_since_limit()
+        storage = get_storage()
+        values, cursor, has_more = storage.read_value_changes(
+            forecast_id, 'forecasts', since, limit)
+        data = ForecastValueChangesSchema().dump(
+            {'forecast_id': forecast_id, 'values': values,
+             'cursor': format_value_cursor(cursor), 'has_more': has_more})
+        return jsonify(data)
+
+
 class ForecastTimeRangeView(MethodView):
     def get(self, forecast_id, *args):
         """
@@ -390,7 +519,7 @@ class ForecastMetadataView(MethodView):
         """
         storage = get_storage()
         forecast = storage.read_forecast(forecast_id)
-        return jsonify(ForecastSchema().dump(forecast))
+        return make_conditional_json(ForecastSchema().dump(forecast))
 
     def post(self, forecast_id, *args):
         """
@@ -450,25 +579,39 @@ class AllCDFForecastGroupsView(MethodView):
         description: List all probabilistic forecasts a user has access to.
         tags:
           - Probabilistic Forecasts
+        parameters:
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: A list of probabilistic forecasts
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/CDFForecastGroupMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
           404:
             $ref: '#/components/responses/404-NotFound'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        cdf_forecast_groups = storage.list_cdf_forecast_groups()
-        return jsonify(
-            CDFForecastGroupSchema(many=True).dump(cdf_forecast_groups)
-        )
+        cdf_forecast_groups = storage.list_cdf_forecast_groups(**params)
+        return make_page_response(
+            dump_many(CDFForecastGroupSchema, cdf_forecast_groups),
+            params['limit'], 'forecast_id')
 
     def post(self, *args):
         """
@@ -549,7 +692,8 @@ class CDFForecastGroupMetadataView(MethodView):
         """
         storage = get_storage()
         cdf_forecast_group = storage.read_cdf_forecast_group(forecast_id)
-        return jsonify(CDFForecastGroupSchema().dump(cdf_forecast_group))
+        return make_conditional_json(
+            CDFForecastGroupSchema().dump(cdf_forecast_group))
 
     def post(self, forecast_id, *args):
         """
@@ -649,7 +793,7 @@ class CDFForecastMetadata(MethodView):
         """
         storage = get_storage()
         cdf_forecast = storage.read_cdf_forecast(forecast_id)
-        return jsonify(CDFForecastSchema().dump(cdf_forecast))
+        return make_conditional_json(CDFForecastSchema().dump(cdf_forecast))
 
 
 class CDFForecastValues(MethodView):
@@ -663,6 +807,7 @@ class CDFForecastValues(MethodView):
         - forecast_id
         - start_time
         - end_time
+        - stream
         - accepts
         responses:
           200:
@@ -680,6 +825,14 @@ class CDFForecastValues(MethodView):
                   2018-10-29T12:00:00Z,32.93
                   2018-10-29T13:00:00Z,25.17
                   2018-10-29T14:00:00Z,  # this value is NaN
+              application/vnd.apache.arrow.stream:
+                schema:
+                  $ref: '#/components/schemas/ArrowValues'
+              application/vnd.apache.parquet:
+                schema:
+                  $ref: '#/components/schemas/ParquetValues'
+          304:
+            $ref: '#/components/responses/304-NotModified'
           400:
             $ref: '#/components/responses/400-TimerangeTooLarge'
           401:
@@ -689,10 +842,26 @@ class CDFForecastValues(MethodView):
         """
         start, end = validate_start_end()
         storage = get_storage()
-        values = storage.read_cdf_forecast_values(forecast_id, start, end)
-        accepts = request.accept_mimetypes.best_match(['application/json',
-                                                       'text/csv'])
-        if accepts == 'application/json':
+        accepts = request.accept_mimetypes.best_match(values_mimetypes())
+        stream = 'stream' in request.args and accepts != PARQUET_MIMETYPE
+        fingerprint = storage.read_values_fingerprint(
+            forecast_id, 'cdf_forecasts')
+        etag = make_etag(fingerprint, start, end, accepts, stream)
+        return make_conditional_response(etag, partial(
+            self._values_response, forecast_id, start, end, accepts,
+            stream, fingerprint))
+
+    def _values_response(self, forecast_id, start, end, accepts, stream,
+                         fingerprint):
+        if stream:
+            return self._stream(forecast_id, start, end, accepts)
+        storage = get_storage()
+        values = storage.read_cdf_forecast_values(
+            forecast_id, start, end, fingerprint=fingerprint)
+        if accepts in BINARY_MIMETYPES:
+            return make_binary_response(
+                values, accepts, {'forecast_id': forecast_id})
+        elif accepts == 'application/json':
             data = CDFForecastValuesSchema().dump({"forecast_id": forecast_id,
                                                    "values": values})
             return jsonify(data)
@@ -708,6 +877,27 @@ class CDFForecastValues(MethodView):
             response.mimetype = 'text/csv'
             return response
 
+    def _stream(self, forecast_id, start, end, accepts):
+        storage = get_storage()
+        chunks = prime_chunks(storage.read_cdf_forecast_values_chunks(
+            forecast_id, start, end,
+            chunksize=current_app.config['STREAM_CHUNK_SIZE']))
+        if accepts == ARROW_MIMETYPE:
+            values = stream_arrow_values({'forecast_id': forecast_id}, chunks)
+        elif accepts == 'application/json':
+            values = stream_json_values(
+                CDFForecastValuesSchema(), {'forecast_id': forecast_id},
+                chunks)
+        else:
+            accepts = 'text/csv'
+            meta_url = url_for('forecasts.single_cdf_metadata',
+                               forecast_id=forecast_id,
+                               _external=True)
+            csv_header = (f'# forecast_id: {forecast_id}\n'
+                          f'# metadata: {meta_url}\n')
+            values = stream_csv_values(csv_header, chunks)
+        return make_streaming_response(values, accepts)
+
     def post(self, forecast_id):
         """
         ---
@@ -735,6 +925,12 @@ class CDFForecastValues(MethodView):
                 2018-10-29T12:00:00Z,32.93
                 2018-10-29T13:00:00Z,25.17
                 2018-10-29T14:00:00Z,  # this value is NaN
+            application/vnd.apache.arrow.stream:
+              schema:
+                $ref: '#/components/schemas/ArrowValues'
+            application/vnd.apache.parquet:
+              schema:
+                $ref: '#/components/schemas/ParquetValues'
         responses:
           201:
             $ref: '#/components/responses/201-Created'
@@ -798,6 +994,46 @@ class CDFForecastLatestView(MethodView):
         return jsonify(data)
 
 
+class CDFForecastValueChangesView(MethodView):
+    def get(self, forecast_id, *args):
+        """
+        ---
+        summary: Get changed Probabilistic Forecast data.
+        description: |
+          Get the values for one constant value of a Probabilistic
+          Forecast that were stored or changed after the values of a
+          previous response, in the order they changed.
+        tags:
+        - Probabilistic Forecasts
+        parameters:
+          - forecast_id
+          - since
+          - value_changes_limit
+        responses:
+          200:
+            description: >-
+              Changed CDF forecast values retrieved successfully.
+            content:
+              application/json:
+                schema:
+                  $ref: '#/components/schemas/CDFForecastValueChanges'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+          404:
+            $ref: '#/components/responses/404-NotFound'
+        """
+        since, limit = validate_since_limit()
+        storage = get_storage()
+        values, cursor, has_more = storage.read_value_changes(
+            forecast_id, 'cdf_forecasts', since, limit)
+        data = CDFForecastValueChangesSchema().dump(
+            {'forecast_id': forecast_id, 'values': values,
+             'cursor': format_value_cursor(cursor), 'has_more': has_more})
+        return jsonify(data)
+
+
 class CDFForecastTimeRangeView(MethodView):
     def get(self, forecast_id, *args):
         """
@@ -901,6 +1137,217 @@ class CDFGroupForecastGapView(MethodView):
         return jsonify(data)
 
 
+class CDFForecastGroupValuesView(MethodView):
+    def get(self, forecast_id, *args):
+        """
+        ---
+        summary: Get Probabilistic Forecast data for all constant values.
+        description: |
+          Get the values of every constant value of a Probabilistic
+          Forecast at once. Values are returned for each timestamp in
+          the order of constant_values, or as one CSV column named by
+          each constant value. Missing values are null or empty.
+        tags:
+          - Probabilistic Forecasts
+        parameters:
+        - forecast_id
+        - start_time
+        - end_time
+        - accepts
+        responses:
+          200:
+            description: CDF forecast group values sucessfully retrieved.
+            content:
+              application/json:
+                schema:
+                  $ref: '#/components/schemas/CDFForecastGroupValues'
+              text/csv:
+                schema:
+                  type: string
+                example: |-
+                  # comment line
+                  timestamp,25.0,50.0,75.0
+                  2018-10-29T12:00:00Z,21.2,32.93,40.1
+                  2018-10-29T13:00:00Z,15.0,25.17,30.8
+          304:
+            $ref: '#/components/responses/304-NotModified'
+          400:
+            $ref: '#/components/responses/400-TimerangeTooLarge'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+          404:
+            $ref: '#/components/responses/404-NotFound'
+        """
+        start, end = validate_start_end()
+        storage = get_storage()
+        accepts = request.accept_mimetypes.best_match(
+            ['application/json', 'text/csv'])
+        fingerprint = storage.read_values_fingerprint(
+            forecast_id, 'cdf_forecasts_groups')
+        etag = make_etag(fingerprint, start, end, accepts)
+        return make_conditional_response(etag, partial(
+            self._values_response, forecast_id, start, end, accepts))
+
+    def _values_response(self, forecast_id, start, end, accepts):
+        storage = get_storage()
+        values = storage.read_cdf_forecast_group_values(
+            forecast_id, start, end)
+        if accepts == 'application/json':
+            data = CDFForecastGroupValuesSchema().dump({
+                'forecast_id': forecast_id,
+                'constant_values': list(values.columns),
+                'values': values})
+            return jsonify(data)
+        else:
+            meta_url = url_for('forecasts.single_cdf_group',
+                               forecast_id=forecast_id,
+                               _external=True)
+            csv_header = (f'# forecast_id: {forecast_id}\n'
+                          f'# metadata: {meta_url}\n')
+            csv_values = values.to_csv(date_format='%Y%m%dT%H:%M:%S%z')
+            response = make_response(csv_header + csv_values, 200)
+            response.mimetype = 'text/csv'
+            return response
+
+    def post(self, forecast_id, *args):
+        """
+        ---
+        summary: Add Probabilistic Forecast data for many constant values.
+        description: |
+          Add timeseries values to any number of the constant values of
+          a Probabilistic Forecast at once. Each constant value must
+          be one of the constant values of the forecast. Float values
+          *will be rounded* to 8 decimal places before storage.
+        tags:
+        - Probabilistic Forecasts
+        parameters:
+        - forecast_id
+        requestBody:
+          required: True
+          content:
+            application/json:
+              schema:
+                $ref: '#/components/schemas/CDFForecastGroupValuesPost'
+            text/csv:
+              schema:
+                type: string
+              example: |-
+                # comment line
+                timestamp,25.0,50.0,75.0
+                2018-10-29T12:00:00Z,21.2,32.93,40.1
+                2018-10-29T13:00:00Z,15.0,25.17,  # this value is NaN
+        responses:
+          201:
+            $ref: '#/components/responses/201-Created'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+          404:
+            $ref: '#/components/responses/404-NotFound'
+          413:
+            $ref: '#/components/responses/413-PayloadTooLarge'
+        """
+        forecast_df = validate_parsable_cdf_group_values()
+        forecast_df = forecast_df.set_index('timestamp').sort_index()
+        storage = get_storage()
+        interval_length, previous_time, extra_params, is_event = (
+            storage.read_metadata_for_cdf_forecast_group_values(
+                forecast_id, forecast_df.index[0])
+        )
+        restrict_forecast_upload_window(
+            extra_params, partial(storage.read_cdf_forecast_group,
+                                  forecast_id),
+            forecast_df.index[0]
+        )
+        validate_index_period(forecast_df.index, interval_length,
+                              previous_time)
+        if is_event:
+            validate_event_data(
+                forecast_df.stack(dropna=False).to_frame('value'))
+        stored = storage.store_cdf_forecast_group_values(
+            forecast_id, forecast_df)
+        return stored, 201
+
+
+class ForecastValuesBatchView(MethodView):
+    def post(self, *args):
+        """
+        ---
+        summary: Add data to many Forecasts
+        description: |
+          Add new timeseries values to many Forecasts and Probabilistic
+          Forecast constant values. The values of every forecast are
+          validated as for the single forecast endpoints before any
+          values are stored, and all values are stored in a single
+          transaction, so either all or none of the values are added.
+          Float values *will be rounded* to 8 decimal places before
+          storage.
+        tags:
+        - Forecasts
+        requestBody:
+          required: True
+          content:
+            application/json:
+              schema:
+                $ref: '#/components/schemas/ForecastValuesBatchPost'
+        responses:
+          201:
+            description: Values added successfully.
+            content:
+              application/json:
+                schema:
+                  type: array
+                  items:
+                    type: string
+                    format: uuid
+                  description: The uuids of the forecasts.
+          400:
+            $ref: '#/components/responses/400-BadRequest'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+          404:
+            $ref: '#/components/responses/404-NotFound'
+          413:
+            $ref: '#/components/responses/413-PayloadTooLarge'
+        """
+        forecasts = validate_parsable_values_batch()
+        for forecast in forecasts:
+            forecast['values'] = forecast['values'].set_index(
+                'timestamp').sort_index()
+        storage = get_storage()
+        metadata = storage.read_metadata_for_forecast_values_batch([
+            (fx['forecast_id'], fx['type'], fx['values'].index[0])
+            for fx in forecasts])
+        readers = {'forecast': storage.read_forecast,
+                   'cdf_forecast': storage.read_cdf_forecast}
+        errors = {}
+        for i, (forecast, fx_metadata) in enumerate(
+                zip(forecasts, metadata)):
+            interval_length, previous_time, extra_params, is_event = (
+                fx_metadata)
+            forecast_df = forecast['values']
+            try:
+                restrict_forecast_upload_window(
+                    extra_params,
+                    partial(readers[forecast['type']],
+                            str(forecast['forecast_id'])),
+                    forecast_df.index[0]
+                )
+                validate_index_period(forecast_df.index, interval_length,
+                                      previous_time)
+                if is_event:
+                    validate_event_data(forecast_df)
+            except BadAPIRequest as err:
+                errors[str(i)] = err.errors
+        if errors:
+            raise BadAPIRequest(forecasts=errors)
+        stored = storage.store_forecast_values_batch([
+            (fx['forecast_id'], fx['type'], fx['values'])
+            for fx in forecasts])
+        return jsonify(stored), 201
+
+
 spec.components.parameter(
     'forecast_id', 'path',
     {
@@ -928,6 +1375,9 @@ forecast_blp.add_url_rule(
 forecast_blp.add_url_rule(
     '/single/<uuid_str:forecast_id>/values/latest',
     view_func=ForecastLatestView.as_view('latest_value'))
+forecast_blp.add_url_rule(
+    '/single/<uuid_str:forecast_id>/values/changes',
+    view_func=ForecastValueChangesView.as_view('value_changes'))
 forecast_blp.add_url_rule(
     '/single/<uuid_str:forecast_id>/values/timerange',
     view_func=ForecastTimeRangeView.as_view('time_range'))
@@ -937,6 +1387,9 @@ forecast_blp.add_url_rule(
 forecast_blp.add_url_rule(
     '/single/<uuid_str:forecast_id>/metadata',
     view_func=ForecastMetadataView.as_view('metadata'))
+forecast_blp.add_url_rule(
+    '/values/batch',
+    view_func=ForecastValuesBatchView.as_view('values_batch'))
 
 forecast_blp.add_url_rule(
     '/cdf/',
@@ -944,6 +1397,9 @@ forecast_blp.add_url_rule(
 forecast_blp.add_url_rule(
     '/cdf/<uuid_str:forecast_id>',
     view_func=CDFForecastGroupMetadataView.as_view('single_cdf_group'))
+forecast_blp.add_url_rule(
+    '/cdf/<uuid_str:forecast_id>/values',
+    view_func=CDFForecastGroupValuesView.as_view('cdf_group_values'))
 forecast_blp.add_url_rule(
     '/cdf/<uuid_str:forecast_id>/values/gaps',
     view_func=CDFGroupForecastGapView.as_view('cdf_group_gaps'))
@@ -956,6 +1412,9 @@ forecast_blp.add_url_rule(
 forecast_blp.add_url_rule(
     '/cdf/single/<uuid_str:forecast_id>/values/latest',
     view_func=CDFForecastLatestView.as_view('cdf_latest_value'))
+forecast_blp.add_url_rule(
+    '/cdf/single/<uuid_str:forecast_id>/values/changes',
+    view_func=CDFForecastValueChangesView.as_view('cdf_value_changes'))
 forecast_blp.add_url_rule(
     '/cdf/single/<uuid_str:forecast_id>/values/timerange',
     view_func=CDFForecastTimeRangeView.as_view('cdf_time_range'))
@@ -1,3 +1,6 @@
+from functools import partial
+
+
 from flask import (Blueprint, request, jsonify, make_response, url_for,
                    current_app)
 from flask.views import MethodView
@@ -13,11 +16,30 @@ from sfa_api.utils.queuing import get_queue
 from sfa_api.utils.errors import BadAPIRequest
 from sfa_api.utils.request_handling import (validate_parsable_values,
                                             validate_start_end,
+                                            validate_since_limit,
                                             validate_observation_values,
                                             validate_index_period,
-                                            validate_event_data)
+                                            validate_event_data,
+                                            validate_list_parameters)
+from sfa_api.utils.response_handling import (ARROW_MIMETYPE,
+                                             BINARY_MIMETYPES,
+                                             PARQUET_MIMETYPE,
+                                             format_value_cursor,
+                                             dump_many,
+                                             make_binary_response,
+                                             make_conditional_json,
+                                             make_conditional_response,
+                                             make_etag,
+                                             make_page_response,
+                                             make_streaming_response,
+                                             prime_chunks,
+                                             stream_arrow_values,
+                                             stream_csv_values,
+                                             stream_json_values,
+                                             values_mimetypes)
 from sfa_api.utils.validators import ALLOWED_TIMEZONES
 from sfa_api.schema import (ObservationValuesSchema,
+                            ObservationValueChangesSchema,
                             ObservationSchema,
                             ObservationPostSchema,
                             ObservationLinksSchema,
@@ -35,21 +57,37 @@ class AllObservationsView(MethodView):
         description: List all observations that the user has access to.
         tags:
           - Observations
+        parameters:
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: A list of observations
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/ObservationMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        observations = storage.list_observations()
-        return jsonify(ObservationSchema(many=True).dump(observations))
+        observations = storage.list_observations(**params)
+        return make_page_response(
+            dump_many(ObservationSchema, observations),
+            params['limit'], 'observation_id')
 
     def post(self, *args):
         """
@@ -127,7 +165,8 @@ class ObservationView(MethodView):
         """
         storage = get_storage()
         observation = storage.read_observation(observation_id)
-        return jsonify(ObservationLinksSchema().dump(observation))
+        return make_conditional_json(
+            ObservationLinksSchema().dump(observation))
 
     def delete(self, observation_id, *args):
         """
@@ -163,6 +202,7 @@ class ObservationValuesView(MethodView):
           - observation_id
           - start_time
           - end_time
+          - stream
           - accepts
         responses:
           200:
@@ -178,6 +218,14 @@ class ObservationValuesView(MethodView):
                   timestamp,value,quality_flag
                   2018-10-29T12:00:00Z,32.93,0
                   2018-10-29T13:00:00Z,25.17,0
+              application/vnd.apache.arrow.stream:
+                schema:
+                  $ref: '#/components/schemas/ArrowValues'
+              application/vnd.apache.parquet:
+                schema:
+                  $ref: '#/components/schemas/ParquetValues'
+          304:
+            $ref: '#/components/responses/304-NotModified'
           400:
             $ref: '#/components/responses/400-TimerangeTooLarge'
           401:
@@ -187,10 +235,27 @@ class ObservationValuesView(MethodView):
         """
         start, end = validate_start_end()
         storage = get_storage()
-        values = storage.read_observation_values(observation_id, start, end)
-        accepts = request.accept_mimetypes.best_match(['application/json',
-                                                       'text/csv'])
-        if accepts == 'application/json':
+        accepts = request.accept_mimetypes.best_match(values_mimetypes())
+        stream = 'stream' in request.args and accepts != PARQUET_MIMETYPE
+        fingerprint = storage.read_values_fingerprint(
+            observation_id, 'observations')
+        etag = make_etag(fingerprint, start, end, accepts, stream)
+        return make_conditional_response(etag, partial(
+            self._values_response, observation_id, start, end, accepts,
+            stream, fingerprint))
+
+    def _values_response(self, observation_id, start, end, accepts, stream,
+                         fingerprint):
+        if stream:
+            return self._stream(observation_id, start, end, accepts)
+        storage = get_storage()
+        values = storage.read_observation_values(
+            observation_id, start, end, fingerprint=fingerprint)
+        if accepts in BINARY_MIMETYPES:
+            return make_binary_response(
+                values, accepts, {'observation_id': observation_id},
+                columns=['value', 'quality_flag'])
+        elif accepts == 'application/json':
             data = ObservationValuesSchema().dump(
                 {"observation_id": observation_id, "values": values})
             return jsonify(data)
@@ -207,6 +272,30 @@ class ObservationValuesView(MethodView):
             response.mimetype = 'text/csv'
             return response
 
+    def _stream(self, observation_id, start, end, accepts):
+        storage = get_storage()
+        chunks = prime_chunks(storage.read_observation_values_chunks(
+            observation_id, start, end,
+            chunksize=current_app.config['STREAM_CHUNK_SIZE']))
+        if accepts == ARROW_MIMETYPE:
+            values = stream_arrow_values(
+                {'observation_id': observation_id}, chunks,
+                columns=['value', 'quality_flag'])
+        elif accepts == 'application/json':
+            values = stream_json_values(
+                ObservationValuesSchema(),
+                {'observation_id': observation_id}, chunks)
+        else:
+            accepts = 'text/csv'
+            meta_url = url_for('observations.metadata',
+                               observation_id=observation_id,
+                               _external=True)
+            csv_header = f'# observation_id: {observation_id}\n# metadata: {meta_url}\n'  # NOQA
+            values = stream_csv_values(
+                csv_header, chunks, columns=['value', 'quality_flag'],
+                index_label='timestamp')
+        return make_streaming_response(values, accepts)
+
     def post(self, observation_id, *args):
         """
         ---
@@ -245,6 +334,12 @@ class ObservationValuesView(MethodView):
                 2018-10-29T12:00:00Z,32.93,0
                 2018-10-29T13:00:00Z,25.17,0
                 2018-10-29T14:00:00Z,,1  # this value is NaN
+            application/vnd.apache.arrow.stream:
+              schema:
+                $ref: '#/components/schemas/ArrowValues'
+            application/vnd.apache.parquet:
+              schema:
+                $ref: '#/components/schemas/ParquetValues'
         responses:
           201:
             $ref: '#/components/responses/201-Created'
@@ -326,6 +421,45 @@ class ObservationLatestView(MethodView):
         return jsonify(data)
 
 
+class ObservationValueChangesView(MethodView):
+    def get(self, observation_id, *args):
+        """
+        ---
+        summary: Get changed Observation data.
+        description: |
+          Get the Observation values that were stored or changed,
+          including changes to the quality flag of older values, after
+          the values of a previous response, in the order they changed.
+        tags:
+        - Observations
+        parameters:
+          - observation_id
+          - since
+          - value_changes_limit
+        responses:
+          200:
+            description: Changed Observation values retrieved successfully.
+            content:
+              application/json:
+                schema:
+                  $ref: '#/components/schemas/ObservationValueChanges'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+          404:
+            $ref: '#/components/responses/404-NotFound'
+        """
+        since, limit = validate_since_limit()
+        storage = get_storage()
+        values, cursor, has_more = storage.read_value_changes(
+            observation_id, 'observations', since, limit)
+        data = ObservationValueChangesSchema().dump(
+            {'observation_id': observation_id, 'values': values,
+             'cursor': format_value_cursor(cursor), 'has_more': has_more})
+        return jsonify(data)
+
+
 class ObservationTimeRangeView(MethodView):
     def get(self, observation_id, *args):
         """
@@ -476,7 +610,7 @@ class ObservationMetadataView(MethodView):
         """
         storage = get_storage()
         observation = storage.read_observation(observation_id)
-        return jsonify(ObservationSchema().dump(observation))
+        return make_conditional_json(ObservationSchema().dump(observation))
 
     def post(self, observation_id, *args):
         """
@@ -580,6 +714,9 @@ obs_blp.add_url_rule(
 obs_blp.add_url_rule(
     '/<uuid_str:observation_id>/values/latest',
     view_func=ObservationLatestView.as_view('latest_value'))
+obs_blp.add_url_rule(
+    '/<uuid_str:observation_id>/values/changes',
+    view_func=ObservationValueChangesView.as_view('value_changes'))
 obs_blp.add_url_rule(
     '/<uuid_str:observation_id>/values/timerange',
     view_func=ObservationTimeRangeView.as_view('time_range'))
@@ -10,6 +10,10 @@ from sfa_api import spec
 from sfa_api.utils.auth import current_access_token
 from sfa_api.utils.errors import BadAPIRequest, StorageAuthError
 from sfa_api.utils.queuing import get_queue
+from sfa_api.utils.request_handling import (validate_fields,
+                                            validate_list_parameters)
+from sfa_api.utils.response_handling import (make_conditional_json,
+                                             make_page_response)
 from sfa_api.utils.storage import get_storage
 from sfa_api.schema import (ReportPostSchema, ReportValuesPostSchema,
                             ReportSchema, SingleReportSchema,
@@ -18,6 +22,7 @@ from sfa_api.schema import (ReportPostSchema, ReportValuesPostSchema,
 
 
 REPORT_STATUS_OPTIONS = ['pending', 'failed', 'complete']
+REPORT_FIELDS = tuple(SingleReportSchema().fields)
 
 
 def enqueue_report(report_id, base_url):
@@ -42,21 +47,36 @@ class AllReportsView(MethodView):
         summary: List Reports.
         tags:
           - Reports
+        parameters:
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: A List of reports
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/ReportSchema'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        reports = storage.list_reports()
-        return jsonify(ReportSchema(many=True).dump(reports))
+        reports = storage.list_reports(cursor=params['cursor'],
+                                       limit=params['limit'])
+        return make_page_response(ReportSchema(many=True).dump(reports),
+                                  params['limit'], 'report_id')
 
     def post(self):
         """
@@ -152,10 +172,16 @@ class ReportView(MethodView):
         """
         ---
         summary: Get report metadata.
+        description: |
+          Get the report, or only the fields listed in the fields
+          parameter. The raw report, values, and outages are only read
+          when requested, so e.g. fields=status,report_parameters is
+          much faster for large reports.
         tags:
           - Reports
         parameters:
         - report_id
+        - fields
         responses:
           200:
             description: Successfully retrieved report metadata.
@@ -168,9 +194,11 @@ class ReportView(MethodView):
           404:
             $ref: '#components/responses/404-NotFound'
         """
+        fields = validate_fields(REPORT_FIELDS)
         storage = get_storage()
-        report = storage.read_report(report_id)
-        return jsonify(SingleReportSchema().dump(report))
+        report = storage.read_report(report_id, fields)
+        return make_conditional_json(
+            SingleReportSchema(only=fields).dump(report))
 
     def delete(self, report_id):
         """
@@ -287,7 +315,7 @@ class ReportValuesView(MethodView):
         """
         storage = get_storage()
         values = storage.read_report_values(report_id)
-        return jsonify(values)
+        return make_conditional_json(values)
 
     def post(self, report_id):
         """
@@ -332,6 +360,40 @@ class ReportValuesView(MethodView):
         return value_id, 201
 
 
+class ReportObjectValuesView(MethodView):
+    def get(self, report_id, object_id):
+        """
+        ---
+        summary: Get the processed values of one object in a report
+        description: |
+          Get the processed values of one forecast or observation used
+          in a report, without reading the values of every other object.
+        tags:
+        - Reports
+        parameters:
+        - report_id
+        - object_id
+        responses:
+          200:
+            description: Successfully retrieved
+            content:
+              application/json:
+                schema:
+                  type: array
+                  items:
+                    $ref: '#/components/schemas/ReportValuesSchema'
+          304:
+            $ref: '#/components/responses/304-NotModified'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+          404:
+            $ref: '#/components/responses/404-NotFound'
+        """
+        storage = get_storage()
+        values = storage.read_report_object_values(report_id, object_id)
+        return make_conditional_json(values)
+
+
 class ReportOutageView(MethodView):
     def get(self, report_id):
         """
@@ -490,6 +552,10 @@ reports_blp.add_url_rule(
     '/<uuid_str:report_id>/values',
     view_func=ReportValuesView.as_view('values')
 )
+reports_blp.add_url_rule(
+    '/<uuid_str:report_id>/values/<uuid_str:object_id>',
+    view_func=ReportObjectValuesView.as_view('object_values')
+)
 reports_blp.add_url_rule(
     '/<uuid_str:report_id>/recompute',
     view_func=RecomputeReportView.as_view('recompute')
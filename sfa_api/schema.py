@@ -67,35 +67,63 @@ class ISODateTime(ma.AwareDateTime):
         return value.isoformat()
 
 
+def timeseries_to_json(value, cols):
+    """Dump a DataFrame to a JSON array of records with keys cols.
+    A DatetimeIndex named like one of cols is converted to UTC and
+    included as a column.
+    """
+    # errors are not handled. This should always be
+    # passed a dataframe with the right columns
+    if (
+        value.index.name in cols and
+        value.index.name not in value.columns
+    ):
+        if isinstance(value.index, pd.DatetimeIndex):
+            if value.index.tzinfo is None:
+                value = value.tz_localize('UTC')
+            else:
+                value = value.tz_convert('UTC')
+        value = value.reset_index()
+    return value.reindex(columns=cols).to_json(
+        orient='records', date_format='iso', date_unit='s',
+        double_precision=8
+    )
+
+
 class TimeseriesField(ma.Nested):
     """Support serialization of schemas that include a DataFrame along
     with other parameters. Does not support deserialization or validation;
     see sfa_api.utils.request_handling for functions that do.
     """
     def _serialize(self, value, attr, obj, **kwargs):
-        # errors are not handled. This should always be
-        # passed a dataframe with the right columns
         cols = self.schema.declared_fields.keys()
-        if (
-            value.index.name in cols and
-            value.index.name not in value.columns
-        ):
-            if isinstance(value.index, pd.DatetimeIndex):
-                if value.index.tzinfo is None:
-                    value = value.tz_localize('UTC')
-                else:
-                    value = value.tz_convert('UTC')
-            value = value.reset_index()
         # annoying to dump to json, then load, then dump again
         # via flask, but substantially (~1.5x - 2x) faster then dumping
         # directly via flask/jsonify
-        out_json = value.reindex(columns=cols).to_json(
-            orient='records', date_format='iso', date_unit='s',
-            double_precision=8
-        )
+        out_json = timeseries_to_json(value, cols)
         return json.loads(out_json)
 
 
+class WideTimeseriesField(ma.Nested):
+    """Serialize a DataFrame with a DatetimeIndex and many columns of
+    values to a list of records with a timestamp and a list of the
+    values of each column in column order. Does not support
+    deserialization or validation; see sfa_api.utils.request_handling
+    for functions that do.
+    """
+    def _serialize(self, value, attr, obj, **kwargs):
+        if isinstance(value.index, pd.DatetimeIndex):
+            if value.index.tzinfo is None:
+                value = value.tz_localize('UTC')
+            else:
+                value = value.tz_convert('UTC')
+        out = json.loads(value.to_json(
+            orient='split', date_format='iso', date_unit='s',
+            double_precision=8))
+        return [{'timestamp': ts, 'values': vals}
+                for ts, vals in zip(out['index'], out['data'])]
+
+
 # solarforecastarbiter.datamodel defines allowed variable as a dict of
 # variable: units we just want the variable names here
 VARIABLES = ALLOWED_VARIABLES.keys()
@@ -566,6 +594,22 @@ class ObservationValuesSchema(ObservationValuesPostSchema):
     _links = OBSERVATION_LINKS
 
 
+VALUE_CHANGES_CURSOR = ma.String(
+    title='Cursor',
+    description=('Pass as the since parameter to read the values changed '
+                 'after these values.'))
+VALUE_CHANGES_HAS_MORE = ma.Boolean(
+    title='Has more',
+    description=('If more changed values can be read now by passing the '
+                 'cursor as the since parameter.'))
+
+
+@spec.define_schema('ObservationValueChanges')
+class ObservationValueChangesSchema(ObservationValuesSchema):
+    cursor = VALUE_CHANGES_CURSOR
+    has_more = VALUE_CHANGES_HAS_MORE
+
+
 class TimeRangeSchema(ma.Schema):
     class Meta:
         strict = True
@@ -742,6 +786,33 @@ class ForecastValuesCSVSchema(ma.Schema):
     pass
 
 
+@spec.define_schema('ArrowValues', component={
+    "type": "string",
+    "format": "binary",
+    "description": """
+Apache Arrow IPC stream with a "timestamp" column of UTC timestamps and
+the "value" column, plus a "quality_flag" column for observations and
+aggregates. The object id is included in the schema metadata of
+responses. When posting values, the same columns are required and
+timestamps without a timezone are assumed to be UTC.
+Only available if the API server has pyarrow installed.
+"""})
+class ArrowValuesSchema(ma.Schema):
+    pass
+
+
+@spec.define_schema('ParquetValues', component={
+    "type": "string",
+    "format": "binary",
+    "description": """
+Apache Parquet file with the same columns and metadata as the
+Apache Arrow IPC stream. Only available if the API server has pyarrow
+installed.
+"""})
+class ParquetValuesSchema(ma.Schema):
+    pass
+
+
 @spec.define_schema('ForecastValues')
 class ForecastValuesSchema(ForecastValuesPostSchema):
     forecast_id = ma.UUID(
@@ -750,6 +821,12 @@ class ForecastValuesSchema(ForecastValuesPostSchema):
     _links = FORECAST_LINKS
 
 
+@spec.define_schema('ForecastValueChanges')
+class ForecastValueChangesSchema(ForecastValuesSchema):
+    cursor = VALUE_CHANGES_CURSOR
+    has_more = VALUE_CHANGES_HAS_MORE
+
+
 @spec.define_schema('ForecastTimeRange')
 class ForecastTimeRangeSchema(TimeRangeSchema):
     forecast_id = ma.UUID(
@@ -948,6 +1025,58 @@ class CDFForecastValuesSchema(CDFForecastValuesPostSchema):
     _links = CDF_LINKS
 
 
+@spec.define_schema('CDFForecastValueChanges')
+class CDFForecastValueChangesSchema(CDFForecastValuesSchema):
+    cursor = VALUE_CHANGES_CURSOR
+    has_more = VALUE_CHANGES_HAS_MORE
+
+
+@spec.define_schema('CDFForecastGroupValue')
+class CDFForecastGroupValueSchema(ma.Schema):
+    class Meta:
+        strict = True
+        ordered = True
+    timestamp = ISODateTime(
+        title="Timestamp",
+        description=(
+            "ISO 8601 Datetime. Unlocalized times are assumed to be UTC."
+        ),
+        validate=TimeLimitValidator()
+    )
+    values = ma.List(
+        ma.Float(allow_nan=True),
+        title="Values",
+        description=(
+            'Value of each constant value at this time in the same order '
+            'as constant_values. NaN may be indicated with JSON null.'))
+
+
+@spec.define_schema('CDFForecastGroupValuesPost')
+class CDFForecastGroupValuesPostSchema(ma.Schema):
+    constant_values = ma.List(
+        ma.Float,
+        title='Constant Values',
+        description=(
+            'The constant values of the probabilistic forecast, one for '
+            'each item of the values of each timestamp.'))
+    values = WideTimeseriesField(CDFForecastGroupValueSchema, many=True)
+
+
+@spec.define_schema('CDFForecastGroupValues')
+class CDFForecastGroupValuesSchema(CDFForecastGroupValuesPostSchema):
+    forecast_id = ma.UUID(
+        title="Forecast ID",
+        description=(
+            "UUID of the probabilistic forecast associated with this data."))
+    _links = ma.Hyperlinks(
+        {
+            'metadata': ma.AbsoluteURLFor('forecasts.single_cdf_group',
+                                          forecast_id='<forecast_id>'),
+        },
+        description="Contains a link to the probabilistic forecast."
+    )
+
+
 @spec.define_schema('CDFForecastGroupDefinition')
 class CDFForecastGroupPostSchema(ForecastPostSchema):
     axis = AXIS_FIELD
@@ -1002,6 +1131,8 @@ class CDFForecastGroupSchema(CDFForecastGroupPostSchema):
                                       site_id='<site_id>'),
             'gaps': ma.AbsoluteURLFor('forecasts.cdf_group_gaps',
                                       forecast_id='<forecast_id>'),
+            'values': ma.AbsoluteURLFor('forecasts.cdf_group_values',
+                                        forecast_id='<forecast_id>'),
         },
         description="Contains a link to associated endpoints."
     )
@@ -1825,6 +1956,93 @@ class AggregateValuesSchema(ObservationValuesPostSchema):
     )
 
 
+VALUES_BATCH_TYPES = ['observation', 'forecast', 'cdf_forecast']
+
+
+@spec.define_schema('ValuesBatchObject')
+class ValuesBatchObjectSchema(ma.Schema):
+    class Meta:
+        strict = True
+        ordered = True
+    object_id = ma.UUID(
+        title='Object ID',
+        description=(
+            'UUID of the observation, forecast, or probabilistic forecast '
+            'constant value.'),
+        required=True)
+    type = ma.String(
+        title='Type',
+        description='The type of object_id.',
+        validate=validate.OneOf(VALUES_BATCH_TYPES),
+        required=True)
+    start = ISODateTime(
+        title='Start',
+        description=('ISO 8601 Datetime of the beginning of the period '
+                     'to read values for.'),
+        required=True)
+    end = ISODateTime(
+        title='End',
+        description=('ISO 8601 Datetime of the end of the period '
+                     'to read values for.'),
+        required=True)
+
+
+@spec.define_schema('ValuesBatchRequest')
+class ValuesBatchRequestSchema(ma.Schema):
+    objects = ma.List(
+        ma.Nested(ValuesBatchObjectSchema),
+        title='Objects',
+        description='The objects and periods to read values for.',
+        validate=validate.Length(min=1),
+        required=True)
+
+
+@spec.define_schema('ValuesBatchResult')
+class ValuesBatchResultSchema(ValuesBatchObjectSchema):
+    values = ma.List(
+        ma.Dict(),
+        title='Values',
+        description=(
+            'Values of the object between start and end. Each value has '
+            'the same fields as ObservationValue for observations or '
+            'ForecastValue for forecasts.'))
+
+
+@spec.define_schema('ValuesBatch')
+class ValuesBatchSchema(ma.Schema):
+    objects = ma.List(
+        ma.Nested(ValuesBatchResultSchema),
+        title='Objects',
+        description='Values of each requested object, in the same order.')
+
+
+@spec.define_schema('ForecastValuesBatchItem')
+class ForecastValuesBatchItemSchema(ma.Schema):
+    class Meta:
+        strict = True
+        ordered = True
+    forecast_id = ma.UUID(
+        title='Forecast ID',
+        description=(
+            'UUID of the forecast or probabilistic forecast constant value.'),
+        required=True)
+    type = ma.String(
+        title='Type',
+        description='The type of forecast_id.',
+        validate=validate.OneOf(['forecast', 'cdf_forecast']),
+        required=True)
+    values = TimeseriesField(ForecastValueSchema, many=True, required=True)
+
+
+@spec.define_schema('ForecastValuesBatchPost')
+class ForecastValuesBatchPostSchema(ma.Schema):
+    forecasts = ma.List(
+        ma.Nested(ForecastValuesBatchItemSchema),
+        title='Forecasts',
+        description='The values to add to each forecast.',
+        required=True)
+
+
 @spec.define_schema('ActionList')
 class ActionList(ma.Schema):
     object_id = ma.UUID(title="Object UUID")
@@ -1844,6 +2062,17 @@ class ActionsOnTypeList(ma.Schema):
         many=True)
 
 
+@spec.define_schema('ActionsOnObjectsList')
+class ActionsOnObjectsList(ma.Schema):
+    objects = ma.Nested(
+        ActionList,
+        title="Objects",
+        description=("List of object uuids and allowed actions. Objects "
+                     "the user cannot perform any action on are not "
+                     "included."),
+        many=True)
+
+
 @spec.define_schema('UserCreatePerms')
 class UserCreatePerms(ma.Schema):
     can_create = ma.List(
@@ -9,6 +9,8 @@ from sfa_api.schema import (SiteSchema, SiteResponseSchema,
                             ForecastSchema, ObservationSchema,
                             CDFForecastGroupSchema)
 from sfa_api.utils.errors import BadAPIRequest
+from sfa_api.utils.request_handling import validate_list_parameters
+from sfa_api.utils.response_handling import dump_many, make_page_response
 from sfa_api.utils.storage import get_storage
 
 
@@ -20,21 +22,36 @@ class AllSitesView(MethodView):
         description: List all sites that the user has access to.
         tags:
         - Sites
+        parameters:
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: A list of sites
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/SiteMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        sites = storage.list_sites()
-        return jsonify(SiteResponseSchema(many=True).dump(sites))
+        sites = storage.list_sites(cursor=params['cursor'],
+                                   limit=params['limit'])
+        return make_page_response(
+            dump_many(SiteResponseSchema, sites), params['limit'], 'site_id')
 
     def post(self, *args):
         """
@@ -114,7 +131,7 @@ class AllSitesInZoneView(MethodView):
         """
         storage = get_storage()
         sites = storage.list_sites_in_zone(zone.replace('+', ' '))
-        return jsonify(SiteResponseSchema(many=True).dump(sites))
+        return jsonify(dump_many(SiteResponseSchema, sites))
 
 
 class SiteView(MethodView):
@@ -233,23 +250,38 @@ class SiteObservations(MethodView):
         - Sites
         parameters:
         - site_id
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: Successfully retrieved site observations.
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/ObservationMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
           404:
              $ref: '#/components/responses/404-NotFound'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        observations = storage.list_observations(site_id)
-        return jsonify(ObservationSchema(many=True).dump(observations))
+        observations = storage.list_observations(site_id, **params)
+        return make_page_response(
+            dump_many(ObservationSchema, observations),
+            params['limit'], 'observation_id')
 
 
 class SiteForecasts(MethodView):
@@ -264,23 +296,38 @@ class SiteForecasts(MethodView):
         - Sites
         parameters:
         - site_id
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: Successfully retrieved site forecasts
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/ForecastMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
           404:
              $ref: '#/components/responses/404-NotFound'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        forecasts = storage.list_forecasts(site_id=site_id)
-        return jsonify(ForecastSchema(many=True).dump(forecasts))
+        forecasts = storage.list_forecasts(site_id=site_id, **params)
+        return make_page_response(
+            dump_many(ForecastSchema, forecasts),
+            params['limit'], 'forecast_id')
 
 
 class SiteCDFForecastGroups(MethodView):
@@ -295,23 +342,38 @@ class SiteCDFForecastGroups(MethodView):
         - Sites
         parameters:
         - site_id
+        - variable
+        - list_cursor
+        - list_limit
         responses:
           200:
             description: Successfully retrieved site cdf forecasts
+            headers:
+              Link:
+                schema:
+                  type: string
+                  description: >-
+                    Url of the next page with the rel="next" parameter, when
+                    the page is full.
             content:
               application/json:
                 schema:
                   type: array
                   items:
                     $ref: '#/components/schemas/CDFForecastGroupMetadata'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
           401:
             $ref: '#/components/responses/401-Unauthorized'
           404:
              $ref: '#/components/responses/404-NotFound'
         """
+        params = validate_list_parameters()
         storage = get_storage()
-        forecasts = storage.list_cdf_forecast_groups(site_id)
-        return jsonify(CDFForecastGroupSchema(many=True).dump(forecasts))
+        forecasts = storage.list_cdf_forecast_groups(site_id, **params)
+        return make_page_response(
+            dump_many(CDFForecastGroupSchema, forecasts),
+            params['limit'], 'forecast_id')
 
 
 spec.components.parameter(
@@ -48,6 +48,10 @@ spec_components = {
         '400-TimerangeTooLarge': {
             'description': 'Requested more than maximum of 1 year of data.',
         },
+        '304-NotModified': {
+            'description': 'The resource matches the ETag in the '
+                           'If-None-Match header.',
+        },
     },
     'securitySchemes': {
         'auth0': {
@@ -91,11 +95,108 @@ spec_components = {
                 'format': 'date-time',
             },
         },
+        'stream': {
+            'in': 'query',
+            'name': 'stream',
+            'required': False,
+            'description': ('If present, the values are read from the '
+                            'database and sent to the client in chunks. '
+                            'Recommended for large requests.'),
+            'allowEmptyValue': True,
+            'schema': {
+                'type': 'boolean',
+            },
+        },
+        'since': {
+            'in': 'query',
+            'name': 'since',
+            'required': False,
+            'description': ('The cursor of a previous response to only '
+                            'return values stored or changed after the '
+                            'values of that response. Values are returned '
+                            'in the order their stores were committed, so '
+                            'passing the cursor of each response to the '
+                            'next request returns every change once, and '
+                            'values changed again are returned again. If '
+                            'not provided, all values are returned.'),
+            'schema': {
+                'type': 'string',
+            },
+        },
+        'value_changes_limit': {
+            'in': 'query',
+            'name': 'limit',
+            'required': False,
+            'description': ('Maximum number of values to return. Defaults '
+                            'to, and may not exceed, 100000.'),
+            'schema': {
+                'type': 'integer',
+                'minimum': 1,
+            },
+        },
+        'fields': {
+            'in': 'query',
+            'name': 'fields',
+            'required': False,
+            'description': ('Comma separated list of the fields to '
+                            'return. All fields are returned if not '
+                            'provided.'),
+            'schema': {
+                'type': 'string',
+            },
+        },
+        'object_ids': {
+            'in': 'query',
+            'name': 'object_ids',
+            'required': True,
+            'description': 'Comma separated list of object UUIDs.',
+            'schema': {
+                'type': 'string',
+            },
+        },
+        'variable': {
+            'in': 'query',
+            'name': 'variable',
+            'required': False,
+            'description': 'Only list objects of this variable.',
+            'schema': {
+                'type': 'string',
+            },
+        },
+        'list_cursor': {
+            'in': 'query',
+            'name': 'cursor',
+            'required': False,
+            'description': ('Only list objects after the object with this '
+                            'id. The Link header of a response with the '
+                            'rel="next" parameter is the url of the next '
+                            'page.'),
+            'schema': {
+                'type': 'string',
+                'format': 'uuid',
+            },
+        },
+        'list_limit': {
+            'in': 'query',
+            'name': 'limit',
+            'required': False,
+            'description': ('Maximum number of objects to return, up to '
+                            '10000. All objects are returned if not '
+                            'provided.'),
+            'schema': {
+                'type': 'integer',
+                'minimum': 1,
+                'maximum': 10000,
+            },
+        },
         'accepts': {
             'name': 'Accept',
             'in': 'header',
             'description': 'The mimetype the API should return '
-                           '"application/json" or "text/csv".',
+                           '"application/json" or "text/csv". Value '
+                           'endpoints may also return '
+                           '"application/vnd.apache.arrow.stream" or '
+                           '"application/vnd.apache.parquet".',
             'schema': {
                 'type': 'string',
             },
@@ -364,6 +465,8 @@ spec = APISpec(
          'description': 'Access and upload probabilistic forecast metadata and values'}, # NOQA
         {'name': 'Reports',
          'description': 'Access and create reports.'},
+        {'name': 'Values',
+         'description': 'Access the values of many observations and forecasts at once.'},  # NOQA
         {'name': 'Aggregates',
          'description': 'Access observation data that has been aggregated for analysis.'},  # NOQA
         {'name': 'Climate Zones',
@@ -21,6 +21,8 @@ def mock_email_funcs(mocker, auth0id, user_email, external_auth0id,
                  new=check)
     mocker.patch('sfa_api.users.get_email_of_user',
                  return_value=user_email)
+    mocker.patch('sfa_api.users.get_emails_of_users',
+                 new=lambda ids: {aid: user_email for aid in ids})
 
 
 @pytest.fixture()
@@ -266,6 +268,34 @@ def test_get_user_actions_on_object_404_no_permissions(
     assert res.status_code == 404
 
 
+def test_get_user_actions_on_objects(
+        api, forecast_id, observation_id, missing_id,
+        inaccessible_forecast_id):
+    res = api.get(
+        f'/users/actions-on/?object_ids={forecast_id},{missing_id},'
+        f'{inaccessible_forecast_id},{observation_id}', BASE_URL)
+    assert res.status_code == 200
+    objects = res.json['objects']
+    assert [o['object_id'] for o in objects] == [forecast_id, observation_id]
+    for obj in objects:
+        assert sorted(obj['actions']) == sorted([
+            'delete', 'write_values', 'delete_values', 'read',
+            'read_values', 'update'])
+
+
+def test_get_user_actions_on_objects_none(api, missing_id):
+    res = api.get(f'/users/actions-on/?object_ids={missing_id}', BASE_URL)
+    assert res.status_code == 200
+    assert res.json == {'objects': []}
+
+
+@pytest.mark.parametrize('query', ['', '?object_ids=', '?object_ids=nope'])
+def test_get_user_actions_on_objects_400(api, query):
+    res = api.get(f'/users/actions-on/{query}', BASE_URL)
+    assert res.status_code == 400
+    assert 'object_ids' in res.json['errors']
+
+
 all_object_types = ['sites', 'aggregates', 'cdf_forecasts', 'forecasts',
                     'observations', 'roles', 'permissions', 'reports']
 
@@ -9,7 +9,7 @@ import pytest
 from sfa_api.conftest import (
     BASE_URL, copy_update, variables, agg_types,
     VALID_OBS_JSON, demo_forecasts, demo_group_cdf,
-    VALID_AGG_JSON, demo_aggregates)
+    VALID_AGG_JSON, demo_aggregates, list_pages)
 
 
 def test_get_all_aggregates(api):
@@ -21,6 +21,27 @@ def test_get_all_aggregates(api):
         assert 'observations' in agg
 
 
+def test_get_all_aggregates_pages(api):
+    expected = [agg['aggregate_id'] for agg in api.get(
+        '/aggregates/', base_url=BASE_URL).json]
+    pages = list_pages(api, '/aggregates/?limit=1', 'aggregate_id')
+    assert all(len(page) == 1 for page in pages[:-1])
+    assert sum(pages, []) == expected
+
+
+def test_get_all_aggregates_variable(api):
+    res = api.get('/aggregates/?variable=ghi', base_url=BASE_URL)
+    assert res.status_code == 200
+    assert all(agg['variable'] == 'ghi' for agg in res.json)
+
+
+@pytest.mark.parametrize('query', [
+    '?variable=nope', '?limit=0', '?cursor=nope'])
+def test_get_all_aggregates_400(api, query):
+    res = api.get(f'/aggregates/{query}', base_url=BASE_URL)
+    assert res.status_code == 400
+
+
 def test_post_aggregate_success(api):
     res = api.post('/aggregates/',
                    base_url=BASE_URL,
@@ -334,6 +355,27 @@ def test_get_aggregate_values_csv(api, aggregate_id, startend):
     assert 'timestamp,value,quality_flag' in data
 
 
+@pytest.mark.parametrize('mimetype', [
+    'application/vnd.apache.arrow.stream',
+    'application/vnd.apache.parquet'
+])
+def test_get_aggregate_values_binary(api, aggregate_id, startend, mimetype):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    res = api.get(f'/aggregates/{aggregate_id}/values{startend}',
+                  headers={'Accept': mimetype},
+                  base_url=BASE_URL)
+    assert res.status_code == 200
+    assert res.mimetype == mimetype
+    if mimetype == 'application/vnd.apache.arrow.stream':
+        table = pa.ipc.open_stream(res.get_data()).read_all()
+    else:
+        table = pq.read_table(pa.BufferReader(res.get_data()))
+    assert table.schema.metadata[b'aggregate_id'] == aggregate_id.encode()
+    assert table.column_names == ['timestamp', 'value', 'quality_flag']
+    assert table.num_rows > 0
+
+
 def test_get_aggregate_values_outside_range(api, aggregate_id):
     res = api.get(f'/aggregates/{aggregate_id}/values',
                   headers={'Accept': 'application/json'},
@@ -425,6 +467,122 @@ def test_get_aggregate_values_no_data_after_effective(api, aggregate_id):
     assert not math.isnan(values[-1]['value'])
 
 
+def test_get_aggregate_values_materialized(api, aggregate_id, startend,
+                                           mocker):
+    from sfa_api.utils import storage_interface
+    res = api.get(f'/aggregates/{aggregate_id}/values{startend}',
+                  headers={'Accept': 'application/json'},
+                  base_url=BASE_URL)
+    assert res.status_code == 200
+    read_raw = mocker.spy(storage_interface, 'read_aggregate_values')
+    again = api.get(f'/aggregates/{aggregate_id}/values{startend}',
+                    headers={'Accept': 'application/json'},
+                    base_url=BASE_URL)
+    assert again.status_code == 200
+    assert again.json == res.json
+    assert read_raw.call_count == 0
+
+
+def test_get_aggregate_values_not_modified(api, aggregate_id, startend,
+                                           mocker):
+    from sfa_api.utils import storage_interface
+    url = f'/aggregates/{aggregate_id}/values{startend}'
+    res = api.get(url, headers={'Accept': 'application/json'},
+                  base_url=BASE_URL)
+    assert res.status_code == 200
+    etag = res.headers['ETag']
+    read = mocker.spy(storage_interface,
+                      'read_materialized_aggregate_values')
+    again = api.get(url, headers={'Accept': 'application/json',
+                                  'If-None-Match': etag},
+                    base_url=BASE_URL)
+    assert again.status_code == 304
+    assert read.call_count == 0
+    csv = api.get(url, headers={'Accept': 'text/csv',
+                                'If-None-Match': etag},
+                  base_url=BASE_URL)
+    assert csv.status_code == 200
+    assert csv.headers['ETag'] != etag
+
+
+def test_get_aggregate_metadata_not_modified(api, aggregate_id):
+    url = f'/aggregates/{aggregate_id}/metadata'
+    etag = api.get(url, base_url=BASE_URL).headers['ETag']
+    r = api.get(url, base_url=BASE_URL, headers={'If-None-Match': etag})
+    assert r.status_code == 304
+
+
+def test_get_aggregate_values_matches_computed(app, api, aggregate_id,
+                                               startend):
+    from sfa_api.aggregates import _compute_aggregate_values
+    from sfa_api.utils.storage import get_storage
+    res = api.get(f'/aggregates/{aggregate_id}/values{startend}',
+                  headers={'Accept': 'application/json'},
+                  base_url=BASE_URL)
+    assert res.status_code == 200
+    values = res.json['values']
+    with app.test_request_context():
+        storage = get_storage()
+        aggregate = storage.read_aggregate(aggregate_id)
+        expected = _compute_aggregate_values(
+            storage, aggregate_id, aggregate,
+            pd.Timestamp(values[0]['timestamp']),
+            pd.Timestamp(values[-1]['timestamp']))
+    assert len(expected) == len(values)
+    for (ts, row), val in zip(expected.iterrows(), values):
+        assert ts == pd.Timestamp(val['timestamp'])
+        assert row['quality_flag'] == val['quality_flag']
+        if math.isnan(row['value']):
+            assert val['value'] is None
+        else:
+            assert row['value'] == pytest.approx(val['value'])
+
+
+def test_get_aggregate_values_after_observation_update(
+        api, aggregate_id, startend):
+    res = api.get(f'/aggregates/{aggregate_id}/values{startend}',
+                  headers={'Accept': 'application/json'},
+                  base_url=BASE_URL)
+    assert res.status_code == 200
+    before = res.json['values']
+    ts = before[len(before) // 2]['timestamp']
+    for obs in demo_aggregates[aggregate_id]['observations']:
+        api.post(f'/observations/{obs["observation_id"]}/values',
+                 base_url=BASE_URL,
+                 json={'values': [
+                     {'timestamp': ts, 'value': 1.0e4, 'quality_flag': 0}]})
+    after = api.get(f'/aggregates/{aggregate_id}/values{startend}',
+                    headers={'Accept': 'application/json'},
+                    base_url=BASE_URL).json['values']
+    changed = [a for a, b in zip(after, before) if a != b]
+    assert len(changed) > 0
+    assert all(c['value'] is not None and c['value'] > 1000
+               for c in changed)
+
+
+@pytest.mark.parametrize('interval_length,expected', [
+    ('1min', '1d'),
+    ('15min', '1d'),
+    ('7min', '1435min'),
+    ('1d', '1d'),
+    ('2d', '2d'),
+])
+def test_value_block_length(interval_length, expected):
+    from sfa_api.aggregates import _value_block_length
+    assert _value_block_length(pd.Timedelta(interval_length)) == (
+        pd.Timedelta(expected))
+
+
+def test_contiguous_blocks():
+    from sfa_api.aggregates import _contiguous_blocks
+    day = pd.Timedelta('1d')
+    starts = [pd.Timestamp('2019-04-01T00:00Z') + day * i
+              for i in (0, 1, 2, 4, 6, 7)]
+    assert _contiguous_blocks(starts, day) == [
+        starts[:3], starts[3:4], starts[4:]]
+    assert _contiguous_blocks([], day) == []
+
+
 def test_get_aggregate_values_404(api, missing_id, startend):
     res = api.get(f'/aggregates/{missing_id}/values{startend}',
                   headers={'Accept': 'application/json'},
@@ -630,3 +788,12 @@ def test_get_aggregate_values_all_none(api, aggregate_id):
     values = res.json['values']
     for val in values:
         assert val['value'] is None
+
+
+@pytest.mark.parametrize('path', ['forecasts/single', 'forecasts/cdf'])
+def test_get_aggregate_forecasts_pages(api, aggregate_id, path):
+    url = f'/aggregates/{aggregate_id}/{path}'
+    expected = [fx['forecast_id'] for fx in api.get(
+        url, base_url=BASE_URL).json]
+    pages = list_pages(api, f'{url}?limit=1', 'forecast_id')
+    assert sum(pages, []) == expected
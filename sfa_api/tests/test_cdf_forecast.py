@@ -314,6 +314,83 @@ def test_get_cdf_forecast_values_200(api, start, end, mimetype,
     assert r.mimetype == mimetype
 
 
+def test_get_cdf_forecast_value_changes(api, cdf_forecast_id):
+    url = f'/forecasts/cdf/single/{cdf_forecast_id}/values/changes'
+    r = api.get(url, base_url=BASE_URL)
+    assert r.status_code == 200
+    response = r.get_json()
+    assert response['forecast_id'] == cdf_forecast_id
+    assert len(response['values']) > 0
+    assert not response['has_more']
+
+
+def test_get_cdf_forecast_value_changes_404(api, missing_id):
+    r = api.get(f'/forecasts/cdf/single/{missing_id}/values/changes',
+                base_url=BASE_URL)
+    assert r.status_code == 404
+
+
+def test_get_cdf_forecast_values_not_modified(api, cdf_forecast_id,
+                                              startend):
+    url = f'/forecasts/cdf/single/{cdf_forecast_id}/values{startend}'
+    etag = api.get(url, base_url=BASE_URL).headers['ETag']
+    r = api.get(url, base_url=BASE_URL, headers={'If-None-Match': etag})
+    assert r.status_code == 304
+    assert r.get_data() == b''
+
+
+@pytest.mark.parametrize('mimetype', ['application/json', 'text/csv'])
+def test_get_cdf_forecast_values_stream(api, cdf_forecast_id, startend,
+                                        mimetype):
+    url = f'/forecasts/cdf/single/{cdf_forecast_id}/values{startend}'
+    r = api.get(url, base_url=BASE_URL, headers={'Accept': mimetype})
+    streamed = api.get(url + '&stream', base_url=BASE_URL,
+                       headers={'Accept': mimetype})
+    assert streamed.status_code == 200
+    assert streamed.mimetype == mimetype
+    if mimetype == 'application/json':
+        assert streamed.get_json() == r.get_json()
+    else:
+        assert streamed.get_data(as_text=True) == r.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('mimetype,stream', [
+    ('application/vnd.apache.arrow.stream', False),
+    ('application/vnd.apache.arrow.stream', True),
+    ('application/vnd.apache.parquet', False),
+    ('application/vnd.apache.parquet', True),
+])
+def test_get_cdf_forecast_values_binary(api, cdf_forecast_id, startend,
+                                        mimetype, stream):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    url = f'/forecasts/cdf/single/{cdf_forecast_id}/values{startend}'
+    expected = api.get(url, base_url=BASE_URL,
+                       headers={'Accept': 'application/json'}).get_json()
+    if stream:
+        url += '&stream'
+    r = api.get(url, base_url=BASE_URL, headers={'Accept': mimetype})
+    assert r.status_code == 200
+    assert r.mimetype == mimetype
+    if mimetype == 'application/vnd.apache.arrow.stream':
+        table = pa.ipc.open_stream(r.get_data()).read_all()
+    else:
+        table = pq.read_table(pa.BufferReader(r.get_data()))
+    assert table.schema.metadata[b'forecast_id'] == cdf_forecast_id.encode()
+    df = table.to_pandas()
+    assert list(df.columns) == ['timestamp', 'value']
+    assert len(df) == len(expected['values'])
+    assert (df['timestamp'] == pd.to_datetime(
+        [v['timestamp'] for v in expected['values']])).all()
+
+
+def test_get_cdf_forecast_values_stream_404(api, bad_id, mock_previous,
+                                            startend):
+    r = api.get(f'/forecasts/cdf/single/{bad_id}/values{startend}&stream',
+                base_url=BASE_URL)
+    assert r.status_code == 404
+
+
 def test_post_and_get_values_json(api, cdf_forecast_id,
                                   mock_previous):
     r = api.post(f'/forecasts/cdf/single/{cdf_forecast_id}/values',
@@ -711,3 +788,168 @@ def test_post_cdf_forecast_values_csv_missing_field(
     assert res.json['errors'] == {
         missing: [f'Missing "{missing}" field.'],
     }
+
+
+GROUP_VALUE_JSON = {
+    'constant_values': [5.0, 50.0],
+    'values': [
+        {'timestamp': '2019-01-22T17:54:00Z', 'values': [1.0, 2.0]},
+        {'timestamp': '2019-01-22T17:59:00Z', 'values': [None, 32.0]},
+        {'timestamp': '2019-01-22T18:04:00Z', 'values': [3.0, 4.5]},
+    ]
+}
+GROUP_VALUE_CSV = (
+    'timestamp,5.0,50.0\n'
+    '20190122T17:54:00+0000,1.0,2.0\n'
+    '20190122T17:59:00+0000,,32.0\n'
+    '20190122T18:04:00+0000,3.0,4.5\n'
+)
+
+
+def test_post_and_get_cdf_forecast_group_values_json(
+        api, cdf_forecast_group_id, mock_previous):
+    r = api.post(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                 base_url=BASE_URL,
+                 json=GROUP_VALUE_JSON)
+    assert r.status_code == 201
+    r = api.get(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                base_url=BASE_URL,
+                headers={'Accept': 'application/json'},
+                query_string={'start': '2019-01-22T17:54:00Z',
+                              'end': '2019-01-22T18:04:00Z'})
+    assert r.status_code == 200
+    data = r.get_json()
+    assert data['forecast_id'] == cdf_forecast_group_id
+    assert data['constant_values'] == [5.0, 20.0, 50.0, 80.0, 95.0]
+    assert [v['timestamp'] for v in data['values']] == [
+        v['timestamp'] for v in GROUP_VALUE_JSON['values']]
+    posted = [[v['values'][0], v['values'][2]] for v in data['values']]
+    assert posted == [v['values'] for v in GROUP_VALUE_JSON['values']]
+
+
+def test_post_cdf_forecast_group_values_matches_single(
+        api, cdf_forecast_group_id, cdf_forecast_id, mock_previous):
+    r = api.post(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                 base_url=BASE_URL,
+                 json=GROUP_VALUE_JSON)
+    assert r.status_code == 201
+    query = {'start': '2019-01-22T17:54:00Z', 'end': '2019-01-22T18:04:00Z'}
+    group = api.get(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                    base_url=BASE_URL,
+                    headers={'Accept': 'application/json'},
+                    query_string=query).get_json()
+    single = api.get(f'/forecasts/cdf/single/{cdf_forecast_id}/values',
+                     base_url=BASE_URL,
+                     headers={'Accept': 'application/json'},
+                     query_string=query).get_json()
+    assert [v['values'][0] for v in group['values']] == [
+        v['value'] for v in single['values']]
+
+
+def test_post_and_get_cdf_forecast_group_values_csv(
+        api, cdf_forecast_group_id, mock_previous):
+    r = api.post(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                 base_url=BASE_URL,
+                 headers={'Content-Type': 'text/csv'},
+                 data=GROUP_VALUE_CSV)
+    assert r.status_code == 201
+    r = api.get(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                base_url=BASE_URL,
+                headers={'Accept': 'text/csv'},
+                query_string={'start': '2019-01-22T17:54:00Z',
+                              'end': '2019-01-22T18:04:00Z'})
+    assert r.status_code == 200
+    lines = r.data.decode('utf-8').split('\n')
+    assert lines[0] == f'# forecast_id: {cdf_forecast_group_id}'
+    assert lines[2] == 'timestamp,5.0,20.0,50.0,80.0,95.0'
+    assert lines[4].startswith('20190122T17:59:00+0000,,')
+    assert lines[4].endswith(',32.0,,')
+
+
+def test_post_cdf_forecast_group_values_storage_call(
+        api, cdf_forecast_group_id, mock_previous, mocker):
+    store = mocker.patch(
+        'sfa_api.utils.storage_interface.store_cdf_forecast_group_values',
+        return_value=cdf_forecast_group_id)
+    r = api.post(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                 base_url=BASE_URL,
+                 json=GROUP_VALUE_JSON)
+    assert r.status_code == 201
+    fx_id, df = store.call_args[0]
+    assert fx_id == cdf_forecast_group_id
+    assert list(df.columns) == [5.0, 50.0]
+    assert df.index.name == 'timestamp'
+    assert len(df.index) == 3
+
+
+def test_post_cdf_forecast_group_values_unknown_constant_value(
+        api, cdf_forecast_group_id, mock_previous):
+    vals = copy_update(GROUP_VALUE_JSON, 'constant_values', [5.0, 51.0])
+    r = api.post(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                 base_url=BASE_URL,
+                 json=vals)
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize('payload', [
+    'taco',
+    {},
+    {'values': []},
+    {'constant_values': [5.0], 'values': GROUP_VALUE_JSON['values']},
+    {'constant_values': [5.0, 5.0], 'values': GROUP_VALUE_JSON['values']},
+    {'constant_values': ['a', 5.0], 'values': GROUP_VALUE_JSON['values']},
+    {'constant_values': [5.0, 50.0], 'values': [
+        {'timestamp': 'notatime', 'values': [1, 2]}]},
+    {'constant_values': [5.0, 50.0], 'values': [
+        {'timestamp': '2019-01-22T17:54:00Z', 'values': [1, 'four']}]},
+])
+def test_post_cdf_forecast_group_values_invalid_json(
+        api, payload, cdf_forecast_group_id, mock_previous):
+    r = api.post(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                 base_url=BASE_URL,
+                 json=payload)
+    assert r.status_code == 400
+
+
+def test_post_cdf_forecast_group_values_bad_previous(
+        api, cdf_forecast_group_id, mock_previous):
+    mock_previous.return_value = pd.Timestamp('2019-01-22T17:50Z')
+    r = api.post(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                 base_url=BASE_URL,
+                 json=GROUP_VALUE_JSON)
+    assert r.status_code == 400
+
+
+def test_post_cdf_forecast_group_values_404(api, cdf_forecast_id,
+                                            mock_previous):
+    r = api.post(f'/forecasts/cdf/{cdf_forecast_id}/values',
+                 base_url=BASE_URL,
+                 json=GROUP_VALUE_JSON)
+    assert r.status_code == 404
+
+
+def test_get_cdf_forecast_group_values_not_modified(
+        api, cdf_forecast_group_id, startend):
+    url = f'/forecasts/cdf/{cdf_forecast_group_id}/values{startend}'
+    r = api.get(url, base_url=BASE_URL,
+                headers={'Accept': 'application/json'})
+    assert r.status_code == 200
+    etag = r.headers['ETag']
+    r = api.get(url, base_url=BASE_URL,
+                headers={'Accept': 'application/json', 'If-None-Match': etag})
+    assert r.status_code == 304
+
+
+def test_get_cdf_forecast_group_values_404(api, bad_id, startend):
+    r = api.get(f'/forecasts/cdf/{bad_id}/values{startend}',
+                base_url=BASE_URL,
+                headers={'Accept': 'application/json'})
+    assert r.status_code == 404
+
+
+def test_get_cdf_forecast_group_values_400(api, cdf_forecast_group_id):
+    r = api.get(f'/forecasts/cdf/{cdf_forecast_group_id}/values',
+                base_url=BASE_URL,
+                headers={'Accept': 'application/json'},
+                query_string={'start': 'bad-date', 'end': 'also_bad'})
+    assert r.status_code == 400
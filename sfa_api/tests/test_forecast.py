@@ -11,7 +11,7 @@ from sfa_api.conftest import (variables, interval_value_types, interval_labels,
                               VALID_FX_VALUE_JSON, VALID_FX_VALUE_CSV,
                               VALID_FORECAST_AGG_JSON, UNSORTED_FX_VALUE_JSON,
                               ADJ_FX_VALUE_JSON, demo_forecasts,
-                              _get_large_test_payload)
+                              _get_large_test_payload, list_pages)
 from sfa_api.utils.storage_interface import POWER_VARIABLES
 
 
@@ -321,6 +321,37 @@ def test_post_forecast_values_event_data(api, mock_previous, vals, status):
     assert res.status_code == status
 
 
+@pytest.mark.parametrize('mimetype', ['application/json', 'text/csv'])
+def test_get_forecast_values_not_modified(api, forecast_id, startend,
+                                          mimetype):
+    url = f'/forecasts/single/{forecast_id}/values{startend}'
+    r = api.get(url, base_url=BASE_URL, headers={'Accept': mimetype})
+    assert r.status_code == 200
+    etag = r.headers['ETag']
+    r = api.get(url, base_url=BASE_URL,
+                headers={'Accept': mimetype, 'If-None-Match': etag})
+    assert r.status_code == 304
+    assert r.get_data() == b''
+
+
+def test_get_forecast_value_changes(api, forecast_id):
+    url = f'/forecasts/single/{forecast_id}/values/changes'
+    r = api.get(url, base_url=BASE_URL)
+    assert r.status_code == 200
+    response = r.get_json()
+    assert response['forecast_id'] == forecast_id
+    assert set(response['values'][0].keys()) == {'timestamp', 'value'}
+    r = api.get(url, base_url=BASE_URL,
+                query_string={'since': response['cursor']})
+    assert r.get_json()['values'] == []
+
+
+def test_get_forecast_value_changes_404(api, bad_id):
+    r = api.get(f'/forecasts/single/{bad_id}/values/changes',
+                base_url=BASE_URL)
+    assert r.status_code == 404
+
+
 def test_get_forecast_values_404(api, bad_id, startend):
     r = api.get(f'/forecasts/single/{bad_id}/values{startend}',
                 base_url=BASE_URL)
@@ -355,6 +386,56 @@ def test_get_forecast_values_200(api, start, end, mimetype, forecast_id):
     assert r.mimetype == mimetype
 
 
+@pytest.mark.parametrize('mimetype', ['application/json', 'text/csv'])
+def test_get_forecast_values_stream(api, forecast_id, startend, mimetype):
+    url = f'/forecasts/single/{forecast_id}/values{startend}'
+    r = api.get(url, base_url=BASE_URL, headers={'Accept': mimetype})
+    streamed = api.get(url + '&stream', base_url=BASE_URL,
+                       headers={'Accept': mimetype})
+    assert streamed.status_code == 200
+    assert streamed.mimetype == mimetype
+    if mimetype == 'application/json':
+        assert streamed.get_json() == r.get_json()
+    else:
+        assert streamed.get_data(as_text=True) == r.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('mimetype,stream', [
+    ('application/vnd.apache.arrow.stream', False),
+    ('application/vnd.apache.arrow.stream', True),
+    ('application/vnd.apache.parquet', False),
+    ('application/vnd.apache.parquet', True),
+])
+def test_get_forecast_values_binary(api, forecast_id, startend, mimetype,
+                                    stream):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    url = f'/forecasts/single/{forecast_id}/values{startend}'
+    expected = api.get(url, base_url=BASE_URL,
+                       headers={'Accept': 'application/json'}).get_json()
+    if stream:
+        url += '&stream'
+    r = api.get(url, base_url=BASE_URL, headers={'Accept': mimetype})
+    assert r.status_code == 200
+    assert r.mimetype == mimetype
+    if mimetype == 'application/vnd.apache.arrow.stream':
+        table = pa.ipc.open_stream(r.get_data()).read_all()
+    else:
+        table = pq.read_table(pa.BufferReader(r.get_data()))
+    assert table.schema.metadata[b'forecast_id'] == forecast_id.encode()
+    df = table.to_pandas()
+    assert list(df.columns) == ['timestamp', 'value']
+    assert len(df) == len(expected['values'])
+    assert (df['timestamp'] == pd.to_datetime(
+        [v['timestamp'] for v in expected['values']])).all()
+
+
+def test_get_forecast_values_stream_404(api, bad_id, startend):
+    r = api.get(f'/forecasts/single/{bad_id}/values{startend}&stream',
+                base_url=BASE_URL)
+    assert r.status_code == 404
+
+
 def test_post_and_get_values_json(api, forecast_id, mock_previous):
     r = api.post(f'/forecasts/single/{forecast_id}/values',
                  base_url=BASE_URL,
@@ -372,6 +453,44 @@ def test_post_and_get_values_json(api, forecast_id, mock_previous):
     assert 'value' in posted_data['values'][0]
 
 
+@pytest.mark.parametrize('mimetype', [
+    'application/vnd.apache.arrow.stream',
+    'application/vnd.apache.parquet'
+])
+@pytest.mark.parametrize('as_file', [True, False])
+def test_post_and_get_values_binary(api, forecast_id, mock_previous, mimetype,
+                                    as_file):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    df = pd.DataFrame(VALID_FX_VALUE_JSON['values'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if mimetype == 'application/vnd.apache.arrow.stream':
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink)
+    data = sink.getvalue().to_pybytes()
+    if as_file:
+        res = api.post(f'/forecasts/single/{forecast_id}/values',
+                       base_url=BASE_URL,
+                       content_type='multipart/form-data',
+                       data={'file': (BytesIO(data), 'values', mimetype)})
+    else:
+        res = api.post(f'/forecasts/single/{forecast_id}/values',
+                       base_url=BASE_URL,
+                       content_type=mimetype,
+                       data=data)
+    assert res.status_code == 201
+    res = api.get(f'/forecasts/single/{forecast_id}/values',
+                  base_url=BASE_URL,
+                  headers={'Accept': 'application/json'},
+                  query_string={'start': '2019-01-22T17:54:00+00:00',
+                                'end': '2019-01-22T18:04:00+00:00'})
+    assert VALID_FX_VALUE_JSON['values'] == res.get_json()['values']
+
+
 def test_post_and_get_values_csv(api, forecast_id, mock_previous):
     r = api.post(f'/forecasts/single/{forecast_id}/values',
                  base_url=BASE_URL,
@@ -815,3 +934,111 @@ def test_post_forecast_values_csv_missing_field(
     assert res.json['errors'] == {
         missing: [f'Missing "{missing}" field.'],
     }
+
+
+@pytest.fixture()
+def batch_json(forecast_id, cdf_forecast_id):
+    return {'forecasts': [
+        {'forecast_id': forecast_id, 'type': 'forecast',
+         'values': VALID_FX_VALUE_JSON['values']},
+        {'forecast_id': cdf_forecast_id, 'type': 'cdf_forecast',
+         'values': VALID_FX_VALUE_JSON['values']},
+    ]}
+
+
+def test_post_forecast_values_batch(api, batch_json, forecast_id,
+                                    cdf_forecast_id, mock_previous):
+    res = api.post('/forecasts/values/batch', base_url=BASE_URL,
+                   json=batch_json)
+    assert res.status_code == 201
+    assert res.get_json() == [forecast_id, cdf_forecast_id]
+    fx = api.get(f'/forecasts/single/{forecast_id}/values',
+                 base_url=BASE_URL,
+                 query_string={'start': '2019-01-22T17:54Z',
+                               'end': '2019-01-22T18:04Z'})
+    assert fx.get_json()['values'] == VALID_FX_VALUE_JSON['values']
+    cdf = api.get(f'/forecasts/cdf/single/{cdf_forecast_id}/values',
+                  base_url=BASE_URL,
+                  query_string={'start': '2019-01-22T17:54Z',
+                                'end': '2019-01-22T18:04Z'})
+    assert cdf.get_json()['values'] == VALID_FX_VALUE_JSON['values']
+
+
+def test_post_forecast_values_batch_single_transaction(
+        api, batch_json, mocker, mock_previous):
+    from sfa_api.utils import storage_interface
+    connect = mocker.spy(storage_interface, 'mysql_connection')
+    store = mocker.spy(storage_interface, 'store_forecast_values_batch')
+    batch_json['forecasts'] = batch_json['forecasts'] * 5
+    res = api.post('/forecasts/values/batch', base_url=BASE_URL,
+                   json=batch_json)
+    assert res.status_code == 201
+    store.assert_called_once()
+    # one connection to read metadata and one to store
+    assert connect.call_count == 2
+
+
+def test_post_forecast_values_batch_404(api, batch_json, missing_id,
+                                        patched_store_values, mock_previous):
+    batch_json['forecasts'][1]['forecast_id'] = missing_id
+    res = api.post('/forecasts/values/batch', base_url=BASE_URL,
+                   json=batch_json)
+    assert res.status_code == 404
+
+
+def test_post_forecast_values_batch_bad_previous(api, batch_json, mocker,
+                                                 mock_previous):
+    store = mocker.patch(
+        'sfa_api.utils.storage_interface.store_forecast_values_batch')
+    mock_previous.return_value = pd.Timestamp('2019-01-22T17:56Z')
+    res = api.post('/forecasts/values/batch', base_url=BASE_URL,
+                   json=batch_json)
+    assert res.status_code == 400
+    errors = res.get_json()['errors']['forecasts'][0]
+    assert set(errors.keys()) == {'0', '1'}
+    assert 'timestamp' in errors['0']
+    store.assert_not_called()
+
+
+def test_post_forecast_values_batch_restricted(api, batch_json, mocker,
+                                               mock_previous,
+                                               restrict_fx_upload):
+    store = mocker.patch(
+        'sfa_api.utils.storage_interface.store_forecast_values_batch')
+    mock_previous.return_value = pd.Timestamp('2019-11-01T06:55Z')
+    restrict_fx_upload.return_value = pd.Timestamp('2019-11-01T06:59Z')
+    batch_json['forecasts'][0]['values'] = ADJ_FX_VALUE_JSON['values']
+    batch_json['forecasts'][1]['values'] = ADJ_FX_VALUE_JSON['values']
+    res = api.post('/forecasts/values/batch', base_url=BASE_URL,
+                   json=batch_json)
+    assert res.status_code == 400
+    assert 'issue_time' in res.get_json()['errors']['forecasts'][0]['0']
+    store.assert_not_called()
+
+
+def test_post_forecast_values_batch_invalid(api, batch_json):
+    batch_json['forecasts'][1]['values'] = [{'timestamp': 'bad',
+                                             'value': 1}]
+    res = api.post('/forecasts/values/batch', base_url=BASE_URL,
+                   json=batch_json)
+    assert res.status_code == 400
+    assert list(res.get_json()['errors']['forecasts'][0].keys()) == ['1']
+
+
+@pytest.mark.parametrize('url', [
+    '/forecasts/single/', '/forecasts/cdf/'])
+def test_list_forecasts_pages(api, url):
+    expected = [fx['forecast_id'] for fx in api.get(
+        url, base_url=BASE_URL).json]
+    pages = list_pages(api, f'{url}?limit=2', 'forecast_id')
+    assert all(len(page) == 2 for page in pages[:-1])
+    assert sum(pages, []) == expected
+
+
+@pytest.mark.parametrize('url', [
+    '/forecasts/single/', '/forecasts/cdf/'])
+def test_list_forecasts_variable(api, url):
+    res = api.get(f'{url}?variable=ghi', base_url=BASE_URL)
+    assert res.status_code == 200
+    assert len(res.json) > 0
+    assert all(fx['variable'] == 'ghi' for fx in res.json)
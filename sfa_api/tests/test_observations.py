@@ -6,9 +6,10 @@ import pytest
 
 from sfa_api.conftest import (variables, interval_labels, BASE_URL,
                               VALID_OBS_VALUE_JSON, VALID_OBS_VALUE_CSV,
-                              VALID_OBS_JSON, copy_update,
+                              VALID_OBS_JSON, copy_update, list_pages,
                               _get_large_test_payload,
                               demo_observations)
+from sfa_api.utils import storage_interface
 
 
 INVALID_NAME = copy_update(VALID_OBS_JSON, 'name', '#Nope')
@@ -103,6 +104,64 @@ def test_get_observation_metadata(api, observation_id):
     assert response['modified_at'].endswith('+00:00')
 
 
+def test_get_observation_value_changes(api, observation_id, mocked_queuing,
+                                       mock_previous):
+    url = f'/observations/{observation_id}/values/changes'
+    r = api.get(url, base_url=BASE_URL)
+    assert r.status_code == 200
+    response = r.get_json()
+    assert response['observation_id'] == observation_id
+    assert len(response['values']) > 0
+    assert not response['has_more']
+    cursor = response['cursor']
+    res = api.post(f'/observations/{observation_id}/values',
+                   base_url=BASE_URL,
+                   json=VALID_OBS_VALUE_JSON)
+    assert res.status_code == 201
+    r = api.get(url, base_url=BASE_URL, query_string={'since': cursor})
+    assert r.status_code == 200
+    assert r.get_json()['values'] == VALID_OBS_VALUE_JSON['values']
+    assert r.get_json()['cursor'] != cursor
+
+
+def test_get_observation_value_changes_limit(api, observation_id):
+    url = f'/observations/{observation_id}/values/changes'
+    r = api.get(url, base_url=BASE_URL, query_string={'limit': 2})
+    assert r.status_code == 200
+    first = r.get_json()
+    assert len(first['values']) == 2
+    assert first['has_more']
+    r = api.get(url, base_url=BASE_URL,
+                query_string={'limit': 2, 'since': first['cursor']})
+    second = r.get_json()
+    assert len(second['values']) == 2
+    assert second['values'][0] != first['values'][0]
+
+
+@pytest.mark.parametrize('query', [
+    {'since': 'nope'},
+    {'limit': 0},
+])
+def test_get_observation_value_changes_400(api, observation_id, query):
+    r = api.get(f'/observations/{observation_id}/values/changes',
+                base_url=BASE_URL, query_string=query)
+    assert r.status_code == 400
+
+
+def test_get_observation_value_changes_404(api, bad_id):
+    r = api.get(f'/observations/{bad_id}/values/changes',
+                base_url=BASE_URL)
+    assert r.status_code == 404
+
+
+def test_get_observation_metadata_not_modified(api, observation_id):
+    url = f'/observations/{observation_id}/metadata'
+    etag = api.get(url, base_url=BASE_URL).headers['ETag']
+    r = api.get(url, base_url=BASE_URL, headers={'If-None-Match': etag})
+    assert r.status_code == 304
+    assert r.get_data() == b''
+
+
 def test_get_observation_metadata_404(api, bad_id):
     r = api.get(f'/observations/{bad_id}/metadata',
                 base_url=BASE_URL)
@@ -289,6 +348,57 @@ def test_get_observation_values_200(api, start, end, mimetype, observation_id):
     assert r.mimetype == mimetype
 
 
+@pytest.mark.parametrize('mimetype', ['application/json', 'text/csv'])
+def test_get_observation_values_stream(api, observation_id, startend,
+                                       mimetype):
+    url = f'/observations/{observation_id}/values{startend}'
+    r = api.get(url, base_url=BASE_URL, headers={'Accept': mimetype})
+    streamed = api.get(url + '&stream', base_url=BASE_URL,
+                       headers={'Accept': mimetype})
+    assert streamed.status_code == 200
+    assert streamed.mimetype == mimetype
+    if mimetype == 'application/json':
+        assert streamed.get_json() == r.get_json()
+    else:
+        assert streamed.get_data(as_text=True) == r.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('mimetype,stream', [
+    ('application/vnd.apache.arrow.stream', False),
+    ('application/vnd.apache.arrow.stream', True),
+    ('application/vnd.apache.parquet', False),
+    ('application/vnd.apache.parquet', True),
+])
+def test_get_observation_values_binary(api, observation_id, startend, mimetype,
+                                       stream):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    url = f'/observations/{observation_id}/values{startend}'
+    expected = api.get(url, base_url=BASE_URL,
+                       headers={'Accept': 'application/json'}).get_json()
+    if stream:
+        url += '&stream'
+    r = api.get(url, base_url=BASE_URL, headers={'Accept': mimetype})
+    assert r.status_code == 200
+    assert r.mimetype == mimetype
+    if mimetype == 'application/vnd.apache.arrow.stream':
+        table = pa.ipc.open_stream(r.get_data()).read_all()
+    else:
+        table = pq.read_table(pa.BufferReader(r.get_data()))
+    assert table.schema.metadata[b'observation_id'] == observation_id.encode()
+    df = table.to_pandas()
+    assert list(df.columns) == ['timestamp', 'value', 'quality_flag']
+    assert len(df) == len(expected['values'])
+    assert (df['timestamp'] == pd.to_datetime(
+        [v['timestamp'] for v in expected['values']])).all()
+
+
+def test_get_observation_values_stream_404(api, bad_id, startend):
+    r = api.get(f'/observations/{bad_id}/values{startend}&stream',
+                base_url=BASE_URL)
+    assert r.status_code == 404
+
+
 def test_post_and_get_values_json(api, observation_id, mocked_queuing,
                                   mock_previous):
     res = api.post(f'/observations/{observation_id}/values',
@@ -305,6 +415,90 @@ def test_post_and_get_values_json(api, observation_id, mocked_queuing,
     assert VALID_OBS_VALUE_JSON['values'] == posted_data['values']
 
 
+@pytest.mark.parametrize('mimetype', ['application/json', 'text/csv'])
+def test_get_observation_values_not_modified(api, observation_id, startend,
+                                             mimetype, mocker):
+    url = f'/observations/{observation_id}/values{startend}'
+    r = api.get(url, base_url=BASE_URL, headers={'Accept': mimetype})
+    assert r.status_code == 200
+    etag = r.headers['ETag']
+    read = mocker.spy(storage_interface, 'read_observation_values')
+    r = api.get(url, base_url=BASE_URL,
+                headers={'Accept': mimetype, 'If-None-Match': etag})
+    assert r.status_code == 304
+    assert r.get_data() == b''
+    assert r.headers['ETag'] == etag
+    assert read.call_count == 0
+
+
+def test_get_observation_values_etag_varies(api, observation_id, startend):
+    url = f'/observations/{observation_id}/values'
+    etags = {
+        api.get(url + query, base_url=BASE_URL,
+                headers={'Accept': mimetype}).headers['ETag']
+        for query, mimetype in [
+            (startend, 'application/json'),
+            (startend, 'text/csv'),
+            (startend + '&stream', 'application/json'),
+            ('?start=20190101T0000Z&end=20190601T0000Z', 'application/json')]
+    }
+    assert len(etags) == 4
+
+
+def test_get_observation_values_etag_changes_after_post(
+        api, observation_id, mocked_queuing, mock_previous):
+    url = f'/observations/{observation_id}/values'
+    query = {'start': '2019-01-22T17:54:00+00:00',
+             'end': '2019-01-22T18:04:00+00:00'}
+    etag = api.get(url, base_url=BASE_URL,
+                   query_string=query).headers['ETag']
+    res = api.post(url, base_url=BASE_URL, json=VALID_OBS_VALUE_JSON)
+    assert res.status_code == 201
+    r = api.get(url, base_url=BASE_URL, query_string=query,
+                headers={'If-None-Match': etag})
+    assert r.status_code == 200
+    assert r.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('mimetype', [
+    'application/vnd.apache.arrow.stream',
+    'application/vnd.apache.parquet'
+])
+@pytest.mark.parametrize('as_file', [True, False])
+def test_post_and_get_values_binary(api, observation_id, mocked_queuing,
+                                    mock_previous, mimetype,
+                                    as_file):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    df = pd.DataFrame(VALID_OBS_VALUE_JSON['values'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if mimetype == 'application/vnd.apache.arrow.stream':
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink)
+    data = sink.getvalue().to_pybytes()
+    if as_file:
+        res = api.post(f'/observations/{observation_id}/values',
+                       base_url=BASE_URL,
+                       content_type='multipart/form-data',
+                       data={'file': (BytesIO(data), 'values', mimetype)})
+    else:
+        res = api.post(f'/observations/{observation_id}/values',
+                       base_url=BASE_URL,
+                       content_type=mimetype,
+                       data=data)
+    assert res.status_code == 201
+    res = api.get(f'/observations/{observation_id}/values',
+                  base_url=BASE_URL,
+                  headers={'Accept': 'application/json'},
+                  query_string={'start': '2019-01-22T17:54:00+00:00',
+                                'end': '2019-01-22T18:04:00+00:00'})
+    assert VALID_OBS_VALUE_JSON['values'] == res.get_json()['values']
+
+
 def test_post_and_get_values_csv(api, observation_id, mocked_queuing,
                                  mock_previous):
     r = api.post(f'/observations/{observation_id}/values',
@@ -807,3 +1001,25 @@ def test_post_observation_values_csv_missing_field(
     assert res.json['errors'] == {
         missing: [f'Missing "{missing}" field.'],
     }
+
+
+def test_list_observations_pages(api):
+    expected = [obs['observation_id'] for obs in api.get(
+        '/observations/', base_url=BASE_URL).json]
+    pages = list_pages(api, '/observations/?limit=2', 'observation_id')
+    assert all(len(page) == 2 for page in pages[:-1])
+    assert sum(pages, []) == expected
+
+
+def test_list_observations_variable(api):
+    res = api.get('/observations/?variable=ghi', base_url=BASE_URL)
+    assert res.status_code == 200
+    assert len(res.json) > 0
+    assert all(obs['variable'] == 'ghi' for obs in res.json)
+
+
+@pytest.mark.parametrize('query', [
+    '?variable=nope', '?limit=0', '?cursor=nope'])
+def test_list_observations_400(api, query):
+    res = api.get(f'/observations/{query}', base_url=BASE_URL)
+    assert res.status_code == 400
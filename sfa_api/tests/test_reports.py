@@ -11,7 +11,8 @@ from solarforecastarbiter.datamodel import (
 
 
 from sfa_api.conftest import (BASE_URL, demo_observations, demo_aggregates,
-                              demo_forecasts, demo_group_cdf, outage_exists)
+                              demo_forecasts, demo_group_cdf, outage_exists,
+                              list_pages)
 from sfa_api.schema import ALLOWED_METRICS
 from sfa_api import reports
 
@@ -133,6 +134,36 @@ def test_post_report_cost(api, report_post_json_cost,
     assert 'Location' in res.headers
 
 
+@pytest.mark.parametrize('fields', [
+    'status', 'status,report_parameters', 'values,outages,raw_report'])
+def test_get_report_fields(api, new_report, fields):
+    report_id = new_report()
+    res = api.get(f'/reports/{report_id}',
+                  base_url=BASE_URL, query_string={'fields': fields})
+    assert res.status_code == 200
+    assert set(res.json.keys()) == set(fields.split(','))
+    full = api.get(f'/reports/{report_id}', base_url=BASE_URL).json
+    for key, value in res.json.items():
+        assert full[key] == value
+
+
+def test_get_report_fields_400(api, new_report):
+    report_id = new_report()
+    res = api.get(f'/reports/{report_id}',
+                  base_url=BASE_URL, query_string={'fields': 'status,nope'})
+    assert res.status_code == 400
+    assert 'fields' in res.json['errors']
+
+
+def test_get_report_not_modified(api, new_report):
+    report_id = new_report()
+    url = f'/reports/{report_id}'
+    etag = api.get(url, base_url=BASE_URL).headers['ETag']
+    r = api.get(url, base_url=BASE_URL, headers={'If-None-Match': etag})
+    assert r.status_code == 304
+    assert r.get_data() == b''
+
+
 def test_get_report_cost(api, new_report,
                          report_post_json_cost):
     report_id = new_report(report_post_json_cost)
@@ -243,6 +274,37 @@ def test_read_report_values(api, new_report, values, report_post_json):
     assert report_values[0]['processed_values'] == values
 
 
+def test_read_report_object_values(api, new_report, report_post_json):
+    report_id = new_report()
+    object_pairs = report_post_json['report_parameters']['object_pairs']
+    obs_id = object_pairs[0]['observation']
+    fx_id = object_pairs[0]['forecast']
+    value_ids = {}
+    for obj_id in (obs_id, fx_id):
+        res = api.post(f'/reports/{report_id}/values',
+                       base_url=BASE_URL,
+                       json={'object_id': obj_id,
+                             'processed_values': f'values of {obj_id}'})
+        assert res.status_code == 201
+        value_ids[obj_id] = res.data.decode()
+    res = api.get(f'/reports/{report_id}/values/{obs_id}',
+                  base_url=BASE_URL)
+    assert res.status_code == 200
+    assert res.get_json() == [{'id': value_ids[obs_id],
+                               'object_id': obs_id,
+                               'processed_values': f'values of {obs_id}'}]
+
+
+def test_read_report_object_values_404(api, new_report, missing_id):
+    report_id = new_report()
+    res = api.get(f'/reports/{report_id}/values/{missing_id}',
+                  base_url=BASE_URL)
+    assert res.status_code == 404
+    res = api.get(f'/reports/{missing_id}/values/{missing_id}',
+                  base_url=BASE_URL)
+    assert res.status_code == 404
+
+
 def test_post_raw_report(api, new_report, raw_report_json):
     report_id = new_report()
     res = api.post(f'/reports/{report_id}/raw',
@@ -380,6 +442,21 @@ def test_list_reports(api, new_report):
     assert len(reports_list) == 4
 
 
+def test_list_reports_pages(api, new_report):
+    new_report()
+    new_report()
+    expected = [report['report_id'] for report in api.get(
+        '/reports/', base_url=BASE_URL).json]
+    pages = list_pages(api, '/reports/?limit=2', 'report_id')
+    assert all(len(page) == 2 for page in pages[:-1])
+    assert sum(pages, []) == expected
+
+
+def test_list_reports_400(api):
+    res = api.get('/reports/?limit=nope', base_url=BASE_URL)
+    assert res.status_code == 400
+
+
 metrics_list = ", ".join(list(ALLOWED_METRICS.keys()))
 categories_list = ", ".join(list(ALLOWED_CATEGORIES.keys()))
 
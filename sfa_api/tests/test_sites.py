@@ -7,7 +7,7 @@ import pytest
 
 
 from sfa_api.conftest import (
-    VALID_SITE_JSON, BASE_URL, copy_update, demo_sites)
+    VALID_SITE_JSON, BASE_URL, copy_update, demo_sites, list_pages)
 
 
 def invalidate(json, key):
@@ -423,3 +423,35 @@ def test_site_update_bad_request(api, site_id, payload, message):
                  json=payload)
     assert r.status_code == 400
     assert r.get_data(as_text=True) == f'{{"errors":{message}}}\n'
+
+
+def test_list_sites_pages(api):
+    expected = [site['site_id'] for site in api.get(
+        '/sites/', base_url=BASE_URL).json]
+    pages = list_pages(api, '/sites/?limit=2', 'site_id')
+    assert all(len(page) == 2 for page in pages[:-1])
+    assert sum(pages, []) == expected
+
+
+def test_list_sites_400(api):
+    res = api.get('/sites/?cursor=nope', base_url=BASE_URL)
+    assert res.status_code == 400
+
+
+@pytest.mark.parametrize('path,key', [
+    ('observations', 'observation_id'),
+    ('forecasts/single', 'forecast_id'),
+    ('forecasts/cdf', 'forecast_id'),
+])
+def test_site_lists_pages(api, site_id, path, key):
+    url = f'/sites/{site_id}/{path}'
+    expected = [obj[key] for obj in api.get(url, base_url=BASE_URL).json]
+    pages = list_pages(api, f'{url}?limit=1', key)
+    assert sum(pages, []) == expected
+    assert all(len(page) == 1 for page in pages[:-1])
+
+
+def test_site_observations_400(api, site_id):
+    r = api.get(f'/sites/{site_id}/observations?limit=nope',
+                base_url=BASE_URL)
+    assert r.status_code == 400
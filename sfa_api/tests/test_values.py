@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+
+from sfa_api.conftest import BASE_URL
+
+
+START = '2019-04-14T12:00:00+00:00'
+END = '2019-04-15T12:00:00+00:00'
+
+
+@pytest.fixture()
+def batch_objects(observation_id, forecast_id, cdf_forecast_id):
+    return [
+        {'object_id': observation_id, 'type': 'observation',
+         'start': START, 'end': END},
+        {'object_id': forecast_id, 'type': 'forecast',
+         'start': START, 'end': END},
+        {'object_id': cdf_forecast_id, 'type': 'cdf_forecast',
+         'start': START, 'end': END},
+    ]
+
+
+def test_post_values_batch(api, batch_objects):
+    r = api.post('/values/batch', base_url=BASE_URL,
+                 json={'objects': batch_objects})
+    assert r.status_code == 200
+    objects = r.get_json()['objects']
+    assert len(objects) == 3
+    for requested, obj in zip(batch_objects, objects):
+        values = obj.pop('values')
+        assert obj == requested
+        assert len(values) > 0
+        assert all(START <= v['timestamp'].replace('Z', '+00:00') <= END
+                   for v in values)
+    assert set(objects[0]['values'][0].keys()) == {
+        'timestamp', 'value', 'quality_flag'}
+    assert set(objects[1]['values'][0].keys()) == {'timestamp', 'value'}
+
+
+@pytest.mark.parametrize('type_', ['observation', 'forecast', 'cdf_forecast'])
+def test_post_values_batch_matches_single(api, batch_objects, type_):
+    obj = [o for o in batch_objects if o['type'] == type_][0]
+    r = api.post('/values/batch', base_url=BASE_URL,
+                 json={'objects': [obj]})
+    path = {'observation': 'observations',
+            'forecast': 'forecasts/single',
+            'cdf_forecast': 'forecasts/cdf/single'}[type_]
+    single = api.get(f'/{path}/{obj["object_id"]}/values',
+                     base_url=BASE_URL,
+                     query_string={'start': START, 'end': END})
+    assert r.get_json()['objects'][0]['values'] == single.get_json()['values']
+
+
+def test_post_values_batch_404(api, batch_objects, missing_id):
+    batch_objects[1]['object_id'] = missing_id
+    r = api.post('/values/batch', base_url=BASE_URL,
+                 json={'objects': batch_objects})
+    assert r.status_code == 404
+
+
+@pytest.mark.parametrize('payload', [
+    {},
+    {'objects': []},
+    {'objects': [{'object_id': 'notauuid', 'type': 'forecast',
+                  'start': START, 'end': END}]},
+    {'objects': [{'object_id': '11c20780-76ae-4b11-bef1-7a75bdc784e3',
+                  'type': 'site', 'start': START, 'end': END}]},
+    {'objects': [{'object_id': '11c20780-76ae-4b11-bef1-7a75bdc784e3',
+                  'type': 'forecast', 'start': START}]},
+    {'objects': [{'object_id': '11c20780-76ae-4b11-bef1-7a75bdc784e3',
+                  'type': 'forecast', 'start': END, 'end': START}]},
+    {'objects': [{'object_id': '11c20780-76ae-4b11-bef1-7a75bdc784e3',
+                  'type': 'forecast', 'start': '2018-01-01T00:00Z',
+                  'end': '2020-01-01T00:00Z'}]},
+])
+def test_post_values_batch_400(api, payload):
+    r = api.post('/values/batch', base_url=BASE_URL, json=payload)
+    assert r.status_code == 400
+    assert 'errors' in r.get_json()
+
+
+def test_post_values_batch_too_many_objects(app, api, batch_objects):
+    app.config['MAX_BATCH_OBJECTS'] = 2
+    r = api.post('/values/batch', base_url=BASE_URL,
+                 json={'objects': batch_objects})
+    assert r.status_code == 400
+    assert 'objects' in r.get_json()['errors']
+
+
+def test_post_values_batch_too_many_days(app, api, batch_objects):
+    app.config['MAX_BATCH_DATA_RANGE_DAYS'] = pd.Timedelta('2 days')
+    r = api.post('/values/batch', base_url=BASE_URL,
+                 json={'objects': batch_objects})
+    assert r.status_code == 400
+    assert r.get_json()['errors']['objects'] == [
+        'At most 2 days of data, summed over all objects, may be '
+        'requested per request']
+
+
+def test_post_values_batch_single_connection(app, api, batch_objects,
+                                             mocker):
+    from sfa_api.utils import storage_interface
+    connect = mocker.spy(storage_interface, 'mysql_connection')
+    r = api.post('/values/batch', base_url=BASE_URL,
+                 json={'objects': batch_objects * 10})
+    assert r.status_code == 200
+    assert connect.call_count == 1
+    assert len(r.get_json()['objects']) == 30
+    assert pd.Timestamp(r.get_json()['objects'][0]['start']) == pd.Timestamp(
+        START)
@@ -4,10 +4,12 @@ from flask.views import MethodView
 
 from sfa_api import spec
 from sfa_api.schema import (UserSchema, ActionList, ALLOWED_OBJECT_TYPES,
-                            UserCreatePerms, ActionsOnTypeList)
+                            UserCreatePerms, ActionsOnTypeList,
+                            ActionsOnObjectsList)
 from sfa_api.utils.auth0_info import (
-    get_email_of_user, get_auth0_id_of_user)
+    get_email_of_user, get_emails_of_users, get_auth0_id_of_user)
 from sfa_api.utils.errors import StorageAuthError, BadAPIRequest
+from sfa_api.utils.request_handling import validate_object_ids
 from sfa_api.utils.storage import get_storage
 
 
@@ -33,8 +35,9 @@ class AllUsersView(MethodView):
         """
         storage = get_storage()
         users = storage.list_users()
+        emails = get_emails_of_users([u['auth0_id'] for u in users])
         for u in users:
-            u['email'] = get_email_of_user(u['auth0_id'])
+            u['email'] = emails[u['auth0_id']]
         return jsonify(UserSchema(many=True).dump(users))
 
 
@@ -294,6 +297,41 @@ class UserActionsView(MethodView):
         return jsonify(ActionList().dump(json_response))
 
 
+class UserActionsOnObjectsView(MethodView):
+    def get(self):
+        """
+        ---
+        summary: Available actions on many objects.
+        description: |-
+          Get the actions the current user is allowed to perform on each
+          of the objects in object_ids. Objects the user cannot perform
+          any action on, or that do not exist, are left out.
+        parameters:
+        - object_ids
+        tags:
+          - Users
+        responses:
+          200:
+            description: List of actions the user can make on the objects.
+            content:
+              application/json:
+                schema:
+                  $ref: '#/components/schemas/ActionsOnObjectsList'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+        """
+        object_ids = validate_object_ids()
+        storage = get_storage()
+        actions = storage.get_user_actions_on_objects(object_ids)
+        json_response = {'objects': [
+            {'object_id': object_id, 'actions': object_actions}
+            for object_id, object_actions in actions.items()]}
+        return Response(ActionsOnObjectsList().dumps(json_response),
+                        mimetype="application/json")
+
+
 class UserCreatePermissions(MethodView):
     def get(self):
         """
@@ -412,6 +450,9 @@ user_blp.add_url_rule(
 user_blp.add_url_rule(
     '/actions-on/<uuid_str:object_id>',
     view_func=UserActionsView.as_view('user_actions_on_object'))
+user_blp.add_url_rule(
+    '/actions-on/',
+    view_func=UserActionsOnObjectsView.as_view('user_actions_on_objects'))
 user_blp.add_url_rule(
     '/can-create/',
     view_func=UserCreatePermissions.as_view('user_create_permissions'))
@@ -5,8 +5,14 @@ flask-jwt-extended because we only need to verify valid tokens
 and not issue any. We use python-jose instead of pyjwt because
 it is better documented and is not missing any JWT features.
 """
+from collections.abc import Mapping
 from json.decoder import JSONDecodeError
 from functools import wraps
+import hashlib
+import json
+import logging
+import threading
+import time
 import requests
 from urllib3 import Retry
 
@@ -17,6 +23,8 @@ from jose import jwt, jwk
 from werkzeug.local import LocalProxy
 
 
+logger = logging.getLogger(__name__)
+
 current_user = LocalProxy(
     lambda: getattr(_request_ctx_stack.top, 'user', ''))
 current_jwt_claims = LocalProxy(
@@ -25,16 +33,178 @@ current_access_token = LocalProxy(
     lambda: getattr(_request_ctx_stack.top, 'access_token', ''))
 
 
+class JWKSProvider:
+    """Lazily load the JSON Web Key Set used to verify access tokens.
+
+    The JWKS is read from path, if given, otherwise requested from url
+    when first needed, and is reloaded once it is older than
+    refresh_interval seconds. If reloading fails, the previously
+    loaded keys continue to be used.
+
+    Parameters
+    ----------
+    url: str
+        URL of the JWKS, e.g. https://<tenant>.auth0.com/.well-known/jwks.json
+    path: str, optional
+        Path to a JSON file containing the JWKS to use instead of url.
+    refresh_interval: float
+        Seconds after which the JWKS is reloaded.
+    min_refresh_interval: float
+        Minimum seconds between loads when a refresh is forced, e.g.
+        for a token signed with an unknown key.
+    timer: callable
+        Returns the current time in seconds.
+    """
+    def __init__(self, url, path=None, refresh_interval=3600,
+                 min_refresh_interval=60, timer=time.monotonic):
+        self.url = url
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._timer = timer
+        self._jwks = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.path:
+            with open(self.path) as f:
+                return json.load(f)
+        resp = requests.get(self.url, timeout=10)
+        resp.raise_for_status()
+        return resp.json()
+
+    def get(self):
+        """Get the JWKS, loading it if it has not been loaded or is
+        older than refresh_interval"""
+        if (
+                self._jwks is None or
+                self._timer() - self._loaded_at >= self.refresh_interval
+        ):
+            return self.refresh()
+        return self._jwks
+
+    def refresh(self):
+        """Reload the JWKS unless it was loaded less than
+        min_refresh_interval seconds ago.
+
+        Raises
+        ------
+        requests.exceptions.RequestException, OSError, ValueError
+            If the JWKS has never been loaded successfully and
+            loading it fails.
+        """
+        with self._lock:
+            now = self._timer()
+            if (
+                    self._jwks is not None and
+                    now - self._loaded_at < self.min_refresh_interval
+            ):
+                return self._jwks
+            try:
+                jwks = self._load()
+            except (requests.exceptions.RequestException, OSError,
+                    ValueError) as e:
+                if self._jwks is None:
+                    raise
+                logger.error('Failed to reload JWKS: %r', e)
+                # try again after min_refresh_interval
+                self._loaded_at = (
+                    now - self.refresh_interval + self.min_refresh_interval)
+            else:
+                self._jwks = jwks
+                self._loaded_at = now
+            return self._jwks
+
+
+def get_jwks(refresh=False):
+    """Get the JWKS to verify tokens with. The JWT_KEY config, when set,
+    takes precedence over the app's JWKSProvider."""
+    jwks = current_app.config.get('JWT_KEY')
+    if jwks is not None:
+        return jwks
+    provider = current_app.extensions['jwks']
+    if refresh:
+        return provider.refresh()
+    return provider.get()
+
+
+def _jwks_keys(refresh=False):
+    """Get the keys of the JWKS constructed into jose key objects by
+    key id. Keys are only constructed again when the JWKS is replaced.
+    Returns None if the key is not a JWKS.
+    """
+    jwks = get_jwks(refresh)
+    cached = current_app.extensions.get('jwks_keys')
+    if cached is not None and cached[0] is jwks:
+        return cached[1]
+    if isinstance(jwks, Mapping) and 'keys' in jwks:
+        keys = {}
+        for key in jwks['keys']:
+            try:
+                keys[key.get('kid')] = jwk.construct(key, 'RS256')
+            except (jwk.JWKError, AttributeError, TypeError):
+                continue
+    else:
+        keys = None
+    current_app.extensions['jwks_keys'] = (jwks, keys)
+    return keys
+
+
+def signing_keys(token):
+    """The key(s) from the JWKS to verify the signature of token with.
+    Uses the pre-constructed key that matches the 'kid' header of the
+    token when possible."""
+    keys = _jwks_keys()
+    if keys is None:
+        return get_jwks()
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+    except jwt.JWTError:
+        # let decoding the token raise the error
+        kid = None
+    if kid is not None and kid not in keys:
+        # the keys may have been rotated
+        keys = _jwks_keys(refresh=True)
+    if kid in keys:
+        return keys[kid]
+    return list(keys.values())
+
+
+def decode_access_token(access_token):
+    """Verify and decode the access token. Decoded claims are cached
+    by a hash of the token until the token expires or for at most
+    TOKEN_CACHE_TTL seconds, so the signature of a token reused
+    across many requests is only verified once.
+
+    Raises
+    ------
+    jose.JWTError
+        If the token is invalid or expired.
+    """
+    cache = current_app.extensions.get('token_cache')
+    cache_key = hashlib.sha256(access_token.encode()).hexdigest()
+    if cache is not None:
+        claims = cache.get(cache_key)
+        if claims is not None:
+            return dict(claims)
+    claims = jwt.decode(
+        access_token,
+        algorithms=['RS256'],
+        key=signing_keys(access_token),
+        audience=current_app.config['AUTH0_AUDIENCE'],
+        issuer=current_app.config['AUTH0_BASE_URL'] + '/')
+    if cache is not None and 'exp' in claims:
+        cache.set(cache_key, dict(claims),
+                  ttl=min(cache.ttl, claims['exp'] - time.time()))
+    return claims
+
+
 def verify_access_token():
     auth = request.headers.get('Authorization', '').split(' ')
     try:
         assert auth[0] == 'Bearer'
-        token = jwt.decode(
-            auth[1],
-            algorithms=['RS256'],
-            key=current_app.config['JWT_KEY'],
-            audience=current_app.config['AUTH0_AUDIENCE'],
-            issuer=current_app.config['AUTH0_BASE_URL'] + '/')
+        token = decode_access_token(auth[1])
     except (jwt.JWTError,
             jwk.JWKError,
             jwt.ExpiredSignatureError,
@@ -53,6 +223,50 @@ def verify_access_token():
         return validate_user_existence()
 
 
+class TimeoutHTTPAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter that uses timeout for requests made without one"""
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def make_auth0_session(config):
+    """Make a requests.Session for requests to config['AUTH0_BASE_URL']
+    that keeps up to config['AUTH0_POOL_SIZE'] connections alive,
+    retries failed connections and idempotent requests, and times out
+    after config['AUTH0_REQUEST_TIMEOUT'] seconds by default.
+    """
+    retries = Retry(
+        total=5, connect=3, read=3, status=3,
+        status_forcelist=[408, 500, 502, 503, 504],
+        backoff_factor=0.2,
+        respect_retry_after_header=True,
+        # return the last response once retries are exhausted so callers
+        # can check the status code instead of handling a RetryError
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        max_retries=retries, pool_maxsize=config['AUTH0_POOL_SIZE'],
+        timeout=config['AUTH0_REQUEST_TIMEOUT'])
+    session = requests.Session()
+    session.mount(config['AUTH0_BASE_URL'], adapter)
+    return session
+
+
+def auth0_session():
+    """The requests.Session of the app shared by all requests to Auth0,
+    so connections are reused instead of opened for every request."""
+    if 'auth0_session' not in current_app.extensions:
+        current_app.extensions['auth0_session'] = make_auth0_session(
+            current_app.config)
+    return current_app.extensions['auth0_session']
+
+
 def request_user_info():
     """Makes a user info request to check if the user exists
     and is verified.
@@ -68,21 +282,11 @@ def request_user_info():
     requests.exceptions.HTTPError
         If the request fails after 5 retries.
     """
-    session = requests.Session()
-    session.headers = {
-        'Authorization': f'Bearer {current_access_token}',
-    }
-    retries = Retry(
-        total=5, connect=3, read=3, status=3,
-        status_forcelist=[408, 500, 502, 503, 504],
-        backoff_factor=0.2,
-        respect_retry_after_header=True,
-    )
     base_url = current_app.config['AUTH0_BASE_URL']
-    adapter = requests.adapters.HTTPAdapter(max_retries=retries)
-    session.mount(base_url, adapter)
-
-    info_request = session.get(base_url + '/userinfo', timeout=3.0)
+    info_request = auth0_session().get(
+        base_url + '/userinfo',
+        headers={'Authorization': f'Bearer {current_access_token}'},
+        timeout=3.0)
 
     info_request.raise_for_status()
     user_info = info_request.json()
@@ -104,8 +308,17 @@ def validate_user_existence():
     to be deleted in auth0 and still carry a valid token. In order
     to avoid adding that use back to our database, we return false
     if the request for user info fails.
+
+    Users found to exist are remembered in the app's user_exists_cache
+    for USER_CACHE_TTL seconds to avoid a database query on every
+    request. A user deleted in the meantime is still denied access
+    to any data by the permission checks in the database.
     """
     from sfa_api.utils.storage import get_storage
+    cache = current_app.extensions.get('user_exists_cache')
+    user = str(current_user)
+    if cache is not None and cache.get(user, False):
+        return True
     storage = get_storage()
     if not storage.user_exists():
         try:
@@ -118,6 +331,8 @@ def validate_user_existence():
                 # is yet to be verified
                 return False
             storage.create_new_user()
+    if cache is not None:
+        cache.set(user, True)
     return True
 
 
@@ -1,6 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import logging
+import math
 import secrets
 import string
+import threading
+import time
 
 
 from flask import current_app
@@ -8,6 +13,7 @@ from jose import jwt, jwk
 import requests
 
 
+from sfa_api.utils.auth import signing_keys, auth0_session
 from sfa_api.utils.queuing import make_redis_connection
 
 
@@ -48,9 +54,10 @@ def get_fresh_auth0_management_token():
                'audience': current_app.config['AUTH0_BASE_URL'] + '/api/v2/',
                'grant_type': 'client_credentials'
                }
-    req = requests.post(current_app.config['AUTH0_BASE_URL'] + '/oauth/token',
-                        headers={'content-type': 'application/json'},
-                        json=payload)
+    req = auth0_session().post(
+        current_app.config['AUTH0_BASE_URL'] + '/oauth/token',
+        headers={'content-type': 'application/json'},
+        json=payload)
     req.raise_for_status()
     token = req.json()['access_token']
     return token
@@ -77,7 +84,7 @@ def check_if_token_is_valid(token):
     try:
         jwt.decode(
             token,
-            key=current_app.config['JWT_KEY'],
+            key=signing_keys(token),
             audience=current_app.config['AUTH0_BASE_URL'] + '/api/v2/',
             issuer=current_app.config['AUTH0_BASE_URL'] + '/')
     except (jwt.JWTError,
@@ -92,11 +99,107 @@ def check_if_token_is_valid(token):
         return True
 
 
+class ManagementTokenProvider:
+    """Keep the Auth0 Management API token in memory until it is close
+    to expiring, so it is not read from Redis and verified on every
+    use.
+
+    When the token is missing or expires within refresh_margin seconds,
+    one caller loads a new token while any others wait for, and then
+    use, the same token. After a failed load, loading is not tried
+    again for retry_interval seconds.
+
+    Parameters
+    ----------
+    refresh_margin: float
+        Seconds before the token expires that it is replaced.
+    retry_interval: float
+        Seconds to wait after a failed load before loading again.
+    timer: callable
+        Returns the current time in seconds since the epoch.
+    """
+    def __init__(self, refresh_margin=300, retry_interval=10,
+                 timer=time.time):
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._timer = timer
+        self._token = None
+        self._expires_at = 0
+        self._retry_at = 0
+        self._lock = threading.Lock()
+
+    def _current(self, now):
+        if self._expires_at - now > self.refresh_margin:
+            return self._token
+
+    def get(self, load):
+        """Get the token, calling load to get a new token if the
+        current token is missing or about to expire.
+
+        Parameters
+        ----------
+        load: callable
+            Returns a new token and its expiration time in seconds
+            since the epoch, or (None, None) if a token could not be
+            retrieved. A token without an expiration time is returned
+            but not kept.
+
+        Returns
+        -------
+        str or None
+            The token, or None if no token could be retrieved.
+        """
+        token = self._current(self._timer())
+        if token is not None:
+            return token
+        with self._lock:
+            now = self._timer()
+            token = self._current(now)
+            if token is not None:
+                return token
+            if now < self._retry_at:
+                # the last load failed, use the old token until it expires
+                return self._token if self._expires_at > now else None
+            token, expires_at = load()
+            if token is None:
+                self._retry_at = now + self.retry_interval
+                return self._token if self._expires_at > now else None
+            if expires_at is not None:
+                self._token = token
+                self._expires_at = expires_at
+            return token
+
+
+def _token_expiration(token):
+    try:
+        return float(jwt.get_unverified_claims(token)['exp'])
+    except (jwt.JWTError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _load_auth0_token():
+    redis_conn = token_redis_connection()
+    token = redis_conn.get('auth0_token')
+    if token is not None and check_if_token_is_valid(token):
+        expires_at = _token_expiration(token)
+        margin = current_app.config['AUTH0_TOKEN_REFRESH_MARGIN']
+        if expires_at is None or expires_at - time.time() > margin:
+            return token, expires_at
+    try:
+        token = get_fresh_auth0_management_token()
+    except (ValueError, requests.HTTPError) as e:
+        logger.error('Failed to retrieve Auth0 token: %r', e)
+        return None, None
+    redis_conn.set('auth0_token', token)
+    return token, _token_expiration(token)
+
+
 def auth0_token():
     """
-    Get the auth0 management API access token from Redis,
-    if present, and validate the token is good.
-    Otherwise, get a new token and store it in Redis
+    Get the auth0 management API access token. The token is kept in
+    memory until it is about to expire. Then the token in Redis is
+    used if it is valid and not about to expire, otherwise a new
+    token is requested and stored in Redis.
 
     Returns
     -------
@@ -104,17 +207,10 @@ def auth0_token():
         Returns None when could not retrieve a token to access the
         Auth0 Management API
     """
-    redis_conn = token_redis_connection()
-    token = redis_conn.get('auth0_token')
-    token_valid = check_if_token_is_valid(token)
-    if token is None or not token_valid:
-        try:
-            token = get_fresh_auth0_management_token()
-        except (ValueError, requests.HTTPError) as e:
-            logger.error('Failed to retrieve Auth0 token: %r', e)
-            return
-        redis_conn.set('auth0_token', token)
-    return token
+    if 'auth0_token' not in current_app.extensions:
+        current_app.extensions['auth0_token'] = ManagementTokenProvider(
+            refresh_margin=current_app.config['AUTH0_TOKEN_REFRESH_MARGIN'])
+    return current_app.extensions['auth0_token'].get(_load_auth0_token)
 
 
 def _verify_auth0_id(auth0_id):
@@ -122,25 +218,33 @@ def _verify_auth0_id(auth0_id):
         raise ValueError('Invalid auth0 ID')
 
 
+def _request_email_of_user(auth0_id, token, config, session):
+    headers = {'content-type': 'application/json',
+               'authorization': f'Bearer {token}'}
+    req = session.get(
+        config['AUTH0_BASE_URL'] + '/api/v2/users/' + auth0_id,
+        params={'fields': 'email',
+                'include_fields': 'true'},
+        headers=headers)
+    if req.status_code == 200:
+        return req.json()['email']
+    else:
+        logger.error('Failed to retrieve email from Auth0: %s %s',
+                     req.status_code, req.text)
+        return None
+
+
 def _get_email_of_user(auth0_id, redis_conn, token,
                        config):
     # email is PII, but easy to clear db
     email = redis_conn.get(auth0_id)
     if email is None:
-        headers = {'content-type': 'application/json',
-                   'authorization': f'Bearer {token}'}
-        req = requests.get(
-            config['AUTH0_BASE_URL'] + '/api/v2/users/' + auth0_id,
-            params={'fields': 'email',
-                    'include_fields': 'true'},
-            headers=headers)
-        if req.status_code == 200:
-            email = req.json()['email']
+        email = _request_email_of_user(auth0_id, token, config,
+                                       auth0_session())
+        if email is not None:
             # expire in 1 day
             redis_conn.set(auth0_id, email, ex=86400)
         else:
-            logger.error('Failed to retrieve email from Auth0: %s %s',
-                         req.status_code, req.text)
             email = 'Unable to retrieve'
     return email
 
@@ -170,10 +274,60 @@ def get_email_of_user(auth0_id):
         current_app.config)
 
 
-def _get_all_emails(token, config, page=0, per_page=100):
+def get_emails_of_users(auth0_ids):
+    """
+    Get the emails of the users with the given auth0 IDs. Emails in
+    Redis are read with a single MGET and the rest are requested from
+    Auth0 concurrently, with at most config['AUTH0_EMAIL_WORKERS']
+    requests at once, and then written back to Redis together.
+
+    Parameters
+    ----------
+    auth0_ids : list of str
+        The auth0 IDs of the users
+
+    Returns
+    -------
+    dict
+        With auth0_id keys and the email, or 'Unable to retrieve',
+        as values
+
+    Raises
+    ------
+    ValueError
+        If any auth0 ID is not valid
+    """
+    list(map(_verify_auth0_id, auth0_ids))
+    auth0_ids = list(dict.fromkeys(auth0_ids))
+    if not auth0_ids:
+        return {}
+    redis_conn = token_redis_connection()
+    emails = dict(zip(auth0_ids, redis_conn.mget(auth0_ids)))
+    missing = [aid for aid, email in emails.items() if email is None]
+    if missing:
+        token = auth0_token()
+        config = current_app.config
+        workers = min(config['AUTH0_EMAIL_WORKERS'], len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched = dict(zip(missing, pool.map(
+                partial(_request_email_of_user, token=token, config=config,
+                        session=auth0_session()),
+                missing)))
+        pipe = redis_conn.pipeline(transaction=False)
+        for aid, email in fetched.items():
+            if email is not None:
+                # expire in 1 day
+                pipe.set(aid, email, ex=86400)
+        pipe.execute()
+        emails.update(fetched)
+    return {aid: email if email is not None else 'Unable to retrieve'
+            for aid, email in emails.items()}
+
+
+def _get_email_page(page, token, config, session, per_page):
     headers = {'content-type': 'application/json',
                'authorization': f'Bearer {token}'}
-    req = requests.get(
+    req = session.get(
         config['AUTH0_BASE_URL'] + '/api/v2/users',
         params={'fields': 'user_id,email',
                 'include_fields': 'true',
@@ -183,15 +337,30 @@ def _get_all_emails(token, config, page=0, per_page=100):
                 },
         headers=headers)
     if req.status_code == 200:
-        rj = req.json()
-        emails = {u['user_id']: u['email'] for u in rj['users']}
-        if rj['total'] > (page + 1) * per_page:
-            emails.update(_get_all_emails(token, config, page+1, per_page))
+        return req.json()
     else:
         logger.error('Failed to retrieve emails from Auth0: %s %s',
                      req.status_code, req.text)
-        emails = {}
-    return emails
+        return None
+
+
+def _get_all_emails(token, config, session, per_page=100):
+    # the first page gives the total number of users, then the
+    # remaining pages are requested concurrently
+    first = _get_email_page(0, token, config, session, per_page)
+    if first is None:
+        return {}
+    pages = [first]
+    npages = math.ceil(first['total'] / per_page)
+    if npages > 1:
+        workers = min(config['AUTH0_EMAIL_WORKERS'], npages - 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pages.extend(pool.map(
+                partial(_get_email_page, token=token, config=config,
+                        session=session, per_page=per_page),
+                range(1, npages)))
+    return {u['user_id']: u['email'] for page in pages
+            if page is not None for u in page['users']}
 
 
 def list_user_emails(auth0_ids):
@@ -217,7 +386,8 @@ def list_user_emails(auth0_ids):
     list(map(_verify_auth0_id, auth0_ids))
     token = auth0_token()
     config = current_app.config
-    emails = _get_all_emails(token=token, config=config)
+    emails = _get_all_emails(token=token, config=config,
+                             session=auth0_session())
     return {aid: emails.get(aid, 'Unable to retrieve') for aid in auth0_ids}
 
 
@@ -228,7 +398,7 @@ def _get_auth0_id_of_user(email, redis_conn, token,
     if user_id is None:
         headers = {'content-type': 'application/json',
                    'authorization': f'Bearer {token}'}
-        req = requests.get(
+        req = auth0_session().get(
             config['AUTH0_BASE_URL'] + '/api/v2/users-by-email',
             params={'fields': 'user_id',
                     'email': email.lower(),
@@ -314,7 +484,7 @@ def create_user(email, password, verified=False):
             'connection': 'Username-Password-Authentication'}
     headers = {'content-type': 'application/json',
                'authorization': f'Bearer {token}'}
-    req = requests.post(
+    req = auth0_session().post(
         config['AUTH0_BASE_URL'] + '/api/v2/users',
         json=body,
         headers=headers)
@@ -352,7 +522,7 @@ def get_refresh_token(email, password):
             'audience': current_app.config['AUTH0_AUDIENCE'],
             'scope': 'offline_access'
             }
-    req = requests.post(
+    req = auth0_session().post(
         current_app.config['AUTH0_BASE_URL'] + '/oauth/token',
         json=body
     )
@@ -388,7 +558,7 @@ def get_access_token(email, password):
             'client_secret': current_app.config['AUTH0_CLIENT_SECRET'],
             'audience': current_app.config['AUTH0_AUDIENCE'],
             }
-    req = requests.post(
+    req = auth0_session().post(
         current_app.config['AUTH0_BASE_URL'] + '/oauth/token',
         json=body
     )
@@ -421,7 +591,7 @@ def exchange_refresh_token(refresh_token):
             'audience': current_app.config['AUTH0_AUDIENCE'],
             'refresh_token': refresh_token
             }
-    req = requests.post(
+    req = auth0_session().post(
         current_app.config['AUTH0_BASE_URL'] + '/oauth/token',
         json=body)
     req.raise_for_status()
@@ -457,7 +627,7 @@ def get_password_reset_link(email):
             }
     headers = {'content-type': 'application/json',
                'authorization': f'Bearer {token}'}
-    req = requests.post(
+    req = auth0_session().post(
         config['AUTH0_BASE_URL'] + '/api/v2/tickets/password-change',
         json=body,
         headers=headers)
@@ -0,0 +1,97 @@
+"""
+Small in-process caches for values that are expensive to look up on
+every request.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """A thread-safe mapping where each entry expires after a
+    time-to-live and the least recently used entry is evicted once
+    maxsize entries are stored.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of entries to keep.
+    ttl: float
+        Default number of seconds an entry is valid for. Entries
+        are never stored if the ttl is not positive.
+    timer: callable
+        Returns the current time in seconds.
+
+    Attributes
+    ----------
+    hits: int
+        Number of lookups that found a valid entry.
+    misses: int
+        Number of lookups that did not find a valid entry.
+    """
+    def __init__(self, maxsize=1024, ttl=60, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key, default=None, count=True):
+        """Get the value for key if it has not expired, otherwise
+        return default."""
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                found = False
+            else:
+                found = expires > self._timer()
+                if found:
+                    self._data.move_to_end(key)
+                else:
+                    del self._data[key]
+            if count:
+                if found:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return value if found else default
+
+    def set(self, key, value, ttl=None):
+        """Store value for key for ttl seconds, or the default ttl
+        of the cache if ttl is None."""
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, self._timer() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """Remove the entry for key if it exists"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Dict of the hits, misses, and current number of entries"""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._data)}
@@ -3,18 +3,27 @@ from io import StringIO
 import json
 import re
 import string
+import uuid
 
 
 from flask import request, current_app
+from marshmallow import ValidationError
 import numpy as np
 import pandas as pd
 from solarforecastarbiter.datamodel import Forecast, Site
 from solarforecastarbiter.reference_forecasts import utils as fx_utils
 from werkzeug.exceptions import RequestEntityTooLarge
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 
+from sfa_api.schema import ForecastValuesBatchItemSchema, VARIABLES
 from sfa_api.utils.errors import (
     BadAPIRequest, NotFoundException, StorageAuthError)
+from sfa_api.utils.response_handling import (
+    ARROW_MIMETYPE, BINARY_MIMETYPES, binary_formats_available)
 
 
 def validate_observation_values(observation_df, quality_flag_range=(0, 1)):
@@ -111,6 +120,36 @@ def parse_csv(csv_string):
     return value_df
 
 
+# bytes that are not in string.printable, i.e. ASCII control characters
+_UNPRINTABLE_BYTES = bytes(
+    b for b in range(128) if chr(b) not in string.printable)
+
+
+def _strip_unprintable(json_str):
+    """Remove all characters that are not in string.printable,
+    including any non-ASCII characters like a byte order mark, in bulk.
+
+    Returns
+    -------
+    bytes
+    """
+    return json_str.encode('ascii', 'ignore').translate(
+        None, _UNPRINTABLE_BYTES)
+
+
+def _loads(json_bytes):
+    """Load JSON with orjson if it is installed. Falls back to the
+    standard library for documents orjson rejects but json accepts,
+    such as those with NaN literals.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(json_bytes)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(json_bytes)
+
+
 def parse_json(json_str):
     """Parse a string of json values into a DataFrame
 
@@ -129,8 +168,7 @@ def parse_json(json_str):
         values key cannot be parsed into a DataFrame.
     """
     try:
-        json_dict = json.loads(''.join(s for s in json_str
-                                       if s in string.printable))
+        json_dict = _loads(_strip_unprintable(json_str))
     except json.decoder.JSONDecodeError:
         raise BadAPIRequest(error='Malformed JSON.')
     try:
@@ -145,13 +183,54 @@ def parse_json(json_str):
     return value_df
 
 
+def parse_arrow(data, mimetype):
+    """Parse an Apache Arrow IPC stream or Parquet file into a DataFrame.
+    Columns keep the types they were serialized with, so no parsing
+    of strings is required for typed timestamp and value columns.
+
+    Parameters
+    ----------
+    data: bytes
+    mimetype: str
+        One of the Arrow or Parquet mimetypes in BINARY_MIMETYPES
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    Raises
+    ------
+    BadAPIRequestError
+        If pyarrow is not installed or the data cannot be read.
+    """
+    if not binary_formats_available():
+        raise BadAPIRequest(error="Unsupported Content-Type or MIME type.")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        if mimetype == ARROW_MIMETYPE:
+            table = pa.ipc.open_stream(data).read_all()
+        else:
+            table = pq.read_table(pa.BufferReader(data))
+    except (pa.ArrowException, OSError):
+        fmt = 'Arrow' if mimetype == ARROW_MIMETYPE else 'Parquet'
+        raise BadAPIRequest(error=f'Malformed {fmt} data.')
+    value_df = table.to_pandas()
+    if 'timestamp' not in value_df.columns and (
+            value_df.index.name == 'timestamp'):
+        value_df = value_df.reset_index()
+    return value_df
+
+
 def parse_values(decoded_data, mimetype):
     """Attempts to parse a string of data into a DataFrame based on MIME type.
 
     Parameters
     ----------
-    decoded_data: str
-        A string of data to parse.
+    decoded_data: str or bytes
+        A string of data to parse, or bytes for the binary Arrow and
+        Parquet formats.
     mimetype: str
         The MIME type of the data.
 
@@ -163,8 +242,11 @@ def parse_values(decoded_data, mimetype):
     ------
     BadAPIRequest
         - If the MIME type is not one of 'text/csv', 'application/json',
-          or 'application/vnd.ms-excel'
-        - If parsing fails, see parse_json or parse_csv for conditions.
+          'application/vnd.ms-excel', or, when pyarrow is installed,
+          'application/vnd.apache.arrow.stream' or
+          'application/vnd.apache.parquet'
+        - If parsing fails, see parse_json, parse_csv, or parse_arrow for
+          conditions.
         - If the file contains more than the maximum allowed number of
           datapoints.
     """
@@ -172,6 +254,8 @@ def parse_values(decoded_data, mimetype):
         values = parse_csv(decoded_data)
     elif mimetype == 'application/json':
         values = parse_json(decoded_data)
+    elif mimetype in BINARY_MIMETYPES:
+        values = parse_arrow(decoded_data, mimetype)
     else:
         error = "Unsupported Content-Type or MIME type."
         raise BadAPIRequest(error=error)
@@ -187,12 +271,13 @@ def parse_values(decoded_data, mimetype):
 
 def decode_file_in_request_body():
     """Decode the data from a utf-8 encoded file into a string and
-    return the contents and the file's mimetype.
+    return the contents and the file's mimetype. Files with a binary
+    Arrow or Parquet mimetype are returned as bytes.
 
     Returns
     -------
-    decoded_data: str
-        The posted utf-8 data as a string.
+    decoded_data: str or bytes
+        The posted utf-8 data as a string, or the binary data.
     posted_file.mimetype: str
         MIME type of the file in the request body.
 
@@ -216,6 +301,8 @@ def decode_file_in_request_body():
         raise BadAPIRequest(error=error)
 
     posted_data = posted_file.read()
+    if posted_file.mimetype in BINARY_MIMETYPES:
+        return posted_data, posted_file.mimetype
 
     try:
         decoded_data = posted_data.decode('utf-8')
@@ -244,6 +331,9 @@ def validate_parsable_values():
         raise RequestEntityTooLarge
     if request.mimetype == 'multipart/form-data':
         decoded_data, mimetype = decode_file_in_request_body()
+    elif request.mimetype in BINARY_MIMETYPES:
+        decoded_data = request.get_data()
+        mimetype = request.mimetype
     else:
         decoded_data = request.get_data(as_text=True)
         mimetype = request.mimetype
@@ -256,6 +346,215 @@ def validate_parsable_values():
     return value_df
 
 
+def validate_parsable_values_batch():
+    """Parse a JSON request body with the values of many forecasts, see
+    sfa_api.schema.ForecastValuesBatchPostSchema, and validate the
+    values of each forecast as validate_forecast_values does.
+
+    Returns
+    -------
+    list of dict
+        With 'forecast_id', 'type', and 'values' keys for each forecast
+        where 'values' is a DataFrame with 'timestamp' and 'value' columns.
+
+    Raises
+    ------
+    BadAPIRequest
+        - If the body is not JSON or does not match the schema.
+        - If there are more than MAX_BATCH_OBJECTS forecasts or more than
+          MAX_POST_DATAPOINTS values in total.
+        - If the values of any forecast cannot be parsed or are empty.
+          Errors are keyed by the position of the forecast in the list.
+    werkzeug.exceptions.RequestEntityTooLarge
+        If the `Content-Length` header is greater than the application's
+        `MAX_CONTENT_LENGTH` config variable.
+    """
+    content_length = int(request.headers.get('Content-Length', 0))
+    if (content_length > current_app.config['MAX_CONTENT_LENGTH']):
+        raise RequestEntityTooLarge
+    if request.mimetype != 'application/json':
+        raise BadAPIRequest(error="Unsupported Content-Type or MIME type.")
+    try:
+        body = _loads(_strip_unprintable(request.get_data(as_text=True)))
+    except json.decoder.JSONDecodeError:
+        raise BadAPIRequest(error='Malformed JSON.')
+    try:
+        raw_forecasts = body['forecasts']
+    except (TypeError, KeyError):
+        raise BadAPIRequest(
+            error='Supplied JSON does not contain "forecasts" field.')
+    if not isinstance(raw_forecasts, list) or len(raw_forecasts) == 0:
+        raise BadAPIRequest(forecasts='Must be a non-empty list.')
+    max_objects = current_app.config['MAX_BATCH_OBJECTS']
+    if len(raw_forecasts) > max_objects:
+        raise BadAPIRequest(forecasts=(
+            f'Values for at most {max_objects} forecasts may be posted '
+            'per request'))
+
+    # validate everything but the values with the schema since
+    # loading many values with marshmallow is slow
+    item_schema = ForecastValuesBatchItemSchema(exclude=('values',))
+    errors = {}
+    forecasts = []
+    total = 0
+    for i, raw in enumerate(raw_forecasts):
+        if not isinstance(raw, dict):
+            errors[str(i)] = {'_schema': ['Invalid input type.']}
+            continue
+        raw = raw.copy()
+        raw_values = raw.pop('values', None)
+        try:
+            forecast = item_schema.load(raw)
+        except ValidationError as err:
+            errors[str(i)] = err.messages
+            continue
+        try:
+            values = pd.DataFrame(raw_values)
+        except ValueError:
+            errors[str(i)] = {'values': ['Malformed values.']}
+            continue
+        if values.size == 0:
+            errors[str(i)] = {'values': ['Must contain values.']}
+            continue
+        try:
+            validate_forecast_values(values)
+        except BadAPIRequest as err:
+            errors[str(i)] = err.errors
+            continue
+        total += values.index.size
+        forecast['values'] = values
+        forecasts.append(forecast)
+    if errors:
+        raise BadAPIRequest(forecasts=errors)
+    max_points = current_app.config['MAX_POST_DATAPOINTS']
+    if total > max_points:
+        raise BadAPIRequest({
+            'error': ('Request exceeds maximum number of datapoints. '
+                      f'{max_points} datapoints allowed, {total} '
+                      'datapoints found in request.')
+        })
+    return forecasts
+
+
+def _parse_cdf_group_json(json_str):
+    """Parse JSON of the form of CDFForecastGroupValuesPostSchema into
+    a DataFrame with a timestamp column and a column for each constant
+    value"""
+    try:
+        json_dict = _loads(_strip_unprintable(json_str))
+    except json.decoder.JSONDecodeError:
+        raise BadAPIRequest(error='Malformed JSON.')
+    try:
+        constant_values = json_dict['constant_values']
+        raw_values = json_dict['values']
+    except (TypeError, KeyError):
+        raise BadAPIRequest(error=(
+            'Supplied JSON does not contain "constant_values" and '
+            '"values" fields.'))
+    try:
+        value_df = pd.DataFrame(raw_values)
+        if value_df.size == 0:
+            return value_df
+        wide = pd.DataFrame(value_df['values'].tolist(),
+                            index=value_df.index)
+        timestamps = value_df['timestamp']
+    except (ValueError, TypeError, KeyError):
+        raise BadAPIRequest({'error': 'Malformed JSON'})
+    if not isinstance(constant_values, list) or (
+            len(constant_values) != len(wide.columns)):
+        raise BadAPIRequest(values=[
+            'Each timestamp must have one value for each of the '
+            'constant_values.'])
+    wide.columns = constant_values
+    wide.insert(0, 'timestamp', timestamps)
+    return wide
+
+
+def validate_parsable_cdf_group_values():
+    """Can be called from a POST view/endpoint to parse the values of
+    all constant values of a probabilistic forecast from JSON, see
+    sfa_api.schema.CDFForecastGroupValuesPostSchema, or from CSV with a
+    timestamp column and a column named by each constant value.
+
+    Returns
+    -------
+    pandas.DataFrame
+        With a timestamp column and a float column of values for each
+        constant value, named by the float constant value.
+
+    Raises
+    ------
+    BadAPIRequest
+        - If the data cannot be parsed or contains no values.
+        - If a constant value is not a number or is repeated.
+        - If any value or timestamp is invalid, see
+          validate_forecast_values.
+        - If there are more than MAX_POST_DATAPOINTS values.
+    werkzeug.exceptions.RequestEntityTooLarge
+        If the `Content-Length` header is greater than the application's
+        `MAX_CONTENT_LENGTH` config variable.
+    """
+    content_length = int(request.headers.get('Content-Length', 0))
+    if (content_length > current_app.config['MAX_CONTENT_LENGTH']):
+        raise RequestEntityTooLarge
+    mimetype = request.mimetype
+    if mimetype == 'multipart/form-data':
+        decoded_data, mimetype = decode_file_in_request_body()
+    else:
+        decoded_data = request.get_data(as_text=True)
+    if mimetype == 'text/csv' or mimetype == 'application/vnd.ms-excel':
+        value_df = parse_csv(decoded_data)
+    elif mimetype == 'application/json':
+        value_df = _parse_cdf_group_json(decoded_data)
+    else:
+        raise BadAPIRequest(error="Unsupported Content-Type or MIME type.")
+    if value_df.size == 0:
+        raise BadAPIRequest({
+            'error': ("Posted data contained no values."),
+        })
+    if 'timestamp' not in value_df.columns:
+        raise BadAPIRequest(timestamp=['Missing "timestamp" field.'])
+    constant_values = value_df.columns.drop('timestamp')
+    try:
+        constant_values = [float(cv) for cv in constant_values]
+    except (TypeError, ValueError):
+        raise BadAPIRequest(constant_values=[
+            'Constant values must be numbers.'])
+    if len(constant_values) == 0:
+        raise BadAPIRequest(constant_values=[
+            'At least one constant value is required.'])
+    if len(set(constant_values)) != len(constant_values):
+        raise BadAPIRequest(constant_values=[
+            'Constant values must be unique.'])
+    max_points = current_app.config['MAX_POST_DATAPOINTS']
+    npoints = value_df.index.size * len(constant_values)
+    if npoints > max_points:
+        raise BadAPIRequest({
+            'error': ('File exceeds maximum number of datapoints. '
+                      f'{max_points} datapoints allowed, {npoints} '
+                      'datapoints found in file.')
+        })
+    errors = {}
+    try:
+        values = value_df.drop(columns='timestamp').apply(
+            pd.to_numeric).astype(float)
+    except (ValueError, TypeError):
+        errors['value'] = [
+            'Invalid item in "value" field. Ensure that all values '
+            'are integers, floats, empty, NaN, or NULL.']
+    try:
+        timestamps = pd.to_datetime(value_df['timestamp'], utc=True)
+    except ValueError:
+        errors['timestamp'] = [
+            'Invalid item in "timestamp" field. Ensure that '
+            'timestamps are ISO8601 compliant']
+    if errors:
+        raise BadAPIRequest(errors)
+    values.columns = constant_values
+    values.insert(0, 'timestamp', timestamps)
+    return values
+
+
 def parse_to_timestamp(dt_string):
     """Attempts to parse to Timestamp.
 
@@ -326,6 +625,149 @@ def validate_start_end():
     return start, end
 
 
+def validate_since_limit():
+    """Parses the since and limit query parameters of a request for
+    changed values.
+
+    Returns
+    -------
+    since: tuple or None
+        The cursor formatted by
+        sfa_api.utils.response_handling.format_value_cursor, or None if
+        since was not provided.
+    limit: int
+        Defaults to, and may not exceed, the MAX_VALUE_CHANGES setting.
+
+    Raises
+    ------
+    BadAPIRequest
+        If since or limit are invalid.
+    """
+    errors = {}
+    max_limit = current_app.config['MAX_VALUE_CHANGES']
+    since = request.args.get('since', None)
+    limit = request.args.get('limit', max_limit)
+    if since is not None:
+        # cursors of microseconds since the epoch, used before values
+        # were versioned, have 16 digits and are rejected
+        match = re.fullmatch(r'(\d{1,15})\.(\d{1,10})', since)
+        if match is None:
+            errors['since'] = ['Invalid cursor']
+        else:
+            since = (int(match.group(1)),
+                     pd.Timestamp(int(match.group(2)), unit='s', tz='UTC'))
+    try:
+        limit = int(limit)
+    except ValueError:
+        errors['limit'] = ['Must be an integer']
+    else:
+        if not 0 < limit <= max_limit:
+            errors['limit'] = [f'Must be between 1 and {max_limit}']
+    if errors:
+        raise BadAPIRequest(errors)
+    return since, limit
+
+
+def validate_list_parameters():
+    """Parses the variable, cursor and limit query parameters of a
+    request to list objects.
+
+    Returns
+    -------
+    dict
+        With keys variable, cursor and limit to pass to the storage
+        list functions. Parameters not in the request are None.
+
+    Raises
+    ------
+    BadAPIRequest
+        If variable, cursor or limit are invalid.
+    """
+    errors = {}
+    variable = request.args.get('variable', None)
+    cursor = request.args.get('cursor', None)
+    limit = request.args.get('limit', None)
+    max_limit = current_app.config['MAX_LIST_LIMIT']
+    if variable is not None and variable not in VARIABLES:
+        errors['variable'] = [f'Must be one of: {", ".join(VARIABLES)}.']
+    if cursor is not None:
+        try:
+            cursor = str(uuid.UUID(cursor))
+        except ValueError:
+            errors['cursor'] = ['Invalid cursor']
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            errors['limit'] = ['Must be an integer']
+        else:
+            if not 0 < limit <= max_limit:
+                errors['limit'] = [f'Must be between 1 and {max_limit}']
+    if errors:
+        raise BadAPIRequest(errors)
+    return {'variable': variable, 'cursor': cursor, 'limit': limit}
+
+
+def validate_fields(allowed):
+    """Parses the comma separated fields query parameter used to
+    request only some fields of an object.
+
+    Parameters
+    ----------
+    allowed: collection of str
+        The fields that may be requested.
+
+    Returns
+    -------
+    tuple or None
+        The requested fields in the order given, or None if the fields
+        parameter was not provided.
+
+    Raises
+    ------
+    BadAPIRequest
+        If no fields or unknown fields are requested.
+    """
+    fields = request.args.get('fields', None)
+    if fields is None:
+        return None
+    fields = tuple(dict.fromkeys(
+        f.strip() for f in fields.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if not fields:
+        raise BadAPIRequest({'fields': ['Must provide at least one field']})
+    if unknown:
+        raise BadAPIRequest({'fields': [
+            f'Unknown fields {", ".join(unknown)}. Must be one of '
+            f'{", ".join(allowed)}']})
+    return fields
+
+
+def validate_object_ids():
+    """Parses the comma separated object_ids query parameter.
+
+    Returns
+    -------
+    list of str
+        The normalized object ids in the order given without duplicates.
+
+    Raises
+    ------
+    BadAPIRequest
+        If object_ids is missing, empty, or contains an invalid uuid.
+    """
+    object_ids = request.args.get('object_ids', '')
+    object_ids = [o.strip() for o in object_ids.split(',') if o.strip()]
+    if not object_ids:
+        raise BadAPIRequest(
+            {'object_ids': ['Must provide at least one object id']})
+    try:
+        object_ids = [str(uuid.UUID(o)) for o in object_ids]
+    except ValueError:
+        raise BadAPIRequest({'object_ids': ['Invalid object id']})
+    return list(dict.fromkeys(object_ids))
+
+
 def validate_index_period(index, interval_length, previous_time):
     """
     Validate that the index conforms to interval_length.
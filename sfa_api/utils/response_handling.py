@@ -0,0 +1,509 @@
+"""
+Helpers for building value responses. Includes serialization to the
+binary Apache Arrow formats, when pyarrow is installed, streaming
+values to the client chunk by chunk instead of serializing the full
+series at once, conditional responses using ETags, and fast
+serialization of lists of metadata.
+"""
+from functools import lru_cache
+import hashlib
+
+
+from flask import (Response, make_response, stream_with_context, json,
+                   jsonify, request, url_for)
+from flask_marshmallow.fields import Hyperlinks, URLFor, _tpl
+from marshmallow import fields, missing
+import pandas as pd
+
+
+from sfa_api.schema import (timeseries_to_json, ModelingParametersField,
+                            BaseModelingParameters, FixedModelingParameters,
+                            SingleAxisModelingParameters)
+
+
+CSV_DATE_FORMAT = '%Y%m%dT%H:%M:%S%z'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+BINARY_MIMETYPES = (ARROW_MIMETYPE, PARQUET_MIMETYPE)
+# end of stream marker for the Arrow IPC streaming format
+ARROW_EOS = b'\xff\xff\xff\xff\x00\x00\x00\x00'
+
+
+@lru_cache(maxsize=None)
+def binary_formats_available():
+    """Check if pyarrow can be imported to support the Arrow IPC
+    and Parquet formats."""
+    try:
+        import pyarrow  # NOQA
+        import pyarrow.parquet  # NOQA
+    except ImportError:
+        return False
+    else:
+        return True
+
+
+def values_mimetypes():
+    """The mimetypes that value endpoints may respond with, in order
+    of preference."""
+    mimetypes = ['application/json', 'text/csv']
+    if binary_formats_available():
+        mimetypes.extend(BINARY_MIMETYPES)
+    return mimetypes
+
+
+def values_to_arrow(values, metadata, columns=None):
+    """Convert a DataFrame of values to a pyarrow.Table
+
+    Parameters
+    ----------
+    values: pandas.DataFrame
+        Values with a DatetimeIndex. The index is converted to UTC
+        and included as the 'timestamp' column.
+    metadata: dict
+        Added to the metadata of the table schema, e.g. the
+        observation_id. Values are converted to strings.
+    columns: list, optional
+        Columns of values to include.
+
+    Returns
+    -------
+    pyarrow.Table
+    """
+    import pyarrow as pa
+
+    if columns is not None:
+        values = values[columns]
+    index = values.index
+    if isinstance(index, pd.DatetimeIndex):
+        if index.tzinfo is None:
+            index = index.tz_localize('UTC')
+        else:
+            index = index.tz_convert('UTC')
+    values = values.set_axis(index.rename('timestamp')).reset_index()
+    table = pa.Table.from_pandas(values, preserve_index=False)
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata.update({
+        str(k).encode(): str(v).encode() for k, v in metadata.items()})
+    return table.replace_schema_metadata(schema_metadata)
+
+
+def arrow_to_bytes(table, mimetype):
+    """Serialize a pyarrow.Table to the format indicated by mimetype"""
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    if mimetype == ARROW_MIMETYPE:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    elif mimetype == PARQUET_MIMETYPE:
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink)
+    else:
+        raise ValueError(f'Unsupported binary mimetype {mimetype}')
+    return sink.getvalue().to_pybytes()
+
+
+def make_binary_response(values, mimetype, metadata, columns=None):
+    """Create a response with values serialized in an Arrow format.
+
+    Parameters
+    ----------
+    values: pandas.DataFrame
+    mimetype: str
+        One of BINARY_MIMETYPES
+    metadata: dict
+        Added to the schema metadata of the table.
+    columns: list, optional
+        Columns of values to include.
+
+    Returns
+    -------
+    flask.Response
+    """
+    table = values_to_arrow(values, metadata, columns)
+    response = make_response(arrow_to_bytes(table, mimetype), 200)
+    response.mimetype = mimetype
+    return response
+
+
+def stream_arrow_values(metadata, chunks, columns=None):
+    """Generator of the Arrow IPC stream of the values read from
+    chunks. The schema is sent with the first chunk, and each
+    following chunk is sent as record batches.
+
+    Parameters
+    ----------
+    metadata: dict
+        Added to the schema metadata.
+    chunks: iterable of pandas.DataFrame
+        Values to write. All chunks must have the same columns and
+        dtypes.
+    columns: list, optional
+        Columns of values to include.
+
+    Yields
+    ------
+    bytes
+    """
+    schema = None
+    for chunk in chunks:
+        table = values_to_arrow(chunk, metadata, columns)
+        if schema is None:
+            schema = table.schema
+            yield schema.serialize().to_pybytes()
+        for batch in table.to_batches():
+            yield batch.serialize().to_pybytes()
+    yield ARROW_EOS
+
+
+def stream_json_values(schema, metadata, chunks):
+    """Generator of the JSON serialization of schema with the values
+    read from chunks.
+
+    Parameters
+    ----------
+    schema: marshmallow.Schema
+        Schema with a 'values' TimeseriesField.
+    metadata: dict
+        Data to dump with schema, not including 'values'.
+    chunks: iterable of pandas.DataFrame
+        Values to include under the 'values' key.
+
+    Yields
+    ------
+    str
+        The JSON object in pieces. The keys of each value are sorted
+        in the same manner as jsonify.
+    """
+    dumped = schema.__class__(exclude=('values',)).dump(metadata)
+    meta_json = json.dumps(dumped, separators=(',', ':'))
+    if len(dumped) > 0:
+        yield meta_json[:-1] + ',"values":['
+    else:
+        yield '{"values":['
+    cols = sorted(schema.fields['values'].schema.declared_fields.keys())
+    first = True
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        records = timeseries_to_json(chunk, cols)[1:-1]
+        if first:
+            first = False
+            yield records
+        else:
+            yield ',' + records
+    yield ']}\n'
+
+
+def stream_csv_values(header, chunks, **to_csv_kwargs):
+    """Generator of a CSV file with the header comment followed by
+    the values read from chunks. The column header line is only
+    written with the first chunk.
+
+    Parameters
+    ----------
+    header: str
+        Comment lines to begin the file with.
+    chunks: iterable of pandas.DataFrame
+        Values to write.
+    **to_csv_kwargs
+        Passed to pandas.DataFrame.to_csv.
+
+    Yields
+    ------
+    str
+    """
+    yield header
+    write_header = True
+    for chunk in chunks:
+        if chunk.empty and not write_header:
+            continue
+        yield chunk.to_csv(header=write_header,
+                           date_format=CSV_DATE_FORMAT,
+                           **to_csv_kwargs)
+        write_header = False
+
+
+def prime_chunks(chunks):
+    """Read the first chunk from chunks before any response is started
+    so that errors raised when requesting the data, e.g. a
+    StorageAuthError, are handled as normal error responses instead
+    of interrupting the stream.
+
+    Returns
+    -------
+    iterator of pandas.DataFrame
+        Iterates over all chunks, including the first.
+    """
+    first = next(chunks)
+
+    def _chunks():
+        yield first
+        yield from chunks
+    return _chunks()
+
+
+def make_streaming_response(generator, mimetype):
+    """Create a response that streams the output of generator while
+    keeping the request context available."""
+    return Response(stream_with_context(generator), mimetype=mimetype)
+
+
+def make_etag(*parts):
+    """Make an entity tag from parts whose repr together identify the
+    content of a response."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def make_conditional_response(etag, make):
+    """Respond with 304 Not Modified if the If-None-Match header of the
+    request matches etag, otherwise with the response returned by
+    make, which is only called when the content is needed.
+
+    Parameters
+    ----------
+    etag: str
+        Entity tag of the content, e.g. from make_etag.
+    make: callable
+        Returns the full response.
+
+    Returns
+    -------
+    flask.Response
+        With the ETag header set.
+    """
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = make()
+    response.set_etag(etag)
+    return response
+
+
+def make_conditional_json(data):
+    """jsonify data with an ETag of the serialized data, responding with
+    304 Not Modified if it matches the If-None-Match header of the
+    request."""
+    response = jsonify(data)
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def format_value_cursor(cursor):
+    """Format a cursor returned by a read of changed values as the
+    string clients pass back in the since query parameter.
+    See sfa_api.utils.request_handling.validate_since_limit."""
+    version, timestamp = cursor
+    return f'{version}.{int(timestamp.timestamp())}'
+
+
+def make_page_response(data, limit, key):
+    """Respond with a page of a list of objects. When the page is
+    full, the Link header holds the url of the next page, which starts
+    after the last object of this page.
+
+    Parameters
+    ----------
+    data: list
+        Serialized objects of the page.
+    limit: int or None
+        The page size requested, None if all objects were requested.
+    key: str
+        Key of the object id used as the cursor of the next page.
+    """
+    response = jsonify(data)
+    if limit is not None and len(data) == limit:
+        args = request.args.to_dict()
+        args['cursor'] = data[-1][key]
+        next_url = url_for(request.endpoint, _external=True,
+                           **request.view_args, **args)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
+
+
+def _link_builder(urlfor):
+    """Make a function that returns the URL of a URLFor field for an
+    object. url_for is called once with a placeholder for each object
+    attribute in the URL and the URLs of the objects are filled into
+    that template. If a URL converter alters the placeholders, url_for
+    is called for each object instead."""
+    params = {}
+    placeholders = {}
+    for name, value in urlfor.params.items():
+        attr = _tpl(str(value))
+        if attr:
+            placeholders[attr] = params[name] = '{%s}' % name
+        else:
+            params[name] = value
+    template = url_for(urlfor.endpoint, **params)
+    if not placeholders:
+        return lambda obj: template
+    if any(template.count(ph) != 1 for ph in placeholders.values()):
+        return lambda obj: urlfor._serialize(None, None, obj)
+    ordered = sorted((template.index(ph), ph, attr)
+                     for attr, ph in placeholders.items())
+    attrs = []
+    texts = []
+    start = 0
+    for pos, ph, attr in ordered:
+        texts.append(template[start:pos])
+        attrs.append(attr)
+        start = pos + len(ph)
+    prefix = texts.pop(0)
+    texts.append(template[start:])
+    pieces = list(zip(attrs, texts))
+
+    def build(obj):
+        url = prefix
+        for attr, text in pieces:
+            value = obj[attr]
+            if value is None:
+                return None
+            url += f'{value}{text}'
+        return url
+    return build
+
+
+def _serialize_string(value, attr, obj):
+    return None if value is None else str(value)
+
+
+def _serialize_int(value, attr, obj):
+    return None if value is None else int(value)
+
+
+def _serialize_float(value, attr, obj):
+    return None if value is None else float(value)
+
+
+def _compile_field(field):
+    """Compile a marshmallow field. Returns a function to call in a
+    request context that returns a function with the signature of
+    field._serialize, or None if the field can not be compiled."""
+    if isinstance(field, Hyperlinks):
+        links = field.schema
+        if not all(isinstance(v, URLFor) for v in links.values()):
+            return None
+
+        def bind():
+            builders = [(name, _link_builder(urlfor))
+                        for name, urlfor in links.items()]
+            return lambda value, attr, obj: {
+                name: build(obj) for name, build in builders}
+        return bind
+    elif type(field) is fields.String:
+        return lambda: _serialize_string
+    elif type(field) is fields.Integer and not field.as_string:
+        return lambda: _serialize_int
+    elif type(field) is fields.Float and not field.as_string:
+        return lambda: _serialize_float
+    elif isinstance(field, ModelingParametersField):
+        compiled = {'fixed': _compile_schema(FixedModelingParameters),
+                    'single_axis': _compile_schema(
+                        SingleAxisModelingParameters),
+                    None: _compile_schema(BaseModelingParameters)}
+        if any(c is None for c in compiled.values()):
+            return None
+
+        def bind():
+            dumps = {type_: c() for type_, c in compiled.items()}
+            return lambda value, attr, obj: dumps.get(
+                value.get('tracking_type'), dumps[None])(value)
+        return bind
+    elif (
+            type(field) is fields.Nested and
+            field.schema.only is None and not field.schema.exclude and
+            not field.schema.load_only
+    ):
+        compiled = _compile_schema(type(field.schema))
+        if compiled is None:
+            return None
+        many = field.many or field.schema.many
+
+        def bind():
+            dump = compiled()
+            if many:
+                return lambda value, attr, obj: (
+                    None if value is None else [dump(v) for v in value])
+            return lambda value, attr, obj: (
+                None if value is None else dump(value))
+        return bind
+    elif type(field) is fields.List:
+        compiled = _compile_field(field.inner)
+        if compiled is None:
+            return None
+
+        def bind():
+            serialize = compiled()
+            return lambda value, attr, obj: None if value is None else [
+                serialize(v, attr, obj) for v in value]
+        return bind
+    else:
+        return lambda: field._serialize
+
+
+@lru_cache(maxsize=None)
+def _compile_schema(schema_class):
+    """Compile the fields of schema_class. Returns a function to call in
+    a request context that returns a function to dump one dict like
+    schema_class().dump, or None if the schema uses features that are
+    not supported."""
+    schema = schema_class()
+    if any(schema._hooks[(tag, many)] for tag in ('pre_dump', 'post_dump')
+           for many in (True, False)):
+        return None
+    compiled = []
+    for name, field in schema.dump_fields.items():
+        bind = _compile_field(field)
+        attr = field.attribute if field.attribute is not None else name
+        if bind is None or '.' in attr:
+            return None
+        key = field.data_key if field.data_key is not None else name
+        compiled.append((key, attr, field._CHECK_ATTRIBUTE, field.default,
+                         bind))
+
+    def bind():
+        serializers = [(key, attr, check, default, bind())
+                       for key, attr, check, default, bind in compiled]
+
+        def dump(obj):
+            out = {}
+            for key, attr, check, default, serialize in serializers:
+                # fields like Hyperlinks do not use the attribute value
+                if not check:
+                    value = None
+                elif attr in obj:
+                    value = obj[attr]
+                elif default is missing:
+                    continue
+                else:
+                    value = default() if callable(default) else default
+                out[key] = serialize(value, attr, obj)
+            return out
+        return dump
+    return bind
+
+
+def dump_many(schema_class, objs):
+    """Serialize a list of dicts to the same data as
+    schema_class(many=True).dump, without the overhead marshmallow
+    has for each object. Meant for the long lists of metadata returned
+    by the list endpoints. The URLs of hyperlinks are filled into
+    templates made with url_for once per call. Schemas with features
+    that can not be compiled are dumped with marshmallow.
+
+    Parameters
+    ----------
+    schema_class: marshmallow.Schema subclass
+    objs: list of dict
+
+    Returns
+    -------
+    list
+        The serialized objects.
+    """
+    compiled = _compile_schema(schema_class)
+    if compiled is None:
+        return schema_class(many=True).dump(objs)
+    dump = compiled()
+    return [dump(obj) for obj in objs]
@@ -9,13 +9,15 @@ from copy import deepcopy
 import datetime as dt
 from functools import partial
 import math
+from operator import itemgetter
 import random
 import re
 import uuid
+import zlib
 
 
 from cryptography.fernet import Fernet
-from flask import current_app
+from flask import current_app, _request_ctx_stack
 import numpy as np
 import pandas as pd
 import pymysql
@@ -26,7 +28,7 @@ from sqlalchemy.pool import QueuePool
 
 
 from sfa_api import schema, json
-from sfa_api.utils import auth0_info
+from sfa_api.utils import auth0_info, value_cache
 from sfa_api.utils.auth import current_user
 from sfa_api.utils.errors import (StorageAuthError, DeleteRestrictionError,
                                   BadAPIRequest)
@@ -51,6 +53,9 @@ RENINF = re.compile(_RESTR[0] + '-Infinity' + _RESTR[1])
 
 POWER_VARIABLES = ['ac_power', 'dc_power', 'poa_global', 'curtailment',
                    'availability']
+# marks zlib compressed report values, processed values stored
+# before they were compressed are plain text that never starts with NUL
+COMPRESSED_REPORT_VALUES = b'\x00zlib\x00'
 
 
 def generate_uuid():
@@ -162,8 +167,10 @@ def get_cursor(cursor_type, commit=True):
         cursorclass = pymysql.cursors.Cursor
     elif cursor_type == 'dict':
         cursorclass = pymysql.cursors.DictCursor
+    elif cursor_type == 'stream':
+        cursorclass = pymysql.cursors.SSCursor
     else:
-        raise AttributeError('cursor_type must be standard or dict')
+        raise AttributeError('cursor_type must be standard, dict, or stream')
     connection = mysql_connection()
     cursor = connection.cursor(cursor=cursorclass)
     try:
@@ -194,6 +201,23 @@ def try_query(query_cmd):
             raise
 
 
+def _execute_procedure(cursor, procedure_name, *args,
+                       with_current_user=True):
+    """Call the procedure with cursor, leaving the results to be
+    fetched from cursor. Allows many procedures to be called over
+    the same connection and in the same transaction.
+    """
+    if with_current_user:
+        new_args = (current_user, *args)
+    else:
+        new_args = args
+    query = f'CALL {procedure_name}({",".join(["%s"] * len(new_args))})'
+    query_cmd = partial(cursor.execute, query, new_args)
+    try_query(query_cmd)
+    # permissions may have changed, so actions must be read again
+    _clear_user_actions_memo(procedure_name)
+
+
 def _call_procedure(
         procedure_name, *args, cursor_type='dict', with_current_user=True):
     """
@@ -202,16 +226,33 @@ def _call_procedure(
     local variables and retrieving from those variables
     """
     with get_cursor(cursor_type) as cursor:
-        if with_current_user:
-            new_args = (current_user, *args)
-        else:
-            new_args = args
-        query = f'CALL {procedure_name}({",".join(["%s"] * len(new_args))})'
-        query_cmd = partial(cursor.execute, query, new_args)
-        try_query(query_cmd)
+        _execute_procedure(cursor, procedure_name, *args,
+                           with_current_user=with_current_user)
         return cursor.fetchall()
 
 
+def _stream_procedure(procedure_name, *args, chunksize=10000,
+                      with_current_user=True):
+    """
+    Generator that calls the procedure with an unbuffered cursor and
+    yields lists of at most chunksize rows as they are read from
+    MySQL. The connection is held until the generator is exhausted
+    or closed.
+    """
+    with get_cursor('stream', commit=False) as cursor:
+        try:
+            _execute_procedure(cursor, procedure_name, *args,
+                               with_current_user=with_current_user)
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # reads any remaining rows so the connection can be reused
+            cursor.close()
+
+
 def _call_procedure_for_single(procedure_name, *args, cursor_type='dict',
                                with_current_user=True):
     """Wrapper handling try/except logic when a single value is expected
@@ -225,35 +266,53 @@ def _call_procedure_for_single(procedure_name, *args, cursor_type='dict',
     return result
 
 
+def _schema_keys(schema_class, exclude=('_links',)):
+    return tuple(key for key in schema_class().fields.keys()
+                 if key not in exclude)
+
+
+def _row_getter(keys, renames=None):
+    """Make a function that returns the values of keys from a row in
+    order, reading the renamed key for any key in renames."""
+    renames = renames or {}
+    return itemgetter(*(renames.get(key, key) for key in keys))
+
+
+# The keys of the objects made from procedure rows by the _set_*
+# functions, read from the schemas once instead of for every row.
+_MODELING_PARAMETERS_KEYS = _schema_keys(schema.ModelingParameters)
+_SITE_KEYS = _schema_keys(schema.SiteResponseSchema)
+# modeling_parameters is not a column, site_id is read in its place
+# and replaced, keeping the key order of the schema
+_SITE_GETTER = _row_getter(_SITE_KEYS, {'modeling_parameters': 'site_id'})
+_MODELING_PARAMETERS_GETTER = _row_getter(_MODELING_PARAMETERS_KEYS)
+_OBSERVATION_KEYS = _schema_keys(schema.ObservationSchema)
+_OBSERVATION_GETTER = _row_getter(_OBSERVATION_KEYS)
+_FORECAST_KEYS = _schema_keys(schema.ForecastSchema)
+_FORECAST_GETTER = _row_getter(_FORECAST_KEYS)
+_CDF_FORECAST_KEYS = _schema_keys(schema.CDFForecastSchema)
+# singles are never modified, so modified_at is their created_at
+_CDF_FORECAST_GETTER = _row_getter(
+    _CDF_FORECAST_KEYS, {'modified_at': 'created_at'})
+_CDF_GROUP_KEYS = _schema_keys(schema.CDFForecastGroupSchema)
+_CDF_GROUP_GETTER = _row_getter(_CDF_GROUP_KEYS)
+_AGGREGATE_KEYS = _schema_keys(schema.AggregateSchema)
+_AGGREGATE_GETTER = _row_getter(_AGGREGATE_KEYS)
+
+
 def _set_modeling_parameters(site_dict):
-    out = {}
-    modeling_parameters = {}
-    for key in schema.ModelingParameters().fields.keys():
-        modeling_parameters[key] = site_dict[key]
-    for key in schema.SiteResponseSchema().fields.keys():
-        if key == 'modeling_parameters':
-            out[key] = modeling_parameters
-        else:
-            out[key] = site_dict[key]
+    out = dict(zip(_SITE_KEYS, _SITE_GETTER(site_dict)))
+    out['modeling_parameters'] = dict(zip(
+        _MODELING_PARAMETERS_KEYS, _MODELING_PARAMETERS_GETTER(site_dict)))
     return out
 
 
 def _set_observation_parameters(observation_dict):
-    out = {}
-    for key in schema.ObservationSchema().fields.keys():
-        if key in ('_links',):
-            continue
-        out[key] = observation_dict[key]
-    return out
+    return dict(zip(_OBSERVATION_KEYS, _OBSERVATION_GETTER(observation_dict)))
 
 
 def _set_forecast_parameters(forecast_dict):
-    out = {}
-    for key in schema.ForecastSchema().fields.keys():
-        if key in ('_links', ):
-            continue
-        out[key] = forecast_dict[key]
-    return out
+    return dict(zip(_FORECAST_KEYS, _FORECAST_GETTER(forecast_dict)))
 
 
 def _process_df_into_json(df, rounding=8):
@@ -287,6 +346,33 @@ def _process_df_into_json(df, rounding=8):
         return '[' + '},'.join(objarr) + '}]'
 
 
+def _read_values_chunks(procedure_name, object_id, start, end,
+                        columns, dtypes, chunksize):
+    """Generator of DataFrames of at most chunksize rows read from
+    procedure_name with an unbuffered cursor. The first column
+    (the object id) is dropped and the 'timestamp' column is set
+    as the index. A single empty DataFrame is yielded if there are
+    no values between start and end.
+    """
+    if start is None:
+        start = MINTIMESTAMP
+    if end is None:
+        end = MAXTIMESTAMP
+
+    rows = _stream_procedure(procedure_name, object_id, start, end,
+                             chunksize=chunksize)
+    empty = True
+    for chunk in rows:
+        empty = False
+        yield pd.DataFrame.from_records(
+            chunk, columns=columns
+        ).drop(columns=columns[0]).set_index('timestamp').astype(dtypes)
+    if empty:
+        yield pd.DataFrame.from_records(
+            [], columns=columns
+        ).drop(columns=columns[0]).set_index('timestamp').astype(dtypes)
+
+
 def store_observation_values(observation_id, observation_df):
     """Store observation data.
 
@@ -310,10 +396,12 @@ def store_observation_values(observation_id, observation_df):
     """
     obs_json = _process_df_into_json(observation_df)
     _call_procedure('store_observation_values', observation_id, obs_json)
+    value_cache.invalidate(observation_id)
     return observation_id
 
 
-def read_observation_values(observation_id, start=None, end=None):
+def read_observation_values(observation_id, start=None, end=None,
+                            fingerprint=None):
     """Read observation values between start and end.
 
     Parameters
@@ -324,6 +412,10 @@ def read_observation_values(observation_id, start=None, end=None):
         Beginning of the period for which to request data.
     end: datetime
         End of the period for which to request data.
+    fingerprint: tuple, optional
+        Fingerprint of the values from read_values_fingerprint, read
+        before this call. Cached values stored with another fingerprint
+        are read again from the database.
 
     Returns
     -------
@@ -335,7 +427,13 @@ def read_observation_values(observation_id, start=None, end=None):
         start = MINTIMESTAMP
     if end is None:
         end = MAXTIMESTAMP
+    return value_cache.cached_values(
+        'observation', observation_id, start, end,
+        partial(_read_observation_values, observation_id, start, end),
+        fingerprint)
+
 
+def _read_observation_values(observation_id, start, end):
     obs_vals = _call_procedure('read_observation_values', observation_id,
                                start, end, cursor_type='standard')
     df = pd.DataFrame.from_records(
@@ -346,6 +444,41 @@ def read_observation_values(observation_id, start=None, end=None):
     return df
 
 
+def read_observation_values_chunks(observation_id, start=None, end=None,
+                                   chunksize=10000):
+    """Read observation values between start and end in chunks
+    without loading all values into memory at once.
+
+    Parameters
+    ----------
+    observation_id: string
+        UUID of associated observation.
+    start: datetime
+        Beginning of the period for which to request data.
+    end: datetime
+        End of the period for which to request data.
+    chunksize: int
+        Maximum number of rows in each DataFrame.
+
+    Returns
+    -------
+    generator of pandas.DataFrame
+        Each with 'value' and 'quality_flag' columns and a DatetimeIndex
+        named 'timestamp'.
+
+    Raises
+    ------
+    StorageAuthError
+        When the first chunk is requested if the user does not have
+        permission to read values on the Observation or if the
+        Observation does not exist.
+    """
+    return _read_values_chunks(
+        'read_observation_values', observation_id, start, end,
+        ['observation_id', 'timestamp', 'value', 'quality_flag'],
+        {'value': 'float', 'quality_flag': 'int64'}, chunksize)
+
+
 def read_latest_observation_value(observation_id):
     """Read the most recent observation value.
 
@@ -466,16 +599,26 @@ def delete_observation(observation_id):
         If the user does not have permission to delete the observation
     """
     _call_procedure('delete_observation', observation_id)
+    value_cache.invalidate(observation_id)
 
 
-def list_observations(site_id=None):
-    """Lists all observations a user has access to.
+def list_observations(site_id=None, variable=None, cursor=None, limit=None):
+    """Lists observations a user has access to, ordered by
+    observation_id.
 
     Parameters
     ----------
     site_id: string
         UUID of Site, when supplied returns only Observations
         made for this Site.
+    variable: string
+        When supplied, returns only objects of this variable.
+    cursor: string
+        UUID of the last object of the previous page, when supplied
+        returns only objects listed after it.
+    limit: int
+        Maximum number of objects to return. All are returned if
+        not supplied.
 
     Returns
     -------
@@ -491,8 +634,9 @@ def list_observations(site_id=None):
     if site_id is not None:
         read_site(site_id)
     observations = [_set_observation_parameters(obs)
-                    for obs in _call_procedure('list_observations')
-                    if site_id is None or obs['site_id'] == site_id]
+                    for obs in _call_procedure(
+                        'list_observations', site_id, variable, cursor,
+                        limit)]
     return observations
 
 
@@ -519,15 +663,25 @@ def store_forecast_values(forecast_id, forecast_df):
     """
     fx_json = _process_df_into_json(forecast_df)
     _call_procedure('store_forecast_values', forecast_id, fx_json)
+    value_cache.invalidate(forecast_id)
     return forecast_id
 
 
-def _read_fx_values(procedure_name, forecast_id, start, end):
+def _read_fx_values(procedure_name, forecast_id, start, end,
+                    fingerprint=None):
     if start is None:
         start = MINTIMESTAMP
     if end is None:
         end = MAXTIMESTAMP
+    kind = {'read_forecast_values': 'forecast',
+            'read_cdf_forecast_values': 'cdf_forecast'}[procedure_name]
+    return value_cache.cached_values(
+        kind, forecast_id, start, end,
+        partial(_read_fx_values_from_db, procedure_name, forecast_id,
+                start, end), fingerprint)
+
 
+def _read_fx_values_from_db(procedure_name, forecast_id, start, end):
     fx_vals = _call_procedure(procedure_name, forecast_id,
                               start, end, cursor_type='standard')
     df = pd.DataFrame.from_records(
@@ -537,7 +691,8 @@ def _read_fx_values(procedure_name, forecast_id, start, end):
     return df
 
 
-def read_forecast_values(forecast_id, start=None, end=None):
+def read_forecast_values(forecast_id, start=None, end=None,
+                         fingerprint=None):
     """Read forecast values between start and end.
 
     Parameters
@@ -548,6 +703,10 @@ def read_forecast_values(forecast_id, start=None, end=None):
         Beginning of the period for which to request data.
     end: datetime
         End of the period for which to request data.
+    fingerprint: tuple, optional
+        Fingerprint of the values from read_values_fingerprint, read
+        before this call. Cached values stored with another fingerprint
+        are read again from the database.
 
     Returns
     -------
@@ -555,7 +714,41 @@ def read_forecast_values(forecast_id, start=None, end=None):
         With a value column and datetime index
     """
     return _read_fx_values('read_forecast_values', forecast_id,
-                           start, end)
+                           start, end, fingerprint)
+
+
+def read_forecast_values_chunks(forecast_id, start=None, end=None,
+                                chunksize=10000):
+    """Read forecast values between start and end in chunks
+    without loading all values into memory at once.
+
+    Parameters
+    ----------
+    forecast_id: string
+        UUID of associated forecast.
+    start: datetime
+        Beginning of the period for which to request data.
+    end: datetime
+        End of the period for which to request data.
+    chunksize: int
+        Maximum number of rows in each DataFrame.
+
+    Returns
+    -------
+    generator of pandas.DataFrame
+        Each with a value column and datetime index
+
+    Raises
+    ------
+    StorageAuthError
+        When the first chunk is requested if the user does not have
+        permission to read values on the Forecast or if the
+        Forecast does not exist.
+    """
+    return _read_values_chunks(
+        'read_forecast_values', forecast_id, start, end,
+        ['forecast_id', 'timestamp', 'value'], {'value': 'float'},
+        chunksize)
 
 
 def read_latest_forecast_value(forecast_id):
@@ -687,10 +880,12 @@ def delete_forecast(forecast_id):
         If the user cannot delete the Forecast
     """
     _call_procedure('delete_forecast', forecast_id)
+    value_cache.invalidate(forecast_id)
 
 
-def list_forecasts(site_id=None, aggregate_id=None):
-    """Lists all Forecasts a user has access to.
+def list_forecasts(site_id=None, aggregate_id=None, variable=None,
+                   cursor=None, limit=None):
+    """Lists Forecasts a user has access to, ordered by forecast_id.
 
     Parameters
     ----------
@@ -700,6 +895,14 @@ def list_forecasts(site_id=None, aggregate_id=None):
     aggregate_id: string
         UUID of the aggregate, when supplied returns only
         forecasts made for this aggregate.
+    variable: string
+        When supplied, returns only objects of this variable.
+    cursor: string
+        UUID of the last object of the previous page, when supplied
+        returns only objects listed after it.
+    limit: int
+        Maximum number of objects to return. All are returned if
+        not supplied.
 
     Returns
     -------
@@ -711,12 +914,9 @@ def list_forecasts(site_id=None, aggregate_id=None):
     if aggregate_id is not None:
         read_aggregate(aggregate_id)
     forecasts = [_set_forecast_parameters(fx)
-                 for fx in _call_procedure('list_forecasts')
-                 if (
-                     (site_id is None and aggregate_id is None) or
-                     (site_id and fx['site_id'] == site_id) or
-                     (aggregate_id and fx['aggregate_id'] == aggregate_id)
-    )]
+                 for fx in _call_procedure(
+                     'list_forecasts', site_id, aggregate_id, variable,
+                     cursor, limit)]
     return forecasts
 
 
@@ -824,8 +1024,17 @@ def delete_site(site_id):
     _call_procedure('delete_site', site_id)
 
 
-def list_sites():
-    """List all sites.
+def list_sites(cursor=None, limit=None):
+    """List all sites, ordered by site_id.
+
+    Parameters
+    ----------
+    cursor: string
+        UUID of the last site of the previous page, when supplied
+        returns only sites listed after it.
+    limit: int
+        Maximum number of sites to return. All are returned if not
+        supplied.
 
     Returns
     -------
@@ -833,7 +1042,7 @@ def list_sites():
         List of Site metadata as dictionaries.
     """
     sites = [_set_modeling_parameters(site)
-             for site in _call_procedure('list_sites')]
+             for site in _call_procedure('list_sites', cursor, limit)]
     return sites
 
 
@@ -874,10 +1083,12 @@ def store_cdf_forecast_values(forecast_id, forecast_df):
     """
     fx_json = _process_df_into_json(forecast_df)
     _call_procedure('store_cdf_forecast_values', forecast_id, fx_json)
+    value_cache.invalidate(forecast_id)
     return forecast_id
 
 
-def read_cdf_forecast_values(forecast_id, start=None, end=None):
+def read_cdf_forecast_values(forecast_id, start=None, end=None,
+                             fingerprint=None):
     """Read CDF forecast values between start and end.
 
     Parameters
@@ -888,6 +1099,10 @@ def read_cdf_forecast_values(forecast_id, start=None, end=None):
         Beginning of the period for which to request data.
     end: datetime
         End of the period for which to request data.
+    fingerprint: tuple, optional
+        Fingerprint of the values from read_values_fingerprint, read
+        before this call. Cached values stored with another fingerprint
+        are read again from the database.
 
     Returns
     -------
@@ -895,7 +1110,199 @@ def read_cdf_forecast_values(forecast_id, start=None, end=None):
         With a value column and datetime index
     """
     return _read_fx_values('read_cdf_forecast_values', forecast_id,
-                           start, end)
+                           start, end, fingerprint)
+
+
+def read_cdf_forecast_values_chunks(forecast_id, start=None, end=None,
+                                    chunksize=10000):
+    """Read CDF forecast values between start and end in chunks
+    without loading all values into memory at once.
+
+    Parameters
+    ----------
+    forecast_id: string
+        UUID of associated forecast.
+    start: datetime
+        Beginning of the period for which to request data.
+    end: datetime
+        End of the period for which to request data.
+    chunksize: int
+        Maximum number of rows in each DataFrame.
+
+    Returns
+    -------
+    generator of pandas.DataFrame
+        Each with a value column and datetime index
+
+    Raises
+    ------
+    StorageAuthError
+        When the first chunk is requested if the user does not have
+        permission to read values on the CDF Forecast or if the
+        CDF Forecast does not exist.
+    """
+    return _read_values_chunks(
+        'read_cdf_forecast_values', forecast_id, start, end,
+        ['forecast_id', 'timestamp', 'value'], {'value': 'float'},
+        chunksize)
+
+
+# procedure, columns, and dtypes used to read the values of each
+# type of object in read_values_batch
+_BATCH_VALUE_READERS = {
+    'observation': (
+        'read_observation_values',
+        ['observation_id', 'timestamp', 'value', 'quality_flag'],
+        {'value': 'float', 'quality_flag': 'int64'}),
+    'forecast': (
+        'read_forecast_values',
+        ['forecast_id', 'timestamp', 'value'], {'value': 'float'}),
+    'cdf_forecast': (
+        'read_cdf_forecast_values',
+        ['forecast_id', 'timestamp', 'value'], {'value': 'float'}),
+}
+
+
+def read_values_fingerprint(object_id, object_type):
+    """Read a summary of the values of an object that changes whenever
+    values of the object are stored, without reading the values.
+
+    Parameters
+    ----------
+    object_id: string
+        UUID of the observation, forecast, CDF forecast, or CDF
+        forecast group.
+    object_type: string
+        One of 'observations', 'forecasts', 'cdf_forecasts', or
+        'cdf_forecasts_groups'.
+
+    Returns
+    -------
+    tuple
+        The version of the last store of values of the object, or the
+        number of constant values and the sum of their versions for a
+        CDF forecast group. Versions are committed with the values.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to read the values of the
+        object or it does not exist.
+    """
+    read = partial(_read_values_fingerprint, object_id, object_type)
+    # storing the values of a constant value does not invalidate its
+    # group, so the fingerprint of a group is always read
+    kind = {'observations': 'observation', 'forecasts': 'forecast',
+            'cdf_forecasts': 'cdf_forecast'}.get(object_type)
+    if kind is None:
+        return read()
+    return value_cache.cached_fingerprint(kind, object_id, read)
+
+
+def _read_values_fingerprint(object_id, object_type):
+    return tuple(_call_procedure_for_single(
+        'read_values_fingerprint', object_id, object_type,
+        cursor_type='standard'))
+
+
+def read_value_changes(object_id, object_type, since=None, limit=100000):
+    """Read the values of an object that were stored or changed after
+    since, in the order the stores that changed them were committed.
+
+    Parameters
+    ----------
+    object_id: string
+        UUID of the observation, forecast, or CDF forecast.
+    object_type: string
+        One of 'observations', 'forecasts', or 'cdf_forecasts'.
+    since: tuple or None
+        A cursor returned by a previous read to read the values changed
+        after those. If None, all values are read.
+    limit: int
+        Maximum number of values to read.
+
+    Returns
+    -------
+    values: pandas.DataFrame
+        With a 'value' column, a 'quality_flag' column for
+        observations, and a DatetimeIndex named 'timestamp'.
+    cursor: tuple
+        Of the version of the store that last changed the last value
+        and its timestamp, or since if no values were read.
+    more: bool
+        If more changed values can be read with cursor.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to read the values of the
+        object or it does not exist.
+    """
+    if since is None:
+        since = (0, MINTIMESTAMP)
+    if object_type == 'observations':
+        columns = ['timestamp', 'value', 'quality_flag', 'version']
+        dtypes = {'value': 'float', 'quality_flag': 'int64'}
+    else:
+        columns = ['timestamp', 'value', 'version']
+        dtypes = {'value': 'float'}
+    # one extra row tells if there are more changes after limit
+    rows = list(_call_procedure(
+        'read_value_changes', object_id, object_type, since[0], since[1],
+        limit + 1, cursor_type='standard'))
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = (int(rows[-1][-1]), pd.Timestamp(rows[-1][0]))
+    else:
+        cursor = since
+    values = pd.DataFrame.from_records(
+        rows, columns=columns
+    ).drop(columns='version').set_index('timestamp').astype(dtypes)
+    return values, cursor, more
+
+
+def read_values_batch(objects):
+    """Read the values of many observations and forecasts using
+    a single database connection.
+
+    Parameters
+    ----------
+    objects: list of dict
+        Each with 'object_id', 'type', 'start', and 'end' keys. Type must
+        be one of 'observation', 'forecast', or 'cdf_forecast'. Start
+        and end may be None.
+
+    Returns
+    -------
+    list of pandas.DataFrame
+        The values of each object in the same order as objects. Observation
+        values have 'value' and 'quality_flag' columns and forecast values
+        have a 'value' column. All have a DatetimeIndex named 'timestamp'.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to read values on any of
+        the objects or if any object does not exist.
+    """
+    out = []
+    with get_cursor('standard', commit=False) as cursor:
+        for obj in objects:
+            procedure_name, columns, dtypes = _BATCH_VALUE_READERS[
+                obj['type']]
+            start = obj.get('start')
+            if start is None:
+                start = MINTIMESTAMP
+            end = obj.get('end')
+            if end is None:
+                end = MAXTIMESTAMP
+            _execute_procedure(cursor, procedure_name,
+                               str(obj['object_id']), start, end)
+            out.append(pd.DataFrame.from_records(
+                list(cursor.fetchall()), columns=columns
+            ).drop(columns=columns[0]).set_index('timestamp').astype(dtypes))
+    return out
 
 
 def read_latest_cdf_forecast_value(forecast_id):
@@ -961,15 +1368,7 @@ def store_cdf_forecast(cdf_forecast):
 
 
 def _set_cdf_forecast_parameters(forecast_dict):
-    out = {}
-    for key in schema.CDFForecastSchema().fields.keys():
-        if key in ('_links', ):
-            continue
-        elif key == 'modified_at':
-            out[key] = forecast_dict['created_at']
-        else:
-            out[key] = forecast_dict[key]
-    return out
+    return dict(zip(_CDF_FORECAST_KEYS, _CDF_FORECAST_GETTER(forecast_dict)))
 
 
 def read_cdf_forecast(forecast_id):
@@ -1006,15 +1405,25 @@ def delete_cdf_forecast(forecast_id):
         if the CDF Forecast does not exist.
     """
     _call_procedure('delete_cdf_forecasts_single', forecast_id)
+    value_cache.invalidate(forecast_id)
 
 
-def list_cdf_forecasts(parent_forecast_id=None):
-    """Lists all Forecasts a user has access to.
+def list_cdf_forecasts(parent_forecast_id=None, variable=None, cursor=None,
+                       limit=None):
+    """Lists CDF Forecasts a user has access to, ordered by forecast_id.
 
     Parameters
     ----------
     parent_forecast_id: string
         UUID of the parent CDF Forecast Group.
+    variable: string
+        When supplied, returns only objects of this variable.
+    cursor: string
+        UUID of the last object of the previous page, when supplied
+        returns only objects listed after it.
+    limit: int
+        Maximum number of objects to return. All are returned if
+        not supplied.
 
     Returns
     -------
@@ -1024,9 +1433,9 @@ def list_cdf_forecasts(parent_forecast_id=None):
     if parent_forecast_id is not None:
         read_cdf_forecast_group(parent_forecast_id)
     forecasts = [_set_cdf_forecast_parameters(fx)
-                 for fx in _call_procedure('list_cdf_forecasts_singles')
-                 if parent_forecast_id is None or
-                 fx['parent'] == parent_forecast_id]
+                 for fx in _call_procedure(
+                     'list_cdf_forecasts_singles', parent_forecast_id,
+                     variable, cursor, limit)]
     return forecasts
 
 
@@ -1081,18 +1490,10 @@ def store_cdf_forecast_group(cdf_forecast_group):
 
 
 def _set_cdf_group_forecast_parameters(forecast_dict):
-    out = {}
-    for key in schema.CDFForecastGroupSchema().fields.keys():
-        if key in ('_links', ):
-            continue
-        elif key == 'constant_values':
-            out[key] = []
-            constant_vals = forecast_dict['constant_values']
-            for single_id, val in constant_vals.items():
-                out[key].append({'forecast_id': single_id,
-                                 'constant_value': val})
-        else:
-            out[key] = forecast_dict[key]
+    out = dict(zip(_CDF_GROUP_KEYS, _CDF_GROUP_GETTER(forecast_dict)))
+    out['constant_values'] = [
+        {'forecast_id': single_id, 'constant_value': val}
+        for single_id, val in forecast_dict['constant_values'].items()]
     return out
 
 
@@ -1131,6 +1532,114 @@ def read_cdf_forecast_group(forecast_id):
     return forecast
 
 
+def _process_wide_df_into_json(df, rounding=8):
+    """Processes a DataFrame with a DatetimeIndex and one column per
+    constant value into a json string of the form
+    [{"cv": ..., "ts": ..., "v": ...}, ...] for sending to MySQL.
+    As in _process_df_into_json, the v key is left out for NaN values.
+    """
+    ncols = len(df.columns)
+    if df.size == 0:
+        return '[]'
+    cvstr = np.tile(
+        np.char.add('{"cv":', np.asarray(df.columns, dtype=float).astype(
+            str)), len(df.index))
+    timestr = np.char.add(
+        np.char.add(cvstr, ',"ts":"'),
+        np.repeat(df.index.values.astype('M8[s]').astype(str), ncols))
+    values = df.values.astype(float).ravel()
+    nans = np.isnan(values)
+    valstr = np.char.add('","v":', np.round(values, rounding).astype('str'))
+    valstr[nans] = '"'
+    objarr = np.char.add(timestr, valstr)
+    return '[' + '},'.join(objarr) + '}]'
+
+
+def store_cdf_forecast_group_values(forecast_id, forecast_df):
+    """Store the values of many constant values of a CDF Forecast Group
+    in one transaction.
+
+    Parameters
+    ----------
+    forecast_id: string
+        UUID of the CDF Forecast Group.
+    forecast_df: DataFrame
+        Dataframe with DatetimeIndex and one column of values for each
+        constant value, named by the constant value.
+
+    Returns
+    -------
+    string
+        The UUID of the CDF Forecast Group.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to write values for the
+        CDF Forecast Group
+    BadAPIRequest
+        If any column is not a constant value of the CDF Forecast Group
+    """
+    fx_json = _process_wide_df_into_json(forecast_df)
+    _call_procedure('store_cdf_forecast_group_values', forecast_id, fx_json)
+    value_cache.invalidate(*_cached_constant_value_ids(forecast_id))
+    return forecast_id
+
+
+def _cached_constant_value_ids(forecast_id):
+    """The ids of the constant values of a CDF Forecast Group if
+    their values may be cached, otherwise an empty list"""
+    if value_cache.get_redis_connection() is None:
+        return []
+    return [cv['forecast_id'] for cv in
+            read_cdf_forecast_group(forecast_id)['constant_values']]
+
+
+def read_cdf_forecast_group_values(forecast_id, start=None, end=None):
+    """Read the values of every constant value of a CDF Forecast Group
+    between start and end with a single query.
+
+    Parameters
+    ----------
+    forecast_id: string
+        UUID of the CDF Forecast Group.
+    start: datetime
+        Beginning of the period for which to request data.
+    end: datetime
+        End of the period for which to request data.
+
+    Returns
+    -------
+    pandas.DataFrame
+        With a datetime index and one float column for each constant
+        value, named by the constant value and sorted in ascending
+        order. Constant values without values have a column of NaN.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to read values of the
+        CDF Forecast Group or if the CDF Forecast Group does not exist.
+    """
+    if start is None:
+        start = MINTIMESTAMP
+    if end is None:
+        end = MAXTIMESTAMP
+
+    rows = _call_procedure('read_cdf_forecast_group_values', forecast_id,
+                           start, end, cursor_type='standard')
+    df = pd.DataFrame.from_records(
+        list(rows), columns=['constant_value', 'timestamp', 'value'])
+    constant_values = sorted(df['constant_value'].unique())
+    df = df.dropna(subset=['timestamp'])
+    wide = df.pivot(
+        index='timestamp', columns='constant_value', values='value'
+    ).reindex(columns=constant_values).astype(float)
+    wide.index = pd.DatetimeIndex(wide.index, name='timestamp')
+    wide.columns.name = None
+    return wide
+
+
 def delete_cdf_forecast_group(forecast_id):
     """Remove a CDF Forecast Grpup from storage.
 
@@ -1145,11 +1654,15 @@ def delete_cdf_forecast_group(forecast_id):
         The CDF Forecast Groups's metadata if successful or
         None if the CDF Forecast does not exist.
     """
+    constant_value_ids = _cached_constant_value_ids(forecast_id)
     _call_procedure('delete_cdf_forecasts_group', forecast_id)
+    value_cache.invalidate(*constant_value_ids)
 
 
-def list_cdf_forecast_groups(site_id=None, aggregate_id=None):
-    """Lists all CDF Forecast Groups a user has access to.
+def list_cdf_forecast_groups(site_id=None, aggregate_id=None, variable=None,
+                             cursor=None, limit=None):
+    """Lists CDF Forecast Groups a user has access to, ordered by
+    forecast_id.
 
     Parameters
     ----------
@@ -1159,6 +1672,14 @@ def list_cdf_forecast_groups(site_id=None, aggregate_id=None):
     aggregate_id:
         UUID of aggregate, when supplied returns only CDF Forecast
         Groups made for this aggregate.
+    variable: string
+        When supplied, returns only objects of this variable.
+    cursor: string
+        UUID of the last object of the previous page, when supplied
+        returns only objects listed after it.
+    limit: int
+        Maximum number of objects to return. All are returned if
+        not supplied.
 
     Returns
     -------
@@ -1170,12 +1691,9 @@ def list_cdf_forecast_groups(site_id=None, aggregate_id=None):
     if aggregate_id is not None:
         read_aggregate(aggregate_id)
     forecasts = [_set_cdf_group_forecast_parameters(fx)
-                 for fx in _call_procedure('list_cdf_forecasts_groups')
-                 if (
-                     (site_id is None and aggregate_id is None) or
-                     (site_id and fx['site_id'] == site_id) or
-                     (aggregate_id and fx['aggregate_id'] == aggregate_id)
-    )]
+                 for fx in _call_procedure(
+                     'list_cdf_forecasts_groups', site_id, aggregate_id,
+                     variable, cursor, limit)]
     return forecasts
 
 
@@ -1228,6 +1746,7 @@ def remove_role_from_user(user_id, role_id):
     # the user could use this to determine if a user_id exists
     _call_procedure('remove_role_from_user',
                     role_id, user_id)
+    value_cache.invalidate_permissions()
 
 
 def add_role_to_user(user_id, role_id):
@@ -1343,6 +1862,7 @@ def delete_role(role_id):
 
     """
     _call_procedure('delete_role', role_id)
+    value_cache.invalidate_permissions()
 
 
 def add_permission_to_role(role_id, permission_id):
@@ -1391,6 +1911,7 @@ def remove_permission_from_role(role_id, permission_id):
           permission.
     """
     _call_procedure('remove_permission_from_role', permission_id, role_id)
+    value_cache.invalidate_permissions()
 
 
 def read_permission(permission_id):
@@ -1430,6 +1951,7 @@ def delete_permission(permission_id):
         or the permission does not exist.
     """
     _call_procedure('delete_permission', permission_id)
+    value_cache.invalidate_permissions()
 
 
 def list_permissions():
@@ -1528,6 +2050,7 @@ def remove_object_from_permission(permission_id, uuid):
     """
     _call_procedure('remove_object_from_permission',
                     uuid, permission_id)
+    value_cache.invalidate_permissions()
 
 
 def _decode_report_parameters(report):
@@ -1545,14 +2068,24 @@ def _decode_report_parameters(report):
     return out
 
 
-def list_reports():
-    """
+def list_reports(cursor=None, limit=None):
+    """List reports a user has access to, ordered by report_id.
+
+    Parameters
+    ----------
+    cursor: string
+        UUID of the last report of the previous page, when supplied
+        returns only reports listed after it.
+    limit: int
+        Maximum number of reports to return. All are returned if not
+        supplied.
+
     Returns
     -------
     list of dicts
         List of dictionaries of report metadata.
     """
-    reports = _call_procedure('list_reports')
+    reports = _call_procedure('list_reports', cursor, limit)
     return [_decode_report_parameters(r) for r in reports]
 
 
@@ -1586,12 +2119,16 @@ def store_report(report):
     return report_id
 
 
-def read_report(report_id):
+def read_report(report_id, fields=None):
     """
     Parameters
     ----------
     report_id
         UUID of the report to read.
+    fields: collection of str, optional
+        Keys of the report to read. The raw report, values, and outages
+        are only read from the database when included. If None, every
+        key is read.
 
     Returns
     -------
@@ -1604,25 +2141,34 @@ def read_report(report_id):
         If the report does not exist, or the the user does not have
         permission to read the report.
     """
-    report = _decode_report_parameters(
-        _call_procedure_for_single('read_report', report_id))
-    try:
-        report_values = read_report_values(report_id)
-    except StorageAuthError:
-        report_values = []
-    report['values'] = report_values
-
-    # report outages only require "read" on the report, and
-    # are expected to succeed if read_report did
-    report_outages = list(_call_procedure(
-        'list_report_outages',
-        report_id
-    ))
-
-    if report['report_parameters'].get('exclude_system_outages', False):
-        system_outages = list_system_outages()
-        report_outages += system_outages
-    report['outages'] = report_outages
+    def requested(field):
+        return fields is None or field in fields
+
+    if requested('raw_report'):
+        report = _call_procedure_for_single('read_report', report_id)
+    else:
+        report = _call_procedure_for_single('read_report_metadata',
+                                            report_id)
+    report = _decode_report_parameters(report)
+    if requested('values'):
+        try:
+            report_values = read_report_values(report_id)
+        except StorageAuthError:
+            report_values = []
+        report['values'] = report_values
+
+    if requested('outages'):
+        # report outages only require "read" on the report, and
+        # are expected to succeed if read_report did
+        report_outages = list(_call_procedure(
+            'list_report_outages',
+            report_id
+        ))
+
+        if report['report_parameters'].get('exclude_system_outages', False):
+            system_outages = list_system_outages()
+            report_outages += system_outages
+        report['outages'] = report_outages
     return report
 
 
@@ -1667,14 +2213,21 @@ def store_report_values(report_id, object_id, values):
         - If the user does not have access to the report.
     """
     uuid = generate_uuid()
-    # encode values? Should values be a dataframe?
-    # temporary dump to json and encode so we can pack this in a blob
-    values_bytes = values.encode()
     _call_procedure('store_report_values', uuid, str(report_id),
-                    str(object_id), values_bytes)
+                    str(object_id), _compress_report_values(values))
     return uuid
 
 
+def _compress_report_values(values):
+    return COMPRESSED_REPORT_VALUES + zlib.compress(values.encode())
+
+
+def _decompress_report_values(blob):
+    if blob.startswith(COMPRESSED_REPORT_VALUES):
+        blob = zlib.decompress(blob[len(COMPRESSED_REPORT_VALUES):])
+    return blob.decode()
+
+
 def read_report_values(report_id):
     """Returns all of the processed values in the report that the user has
     access too.
@@ -1696,10 +2249,40 @@ def read_report_values(report_id):
         If the user does not have access to the report.
     """
     values = _call_procedure('read_report_values', report_id)
-    # decode values?
-    # temporary decode from bytes
     for row in values:
-        row['processed_values'] = row['processed_values'].decode()
+        row['processed_values'] = _decompress_report_values(
+            row['processed_values'])
+    return values
+
+
+def read_report_object_values(report_id, object_id):
+    """Returns the processed values of one object in the report, so
+    the values of each object can be read when they are needed.
+
+    Parameters
+    ----------
+    report_id: str
+        UUID of the report associated with the data.
+    object_id: str
+        UUID of the original object.
+
+    Returns
+    -------
+    list
+        List of processed data dicts containing a unique id, original
+        object_id and values in some serialized form.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have access to the report, or to the
+        values of the object.
+    """
+    values = _call_procedure('read_report_object_values', report_id,
+                             object_id)
+    for row in values:
+        row['processed_values'] = _decompress_report_values(
+            row['processed_values'])
     return values
 
 
@@ -1796,6 +2379,10 @@ def _set_is_event(out):
 def _read_metadata_for_write(obj_id, type_, start):
     out = _call_procedure_for_single(
         'read_metadata_for_value_write', obj_id, type_, start)
+    return _process_metadata_for_write(out)
+
+
+def _process_metadata_for_write(out):
     interval_length = out['interval_length']
     previous_time = _set_previous_time(out)
     extra_parameters = _set_extra_params(out)
@@ -1864,6 +2451,119 @@ def read_metadata_for_cdf_forecast_values(forecast_id, start):
     return _read_metadata_for_write(forecast_id, 'cdf_forecasts', start)
 
 
+def read_metadata_for_cdf_forecast_group_values(forecast_id, start):
+    """Reads necessary metadata to process the values of all constant
+    values of a CDF forecast group before storing them.
+
+    Parameters
+    ----------
+    forecast_id : string
+        UUID of the CDF forecast group.
+    start : datetime
+        Reference datetime to find last value before
+
+    Returns
+    -------
+    interval_length : int
+        The interval length of the forecast
+    previous_time : pandas.Timestamp or None
+        The most recent timestamp of any constant value before start
+        or None if no times
+    extra_parameters : str
+        The extra parameters of the forecast
+    is_event : boolean
+        True if the forecast is an event forecast.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to write values for the
+        CDF Forecast Group
+    """
+    return _read_metadata_for_write(forecast_id, 'cdf_forecasts_groups',
+                                    start)
+
+
+_FORECAST_VALUE_TABLES = {
+    'forecast': ('forecasts', 'store_forecast_values'),
+    'cdf_forecast': ('cdf_forecasts', 'store_cdf_forecast_values'),
+}
+
+
+def read_metadata_for_forecast_values_batch(forecasts):
+    """Reads the metadata necessary to process the values of many
+    forecasts and CDF forecasts before storing them, using a single
+    database connection.
+
+    Parameters
+    ----------
+    forecasts : list of tuple
+        Each tuple is (forecast_id, type, start) where type is 'forecast'
+        or 'cdf_forecast' and start is the reference datetime to find the
+        last value before.
+
+    Returns
+    -------
+    list of tuple
+        (interval_length, previous_time, extra_parameters, is_event)
+        for each forecast as returned by read_metadata_for_forecast_values.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to write values for any
+        of the forecasts
+    """
+    out = []
+    with get_cursor('dict', commit=False) as cursor:
+        for forecast_id, type_, start in forecasts:
+            _execute_procedure(
+                cursor, 'read_metadata_for_value_write', str(forecast_id),
+                _FORECAST_VALUE_TABLES[type_][0], start)
+            result = cursor.fetchall()
+            if len(result) == 0:
+                raise StorageAuthError()
+            out.append(_process_metadata_for_write(result[0]))
+    return out
+
+
+def store_forecast_values_batch(forecasts):
+    """Store the values of many forecasts and CDF forecasts in a single
+    transaction. If storing the values of any forecast fails, no values
+    are stored.
+
+    Parameters
+    ----------
+    forecasts : list of tuple
+        Each tuple is (forecast_id, type, forecast_df) where type is
+        'forecast' or 'cdf_forecast' and forecast_df is a DataFrame with
+        a DatetimeIndex and value column.
+
+    Returns
+    -------
+    list of str
+        The UUIDs of the forecasts.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to write values for any
+        of the forecasts
+    """
+    with get_cursor('standard') as cursor:
+        # each store locks the value version of the forecast until the
+        # commit, so forecasts are stored in the same order by every
+        # batch to not deadlock with concurrent batches
+        for forecast_id, type_, forecast_df in sorted(
+                forecasts, key=lambda fx: str(fx[0])):
+            _execute_procedure(
+                cursor, _FORECAST_VALUE_TABLES[type_][1], str(forecast_id),
+                _process_df_into_json(forecast_df))
+    forecast_ids = [str(forecast[0]) for forecast in forecasts]
+    value_cache.invalidate(*forecast_ids)
+    return forecast_ids
+
+
 def read_metadata_for_observation_values(observation_id, start):
     """Reads necessary metadata to process observation values
     before storing them.
@@ -1938,21 +2638,17 @@ def update_aggregate(aggregate_id, *, name=None, description=None,
 
 
 def _set_aggregate_parameters(aggregate_dict):
-    out = {}
-    for key in schema.AggregateSchema().fields.keys():
-        if key == 'observations':
-            out[key] = []
-            for obs in aggregate_dict['observations']:
-                for tkey in ('created_at', 'observation_deleted_at',
-                             'effective_until', 'effective_from'):
-                    if obs[tkey] is not None:
-                        keydt = dt.datetime.fromisoformat(obs[tkey])
-                        if keydt.tzinfo is None:
-                            keydt = pytz.utc.localize(keydt)
-                        obs[tkey] = keydt
-                out[key].append(obs)
-        else:
-            out[key] = aggregate_dict[key]
+    out = dict(zip(_AGGREGATE_KEYS, _AGGREGATE_GETTER(aggregate_dict)))
+    out['observations'] = []
+    for obs in aggregate_dict['observations']:
+        for tkey in ('created_at', 'observation_deleted_at',
+                     'effective_until', 'effective_from'):
+            if obs[tkey] is not None:
+                keydt = dt.datetime.fromisoformat(obs[tkey])
+                if keydt.tzinfo is None:
+                    keydt = pytz.utc.localize(keydt)
+                obs[tkey] = keydt
+        out['observations'].append(obs)
     return out
 
 
@@ -1991,8 +2687,20 @@ def delete_aggregate(aggregate_id):
     _call_procedure('delete_aggregate', aggregate_id)
 
 
-def list_aggregates():
-    """Lists all aggregates a user has access to.
+def list_aggregates(variable=None, cursor=None, limit=None):
+    """Lists all aggregates a user has access to, ordered by
+    aggregate_id.
+
+    Parameters
+    ----------
+    variable: string
+        When supplied, returns only aggregates of this variable.
+    cursor: string
+        UUID of the last aggregate of the previous page, when supplied
+        returns only aggregates listed after it.
+    limit: int
+        Maximum number of aggregates to return. All are returned if
+        not supplied.
 
     Returns
     -------
@@ -2006,7 +2714,8 @@ def list_aggregates():
         no aggregates exists for that id
     """
     aggregates = [_set_aggregate_parameters(agg)
-                  for agg in _call_procedure('list_aggregates')]
+                  for agg in _call_procedure(
+                      'list_aggregates', variable, cursor, limit)]
     return aggregates
 
 
@@ -2101,17 +2810,143 @@ def read_aggregate_values(aggregate_id, start=None, end=None):
     start = start or pd.Timestamp('19700101T000001Z')
     end = end or pd.Timestamp('20380119T031407Z')
     agg_vals = _call_procedure('read_aggregate_values', aggregate_id,
-                               start, end)
-    groups = pd.DataFrame.from_records(
-        list(agg_vals), columns=['observation_id', 'timestamp',
-                                 'value', 'quality_flag']
-    ).groupby('observation_id')
-    out = {}
-    for obs_id, df in groups:
-        out[obs_id] = df.drop(columns='observation_id').drop_duplicates(
-        ).set_index('timestamp').sort_index().astype(
-            {'value': 'float', 'quality_flag': 'int64'})
-    return out
+                               start, end, cursor_type='standard')
+    return _split_aggregate_values(agg_vals)
+
+
+def _split_aggregate_values(rows):
+    """Split (observation_id, timestamp, value, quality_flag) rows into
+    a DataFrame for each observation, sorted by timestamp and without
+    the duplicate rows returned when an observation is included in an
+    aggregate for overlapping periods"""
+    if len(rows) == 0:
+        return {}
+    records = pd.DataFrame.from_records(
+        list(rows), columns=['observation_id', 'timestamp',
+                             'value', 'quality_flag'])
+    codes, uniques = pd.factorize(records['observation_id'], sort=True)
+    times = pd.DatetimeIndex(records['timestamp'], name='timestamp')
+    order = np.lexsort((times.asi8, codes))
+    codes = codes[order]
+    nanos = times.asi8[order]
+    # an observation has one value per timestamp, so repeated
+    # (observation, timestamp) pairs are exact duplicates
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (codes[1:] != codes[:-1]) | (nanos[1:] != nanos[:-1])
+    take = order[keep]
+    frame = pd.DataFrame(
+        {'value': records['value'].to_numpy(dtype=float)[take],
+         'quality_flag': records['quality_flag'].to_numpy(
+             dtype='int64')[take]},
+        index=times[take])
+    # codes are sorted, so each observation is a contiguous slice
+    bounds = np.searchsorted(codes[keep], np.arange(len(uniques) + 1))
+    return {obs_id: frame.iloc[bounds[i]:bounds[i + 1]]
+            for i, obs_id in enumerate(uniques)}
+
+
+def read_aggregate_value_blocks(aggregate_id, start, end):
+    """Read which blocks of computed aggregate values are valid.
+
+    Parameters
+    ----------
+    aggregate_id: string
+        UUID of associated aggregate.
+    start : datetime
+        Start of the first block to read.
+    end : datetime
+        Start of the last block to read.
+
+    Returns
+    -------
+    tuple or None
+        The version of the aggregate values and a set of the start
+        of each valid block as pandas.Timestamp. None if the user
+        cannot read the values of every observation in the aggregate,
+        so computed values may not be used.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user does not have permission to read values of the
+        aggregate or it does not exist.
+    """
+    rows = _call_procedure('read_aggregate_value_blocks', aggregate_id,
+                           start, end, cursor_type='standard')
+    if len(rows) == 0:
+        return None
+    version = rows[0][0]
+    blocks = {pd.Timestamp(row[1]) for row in rows if row[1] is not None}
+    return version, blocks
+
+
+def _format_block_time(time_):
+    return pd.Timestamp(time_).tz_convert('UTC').strftime(
+        '%Y-%m-%dT%H:%M:%S')
+
+
+def store_aggregate_value_blocks(aggregate_id, version, blocks, values):
+    """Store computed aggregate values and mark the blocks they were
+    computed for as valid, unless the observation values of the
+    aggregate changed after version was read.
+
+    Parameters
+    ----------
+    aggregate_id: string
+        UUID of associated aggregate.
+    version: int
+        Version returned by read_aggregate_value_blocks before the
+        observation values were read.
+    blocks: list of dict
+        With 'start' and 'end', the first and last timestamp of the
+        block, and 'raw_start' and 'raw_end', the range of observation
+        values used to compute the block.
+    values: pandas.DataFrame
+        With a DatetimeIndex and value and quality_flag columns.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user cannot read the values of the aggregate and every
+        observation in it.
+    """
+    blocks_json = json.dumps([
+        {key: _format_block_time(block[key])
+         for key in ('start', 'end', 'raw_start', 'raw_end')}
+        for block in blocks])
+    _call_procedure('store_aggregate_value_blocks', aggregate_id, version,
+                    blocks_json, _process_df_into_json(values))
+
+
+def read_materialized_aggregate_values(aggregate_id, start, end):
+    """Read computed aggregate values between start and end.
+
+    Parameters
+    ----------
+    aggregate_id: string
+        UUID of associated aggregate.
+    start : datetime
+        Beginning of the period for which to request data.
+    end : datetime
+        End of the period for which to request data.
+
+    Returns
+    -------
+    pandas.DataFrame
+        With a DatetimeIndex and value and quality_flag columns
+
+    Raises
+    ------
+    StorageAuthError
+        If the user cannot read the values of the aggregate and every
+        observation in it.
+    """
+    rows = _call_procedure('read_materialized_aggregate_values',
+                           aggregate_id, start, end, cursor_type='standard')
+    return pd.DataFrame.from_records(
+        list(rows), columns=['timestamp', 'value', 'quality_flag']
+    ).set_index('timestamp').astype(
+        {'value': 'float', 'quality_flag': 'int64'})
 
 
 def read_user_id(auth0_id):
@@ -2207,14 +3042,69 @@ def get_user_actions_on_object(object_id):
     -------
     list
         The list of actions.
+
+    Raises
+    ------
+    StorageAuthError
+        If the user cannot perform any action on the object or it
+        does not exist.
     """
-    permissions = _call_procedure('get_user_actions_on_object', object_id)
-    if not permissions:
+    actions = get_user_actions_on_objects([object_id]).get(object_id)
+    if not actions:
         raise StorageAuthError()
-    actions = list(set([perm['action'] for perm in permissions]))
     return actions
 
 
+def _user_actions_memo():
+    """The actions already read for the current user in this request,
+    or None outside of a request."""
+    ctx = _request_ctx_stack.top
+    if ctx is None:
+        return None
+    memo = getattr(ctx, 'user_actions', None)
+    if memo is None or memo[0] != current_user:
+        memo = (str(current_user), {})
+        ctx.user_actions = memo
+    return memo[1]
+
+
+def _clear_user_actions_memo(procedure_name):
+    ctx = _request_ctx_stack.top
+    if ctx is not None and not procedure_name.startswith(
+            ('read_', 'list_', 'get_', 'find_')):
+        ctx.user_actions = None
+
+
+def get_user_actions_on_objects(object_ids):
+    """Read the actions that the user can perform on each of the objects
+    with at most one call to the database. Actions are remembered for
+    the rest of the request, so objects already checked are not read
+    again.
+
+    Parameters
+    ----------
+    object_ids: list of str
+        UUIDs of the objects.
+
+    Returns
+    -------
+    dict
+        The list of actions keyed by object id. Objects the user cannot
+        perform any action on, or that do not exist, are not included.
+    """
+    memo = _user_actions_memo()
+    if memo is None:
+        memo = {}
+    missing = [oid for oid in dict.fromkeys(object_ids) if oid not in memo]
+    if missing:
+        objects = _call_procedure('get_user_actions_on_objects',
+                                  json.dumps(missing))
+        read = {obj['object_id']: obj['actions'] for obj in objects}
+        for oid in missing:
+            memo[oid] = read.get(oid, [])
+    return {oid: list(memo[oid]) for oid in object_ids if memo[oid]}
+
+
 def list_zones():
     """List all climate zones
 
@@ -2518,6 +3408,10 @@ def list_actions_on_all_objects_of_type(object_type):
     object_action_list = _call_procedure(
         'list_actions_on_all_objects_of_type',
         object_type)
+    memo = _user_actions_memo()
+    if memo is not None:
+        memo.update({obj['object_id']: obj['actions']
+                     for obj in object_action_list})
     return object_action_list
 
 
@@ -1,6 +1,10 @@
 import pytest
 from json.decoder import JSONDecodeError
+import time
 
+from jose import jwk, jwt
+
+from flask import _request_ctx_stack
 from requests.exceptions import HTTPError
 
 from sfa_api.utils import auth
@@ -59,6 +63,192 @@ def test_verify_access_token_bad_key(app, valid_auth):
     assert not auth.verify_access_token()
 
 
+@pytest.fixture()
+def local_jwks(app):
+    """Replace JWT_KEY with the JWKS of a new RSA key and return a
+    function to sign tokens with it"""
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private = rsa.generate_private_key(
+        public_exponent=65537, key_size=2048, backend=default_backend())
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption())
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo)
+    public = jwk.construct(public_pem, 'RS256').to_dict()
+    public['kid'] = 'testkid'
+    app.config['JWT_KEY'] = {'keys': [public]}
+
+    def sign(exp_in=3600, **claims):
+        now = int(time.time())
+        claims = {'sub': 'auth0|local', 'iat': now, 'exp': now + exp_in,
+                  'aud': app.config['AUTH0_AUDIENCE'],
+                  'iss': app.config['AUTH0_BASE_URL'] + '/', **claims}
+        return jwt.encode(claims, private_pem.decode(), algorithm='RS256',
+                          headers={'kid': 'testkid'})
+    return sign
+
+
+def test_decode_access_token_cached(app, local_jwks, mocker):
+    token = local_jwks()
+    decode = mocker.spy(auth.jwt, 'decode')
+    with app.test_request_context():
+        first = auth.decode_access_token(token)
+        second = auth.decode_access_token(token)
+    assert first == second
+    assert first['sub'] == 'auth0|local'
+    assert decode.call_count == 1
+    assert app.extensions['token_cache'].stats()['hits'] == 1
+
+
+def test_decode_access_token_cache_honors_exp(app, local_jwks):
+    token = local_jwks(exp_in=100)
+    with app.test_request_context():
+        auth.decode_access_token(token)
+    cache = app.extensions['token_cache']
+    assert cache.ttl > 100
+    (_, expires), = cache._data.values()
+    assert expires - time.monotonic() <= 100
+
+
+def test_decode_access_token_invalid_not_cached(app, local_jwks):
+    token = local_jwks(aud='someone else')
+    with app.test_request_context():
+        with pytest.raises(jwt.JWTError):
+            auth.decode_access_token(token)
+    assert len(app.extensions['token_cache']) == 0
+
+
+def test_verify_access_token_local_key(app, local_jwks, existing_user):
+    token = local_jwks()
+    with app.test_request_context(
+            headers={'Authorization': f'Bearer {token}'}):
+        assert auth.verify_access_token()
+        assert auth.current_user == 'auth0|local'
+
+
+def test_signing_keys(app, local_jwks):
+    token = local_jwks()
+    with app.test_request_context():
+        key = auth.signing_keys(token)
+        assert isinstance(key, jwk.Key)
+        # constructed once per JWKS
+        assert auth.signing_keys(token) is key
+        other = jwt.encode({'sub': 'a'}, 'secret', headers={'kid': 'other'})
+        assert auth.signing_keys(other) == [key]
+        app.config['JWT_KEY'] = 'notajwks'
+        assert auth.signing_keys(token) == 'notajwks'
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def jwks_provider(mocker):
+    get = mocker.patch('sfa_api.utils.auth.requests.get')
+    get.return_value.json.side_effect = [{'keys': [i]} for i in range(5)]
+    timer = FakeTimer()
+    provider = auth.JWKSProvider('https://jwks', refresh_interval=100,
+                                 min_refresh_interval=10, timer=timer)
+    return provider, get, timer
+
+
+def test_jwks_provider_lazy(jwks_provider):
+    provider, get, timer = jwks_provider
+    get.assert_not_called()
+    assert provider.get() == {'keys': [0]}
+    assert provider.get() == {'keys': [0]}
+    get.assert_called_once()
+    assert get.call_args[0] == ('https://jwks',)
+
+
+def test_jwks_provider_refresh_interval(jwks_provider):
+    provider, get, timer = jwks_provider
+    assert provider.get() == {'keys': [0]}
+    timer.now = 99
+    assert provider.get() == {'keys': [0]}
+    timer.now = 100
+    assert provider.get() == {'keys': [1]}
+    assert get.call_count == 2
+
+
+def test_jwks_provider_refresh_rate_limited(jwks_provider):
+    provider, get, timer = jwks_provider
+    assert provider.refresh() == {'keys': [0]}
+    timer.now = 5
+    assert provider.refresh() == {'keys': [0]}
+    timer.now = 10
+    assert provider.refresh() == {'keys': [1]}
+
+
+def test_jwks_provider_keeps_keys_on_failure(jwks_provider):
+    provider, get, timer = jwks_provider
+    assert provider.get() == {'keys': [0]}
+    get.side_effect = HTTPError
+    timer.now = 100
+    assert provider.get() == {'keys': [0]}
+    assert get.call_count == 2
+    # retried after min_refresh_interval, not refresh_interval
+    timer.now = 105
+    provider.get()
+    assert get.call_count == 2
+    timer.now = 110
+    provider.get()
+    assert get.call_count == 3
+
+
+def test_jwks_provider_fails_without_keys(jwks_provider):
+    provider, get, timer = jwks_provider
+    get.side_effect = HTTPError
+    with pytest.raises(HTTPError):
+        provider.get()
+
+
+def test_jwks_provider_file(tmp_path, mocker):
+    get = mocker.patch('sfa_api.utils.auth.requests.get')
+    path = tmp_path / 'jwks.json'
+    path.write_text('{"keys": ["a"]}')
+    provider = auth.JWKSProvider('https://jwks', path=str(path))
+    assert provider.get() == {'keys': ['a']}
+    get.assert_not_called()
+
+
+def test_get_jwks(app, mocker):
+    provider = mocker.Mock()
+    provider.get.return_value = 'get'
+    provider.refresh.return_value = 'refresh'
+    app.config['JWT_KEY'] = None
+    mocker.patch.dict(app.extensions, jwks=provider)
+    with app.app_context():
+        assert auth.get_jwks() == 'get'
+        assert auth.get_jwks(refresh=True) == 'refresh'
+        app.config['JWT_KEY'] = 'key'
+        assert auth.get_jwks() == 'key'
+
+
+def test_signing_keys_unknown_kid_refreshes(app, local_jwks, mocker):
+    token = local_jwks()
+    jwks = app.config['JWT_KEY']
+    app.config['JWT_KEY'] = None
+    provider = mocker.Mock()
+    provider.get.return_value = {'keys': []}
+    provider.refresh.return_value = jwks
+    mocker.patch.dict(app.extensions, jwks=provider)
+    with app.app_context():
+        key = auth.signing_keys(token)
+    assert isinstance(key, jwk.Key)
+    provider.refresh.assert_called_once()
+
+
 def test_requires_auth(valid_auth, existing_user):
     @auth.requires_auth
     def func():
@@ -123,6 +313,80 @@ def test_validate_user_existence(app, mocked_user_exists_storage,
             exists.assert_called()
 
 
+def test_validate_user_existence_cached(app, mocked_user_exists_storage):
+    exists, user_info, create_user = mocked_user_exists_storage(
+        user_exists=True)
+    cache = app.extensions['user_exists_cache']
+    with app.test_request_context():
+        _request_ctx_stack.top.user = 'auth0|cached'
+        assert auth.validate_user_existence()
+        assert auth.validate_user_existence()
+    assert exists.call_count == 1
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+    with app.test_request_context():
+        _request_ctx_stack.top.user = 'auth0|other'
+        assert auth.validate_user_existence()
+    assert exists.call_count == 2
+    cache.invalidate('auth0|cached')
+    with app.test_request_context():
+        _request_ctx_stack.top.user = 'auth0|cached'
+        assert auth.validate_user_existence()
+    assert exists.call_count == 3
+
+
+def test_validate_user_existence_not_cached(app, mocked_user_exists_storage):
+    exists, user_info, create_user = mocked_user_exists_storage(
+        user_exists=False, verified=False)
+    with app.test_request_context():
+        _request_ctx_stack.top.user = 'auth0|unverified'
+        assert not auth.validate_user_existence()
+        assert not auth.validate_user_existence()
+    assert exists.call_count == 2
+    assert len(app.extensions['user_exists_cache']) == 0
+
+
+def test_make_auth0_session(app):
+    session = auth.make_auth0_session(app.config)
+    adapter = session.get_adapter(app.config['AUTH0_BASE_URL'] + '/userinfo')
+    assert isinstance(adapter, auth.TimeoutHTTPAdapter)
+    assert adapter.timeout == app.config['AUTH0_REQUEST_TIMEOUT']
+    assert adapter._pool_maxsize == app.config['AUTH0_POOL_SIZE']
+    assert adapter.max_retries.total == 5
+    assert 503 in adapter.max_retries.status_forcelist
+    assert not adapter.max_retries.raise_on_status
+
+
+@pytest.mark.parametrize('timeout,expected', [(None, 10), (3.0, 3.0)])
+def test_timeout_http_adapter(mocker, timeout, expected):
+    send = mocker.patch('requests.adapters.HTTPAdapter.send')
+    adapter = auth.TimeoutHTTPAdapter(timeout=10)
+    adapter.send('request', timeout=timeout)
+    assert send.call_args[1]['timeout'] == expected
+
+
+def test_auth0_session_shared(app):
+    with app.app_context():
+        session = auth.auth0_session()
+        assert auth.auth0_session() is session
+    with app.app_context():
+        assert auth.auth0_session() is session
+
+
+def test_request_user_info_uses_session(app, requests_mock):
+    requests_mock.register_uri(
+        'GET', app.config['AUTH0_BASE_URL'] + '/userinfo',
+        json={'sub': 'auth0|me'})
+    ctx = app.test_request_context()
+    ctx.access_token = 'thetoken'
+    with ctx:
+        session = auth.auth0_session()
+        assert auth.request_user_info() == {'sub': 'auth0|me'}
+        assert auth.auth0_session() is session
+    req = requests_mock.request_history[0]
+    assert req.headers['Authorization'] == 'Bearer thetoken'
+    assert req.timeout == 3.0
+
+
 def test_request_user_info(sql_app, auth_token, user_id):
     ctx = sql_app.test_request_context()
     ctx.access_token = auth_token
@@ -1,6 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import re
+import threading
+import time
 
 
+from jose import jwt
 import pytest
 from redis import Redis
 import requests
@@ -99,6 +104,116 @@ def test_auth0_token_no_fresh(running_app, mocker, se):
     assert log.called
 
 
+class Timer:
+    def __init__(self, now=1000.):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_management_token_provider_keeps_token(mocker):
+    timer = Timer()
+    provider = auth0_info.ManagementTokenProvider(
+        refresh_margin=100, timer=timer)
+    load = mocker.Mock(side_effect=[('one', 2000.), ('two', 3000.)])
+    assert provider.get(load) == 'one'
+    timer.now = 1899.
+    assert provider.get(load) == 'one'
+    assert load.call_count == 1
+    timer.now = 1900.
+    assert provider.get(load) == 'two'
+    assert load.call_count == 2
+
+
+def test_management_token_provider_no_expiration(mocker):
+    provider = auth0_info.ManagementTokenProvider(timer=Timer())
+    load = mocker.Mock(return_value=('token', None))
+    assert provider.get(load) == 'token'
+    assert provider.get(load) == 'token'
+    assert load.call_count == 2
+
+
+def test_management_token_provider_failed_load(mocker):
+    timer = Timer()
+    provider = auth0_info.ManagementTokenProvider(
+        refresh_margin=100, retry_interval=10, timer=timer)
+    load = mocker.Mock(side_effect=[
+        ('one', 1200.), (None, None), ('two', 2000.)])
+    assert provider.get(load) == 'one'
+    timer.now = 1150.
+    # old token is used until it expires while waiting to retry
+    assert provider.get(load) == 'one'
+    timer.now = 1159.
+    assert provider.get(load) == 'one'
+    assert load.call_count == 2
+    timer.now = 1160.
+    assert provider.get(load) == 'two'
+    assert load.call_count == 3
+
+
+def test_management_token_provider_failed_load_expired(mocker):
+    timer = Timer()
+    provider = auth0_info.ManagementTokenProvider(timer=timer)
+    load = mocker.Mock(return_value=(None, None))
+    assert provider.get(load) is None
+    timer.now = 1009.
+    assert provider.get(load) is None
+    assert load.call_count == 1
+
+
+def test_management_token_provider_single_flight(mocker):
+    provider = auth0_info.ManagementTokenProvider()
+    started = threading.Event()
+    release = threading.Event()
+
+    def load():
+        started.set()
+        release.wait(5)
+        return 'token', time.time() + 3600
+
+    load = mocker.Mock(side_effect=load)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(provider.get, load)
+        started.wait(5)
+        others = [pool.submit(provider.get, load) for _ in range(3)]
+        release.set()
+        tokens = [f.result() for f in [first] + others]
+    assert tokens == ['token'] * 4
+    assert load.call_count == 1
+
+
+@pytest.fixture()
+def valid_jwt(mocker):
+    mocker.patch('sfa_api.utils.auth0_info.check_if_token_is_valid',
+                 return_value=True)
+
+    def make(exp):
+        return jwt.encode({'exp': exp}, 'secret')
+    return make
+
+
+def test_auth0_token_kept_in_memory(running_app, mocker, valid_jwt):
+    token = valid_jwt(time.time() + 3600)
+    r = auth0_info.token_redis_connection()
+    r.set('auth0_token', token)
+    get = mocker.spy(r, 'get')
+    assert auth0_info.auth0_token() == token
+    assert auth0_info.auth0_token() == token
+    assert get.call_count == 1
+
+
+def test_auth0_token_in_redis_expiring(running_app, mocker, valid_jwt):
+    r = auth0_info.token_redis_connection()
+    r.set('auth0_token', valid_jwt(time.time() + 60))
+    new = valid_jwt(time.time() + 3600)
+    mocker.patch(
+        'sfa_api.utils.auth0_info.get_fresh_auth0_management_token',
+        return_value=new)
+    assert auth0_info.auth0_token() == new
+    assert r.get('auth0_token') == new
+
+
 @pytest.mark.parametrize('val', [
     'no', 'auth0other',
     pytest.param('auth0|4882lxjlsd0', marks=pytest.mark.xfail)
@@ -187,6 +302,28 @@ def test_list_user_emails(running_app, auth0id, email,
         email, 'second', 'third', 'Unable to retrieve'}
 
 
+def test_list_user_emails_pages_concurrently(running_app, requests_mock,
+                                             token_set, mocker):
+    def page(request, context):
+        num = int(request.qs['page'][0])
+        return {'users': [{'email': f'email{num}',
+                           'user_id': f'auth0|{num}'}],
+                'total': 350}
+
+    requests_mock.register_uri(
+        'GET', running_app.config['AUTH0_BASE_URL'] + '/api/v2/users',
+        json=page)
+    pool = mocker.spy(auth0_info, 'ThreadPoolExecutor')
+    ids = [f'auth0|{i}' for i in range(5)]
+    out = auth0_info.list_user_emails(ids)
+    assert out == {'auth0|0': 'email0', 'auth0|1': 'email1',
+                   'auth0|2': 'email2', 'auth0|3': 'email3',
+                   'auth0|4': 'Unable to retrieve'}
+    assert sorted(int(h.qs['page'][0])
+                  for h in requests_mock.request_history) == [0, 1, 2, 3]
+    assert pool.call_args[1]['max_workers'] == 3
+
+
 def test_list_user_emails_invalid(running_app, auth0id):
     ids = [auth0id, 'auth0|one', 'auth0|ooasdd', 'auth0|what',
            'bad']
@@ -194,6 +331,49 @@ def test_list_user_emails_invalid(running_app, auth0id):
         auth0_info.list_user_emails(ids)
 
 
+def test_get_emails_of_users(running_app, auth0id, email, requests_mock,
+                             token_set, email_in_redis, mocker):
+    running_app.config['AUTH0_EMAIL_WORKERS'] = 2
+    base = running_app.config['AUTH0_BASE_URL'] + '/api/v2/users/'
+    requests_mock.register_uri(
+        'GET', base + 'auth0|one', content=b'{"email": "second"}')
+    requests_mock.register_uri(
+        'GET', base + 'auth0|ooasdd', content=b'{"email": "third"}')
+    requests_mock.register_uri('GET', base + 'auth0|what', status_code=404)
+    r = auth0_info.token_redis_connection()
+    mget = mocker.spy(r, 'mget')
+    ids = [auth0id, 'auth0|one', 'auth0|ooasdd', 'auth0|what', 'auth0|one']
+    out = auth0_info.get_emails_of_users(ids)
+    assert out == {auth0id: email, 'auth0|one': 'second',
+                   'auth0|ooasdd': 'third', 'auth0|what': 'Unable to retrieve'}
+    assert mget.call_count == 1
+    # the cached email is not requested and each miss is requested once
+    assert sorted(h.path for h in requests_mock.request_history) == [
+        '/api/v2/users/auth0%7cone', '/api/v2/users/auth0%7cooasdd',
+        '/api/v2/users/auth0%7cwhat']
+    assert r.get('auth0|one') == 'second'
+    assert 90000 > r.ttl('auth0|ooasdd') > 80000
+    assert r.get('auth0|what') is None
+
+
+def test_get_emails_of_users_all_in_redis(running_app, auth0id, email,
+                                          email_in_redis, requests_mock,
+                                          mocker):
+    token = mocker.patch('sfa_api.utils.auth0_info.auth0_token')
+    assert auth0_info.get_emails_of_users([auth0id]) == {auth0id: email}
+    assert not token.called
+    assert not requests_mock.called
+
+
+def test_get_emails_of_users_empty(running_app):
+    assert auth0_info.get_emails_of_users([]) == {}
+
+
+def test_get_emails_of_users_invalid(running_app, auth0id):
+    with pytest.raises(ValueError):
+        auth0_info.get_emails_of_users([auth0id, 'bad'])
+
+
 def test_get_auth0_id_of_user(
         running_app, auth0id, email, requests_mock, token_set):
     requests_mock.register_uri(
@@ -232,6 +412,54 @@ def test_get_auth0_id_of_user_empty(running_app, email,
     assert out == 'Unable to retrieve'
 
 
+@pytest.fixture()
+def unavailable_auth0(running_app, token_set):
+    """Point the Auth0 session at a local server that always responds
+    503, so the retries of the real session are used."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    running_app.config['AUTH0_BASE_URL'] = (
+        f'http://127.0.0.1:{server.server_port}')
+    running_app.extensions.pop('auth0_session', None)
+    yield requests_seen
+    running_app.extensions.pop('auth0_session', None)
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_email_of_user_unavailable(auth0id, unavailable_auth0):
+    assert auth0_info.get_email_of_user(auth0id) == 'Unable to retrieve'
+    # the first request and three retries
+    assert len(unavailable_auth0) == 4
+
+
+def test_get_emails_of_users_unavailable(auth0id, unavailable_auth0):
+    assert auth0_info.get_emails_of_users([auth0id]) == {
+        auth0id: 'Unable to retrieve'}
+
+
+def test_list_user_emails_unavailable(auth0id, unavailable_auth0):
+    assert auth0_info.list_user_emails([auth0id]) == {
+        auth0id: 'Unable to retrieve'}
+
+
+def test_get_auth0_id_of_user_unavailable(email, unavailable_auth0):
+    assert auth0_info.get_auth0_id_of_user(email) == 'Unable to retrieve'
+
+
 def test_random_password():
     p1 = auth0_info.random_password()
     p2 = auth0_info.random_password()
@@ -0,0 +1,237 @@
+"""
+Micro-benchmarks comparing the throughput of the current implementations
+with the ones they replaced. Only run with ``pytest --run-benchmarks``.
+Results are printed (use ``-s``) and recorded as junitxml properties.
+"""
+import json
+import string
+import time
+import uuid
+
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+
+from sfa_api.utils import request_handling
+
+
+pytestmark = pytest.mark.benchmark
+
+
+def _rows_per_second(func, rows, repeat=3):
+    best = min(_timeit(func) for _ in range(repeat))
+    return rows / best
+
+
+def _timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _report(record_property, name, rows, old, new):
+    record_property(f'{name}_old_rows_per_s', old)
+    record_property(f'{name}_new_rows_per_s', new)
+    print(f'\n{name} ({rows} rows): {old:,.0f} rows/s -> {new:,.0f} rows/s '
+          f'({new / old:.1f}x)')
+
+
+def _parse_json_printable_filter(json_str):
+    # parse_json before the bulk translate and orjson decode
+    json_dict = json.loads(''.join(s for s in json_str
+                                   if s in string.printable))
+    return pd.DataFrame(json_dict['values'])
+
+
+@pytest.fixture(scope='module')
+def values_json():
+    nrows = 200000
+    index = pd.date_range('2019-01-01T00:00Z', freq='1min', periods=nrows)
+    values = [
+        {'timestamp': ts, 'value': None if i % 7 == 0 else i / 3,
+         'quality_flag': i % 2}
+        for i, ts in enumerate(index.strftime('%Y-%m-%dT%H:%M:%SZ'))]
+    return nrows, '\ufeff' + json.dumps({'values': values})
+
+
+def test_parse_json(values_json, record_property):
+    nrows, json_str = values_json
+    pdt.assert_frame_equal(request_handling.parse_json(json_str),
+                           _parse_json_printable_filter(json_str))
+    old = _rows_per_second(
+        lambda: _parse_json_printable_filter(json_str), nrows)
+    new = _rows_per_second(
+        lambda: request_handling.parse_json(json_str), nrows)
+    _report(record_property, 'parse_json', nrows, old, new)
+
+
+def _split_aggregate_values_groupby(rows):
+    # storage_interface.read_aggregate_values before the single pass
+    # array assembly
+    groups = pd.DataFrame.from_records(
+        list(rows), columns=['observation_id', 'timestamp',
+                             'value', 'quality_flag']
+    ).groupby('observation_id')
+    out = {}
+    for obs_id, df in groups:
+        out[obs_id] = df.drop(columns='observation_id').drop_duplicates(
+        ).set_index('timestamp').sort_index().astype(
+            {'value': 'float', 'quality_flag': 'int64'})
+    return out
+
+
+@pytest.mark.parametrize('nobs', [10, 100, 500])
+def test_split_aggregate_values(nobs, record_property):
+    from sfa_api.utils.storage_interface import _split_aggregate_values
+    index = pd.date_range('2019-01-01T00:00Z', freq='5min', periods=288 * 2)
+    times = list(index.to_pydatetime())
+    rows = []
+    for i in range(nobs):
+        obs_id = str(uuid.UUID(int=i))
+        rows += [(obs_id, ts, None if j % 11 == 0 else j / 3, j % 2)
+                 for j, ts in enumerate(times)]
+        # observations included twice have duplicated rows
+        if i % 5 == 0:
+            rows += rows[-len(times) // 2:]
+    rows = tuple(rows)
+    old_out = _split_aggregate_values_groupby(rows)
+    new_out = _split_aggregate_values(rows)
+    assert list(old_out.keys()) == list(new_out.keys())
+    for obs_id, df in old_out.items():
+        pdt.assert_frame_equal(new_out[obs_id], df)
+    old = _rows_per_second(lambda: _split_aggregate_values_groupby(rows),
+                           len(rows))
+    new = _rows_per_second(lambda: _split_aggregate_values(rows), len(rows))
+    _report(record_property, f'split_aggregate_values_{nobs}', len(rows),
+            old, new)
+
+
+# storage_interface row mappers before the precomputed key getters,
+# which instantiated a schema for every row
+def _set_modeling_parameters_schema(site_dict):
+    from sfa_api import schema
+    out = {}
+    modeling_parameters = {}
+    for key in schema.ModelingParameters().fields.keys():
+        modeling_parameters[key] = site_dict[key]
+    for key in schema.SiteResponseSchema().fields.keys():
+        if key == 'modeling_parameters':
+            out[key] = modeling_parameters
+        else:
+            out[key] = site_dict[key]
+    return out
+
+
+def _set_observation_parameters_schema(observation_dict):
+    from sfa_api import schema
+    out = {}
+    for key in schema.ObservationSchema().fields.keys():
+        if key in ('_links',):
+            continue
+        out[key] = observation_dict[key]
+    return out
+
+
+def _set_forecast_parameters_schema(forecast_dict):
+    from sfa_api import schema
+    out = {}
+    for key in schema.ForecastSchema().fields.keys():
+        if key in ('_links', ):
+            continue
+        out[key] = forecast_dict[key]
+    return out
+
+
+def _set_cdf_group_forecast_parameters_schema(forecast_dict):
+    from sfa_api import schema
+    out = {}
+    for key in schema.CDFForecastGroupSchema().fields.keys():
+        if key in ('_links', ):
+            continue
+        elif key == 'constant_values':
+            out[key] = []
+            constant_vals = forecast_dict['constant_values']
+            for single_id, val in constant_vals.items():
+                out[key].append({'forecast_id': single_id,
+                                 'constant_value': val})
+        else:
+            out[key] = forecast_dict[key]
+    return out
+
+
+def _metadata_rows(keys, nobjects):
+    rows = []
+    for i in range(nobjects):
+        row = {key: f'{key}{i}' for key in keys}
+        row['constant_values'] = {str(uuid.UUID(int=i * 3 + j)): j * 25.
+                                  for j in range(3)}
+        rows.append(row)
+    return rows
+
+
+@pytest.mark.parametrize('list_func,procedure_keys,old_mapper', [
+    ('list_observations',
+     '_OBSERVATION_KEYS', _set_observation_parameters_schema),
+    ('list_forecasts', '_FORECAST_KEYS', _set_forecast_parameters_schema),
+    ('list_sites', ('_SITE_KEYS', '_MODELING_PARAMETERS_KEYS'),
+     _set_modeling_parameters_schema),
+    ('list_cdf_forecast_groups', '_CDF_GROUP_KEYS',
+     _set_cdf_group_forecast_parameters_schema),
+])
+def test_list_metadata(app, mocker, record_property, list_func,
+                       procedure_keys, old_mapper):
+    from sfa_api.utils import storage_interface
+    nobjects = 5000
+    if isinstance(procedure_keys, str):
+        procedure_keys = (procedure_keys,)
+    keys = [key for attr in procedure_keys
+            for key in getattr(storage_interface, attr)]
+    rows = _metadata_rows(keys, nobjects)
+    mocker.patch.object(storage_interface, '_call_procedure',
+                        return_value=rows)
+    new_func = getattr(storage_interface, list_func)
+
+    def old_func():
+        return [old_mapper(row)
+                for row in storage_interface._call_procedure(list_func)]
+
+    with app.app_context():
+        expected = old_func()
+        out = new_func()
+        assert out == expected
+        assert [list(o.keys()) for o in out] == [
+            list(o.keys()) for o in expected]
+        old = _rows_per_second(old_func, nobjects)
+        new = _rows_per_second(new_func, nobjects)
+    _report(record_property, list_func, nobjects, old, new)
+
+
+@pytest.mark.parametrize('nobjects', [1000, 10000])
+@pytest.mark.parametrize('schema_name,demo_name', [
+    ('ObservationSchema', 'demo_observations'),
+    ('ForecastSchema', 'demo_forecasts'),
+    ('SiteResponseSchema', 'demo_sites'),
+    ('CDFForecastGroupSchema', 'demo_group_cdf'),
+])
+def test_dump_many(record_property, schema_name, demo_name, nobjects):
+    from flask import jsonify
+    from sfa_api import conftest, create_app, schema
+    from sfa_api.utils import response_handling
+    schema_class = getattr(schema, schema_name)
+    demo = list(getattr(conftest, demo_name).values())
+    objs = [demo[i % len(demo)] for i in range(nobjects)]
+
+    def old_func():
+        return schema_class(many=True).dump(objs)
+
+    def new_func():
+        return response_handling.dump_many(schema_class, objs)
+
+    with create_app('TestingConfig').test_request_context():
+        assert jsonify(new_func()).get_data() == jsonify(
+            old_func()).get_data()
+        old = _rows_per_second(old_func, nobjects)
+        new = _rows_per_second(new_func, nobjects)
+    _report(record_property, f'dump_many_{schema_name}', nobjects, old, new)
@@ -0,0 +1,70 @@
+import pytest
+
+
+from sfa_api.utils.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def timer():
+    return FakeTimer()
+
+
+def test_ttlcache_get_set(timer):
+    cache = TTLCache(maxsize=2, ttl=10, timer=timer)
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    assert 'a' in cache
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+
+def test_ttlcache_expires(timer):
+    cache = TTLCache(maxsize=2, ttl=10, timer=timer)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=20)
+    timer.now = 10
+    assert cache.get('a', 'gone') == 'gone'
+    assert cache.get('b') == 2
+    assert len(cache) == 1
+    timer.now = 20
+    assert 'b' not in cache
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 0}
+
+
+def test_ttlcache_evicts_least_recently_used(timer):
+    cache = TTLCache(maxsize=2, ttl=10, timer=timer)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+@pytest.mark.parametrize('maxsize,ttl', [(0, 10), (2, 0)])
+def test_ttlcache_disabled(timer, maxsize, ttl):
+    cache = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+    cache.set('a', 1)
+    assert len(cache) == 0
+    assert cache.get('a') is None
+
+
+def test_ttlcache_invalidate_clear(timer):
+    cache = TTLCache(maxsize=3, ttl=10, timer=timer)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.invalidate('a')
+    cache.invalidate('missing')
+    assert 'a' not in cache
+    assert 'b' in cache
+    cache.clear()
+    assert len(cache) == 0
@@ -1,3 +1,8 @@
+import json
+import string
+
+
+import numpy as np
 import pandas as pd
 import pandas.testing as pdt
 import pytest
@@ -7,7 +12,7 @@ from werkzeug.exceptions import RequestEntityTooLarge
 
 from sfa_api.conftest import (
     VALID_FORECAST_JSON, VALID_CDF_FORECAST_JSON, demo_forecasts)
-from sfa_api.utils import request_handling
+from sfa_api.utils import request_handling, response_handling
 from sfa_api.utils.errors import (
     BadAPIRequest, StorageAuthError, NotFoundException)
 
@@ -53,6 +58,115 @@ def test_validate_start_end_not_provided(app, forecast_id, query, exc):
             assert set(err.value.errors.keys()) == exc
 
 
+@pytest.mark.parametrize('query,since,limit', [
+    ('', None, 100000),
+    ('?limit=10', None, 10),
+    ('?since=12.1577836500&limit=100000',
+     (12, pd.Timestamp('2019-12-31T23:55Z')), 100000),
+])
+def test_validate_since_limit(app, forecast_id, query, since, limit):
+    url = f'/forecasts/single/{forecast_id}/values/changes{query}'
+    with app.test_request_context(url):
+        assert request_handling.validate_since_limit() == (since, limit)
+
+
+def test_validate_since_limit_format_cursor(app, forecast_id):
+    cursor = (12, pd.Timestamp('2019-12-31T23:55Z'))
+    formatted = response_handling.format_value_cursor(cursor)
+    url = f'/forecasts/single/{forecast_id}/values/changes?since={formatted}'
+    with app.test_request_context(url):
+        assert request_handling.validate_since_limit() == (cursor, 100000)
+
+
+@pytest.mark.parametrize('query,exc', [
+    ('?since=', {'since'}),
+    ('?since=nope', {'since'}),
+    ('?since=12', {'since'}),
+    # a cursor of the change time, before values were versioned
+    ('?since=1577836800123456.1577836500', {'since'}),
+    ('?since=-1.1577836500', {'since'}),
+    ('?limit=0', {'limit'}),
+    ('?limit=100001', {'limit'}),
+    ('?limit=ten', {'limit'}),
+    ('?since=1.2.3&limit=-1', {'since', 'limit'}),
+])
+def test_validate_since_limit_fail(app, forecast_id, query, exc):
+    url = f'/forecasts/single/{forecast_id}/values/changes{query}'
+    with app.test_request_context(url):
+        with pytest.raises(BadAPIRequest) as err:
+            request_handling.validate_since_limit()
+        assert set(err.value.errors.keys()) == exc
+
+
+@pytest.mark.parametrize('query,expected', [
+    ('', {'variable': None, 'cursor': None, 'limit': None}),
+    ('?variable=ghi&limit=10',
+     {'variable': 'ghi', 'cursor': None, 'limit': 10}),
+    ('?cursor=123E4567-E89B-12D3-A456-426655440000&limit=1',
+     {'variable': None, 'cursor': '123e4567-e89b-12d3-a456-426655440000',
+      'limit': 1}),
+    ('?limit=10000', {'variable': None, 'cursor': None, 'limit': 10000}),
+])
+def test_validate_list_parameters(app, query, expected):
+    with app.test_request_context(f'/observations/{query}'):
+        assert request_handling.validate_list_parameters() == expected
+
+
+@pytest.mark.parametrize('query,exc', [
+    ('?variable=nope', {'variable'}),
+    ('?cursor=', {'cursor'}),
+    ('?cursor=123e4567', {'cursor'}),
+    ('?limit=0', {'limit'}),
+    ('?limit=ten', {'limit'}),
+    ('?limit=10001', {'limit'}),
+    # larger than the INT UNSIGNED lim of the list procedures
+    ('?limit=5000000000', {'limit'}),
+    ('?variable=GHI&cursor=nope&limit=-1', {'variable', 'cursor', 'limit'}),
+])
+def test_validate_list_parameters_fail(app, query, exc):
+    with app.test_request_context(f'/observations/{query}'):
+        with pytest.raises(BadAPIRequest) as err:
+            request_handling.validate_list_parameters()
+        assert set(err.value.errors.keys()) == exc
+
+
+@pytest.mark.parametrize('query,expected', [
+    ('', None),
+    ('?fields=status', ('status',)),
+    ('?fields=status,report_parameters', ('status', 'report_parameters')),
+    ('?fields=values,%20status,values,', ('values', 'status')),
+])
+def test_validate_fields(app, query, expected):
+    with app.test_request_context(f'/reports/{query}'):
+        assert request_handling.validate_fields(
+            ('status', 'report_parameters', 'values')) == expected
+
+
+@pytest.mark.parametrize('query', [
+    '?fields=', '?fields=,', '?fields=status,nope', '?fields=Status'])
+def test_validate_fields_fail(app, query):
+    with app.test_request_context(f'/reports/{query}'):
+        with pytest.raises(BadAPIRequest) as err:
+            request_handling.validate_fields(('status', 'values'))
+        assert set(err.value.errors.keys()) == {'fields'}
+
+
+def test_validate_object_ids(app, forecast_id, observation_id):
+    query = f'?object_ids={forecast_id},%20{observation_id.upper()},'
+    with app.test_request_context(f'/users/actions-on/{query}'):
+        assert request_handling.validate_object_ids() == [
+            forecast_id, observation_id]
+
+
+@pytest.mark.parametrize('query', [
+    '', '?object_ids=', '?object_ids=,', '?object_ids=nope'])
+def test_validate_object_ids_fail(app, query):
+    with app.test_request_context(f'/users/actions-on/{query}'):
+        with pytest.raises(BadAPIRequest) as err:
+            request_handling.validate_object_ids()
+        assert set(err.value.errors.keys()) == {'object_ids'}
+
+
 @pytest.mark.parametrize('content_type,payload', [
     ('text/csv', ''),
     ('application/json', '{}'),
@@ -94,6 +208,173 @@ def test_validate_parsable_success(app, content_type, payload, forecast_id):
         request_handling.validate_parsable_values()
 
 
+BATCH_FX_ID = '11c20780-76ae-4b11-bef1-7a75bdc784e3'
+BATCH_VALUES = [{'timestamp': '2019-01-01T12:00:00Z', 'value': 5},
+                {'timestamp': '2019-01-01T13:00:00Z', 'value': None}]
+
+
+def _batch_request(app, payload, content_type='application/json'):
+    if not isinstance(payload, str):
+        payload = json.dumps(payload)
+    return app.test_request_context(
+        '/forecasts/values/batch', content_type=content_type, data=payload,
+        method='POST')
+
+
+def test_validate_parsable_values_batch(app):
+    payload = {'forecasts': [
+        {'forecast_id': BATCH_FX_ID, 'type': 'forecast',
+         'values': BATCH_VALUES},
+        {'forecast_id': BATCH_FX_ID, 'type': 'cdf_forecast',
+         'values': BATCH_VALUES[:1]}]}
+    with _batch_request(app, payload):
+        out = request_handling.validate_parsable_values_batch()
+    assert [str(fx['forecast_id']) for fx in out] == [BATCH_FX_ID] * 2
+    assert [fx['type'] for fx in out] == ['forecast', 'cdf_forecast']
+    assert len(out[0]['values']) == 2
+    assert np.isnan(out[0]['values']['value'].iloc[1])
+    assert out[1]['values']['timestamp'].iloc[0] == pd.Timestamp(
+        '2019-01-01T12:00Z')
+
+
+@pytest.mark.parametrize('payload,content_type', [
+    ('nope', 'application/json'),
+    ('{"forecasts": []}', 'text/csv'),
+    ({}, 'application/json'),
+    ({'forecasts': []}, 'application/json'),
+    ({'forecasts': {}}, 'application/json'),
+])
+def test_validate_parsable_values_batch_fail(app, payload, content_type):
+    with pytest.raises(BadAPIRequest):
+        with _batch_request(app, payload, content_type):
+            request_handling.validate_parsable_values_batch()
+
+
+@pytest.mark.parametrize('item,key', [
+    ('nope', '_schema'),
+    ({'forecast_id': 'nope', 'type': 'forecast', 'values': BATCH_VALUES},
+     'forecast_id'),
+    ({'forecast_id': BATCH_FX_ID, 'type': 'site', 'values': BATCH_VALUES},
+     'type'),
+    ({'forecast_id': BATCH_FX_ID, 'type': 'forecast'}, 'values'),
+    ({'forecast_id': BATCH_FX_ID, 'type': 'forecast', 'values': []},
+     'values'),
+    ({'forecast_id': BATCH_FX_ID, 'type': 'forecast',
+      'values': [{'timestamp': 'bad', 'value': 1}]}, 'timestamp'),
+    ({'forecast_id': BATCH_FX_ID, 'type': 'forecast',
+      'values': [{'timestamp': '2019-01-01T00:00Z'}]}, 'value'),
+])
+def test_validate_parsable_values_batch_item_errors(app, item, key):
+    payload = {'forecasts': [
+        {'forecast_id': BATCH_FX_ID, 'type': 'forecast',
+         'values': BATCH_VALUES}, item]}
+    with pytest.raises(BadAPIRequest) as err:
+        with _batch_request(app, payload):
+            request_handling.validate_parsable_values_batch()
+    errors = err.value.errors['forecasts'][0]
+    assert list(errors.keys()) == ['1']
+    assert key in errors['1']
+
+
+def test_validate_parsable_values_batch_too_many(app):
+    app.config['MAX_BATCH_OBJECTS'] = 1
+    payload = {'forecasts': [
+        {'forecast_id': BATCH_FX_ID, 'type': 'forecast',
+         'values': BATCH_VALUES}] * 2}
+    with pytest.raises(BadAPIRequest) as err:
+        with _batch_request(app, payload):
+            request_handling.validate_parsable_values_batch()
+    assert 'forecasts' in err.value.errors
+
+
+def test_validate_parsable_values_batch_too_much_data(app):
+    app.config['MAX_POST_DATAPOINTS'] = 3
+    payload = {'forecasts': [
+        {'forecast_id': BATCH_FX_ID, 'type': 'forecast',
+         'values': BATCH_VALUES}] * 2}
+    with pytest.raises(BadAPIRequest) as err:
+        with _batch_request(app, payload):
+            request_handling.validate_parsable_values_batch()
+    assert 'error' in err.value.errors
+
+
+def test_validate_parsable_values_batch_too_large(app):
+    with pytest.raises(RequestEntityTooLarge):
+        with app.test_request_context(
+                '/forecasts/values/batch', content_type='application/json',
+                method='POST', content_length=17*1024*1024):
+            request_handling.validate_parsable_values_batch()
+
+
+GROUP_VALUES = {
+    'constant_values': [5.0, 50],
+    'values': [
+        {'timestamp': '2019-01-01T12:05:00Z', 'values': [2.0, None]},
+        {'timestamp': '2019-01-01T12:00:00Z', 'values': [1, 3.5]}]}
+GROUP_CSV = ('timestamp,5.0,50\n2019-01-01T12:05:00Z,2.0,\n'
+             '2019-01-01T12:00:00Z,1,3.5\n')
+
+
+def _group_request(app, payload, content_type='application/json'):
+    if not isinstance(payload, str):
+        payload = json.dumps(payload)
+    return app.test_request_context(
+        f'/forecasts/cdf/{BATCH_FX_ID}/values', content_type=content_type,
+        data=payload, method='POST')
+
+
+@pytest.mark.parametrize('payload,content_type', [
+    (GROUP_VALUES, 'application/json'),
+    (GROUP_CSV, 'text/csv'),
+])
+def test_validate_parsable_cdf_group_values(app, payload, content_type):
+    with _group_request(app, payload, content_type):
+        out = request_handling.validate_parsable_cdf_group_values()
+    assert list(out.columns) == ['timestamp', 5.0, 50.0]
+    assert (out.dtypes[[5.0, 50.0]] == 'float').all()
+    assert list(out['timestamp']) == [
+        pd.Timestamp('2019-01-01T12:05Z'), pd.Timestamp('2019-01-01T12:00Z')]
+    assert list(out[5.0]) == [2.0, 1.0]
+    assert np.isnan(out[50.0].iloc[0])
+
+
+@pytest.mark.parametrize('payload,content_type,key', [
+    ('notjson', 'application/json', 'error'),
+    ({'values': GROUP_VALUES['values']}, 'application/json', 'error'),
+    ({'constant_values': [5.0], 'values': []}, 'application/json', 'error'),
+    ({'constant_values': [5.0], 'values': GROUP_VALUES['values']},
+     'application/json', 'values'),
+    ({'constant_values': [5.0, 5], 'values': GROUP_VALUES['values']},
+     'application/json', 'constant_values'),
+    ({'constant_values': ['a', 5], 'values': GROUP_VALUES['values']},
+     'application/json', 'constant_values'),
+    ({'constant_values': [5.0], 'values': [
+        {'timestamp': '2019-01-01T12:00:00Z', 'values': ['a']}]},
+     'application/json', 'value'),
+    ({'constant_values': [5.0], 'values': [
+        {'timestamp': 'notatime', 'values': [1.0]}]},
+     'application/json', 'timestamp'),
+    ('timestamp,low\n2019-01-01T12:00:00Z,1', 'text/csv', 'constant_values'),
+    ('time,5.0\n2019-01-01T12:00:00Z,1', 'text/csv', 'timestamp'),
+    ('timestamp\n2019-01-01T12:00:00Z', 'text/csv', 'constant_values'),
+    (GROUP_VALUES, 'application/xml', 'error'),
+])
+def test_validate_parsable_cdf_group_values_fail(
+        app, payload, content_type, key):
+    with pytest.raises(BadAPIRequest) as err:
+        with _group_request(app, payload, content_type):
+            request_handling.validate_parsable_cdf_group_values()
+    assert key in err.value.errors
+
+
+def test_validate_parsable_cdf_group_values_too_much_data(app):
+    app.config['MAX_POST_DATAPOINTS'] = 3
+    with pytest.raises(BadAPIRequest) as err:
+        with _group_request(app, GROUP_VALUES):
+            request_handling.validate_parsable_cdf_group_values()
+    assert 'error' in err.value.errors
+
+
 def test_validate_observation_values():
     df = pd.DataFrame({'value': [0.1, '.2'],
                        'quality_flag': [0.0, 1],
@@ -203,6 +484,25 @@ def test_parse_json_bom():
     pdt.assert_frame_equal(test_df, expected_parsed_df)
 
 
+@pytest.mark.parametrize('json_str', [
+    '\ufeff{"values": [1, 2]}',
+    '{"values":\x00\x07 [1,\x1b 2]}\r\n',
+    '{"values": ["caf\u00e9 \u2603", "\\u00e9"]}',
+    ''.join(chr(i) for i in range(300)),
+])
+def test_strip_unprintable(json_str):
+    expected = ''.join(s for s in json_str if s in string.printable)
+    assert request_handling._strip_unprintable(json_str) == (
+        expected.encode())
+
+
+def test_parse_json_nan_literal():
+    test_df = request_handling.parse_json(
+        '{"values": {"a": [1, NaN], "b": [Infinity, 2]}}')
+    assert test_df['a'].isna().tolist() == [False, True]
+    assert test_df['b'].tolist() == [np.inf, 2]
+
+
 @pytest.mark.parametrize('json_input', [
     '',
     "{'a':[1,2,3]}"
@@ -259,6 +559,82 @@ def test_parse_values_success(app, data, mimetype):
     pdt.assert_frame_equal(test_df, expected_parsed_df)
 
 
+def _to_binary(df, mimetype):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if mimetype == 'application/vnd.apache.arrow.stream':
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+@pytest.mark.parametrize('mimetype', [
+    'application/vnd.apache.arrow.stream',
+    'application/vnd.apache.parquet'
+])
+def test_parse_values_binary(app, mimetype):
+    data = _to_binary(expected_parsed_df, mimetype)
+    with app.test_request_context():
+        test_df = request_handling.parse_values(data, mimetype)
+    pdt.assert_frame_equal(test_df, expected_parsed_df)
+
+
+@pytest.mark.parametrize('mimetype', [
+    'application/vnd.apache.arrow.stream',
+    'application/vnd.apache.parquet'
+])
+def test_parse_arrow_typed_columns(mimetype):
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2019-01-01T00:00', freq='1h',
+                                   periods=3, tz='UTC'),
+        'value': [1.0, None, 3.0],
+        'quality_flag': [0, 1, 0]})
+    data = _to_binary(df, mimetype)
+    test_df = request_handling.parse_arrow(data, mimetype)
+    pdt.assert_frame_equal(test_df, df)
+    out = request_handling.validate_observation_values(test_df)
+    assert str(out['timestamp'].dt.tz) == 'UTC'
+
+
+def test_parse_arrow_timestamp_index():
+    df = pd.DataFrame({'value': [1.0, 2.0]},
+                      index=pd.DatetimeIndex(
+                          ['2019-01-01T00:00Z', '2019-01-01T01:00Z'],
+                          name='timestamp'))
+    pa = pytest.importorskip('pyarrow')
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    test_df = request_handling.parse_arrow(
+        sink.getvalue().to_pybytes(), 'application/vnd.apache.arrow.stream')
+    assert list(test_df.columns) == ['timestamp', 'value']
+
+
+@pytest.mark.parametrize('mimetype', [
+    'application/vnd.apache.arrow.stream',
+    'application/vnd.apache.parquet'
+])
+def test_parse_arrow_malformed(mimetype):
+    pytest.importorskip('pyarrow')
+    with pytest.raises(request_handling.BadAPIRequest):
+        request_handling.parse_arrow(b'not arrow data', mimetype)
+
+
+def test_parse_arrow_not_available(mocker):
+    mocker.patch.object(request_handling, 'binary_formats_available',
+                        return_value=False)
+    with pytest.raises(request_handling.BadAPIRequest) as e:
+        request_handling.parse_arrow(
+            b'', 'application/vnd.apache.arrow.stream')
+    assert e.value.errors == {
+        'error': ['Unsupported Content-Type or MIME type.']}
+
+
 @pytest.mark.parametrize('data,mimetype', [
     (csv_string, 'application/fail'),
     (json_string, 'image/bmp'),
@@ -0,0 +1,313 @@
+import copy
+
+
+from flask import jsonify
+from marshmallow import post_dump
+import numpy as np
+import pandas as pd
+import pytest
+
+
+from sfa_api import create_app, json, ma, schema
+from sfa_api.conftest import (demo_sites, demo_observations, demo_forecasts,
+                              demo_group_cdf, demo_single_cdf,
+                              demo_aggregates)
+from sfa_api.schema import ObservationValuesSchema, ForecastValuesSchema
+from sfa_api.utils import request_handling, response_handling
+
+
+@pytest.fixture()
+def request_context():
+    app = create_app('TestingConfig')
+    with app.test_request_context():
+        yield app
+
+
+@pytest.fixture()
+def obs_values():
+    index = pd.date_range('2019-01-01T00:00Z', freq='5min', periods=25,
+                          name='timestamp')
+    values = pd.DataFrame({'value': np.arange(25) / 3,
+                           'quality_flag': np.arange(25) % 2},
+                          index=index)
+    values.iloc[3, 0] = np.nan
+    return values
+
+
+def _split(df, n):
+    return [df.iloc[i:i + n] for i in range(0, len(df), n)]
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 25, 100])
+def test_stream_json_values(request_context, obs_values, chunksize):
+    obs_id = '123e4567-e89b-12d3-a456-426655440000'
+    expected = ObservationValuesSchema().dump(
+        {'observation_id': obs_id, 'values': obs_values})
+    out = ''.join(response_handling.stream_json_values(
+        ObservationValuesSchema(), {'observation_id': obs_id},
+        _split(obs_values, chunksize)))
+    assert json.loads(out) == expected
+    # same key order and separators as jsonify
+    assert out == request_context.json_encoder(
+        separators=(',', ':'), sort_keys=True).encode(expected) + '\n'
+
+
+def test_stream_json_values_empty(request_context, obs_values):
+    fx_id = '123e4567-e89b-12d3-a456-426655440000'
+    out = ''.join(response_handling.stream_json_values(
+        ForecastValuesSchema(), {'forecast_id': fx_id},
+        [obs_values[['value']].iloc[:0]]))
+    loaded = json.loads(out)
+    assert loaded['values'] == []
+    assert loaded['forecast_id'] == fx_id
+    assert '_links' in loaded
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 25, 100])
+def test_stream_csv_values(obs_values, chunksize):
+    header = '# observation_id: abc\n'
+    expected = header + obs_values.to_csv(
+        columns=['value', 'quality_flag'], index_label='timestamp',
+        date_format='%Y%m%dT%H:%M:%S%z')
+    out = ''.join(response_handling.stream_csv_values(
+        header, _split(obs_values, chunksize),
+        columns=['value', 'quality_flag'], index_label='timestamp'))
+    assert out == expected
+
+
+def test_stream_csv_values_empty(obs_values):
+    empty = obs_values.iloc[:0]
+    out = ''.join(response_handling.stream_csv_values('# x\n', [empty]))
+    assert out == '# x\n' + empty.to_csv()
+
+
+def test_prime_chunks():
+    read = []
+
+    def gen():
+        read.append(0)
+        yield 0
+        read.append(1)
+        yield 1
+
+    chunks = response_handling.prime_chunks(gen())
+    assert read == [0]
+    assert list(chunks) == [0, 1]
+    assert read == [0, 1]
+
+
+def test_prime_chunks_raises():
+    def gen():
+        raise ValueError
+        yield
+
+    with pytest.raises(ValueError):
+        response_handling.prime_chunks(gen())
+
+
+def test_values_mimetypes(mocker):
+    mocker.patch.object(response_handling, 'binary_formats_available',
+                        return_value=False)
+    assert response_handling.values_mimetypes() == [
+        'application/json', 'text/csv']
+
+
+def test_values_mimetypes_binary(mocker):
+    mocker.patch.object(response_handling, 'binary_formats_available',
+                        return_value=True)
+    assert response_handling.values_mimetypes()[2:] == [
+        response_handling.ARROW_MIMETYPE, response_handling.PARQUET_MIMETYPE]
+
+
+@pytest.mark.parametrize('mimetype', [
+    response_handling.ARROW_MIMETYPE, response_handling.PARQUET_MIMETYPE])
+@pytest.mark.parametrize('tz', [None, 'UTC', 'Etc/GMT+7'])
+def test_arrow_to_bytes(obs_values, mimetype, tz):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    if tz is None:
+        values = obs_values.tz_localize(None)
+    else:
+        values = obs_values.tz_convert(tz)
+    table = response_handling.values_to_arrow(
+        values, {'observation_id': 'abc'})
+    out = response_handling.arrow_to_bytes(table, mimetype)
+    if mimetype == response_handling.ARROW_MIMETYPE:
+        new = pa.ipc.open_stream(out).read_all()
+    else:
+        new = pq.read_table(pa.BufferReader(out))
+    assert new.schema.metadata[b'observation_id'] == b'abc'
+    pd.testing.assert_frame_equal(
+        new.to_pandas().set_index('timestamp'), obs_values, check_freq=False)
+
+
+def test_arrow_to_bytes_bad_mimetype(obs_values):
+    pytest.importorskip('pyarrow')
+    table = response_handling.values_to_arrow(obs_values, {})
+    with pytest.raises(ValueError):
+        response_handling.arrow_to_bytes(table, 'text/csv')
+
+
+def test_values_to_arrow_columns(obs_values):
+    pytest.importorskip('pyarrow')
+    table = response_handling.values_to_arrow(obs_values, {}, ['value'])
+    assert table.column_names == ['timestamp', 'value']
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 25, 100])
+def test_stream_arrow_values(obs_values, chunksize):
+    pa = pytest.importorskip('pyarrow')
+    out = b''.join(response_handling.stream_arrow_values(
+        {'observation_id': 'abc'},
+        _split(obs_values, chunksize) + [obs_values.iloc[:0]]))
+    new = pa.ipc.open_stream(out).read_all()
+    assert new.schema.metadata[b'observation_id'] == b'abc'
+    pd.testing.assert_frame_equal(
+        new.to_pandas().set_index('timestamp'), obs_values, check_freq=False)
+
+
+def test_stream_arrow_values_empty(obs_values):
+    pa = pytest.importorskip('pyarrow')
+    out = b''.join(response_handling.stream_arrow_values(
+        {}, [obs_values.iloc[:0]]))
+    new = pa.ipc.open_stream(out).read_all()
+    assert new.num_rows == 0
+    assert new.column_names == ['timestamp', 'value', 'quality_flag']
+
+
+def test_make_etag():
+    etag = response_handling.make_etag((3, None, 10), 'text/csv')
+    assert etag == response_handling.make_etag((3, None, 10), 'text/csv')
+    assert etag != response_handling.make_etag((3, None, 11), 'text/csv')
+    assert etag != response_handling.make_etag((3, None, 10), 'text/json')
+
+
+@pytest.mark.parametrize('if_none_match,status', [
+    (None, 200),
+    ('"other"', 200),
+    ('"abc"', 304),
+    ('"other", "abc"', 304),
+    ('*', 304),
+])
+def test_make_conditional_response(mocker, if_none_match, status):
+    app = create_app('TestingConfig')
+    headers = {} if if_none_match is None else {
+        'If-None-Match': if_none_match}
+    make = mocker.Mock(return_value=app.response_class('body'))
+    with app.test_request_context(headers=headers):
+        response = response_handling.make_conditional_response('abc', make)
+    assert response.status_code == status
+    assert response.get_etag() == ('abc', False)
+    assert make.called is (status == 200)
+    if status == 304:
+        assert response.get_data() == b''
+
+
+def test_make_conditional_json():
+    app = create_app('TestingConfig')
+    with app.test_request_context():
+        first = response_handling.make_conditional_json({'a': 1})
+    etag = first.headers['ETag']
+    with app.test_request_context(headers={'If-None-Match': etag}):
+        second = response_handling.make_conditional_json({'a': 1})
+        changed = response_handling.make_conditional_json({'a': 2})
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+OBS_A = '123e4567-e89b-12d3-a456-426655440000'
+OBS_B = '123e4567-e89b-12d3-a456-426655440001'
+
+
+@pytest.mark.parametrize('query,link', [
+    ('', None),
+    ('?limit=3', None),
+    ('?limit=2&variable=ghi', f'cursor={OBS_B}&variable=ghi'),
+    (f'?limit=2&cursor={OBS_A}', f'cursor={OBS_B}'),
+])
+def test_make_page_response(query, link):
+    app = create_app('TestingConfig')
+    data = [{'observation_id': OBS_A}, {'observation_id': OBS_B}]
+    with app.test_request_context(f'/observations/{query}'):
+        limit = request_handling.validate_list_parameters()['limit']
+        response = response_handling.make_page_response(
+            data, limit, 'observation_id')
+    assert response.json == data
+    if link is None:
+        assert 'Link' not in response.headers
+    else:
+        assert response.headers['Link'].startswith(
+            '<http://localhost/observations/?')
+        assert response.headers['Link'].endswith('>; rel="next"')
+        for arg in ['limit=2'] + link.split('&'):
+            assert arg in response.headers['Link']
+
+
+@pytest.mark.parametrize('schema_class,objects', [
+    (schema.SiteResponseSchema, demo_sites),
+    (schema.ObservationSchema, demo_observations),
+    (schema.ForecastSchema, demo_forecasts),
+    (schema.CDFForecastGroupSchema, demo_group_cdf),
+    (schema.CDFForecastSchema, demo_single_cdf),
+    (schema.AggregateSchema, demo_aggregates),
+])
+def test_dump_many(request_context, schema_class, objects):
+    objs = list(objects.values())
+    expected = schema_class(many=True).dump(objs)
+    out = response_handling.dump_many(schema_class, objs)
+    assert response_handling._compile_schema(schema_class) is not None
+    assert out == expected
+    assert jsonify(out).get_data() == jsonify(expected).get_data()
+
+
+def test_dump_many_empty(request_context):
+    assert response_handling.dump_many(schema.ObservationSchema, []) == []
+
+
+def test_dump_many_missing_and_none(request_context):
+    obj = copy.deepcopy(demo_forecasts['11c20780-76ae-4b11-bef1-7a75bdc784e3'])
+    obj['site_id'] = None
+    obj['aggregate_id'] = '458ffc27-df0b-11e9-b622-62adb5fd6af0'
+    del obj['extra_parameters']
+    out = response_handling.dump_many(schema.ForecastSchema, [obj])
+    assert out == schema.ForecastSchema(many=True).dump([obj])
+    assert 'extra_parameters' not in out[0]
+    assert out[0]['_links']['site'] is None
+    assert out[0]['_links']['aggregate'].endswith(
+        '/aggregates/458ffc27-df0b-11e9-b622-62adb5fd6af0')
+
+
+class _PostDumpSchema(ma.Schema):
+    name = ma.String()
+
+    @post_dump
+    def upper(self, data, **kwargs):
+        return {'name': data['name'].upper()}
+
+
+def test_dump_many_not_compiled(request_context):
+    assert response_handling._compile_schema(_PostDumpSchema) is None
+    assert response_handling.dump_many(
+        _PostDumpSchema, [{'name': 'a'}, {'name': 'b'}]) == [
+            {'name': 'A'}, {'name': 'B'}]
+
+
+def test_link_builder_quoted(request_context):
+    # the default converter quotes the placeholder, so url_for is used
+    # for each object
+    urlfor = ma.AbsoluteURLFor('users.user_actions_on_type',
+                               object_type='<object_type>')
+    build = response_handling._link_builder(urlfor)
+    obj = {'object_type': 'a b'}
+    assert build(obj) == urlfor._serialize(None, None, obj)
+    assert build(obj).endswith('/users/actions-on-type/a%20b')
+
+
+def test_link_builder_template(request_context):
+    urlfor = ma.AbsoluteURLFor('sites.single', site_id='<site_id>')
+    build = response_handling._link_builder(urlfor)
+    obj = {'site_id': '123e4567-e89b-12d3-a456-426655440001'}
+    assert build(obj) == urlfor._serialize(None, None, obj)
+    assert build({'site_id': None}) is None
@@ -94,6 +94,35 @@ def test_convert_datetime_utc():
                     tzinfo=dt.timezone(dt.timedelta(hours=0))))
 
 
+@pytest.mark.parametrize('mapper,schema_class', [
+    ('_set_observation_parameters', 'ObservationSchema'),
+    ('_set_forecast_parameters', 'ForecastSchema'),
+    ('_set_cdf_forecast_parameters', 'CDFForecastSchema'),
+    ('_set_cdf_group_forecast_parameters', 'CDFForecastGroupSchema'),
+    ('_set_modeling_parameters', 'SiteResponseSchema'),
+])
+def test_set_parameters(mapper, schema_class):
+    from sfa_api import schema
+    keys = [k for k in getattr(schema, schema_class)().fields.keys()
+            if k != '_links']
+    row = {k: k + '_value'
+           for k in keys + list(schema.ModelingParameters().fields.keys())}
+    row['constant_values'] = {'a': 1.0}
+    out = getattr(storage_interface, mapper)(row)
+    assert list(out.keys()) == keys
+    for key in keys:
+        if key == 'modified_at' and mapper == '_set_cdf_forecast_parameters':
+            assert out[key] == 'created_at_value'
+        elif key == 'constant_values':
+            assert out[key] == [{'forecast_id': 'a', 'constant_value': 1.0}]
+        elif key == 'modeling_parameters':
+            assert out[key] == {
+                k: k + '_value'
+                for k in schema.ModelingParameters().fields.keys()}
+        else:
+            assert out[key] == key + '_value'
+
+
 def test_try_query_raises():
     with pytest.raises(pymysql.err.IntegrityError):
         def f():
@@ -162,6 +191,43 @@ def test_list_observations_invalid_site(sql_app, user):
         storage_interface.list_observations(str(uuid.uuid1()))
 
 
+@pytest.mark.parametrize('func,key', [
+    ('list_observations', 'observation_id'),
+    ('list_forecasts', 'forecast_id'),
+    ('list_cdf_forecasts', 'forecast_id'),
+    ('list_cdf_forecast_groups', 'forecast_id'),
+    ('list_sites', 'site_id'),
+    ('list_aggregates', 'aggregate_id'),
+    ('list_reports', 'report_id'),
+])
+def test_list_pages(sql_app, user, func, key):
+    list_func = getattr(storage_interface, func)
+    expected = [obj[key] for obj in list_func()]
+
+    def swapped(id_):
+        # ids are stored as UUID_TO_BIN(id, 1) with the time fields swapped
+        bytes_ = uuid.UUID(id_).bytes
+        return bytes_[6:8] + bytes_[4:6] + bytes_[:4] + bytes_[8:]
+
+    assert expected == sorted(expected, key=swapped)
+    pages = [list_func(limit=2)]
+    while pages[-1]:
+        pages.append(list_func(cursor=pages[-1][-1][key], limit=2))
+    assert all(len(page) <= 2 for page in pages)
+    assert [obj[key] for page in pages for obj in page] == expected
+
+
+@pytest.mark.parametrize('func', [
+    'list_observations', 'list_forecasts', 'list_cdf_forecasts',
+    'list_cdf_forecast_groups'])
+def test_list_variable(sql_app, user, func):
+    list_func = getattr(storage_interface, func)
+    objects = list_func(variable='ghi')
+    assert len(objects) > 0
+    assert all(obj['variable'] == 'ghi' for obj in objects)
+    assert len(objects) < len(list_func())
+
+
 @pytest.mark.parametrize('observation_id', demo_observations.keys())
 def test_read_observation(sql_app, user, observation_id):
     observation = storage_interface.read_observation(observation_id)
@@ -210,6 +276,125 @@ def test_read_observation_values_invalid_user(sql_app, invalid_user, startend):
             list(demo_observations.keys())[0], start, end)
 
 
+@pytest.mark.parametrize('observation_id', demo_observations.keys())
+def test_read_observation_values_chunks(sql_app, user, observation_id,
+                                        startend):
+    start, end = startend
+    expected = storage_interface.read_observation_values(
+        observation_id, start, end)
+    chunks = list(storage_interface.read_observation_values_chunks(
+        observation_id, start, end, chunksize=7))
+    assert all(len(c) <= 7 for c in chunks)
+    pdt.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def test_read_observation_values_chunks_empty(sql_app, user):
+    chunks = list(storage_interface.read_observation_values_chunks(
+        list(demo_observations.keys())[0],
+        pd.Timestamp('1970-01-01T00:00Z'), pd.Timestamp('1970-01-02T00:00Z')))
+    assert len(chunks) == 1
+    assert chunks[0].empty
+    assert (chunks[0].columns == ['value', 'quality_flag']).all()
+
+
+def test_read_observation_values_chunks_invalid_user(
+        sql_app, invalid_user, startend):
+    start, end = startend
+    chunks = storage_interface.read_observation_values_chunks(
+        list(demo_observations.keys())[0], start, end)
+    with pytest.raises(storage_interface.StorageAuthError):
+        next(chunks)
+
+
+@pytest.mark.parametrize('observation_id', demo_observations.keys())
+def test_read_values_fingerprint(sql_app, user, observation_id, startend):
+    start, end = startend
+    version, = storage_interface.read_values_fingerprint(
+        observation_id, 'observations')
+    values = storage_interface.read_observation_values(
+        observation_id, start, end)
+    storage_interface.store_observation_values(observation_id, values)
+    # rewriting the same values still commits a new version
+    assert storage_interface.read_values_fingerprint(
+        observation_id, 'observations') == (version + 1,)
+
+
+def test_read_values_fingerprint_invalid_user(sql_app, invalid_user):
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_values_fingerprint(
+            list(demo_observations.keys())[0], 'observations')
+
+
+@pytest.mark.parametrize('object_type,columns', [
+    ('observations', ['value', 'quality_flag']),
+    ('forecasts', ['value']),
+    ('cdf_forecasts', ['value']),
+])
+def test_read_value_changes(sql_app, user, observation_id, forecast_id,
+                            cdf_forecast_id, object_type, columns):
+    object_id = {'observations': observation_id, 'forecasts': forecast_id,
+                 'cdf_forecasts': cdf_forecast_id}[object_type]
+    values, cursor, more = storage_interface.read_value_changes(
+        object_id, object_type)
+    assert len(values) > 0
+    assert list(values.columns) == columns
+    assert not more
+    assert cursor[1] == values.index[-1]
+    again, new_cursor, more = storage_interface.read_value_changes(
+        object_id, object_type, since=cursor)
+    assert len(again) == 0
+    assert new_cursor == cursor
+    assert not more
+
+
+def test_read_value_changes_limit(sql_app, user, observation_id):
+    expected, _, _ = storage_interface.read_value_changes(
+        observation_id, 'observations')
+    chunks = []
+    cursor = None
+    more = True
+    while more:
+        values, cursor, more = storage_interface.read_value_changes(
+            observation_id, 'observations', since=cursor, limit=100)
+        assert len(values) <= 100
+        chunks.append(values)
+    pdt.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def test_read_value_changes_after_store(sql_app, user, nocommit_cursor,
+                                        observation_id):
+    _, cursor, _ = storage_interface.read_value_changes(
+        observation_id, 'observations')
+    stored = storage_interface.read_observation_values(
+        observation_id).iloc[:3].copy()
+    stored['quality_flag'] = stored['quality_flag'] ^ 1
+    storage_interface.store_observation_values(observation_id, stored)
+    values, _, _ = storage_interface.read_value_changes(
+        observation_id, 'observations', since=cursor)
+    pdt.assert_frame_equal(values, stored[values.columns],
+                           check_freq=False)
+
+
+def test_read_value_changes_unchanged_store(sql_app, user, nocommit_cursor,
+                                            observation_id):
+    _, cursor, _ = storage_interface.read_value_changes(
+        observation_id, 'observations')
+    stored = storage_interface.read_observation_values(
+        observation_id).iloc[:3].copy()
+    storage_interface.store_observation_values(observation_id, stored)
+    values, new_cursor, more = storage_interface.read_value_changes(
+        observation_id, 'observations', since=cursor)
+    assert len(values) == 0
+    assert new_cursor == cursor
+    assert not more
+
+
+def test_read_value_changes_invalid_user(sql_app, invalid_user):
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_value_changes(
+            list(demo_observations.keys())[0], 'observations')
+
+
 @pytest.mark.parametrize('observation_id', demo_observations.keys())
 def test_read_latest_observation_value(sql_app, user, observation_id):
     idx_step = demo_observations[observation_id]['interval_length']
@@ -351,6 +536,25 @@ def test_process_df_into_json_extended():
     assert [j['qf'] for j in jo] == [0, 1, 999]
 
 
+def test_process_wide_df_into_json():
+    df = pd.DataFrame({5.0: [1.0, 3.0], 50.0: [np.nan, 4.123456789]},
+                      index=pd.date_range(
+                          start='2020-02-02T00:00:00Z',
+                          periods=2, freq='10min'))
+    out = storage_interface._process_wide_df_into_json(df)
+    jo = json.loads(out)
+    assert [j['cv'] for j in jo] == [5.0, 50.0, 5.0, 50.0]
+    assert [j['ts'] for j in jo] == [
+        i.strftime('%Y-%m-%dT%H:%M:%S') for i in df.index.repeat(2)]
+    assert [j.get('v', 'NO!') for j in jo] == [1.0, 'NO!', 3.0, 4.12345679]
+
+
+def test_process_wide_df_into_json_empty():
+    df = pd.DataFrame({5.0: []}, index=pd.DatetimeIndex([]))
+    out = storage_interface._process_wide_df_into_json(df)
+    assert json.loads(out) == []
+
+
 @pytest.mark.parametrize('observation', demo_observations.values())
 def test_store_observation_values(sql_app, user, nocommit_cursor,
                                   observation, obs_vals):
@@ -538,6 +742,26 @@ def test_read_forecast_values_invalid_user(sql_app, invalid_user, startend):
             list(demo_forecasts.keys())[0], start, end)
 
 
+@pytest.mark.parametrize('forecast_id', demo_forecasts.keys())
+def test_read_forecast_values_chunks(sql_app, user, forecast_id, startend):
+    start, end = startend
+    expected = storage_interface.read_forecast_values(
+        forecast_id, start, end)
+    chunks = list(storage_interface.read_forecast_values_chunks(
+        forecast_id, start, end, chunksize=7))
+    assert all(len(c) <= 7 for c in chunks)
+    pdt.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def test_read_forecast_values_chunks_invalid_forecast(sql_app, user,
+                                                      startend):
+    start, end = startend
+    chunks = storage_interface.read_forecast_values_chunks(
+        str(uuid.uuid1()), start, end)
+    with pytest.raises(storage_interface.StorageAuthError):
+        next(chunks)
+
+
 @pytest.mark.parametrize('forecast_id', demo_forecasts.keys())
 def test_read_latest_forecast_value(sql_app, user, forecast_id):
     idx_step = demo_forecasts[forecast_id]['interval_length']
@@ -889,6 +1113,18 @@ def test_read_cdf_forecast_values(sql_app, user, forecast_id, startend):
     assert (forecast_values.columns == ['value']).all()
 
 
+@pytest.mark.parametrize('forecast_id', demo_single_cdf.keys())
+def test_read_cdf_forecast_values_chunks(sql_app, user, forecast_id,
+                                         startend):
+    start, end = startend
+    expected = storage_interface.read_cdf_forecast_values(
+        forecast_id, start, end)
+    chunks = list(storage_interface.read_cdf_forecast_values_chunks(
+        forecast_id, start, end, chunksize=7))
+    assert all(len(c) <= 7 for c in chunks)
+    pdt.assert_frame_equal(pd.concat(chunks), expected)
+
+
 def test_read_cdf_forecast_values_invalid_forecast(sql_app, user, startend):
     start, end = startend
     with pytest.raises(storage_interface.StorageAuthError):
@@ -904,6 +1140,99 @@ def test_read_cdf_forecast_values_invalid_user(
             list(demo_single_cdf.keys())[0], start, end)
 
 
+def test_read_values_batch(sql_app, user, startend):
+    start, end = startend
+    objects = (
+        [{'object_id': k, 'type': 'observation', 'start': start, 'end': end}
+         for k in demo_observations.keys()] +
+        [{'object_id': k, 'type': 'forecast', 'start': start, 'end': end}
+         for k in demo_forecasts.keys()] +
+        [{'object_id': k, 'type': 'cdf_forecast', 'start': start,
+          'end': end} for k in demo_single_cdf.keys()])
+    readers = {
+        'observation': storage_interface.read_observation_values,
+        'forecast': storage_interface.read_forecast_values,
+        'cdf_forecast': storage_interface.read_cdf_forecast_values,
+    }
+    values = storage_interface.read_values_batch(objects)
+    assert len(values) == len(objects)
+    for obj, obj_values in zip(objects, values):
+        pdt.assert_frame_equal(
+            obj_values,
+            readers[obj['type']](obj['object_id'], start, end))
+
+
+def test_read_values_batch_invalid_object(sql_app, user):
+    objects = [
+        {'object_id': list(demo_observations.keys())[0],
+         'type': 'observation', 'start': None, 'end': None},
+        {'object_id': str(uuid.uuid1()), 'type': 'forecast',
+         'start': None, 'end': None}]
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_values_batch(objects)
+
+
+def test_read_values_batch_invalid_user(sql_app, invalid_user):
+    objects = [{'object_id': list(demo_forecasts.keys())[0],
+                'type': 'forecast', 'start': None, 'end': None}]
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_values_batch(objects)
+
+
+def test_read_metadata_for_forecast_values_batch(sql_app, user):
+    start = pd.Timestamp('2019-09-30T12:00Z')
+    forecasts = (
+        [(k, 'forecast', start) for k in demo_forecasts.keys()] +
+        [(k, 'cdf_forecast', start) for k in demo_single_cdf.keys()])
+    out = storage_interface.read_metadata_for_forecast_values_batch(
+        forecasts)
+    assert out == [
+        storage_interface.read_metadata_for_forecast_values(k, start)
+        if type_ == 'forecast' else
+        storage_interface.read_metadata_for_cdf_forecast_values(k, start)
+        for k, type_, start in forecasts]
+
+
+def test_read_metadata_for_forecast_values_batch_invalid(sql_app, user):
+    start = pd.Timestamp('2019-09-30T12:00Z')
+    forecasts = [(list(demo_forecasts.keys())[0], 'forecast', start),
+                 (str(uuid.uuid1()), 'cdf_forecast', start)]
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_metadata_for_forecast_values_batch(forecasts)
+
+
+def test_store_forecast_values_batch(sql_app, user, nocommit_cursor,
+                                     fx_vals):
+    forecast = list(demo_forecasts.values())[0].copy()
+    forecast['name'] = 'new_forecast'
+    new_id = storage_interface.store_forecast(forecast)
+    cdf_id = list(demo_single_cdf.keys())[0]
+    start, end = fx_vals.index[0], fx_vals.index[-1]
+    out = storage_interface.store_forecast_values_batch(
+        [(new_id, 'forecast', fx_vals), (cdf_id, 'cdf_forecast', fx_vals)])
+    assert out == [new_id, cdf_id]
+    pdt.assert_frame_equal(
+        storage_interface.read_forecast_values(new_id), fx_vals,
+        check_freq=False)
+    pdt.assert_frame_equal(
+        storage_interface.read_cdf_forecast_values(cdf_id, start, end),
+        fx_vals, check_freq=False)
+
+
+def test_store_forecast_values_batch_rolls_back(sql_app, user,
+                                                nocommit_cursor, fx_vals):
+    fx_id = list(demo_forecasts.keys())[0]
+    start, end = fx_vals.index[0], fx_vals.index[-1]
+    before = storage_interface.read_forecast_values(fx_id, start, end)
+    new_vals = fx_vals + 1
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.store_forecast_values_batch(
+            [(fx_id, 'forecast', new_vals),
+             (str(uuid.uuid1()), 'forecast', new_vals)])
+    pdt.assert_frame_equal(
+        storage_interface.read_forecast_values(fx_id, start, end), before)
+
+
 @pytest.mark.parametrize('forecast_id', demo_single_cdf.keys())
 def test_read_latest_cdf_forecast_value(sql_app, user, forecast_id):
     parent_id = demo_single_cdf[forecast_id]['parent']
@@ -1014,6 +1343,83 @@ def test_store_cdf_forecast_values_invalid_user(sql_app, invalid_user,
         storage_interface.store_cdf_forecast_values(fx_id, fx_vals)
 
 
+@pytest.mark.parametrize('forecast_id', demo_group_cdf.keys())
+def test_read_cdf_forecast_group_values(sql_app, user, forecast_id,
+                                        startend):
+    start, end = startend
+    values = storage_interface.read_cdf_forecast_group_values(
+        forecast_id, start, end)
+    constant_values = sorted(
+        cv['constant_value']
+        for cv in demo_group_cdf[forecast_id]['constant_values'])
+    assert list(values.columns) == constant_values
+    assert values.index.name == 'timestamp'
+    for cv in demo_group_cdf[forecast_id]['constant_values']:
+        single = storage_interface.read_cdf_forecast_values(
+            cv['forecast_id'], start, end)
+        pdt.assert_series_equal(
+            values[cv['constant_value']].dropna(),
+            single['value'].dropna(), check_names=False)
+
+
+def test_read_cdf_forecast_group_values_empty(sql_app, user):
+    forecast_id = list(demo_group_cdf.keys())[0]
+    values = storage_interface.read_cdf_forecast_group_values(
+        forecast_id, pd.Timestamp('1970-01-01T00:00Z'),
+        pd.Timestamp('1970-01-02T00:00Z'))
+    assert len(values.index) == 0
+    assert isinstance(values.index, pd.DatetimeIndex)
+    assert len(values.columns) == len(
+        demo_group_cdf[forecast_id]['constant_values'])
+
+
+def test_read_cdf_forecast_group_values_single_id(sql_app, user, startend):
+    start, end = startend
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_cdf_forecast_group_values(
+            list(demo_single_cdf.keys())[0], start, end)
+
+
+def test_read_cdf_forecast_group_values_invalid_user(
+        sql_app, invalid_user, startend):
+    start, end = startend
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_cdf_forecast_group_values(
+            list(demo_group_cdf.keys())[0], start, end)
+
+
+def test_store_cdf_forecast_group_values(sql_app, user, nocommit_cursor,
+                                         fx_vals):
+    forecast_id = list(demo_group_cdf.keys())[0]
+    cvs = demo_group_cdf[forecast_id]['constant_values']
+    fx_vals = fx_vals.shift(freq='30d')
+    wide = pd.DataFrame({cv['constant_value']: fx_vals['value'] + i
+                         for i, cv in enumerate(cvs)})
+    wide.iloc[2:4, 0] = np.nan
+    storage_interface.store_cdf_forecast_group_values(forecast_id, wide)
+    for i, cv in enumerate(cvs):
+        stored = storage_interface.read_cdf_forecast_values(
+            cv['forecast_id'], start=fx_vals.index[0])
+        pdt.assert_series_equal(stored['value'], wide[cv['constant_value']],
+                                check_names=False, check_freq=False)
+
+
+def test_store_cdf_forecast_group_values_unknown_constant_value(
+        sql_app, user, nocommit_cursor, fx_vals):
+    forecast_id = list(demo_group_cdf.keys())[0]
+    wide = fx_vals.rename(columns={'value': -1234.5})
+    with pytest.raises(storage_interface.BadAPIRequest):
+        storage_interface.store_cdf_forecast_group_values(forecast_id, wide)
+
+
+def test_store_cdf_forecast_group_values_invalid_user(
+        sql_app, invalid_user, nocommit_cursor, fx_vals):
+    forecast_id = list(demo_group_cdf.keys())[0]
+    wide = fx_vals.rename(columns={'value': 5.0})
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.store_cdf_forecast_group_values(forecast_id, wide)
+
+
 @pytest.mark.parametrize('forecast_id', demo_single_cdf.keys())
 def test_read_cdf_forecast_single(sql_app, user, forecast_id):
     single = demo_single_cdf[forecast_id]
@@ -1401,6 +1807,27 @@ def test_read_metadata_for_cdf_forecast_values_start(
     assert isinstance(ie, bool) and not ie
 
 
+def test_read_metadata_for_cdf_forecast_group_values(
+        sql_app, user, nocommit_cursor):
+    forecast_id = list(demo_group_cdf.keys())[0]
+    start = pd.Timestamp('2019-09-02')
+    iv, pt, ep, ie = (
+        storage_interface.read_metadata_for_cdf_forecast_group_values(
+            forecast_id, start))
+    assert iv == demo_group_cdf[forecast_id]['interval_length']
+    assert isinstance(pt, pd.Timestamp)
+    assert pt.tzinfo is not None
+    assert isinstance(ep, str)
+    assert isinstance(ie, bool) and not ie
+
+
+def test_read_metadata_for_cdf_forecast_group_values_single_id(
+        sql_app, user, nocommit_cursor):
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_metadata_for_cdf_forecast_group_values(
+            list(demo_single_cdf.keys())[0], pd.Timestamp('2019-09-02'))
+
+
 @pytest.mark.parametrize('aggregate_id', demo_aggregates.keys())
 def test_read_aggregate(sql_app, user, aggregate_id):
     aggregate = storage_interface.read_aggregate(aggregate_id)
@@ -1741,6 +2168,94 @@ def test_read_aggregate_values_empty(sql_app, user, nocommit_cursor):
     assert not out
 
 
+def test_split_aggregate_values():
+    t0 = dt.datetime(2019, 4, 14, 12)
+    t1 = dt.datetime(2019, 4, 14, 13)
+    rows = (
+        ('b', t1, 2.0, 1),
+        ('a', t1, None, 0),
+        ('b', t0, 1.0, 0),
+        ('a', t0, 3.0, 2),
+        ('b', t1, 2.0, 1),
+    )
+    out = storage_interface._split_aggregate_values(rows)
+    assert list(out.keys()) == ['a', 'b']
+    index = pd.DatetimeIndex([t0, t1], name='timestamp')
+    pdt.assert_frame_equal(out['a'], pd.DataFrame(
+        {'value': [3.0, np.nan], 'quality_flag': [2, 0]}, index=index))
+    pdt.assert_frame_equal(out['b'], pd.DataFrame(
+        {'value': [1.0, 2.0], 'quality_flag': [0, 1]}, index=index))
+
+
+def test_split_aggregate_values_tz():
+    t0 = dt.datetime(2019, 4, 14, 12, tzinfo=dt.timezone.utc)
+    rows = (('a', t0, 1.0, 0), ('a', t0, 1.0, 0))
+    out = storage_interface._split_aggregate_values(rows)
+    pdt.assert_frame_equal(out['a'], pd.DataFrame(
+        {'value': [1.0], 'quality_flag': [0]},
+        index=pd.DatetimeIndex([t0], name='timestamp')))
+
+
+def test_split_aggregate_values_empty():
+    assert storage_interface._split_aggregate_values(()) == {}
+
+
+def test_aggregate_value_blocks(sql_app, user, nocommit_cursor):
+    aggregate_id = list(demo_aggregates.keys())[0]
+    start = pd.Timestamp('20190415T0000Z')
+    end = pd.Timestamp('20190416T0000Z')
+    version, blocks = storage_interface.read_aggregate_value_blocks(
+        aggregate_id, start, end)
+    assert blocks == set()
+    values = pd.DataFrame(
+        {'value': [1.0, np.nan], 'quality_flag': [0, 2]},
+        index=pd.DatetimeIndex([start, start + pd.Timedelta('1h')],
+                               name='timestamp'))
+    block = {'start': start, 'end': end - pd.Timedelta('1h'),
+             'raw_start': start - pd.Timedelta('1h'),
+             'raw_end': end - pd.Timedelta('1h')}
+    storage_interface.store_aggregate_value_blocks(
+        aggregate_id, version, [block], values)
+    assert storage_interface.read_aggregate_value_blocks(
+        aggregate_id, start, end) == (version, {start})
+    out = storage_interface.read_materialized_aggregate_values(
+        aggregate_id, start, end)
+    pdt.assert_frame_equal(out, values)
+
+
+def test_store_aggregate_value_blocks_old_version(
+        sql_app, user, nocommit_cursor):
+    aggregate_id = list(demo_aggregates.keys())[0]
+    start = pd.Timestamp('20190415T0000Z')
+    end = pd.Timestamp('20190416T0000Z')
+    version, _ = storage_interface.read_aggregate_value_blocks(
+        aggregate_id, start, end)
+    storage_interface.store_observation_values(
+        '123e4567-e89b-12d3-a456-426655440000',
+        pd.DataFrame({'value': [1.0], 'quality_flag': [0]},
+                     index=pd.DatetimeIndex([start], name='timestamp')))
+    storage_interface.store_aggregate_value_blocks(
+        aggregate_id, version,
+        [{'start': start, 'end': end, 'raw_start': start, 'raw_end': end}],
+        pd.DataFrame({'value': [], 'quality_flag': []},
+                     index=pd.DatetimeIndex([], name='timestamp')))
+    assert storage_interface.read_aggregate_value_blocks(
+        aggregate_id, start, end) == (version + 1, set())
+
+
+def test_aggregate_value_blocks_denied(sql_app, invalid_user,
+                                       nocommit_cursor):
+    aggregate_id = list(demo_aggregates.keys())[0]
+    start = pd.Timestamp('20190415T0000Z')
+    end = pd.Timestamp('20190416T0000Z')
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_aggregate_value_blocks(
+            aggregate_id, start, end)
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_materialized_aggregate_values(
+            aggregate_id, start, end)
+
+
 def test_read_user_id(sql_app, user, nocommit_cursor, external_userid,
                       external_auth0id):
     out = storage_interface.read_user_id(external_auth0id)
@@ -1823,6 +2338,25 @@ def test_read_report(sql_app, report, user, reportid):
     assert out == report
 
 
+@pytest.mark.parametrize('fields,procedures', [
+    (('status',), ['read_report_metadata']),
+    (('status', 'raw_report'), ['read_report']),
+    (('values',), ['read_report_metadata', 'read_report_values']),
+    (('outages',), ['read_report_metadata', 'list_report_outages']),
+    (None, ['read_report', 'read_report_values', 'list_report_outages']),
+])
+def test_read_report_fields(sql_app, report, user, reportid, mocker,
+                            fields, procedures):
+    call = mocker.spy(storage_interface, '_call_procedure')
+    out = storage_interface.read_report(reportid, fields)
+    assert [c[0][0] for c in call.call_args_list] == procedures
+    for key in (fields or report.keys()):
+        assert out[key] == report[key]
+    if fields is not None:
+        unread = {'values', 'outages', 'raw_report'} - set(fields)
+        assert not unread & set(out.keys())
+
+
 def test_read_report_values_missing(sql_app, report, user, reportid,
                                     remove_perms_from_current_role):
     remove_perms_from_current_role('read_values', 'reports')
@@ -1871,6 +2405,53 @@ def test_read_report_values(sql_app, user, reportid, report):
     assert out == report['values']
 
 
+def test_store_report_values_compressed(sql_app, user, reportid,
+                                        report_values, nocommit_cursor,
+                                        mocker):
+    call = mocker.spy(storage_interface, '_call_procedure')
+    processed = '{"data": [' + ', '.join(['{"value": 1.0}'] * 1000) + ']}'
+    newid = storage_interface.store_report_values(
+        reportid, report_values['object_id'], processed)
+    stored = call.call_args[0][-1]
+    assert stored.startswith(storage_interface.COMPRESSED_REPORT_VALUES)
+    assert len(stored) < len(processed) / 10
+    vals = storage_interface.read_report_values(reportid)
+    assert [v['processed_values'] for v in vals if v['id'] == newid] == [
+        processed]
+
+
+@pytest.mark.parametrize('values', [
+    '', 'superencodedvalues', '{"data": []}', '\u00b5' * 10])
+def test_compress_report_values(values):
+    blob = storage_interface._compress_report_values(values)
+    assert storage_interface._decompress_report_values(blob) == values
+
+
+def test_decompress_report_values_uncompressed():
+    assert storage_interface._decompress_report_values(
+        b'superencodedvalues') == 'superencodedvalues'
+
+
+def test_read_report_object_values(sql_app, user, reportid, report,
+                                   report_values):
+    out = storage_interface.read_report_object_values(
+        reportid, report_values['object_id'])
+    assert out == report['values']
+
+
+def test_read_report_object_values_other_object(sql_app, user, reportid,
+                                                forecast_id):
+    out = storage_interface.read_report_object_values(reportid, forecast_id)
+    assert out == []
+
+
+def test_read_report_object_values_denied(sql_app, invalid_user, reportid,
+                                          report_values):
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.read_report_object_values(
+            reportid, report_values['object_id'])
+
+
 def test_read_report_values_denied(sql_app, invalid_user, reportid):
     with pytest.raises(storage_interface.StorageAuthError):
         storage_interface.read_report_values(reportid)
@@ -2086,6 +2667,60 @@ def test_get_user_actions_on_object_no_actions(
         storage_interface.get_user_actions_on_object(inaccessible_forecast_id)
 
 
+def test_get_user_actions_on_objects(
+        sql_app, user, nocommit_cursor, forecast_id, observation_id,
+        missing_id, inaccessible_forecast_id):
+    actions = storage_interface.get_user_actions_on_objects(
+        [forecast_id, missing_id, inaccessible_forecast_id, observation_id])
+    assert list(actions.keys()) == [forecast_id, observation_id]
+    for obj_actions in actions.values():
+        assert sorted(obj_actions) == sorted([
+            'read', 'read_values', 'delete', 'delete_values',
+            'write_values', 'update'])
+
+
+def test_get_user_actions_on_objects_once_per_request(
+        sql_app, user, nocommit_cursor, forecast_id, observation_id,
+        missing_id, mocker):
+    proc = mocker.spy(storage_interface, '_call_procedure')
+    storage_interface.get_user_actions_on_objects([forecast_id, missing_id])
+    storage_interface.get_user_actions_on_object(forecast_id)
+    with pytest.raises(storage_interface.StorageAuthError):
+        storage_interface.get_user_actions_on_object(missing_id)
+    actions = storage_interface.get_user_actions_on_objects(
+        [observation_id, forecast_id])
+    assert list(actions.keys()) == [observation_id, forecast_id]
+    assert proc.call_count == 2
+    assert json.loads(proc.call_args_list[0][0][1]) == [
+        forecast_id, missing_id]
+    assert json.loads(proc.call_args_list[1][0][1]) == [observation_id]
+
+
+def test_get_user_actions_on_objects_after_list_actions(
+        sql_app, user, nocommit_cursor, forecast_id, mocker):
+    proc = mocker.spy(storage_interface, '_call_procedure')
+    storage_interface.list_actions_on_all_objects_of_type('forecasts')
+    assert forecast_id in storage_interface.get_user_actions_on_objects(
+        [forecast_id])
+    assert proc.call_count == 1
+
+
+@pytest.mark.parametrize('procedure,again', [
+    ('read_forecast', False),
+    ('list_actions_on_all_objects_of_type', False),
+    ('store_forecast_values', True),
+    ('add_object_to_permission', True),
+])
+def test_get_user_actions_on_objects_after_procedure(
+        sql_app, user, nocommit_cursor, forecast_id, mocker, procedure,
+        again):
+    proc = mocker.spy(storage_interface, '_call_procedure')
+    storage_interface.get_user_actions_on_object(forecast_id)
+    storage_interface._clear_user_actions_memo(procedure)
+    storage_interface.get_user_actions_on_object(forecast_id)
+    assert proc.call_count == 1 + again
+
+
 def test_list_zones(sql_app):
     zones = storage_interface.list_zones()
     assert {z['name'] for z in zones} == {f'Reference Region {i}'
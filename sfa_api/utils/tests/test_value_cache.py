@@ -0,0 +1,280 @@
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+
+from sfa_api.utils import value_cache
+
+
+START = pd.Timestamp('2019-04-14T12:00Z')
+END = pd.Timestamp('2019-04-15T12:00Z')
+OBJECT_ID = '123e4567-e89b-12d3-a456-426655440000'
+
+
+@pytest.fixture()
+def cache_app(app):
+    app.config['VALUE_CACHE_TTL'] = 60
+    app.config['USE_FAKE_REDIS'] = True
+    with app.test_request_context():
+        yield app
+
+
+@pytest.fixture()
+def values():
+    return pd.DataFrame(
+        {'value': [1.0, None, 3.0], 'quality_flag': [0, 1, 2]},
+        index=pd.DatetimeIndex(
+            ['2019-04-14T12:00Z', '2019-04-14T13:00Z', '2019-04-14T14:00Z'],
+            name='timestamp'))
+
+
+@pytest.fixture()
+def read(mocker, values):
+    return mocker.Mock(return_value=values)
+
+
+def _sample(name, kind='observation'):
+    prometheus_client = pytest.importorskip('prometheus_client')
+    return prometheus_client.REGISTRY.get_sample_value(
+        name, {'kind': kind}) or 0
+
+
+def test_dumps_loads(values):
+    df, fingerprint = value_cache._loads(value_cache._dumps(values, (3,)))
+    pdt.assert_frame_equal(df, values)
+    assert fingerprint == value_cache._fingerprint_str((3,))
+
+
+def test_dumps_loads_no_quality_flag(values):
+    values = values[['value']].tz_convert('Etc/GMT+7')
+    df, fingerprint = value_cache._loads(value_cache._dumps(values))
+    pdt.assert_frame_equal(df, values)
+    assert fingerprint == value_cache._fingerprint_str(None)
+
+
+def test_cached_values(cache_app, read, values):
+    hits = _sample('sfa_api_value_cache_hits_total')
+    misses = _sample('sfa_api_value_cache_misses_total')
+    for _ in range(3):
+        out = value_cache.cached_values(
+            'observation', OBJECT_ID, START, END, read)
+        pdt.assert_frame_equal(out, values)
+    assert read.call_count == 1
+    assert _sample('sfa_api_value_cache_hits_total') == hits + 2
+    assert _sample('sfa_api_value_cache_misses_total') == misses + 1
+
+
+def test_cached_values_disabled(cache_app, read):
+    cache_app.config['VALUE_CACHE_TTL'] = 0
+    for _ in range(2):
+        value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    assert read.call_count == 2
+
+
+@pytest.mark.parametrize('start,end,user', [
+    (START - pd.Timedelta('1h'), END, 'auth0|user'),
+    (START, END + pd.Timedelta('1h'), 'auth0|user'),
+    (START, END, 'auth0|other'),
+])
+def test_cached_values_key(cache_app, read, start, end, user):
+    from flask import _request_ctx_stack
+    _request_ctx_stack.top.user = 'auth0|user'
+    value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    _request_ctx_stack.top.user = user
+    value_cache.cached_values('observation', OBJECT_ID, start, end, read)
+    assert read.call_count == 2
+
+
+def test_cached_values_empty_not_cached(cache_app, read, values):
+    read.return_value = values.iloc[:0]
+    for _ in range(2):
+        value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    assert read.call_count == 2
+
+
+def test_invalidate(cache_app, read):
+    value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    value_cache.invalidate('other', OBJECT_ID)
+    value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    assert read.call_count == 2
+    conn = value_cache.get_redis_connection()
+    assert 0 < conn.ttl(value_cache._version_key(OBJECT_ID)) <= 120
+
+
+@pytest.mark.parametrize('version_key,invalidate', [
+    (value_cache._version_key(OBJECT_ID),
+     lambda: value_cache.invalidate(OBJECT_ID)),
+    (value_cache.PERMISSIONS_KEY, value_cache.invalidate_permissions),
+], ids=['object', 'permissions'])
+def test_invalidate_after_version_expires(cache_app, read, values,
+                                          version_key, invalidate):
+    conn = value_cache.get_redis_connection()
+    invalidate()
+    value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    # the frame cached with the first version outlives the version
+    conn.delete(version_key)
+    invalidate()
+    read.return_value = values * 2
+    out = value_cache.cached_values(
+        'observation', OBJECT_ID, START, END, read)
+    pdt.assert_frame_equal(out, values * 2)
+    assert read.call_count == 2
+
+
+def test_invalidate_permissions(cache_app, read):
+    value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    value_cache.invalidate_permissions()
+    value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    assert read.call_count == 2
+
+
+def test_cached_values_fingerprint(cache_app, read, values):
+    value_cache.cached_values(
+        'observation', OBJECT_ID, START, END, read, (1,))
+    value_cache.cached_values(
+        'observation', OBJECT_ID, START, END, read, (1,))
+    value_cache.cached_values('observation', OBJECT_ID, START, END, read)
+    assert read.call_count == 1
+    # values stored after the frame was cached, before the cache was
+    # invalidated
+    read.return_value = values * 2
+    out = value_cache.cached_values(
+        'observation', OBJECT_ID, START, END, read, (2,))
+    pdt.assert_frame_equal(out, values * 2)
+    out = value_cache.cached_values(
+        'observation', OBJECT_ID, START, END, read, (2,))
+    pdt.assert_frame_equal(out, values * 2)
+    assert read.call_count == 2
+
+
+def test_cached_fingerprint(cache_app, mocker):
+    read = mocker.Mock(return_value=(3,))
+    hits = _sample('sfa_api_value_cache_hits_total',
+                   'observation_fingerprint')
+    for _ in range(3):
+        assert value_cache.cached_fingerprint(
+            'observation', OBJECT_ID, read) == (3,)
+    assert read.call_count == 1
+    assert _sample('sfa_api_value_cache_hits_total',
+                   'observation_fingerprint') == hits + 2
+    value_cache.invalidate(OBJECT_ID)
+    read.return_value = (4,)
+    assert value_cache.cached_fingerprint(
+        'observation', OBJECT_ID, read) == (4,)
+    value_cache.invalidate_permissions()
+    value_cache.cached_fingerprint('observation', OBJECT_ID, read)
+    assert read.call_count == 3
+
+
+def test_cached_fingerprint_user(cache_app, mocker):
+    from flask import _request_ctx_stack
+    read = mocker.Mock(return_value=(3,))
+    _request_ctx_stack.top.user = 'auth0|user'
+    value_cache.cached_fingerprint('observation', OBJECT_ID, read)
+    _request_ctx_stack.top.user = 'auth0|other'
+    value_cache.cached_fingerprint('observation', OBJECT_ID, read)
+    assert read.call_count == 2
+
+
+def test_cached_fingerprint_disabled(cache_app, mocker):
+    cache_app.config['VALUE_CACHE_TTL'] = 0
+    read = mocker.Mock(return_value=(3,))
+    for _ in range(2):
+        value_cache.cached_fingerprint('observation', OBJECT_ID, read)
+    assert read.call_count == 2
+
+
+def test_cached_values_redis_down(cache_app, read, values, mocker):
+    conn = value_cache.get_redis_connection()
+    mocker.patch.object(conn, 'mget', side_effect=ConnectionError)
+    out = value_cache.cached_values(
+        'observation', OBJECT_ID, START, END, read)
+    pdt.assert_frame_equal(out, values)
+    assert read.call_count == 1
+
+
+@pytest.mark.parametrize('func,args,invalidated', [
+    ('store_observation_values', (OBJECT_ID, 'df'), 'invalidate'),
+    ('delete_observation', (OBJECT_ID,), 'invalidate'),
+    ('store_forecast_values', (OBJECT_ID, 'df'), 'invalidate'),
+    ('delete_forecast', (OBJECT_ID,), 'invalidate'),
+    ('store_cdf_forecast_values', (OBJECT_ID, 'df'), 'invalidate'),
+    ('delete_cdf_forecast', (OBJECT_ID,), 'invalidate'),
+    ('remove_role_from_user', ('user', 'role'), 'invalidate_permissions'),
+    ('delete_role', ('role',), 'invalidate_permissions'),
+    ('remove_permission_from_role', ('role', 'perm'),
+     'invalidate_permissions'),
+    ('delete_permission', ('perm',), 'invalidate_permissions'),
+    ('remove_object_from_permission', ('perm', OBJECT_ID),
+     'invalidate_permissions'),
+])
+def test_storage_invalidates(cache_app, mocker, func, args, invalidated):
+    from sfa_api.utils import storage_interface
+    mocker.patch.object(storage_interface, '_call_procedure')
+    mocker.patch.object(storage_interface, '_process_df_into_json')
+    invalidate = mocker.patch.object(value_cache, invalidated)
+    getattr(storage_interface, func)(*args)
+    invalidate.assert_called_once()
+
+
+def test_storage_read_observation_values_cached(cache_app, mocker, values):
+    from sfa_api.utils import storage_interface
+    read = mocker.patch.object(storage_interface, '_read_observation_values',
+                               return_value=values)
+    for _ in range(2):
+        out = storage_interface.read_observation_values(OBJECT_ID, START, END)
+        pdt.assert_frame_equal(out, values)
+    read.assert_called_once_with(OBJECT_ID, START, END)
+
+
+@pytest.mark.parametrize('object_type', [
+    'observations', 'forecasts', 'cdf_forecasts'])
+def test_storage_read_values_fingerprint_cached(cache_app, mocker,
+                                                object_type):
+    from sfa_api.utils import storage_interface
+    call = mocker.patch.object(storage_interface,
+                               '_call_procedure_for_single',
+                               return_value=(3,))
+    for _ in range(2):
+        assert storage_interface.read_values_fingerprint(
+            OBJECT_ID, object_type) == (3,)
+    call.assert_called_once()
+
+
+def test_storage_read_values_fingerprint_group_not_cached(cache_app,
+                                                          mocker):
+    from sfa_api.utils import storage_interface
+    call = mocker.patch.object(storage_interface,
+                               '_call_procedure_for_single',
+                               return_value=(3, 10))
+    for _ in range(2):
+        storage_interface.read_values_fingerprint(
+            OBJECT_ID, 'cdf_forecasts_groups')
+    assert call.call_count == 2
+
+
+def test_storage_cdf_group_invalidates_constant_values(cache_app, mocker):
+    from sfa_api.utils import storage_interface
+    mocker.patch.object(storage_interface, '_call_procedure')
+    mocker.patch.object(storage_interface, '_process_wide_df_into_json')
+    mocker.patch.object(
+        storage_interface, 'read_cdf_forecast_group', return_value={
+            'constant_values': [{'forecast_id': 'a'}, {'forecast_id': 'b'}]})
+    invalidate = mocker.patch.object(value_cache, 'invalidate')
+    storage_interface.store_cdf_forecast_group_values(OBJECT_ID, 'df')
+    invalidate.assert_called_once_with('a', 'b')
+    invalidate.reset_mock()
+    storage_interface.delete_cdf_forecast_group(OBJECT_ID)
+    invalidate.assert_called_once_with('a', 'b')
+
+
+def test_storage_forecast_batch_invalidates(cache_app, mocker):
+    from sfa_api.utils import storage_interface
+    mocker.patch.object(storage_interface, 'get_cursor')
+    mocker.patch.object(storage_interface, '_execute_procedure')
+    mocker.patch.object(storage_interface, '_process_df_into_json')
+    invalidate = mocker.patch.object(value_cache, 'invalidate')
+    storage_interface.store_forecast_values_batch(
+        [('a', 'forecast', 'df'), ('b', 'cdf_forecast', 'df')])
+    invalidate.assert_called_once_with('a', 'b')
@@ -0,0 +1,250 @@
+"""
+Cache of the values of observations, forecasts, and CDF forecasts read
+from the database, stored in Redis so it is shared by every worker.
+
+Cached frames are keyed on the object, the requested period, the user,
+and two versions. The version of an object is replaced with a new
+random value after its values are stored or it is deleted, and the
+permissions version is replaced after any change to roles or
+permissions, so later reads never find frames stored before the
+change. Frames expire
+after VALUE_CACHE_TTL seconds, which also limits how long changes made
+outside of the API are not seen.
+
+The fingerprints of the values, which the ETags of value responses are
+made from, are cached under the same versions, so a cached response
+needs no database query. A store commits before the object version is
+replaced, so in between a fingerprint of the new values may be cached
+while the frames of the old values are still found. Each frame is
+stored with the fingerprint that was read before its values, and a
+frame with another fingerprint than the one of the request is read
+again, so an ETag never identifies older values.
+"""
+import io
+import json
+import logging
+import uuid
+
+
+from flask import current_app
+import numpy as np
+import pandas as pd
+
+
+from sfa_api.utils.auth import current_user
+
+
+logger = logging.getLogger(__name__)
+KEY_PREFIX = 'sfa_api:values'
+PERMISSIONS_KEY = f'{KEY_PREFIX}:permissions_version'
+
+
+def _make_counter(name, documentation):
+    try:
+        from prometheus_client import Counter
+    except ImportError:  # pragma: no cover
+        return None
+    return Counter(name, documentation, ['kind'])
+
+
+cache_hits = _make_counter(
+    'sfa_api_value_cache_hits_total',
+    'Number of value reads served from the value cache')
+cache_misses = _make_counter(
+    'sfa_api_value_cache_misses_total',
+    'Number of value reads that had to query the database')
+
+
+def _count(counter, kind):
+    if counter is not None:
+        counter.labels(kind=kind).inc()
+
+
+def _ttl():
+    return current_app.config.get('VALUE_CACHE_TTL', 0)
+
+
+def get_redis_connection():
+    """Return the Redis connection used to cache values, or None if
+    caching is disabled."""
+    if _ttl() <= 0:
+        return None
+    if not hasattr(current_app, 'value_cache_redis'):
+        try:
+            if current_app.config.get('USE_FAKE_REDIS', False):
+                from fakeredis import FakeStrictRedis
+                conn = FakeStrictRedis()
+            else:
+                from sfa_api.utils.queuing import make_redis_connection
+                conn = make_redis_connection(current_app.config)
+        except ImportError:  # pragma: no cover
+            logger.warning('redis is not installed, values are not cached')
+            conn = None
+        current_app.value_cache_redis = conn
+    return current_app.value_cache_redis
+
+
+def _version_key(object_id):
+    return f'{KEY_PREFIX}:version:{object_id}'
+
+
+def _fingerprint_str(fingerprint):
+    return json.dumps(None if fingerprint is None else list(fingerprint))
+
+
+def _key(conn, kind, object_id, *parts):
+    versions = conn.mget(_version_key(object_id), PERMISSIONS_KEY)
+    return ':'.join([
+        KEY_PREFIX, kind, object_id,
+        *[(v or b'0').decode() for v in versions],
+        str(current_user), *parts])
+
+
+def _dumps(df, fingerprint=None):
+    buf = io.BytesIO()
+    np.savez(buf, timestamp=df.index.asi8,
+             tz=np.array(str(df.index.tz or '')),
+             fingerprint=np.array(_fingerprint_str(fingerprint)),
+             columns=np.array(list(df.columns), dtype=str),
+             **{f'column_{i}': df[col].to_numpy()
+                for i, col in enumerate(df.columns)})
+    return buf.getvalue()
+
+
+def _loads(blob):
+    """Return the frame and the fingerprint string stored in blob"""
+    with np.load(io.BytesIO(blob), allow_pickle=False) as arrays:
+        tz = str(arrays['tz']) or None
+        index = pd.DatetimeIndex(arrays['timestamp'], name='timestamp')
+        if tz is not None:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        fingerprint = (str(arrays['fingerprint'])
+                       if 'fingerprint' in arrays.files else None)
+        return pd.DataFrame(
+            {str(col): arrays[f'column_{i}']
+             for i, col in enumerate(arrays['columns'])},
+            index=index), fingerprint
+
+
+def cached_fingerprint(kind, object_id, read):
+    """Return the fingerprint of the values of an object from the
+    cache, or read it with read and store it in the cache.
+
+    Parameters
+    ----------
+    kind: str
+        The type of object, used to label the cache metrics.
+    object_id: str
+        UUID of the object.
+    read: callable
+        Reads the fingerprint from the database as a tuple of
+        integers.
+
+    Returns
+    -------
+    tuple
+    """
+    conn = get_redis_connection()
+    if conn is None:
+        return read()
+    kind = f'{kind}_fingerprint'
+    try:
+        key = _key(conn, kind, str(object_id))
+        blob = conn.get(key)
+    except Exception:
+        logger.exception('Failed to read from the value cache')
+        return read()
+    if blob is not None:
+        _count(cache_hits, kind)
+        return tuple(json.loads(blob))
+    _count(cache_misses, kind)
+    fingerprint = read()
+    try:
+        conn.set(key, _fingerprint_str(fingerprint),
+                 ex=int(np.ceil(_ttl())))
+    except Exception:
+        logger.exception('Failed to write to the value cache')
+    return fingerprint
+
+
+def cached_values(kind, object_id, start, end, read, fingerprint=None):
+    """Return the values of an object from the cache, or read them
+    with read and store them in the cache.
+
+    Parameters
+    ----------
+    kind: str
+        The type of object, used to label the cache metrics.
+    object_id: str
+        UUID of the object.
+    start: datetime
+        Beginning of the requested period.
+    end: datetime
+        End of the requested period.
+    read: callable
+        Reads the values from the database as a DataFrame with a
+        DatetimeIndex.
+    fingerprint: tuple, optional
+        Fingerprint of the values read before this call. Cached values
+        stored with another fingerprint are read again.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    conn = get_redis_connection()
+    if conn is None:
+        return read()
+    object_id = str(object_id)
+    try:
+        key = _key(conn, kind, object_id, pd.Timestamp(start).isoformat(),
+                   pd.Timestamp(end).isoformat())
+        blob = conn.get(key)
+    except Exception:
+        logger.exception('Failed to read from the value cache')
+        return read()
+    if blob is not None:
+        df, stored = _loads(blob)
+        if fingerprint is None or stored == _fingerprint_str(fingerprint):
+            _count(cache_hits, kind)
+            return df
+    _count(cache_misses, kind)
+    df = read()
+    # empty periods are cheap to read and are often about to be filled
+    if len(df) > 0:
+        try:
+            conn.set(key, _dumps(df, fingerprint),
+                     ex=int(np.ceil(_ttl())))
+        except Exception:
+            logger.exception('Failed to write to the value cache')
+    return df
+
+
+def _new_versions(keys):
+    conn = get_redis_connection()
+    if conn is None:
+        return
+    # versions are random instead of counters, which would start over
+    # when the key expires and match frames cached with the old count.
+    # A version outlives the frames cached before it was set, so
+    # reading without a version after it expires does not find them
+    expire = 2 * int(np.ceil(_ttl()))
+    try:
+        pipe = conn.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, uuid.uuid4().hex, ex=expire)
+        pipe.execute()
+    except Exception:
+        logger.exception('Failed to invalidate the value cache')
+
+
+def invalidate(*object_ids):
+    """Prevent cached values of the objects from being read. Call after
+    the values are changed or the objects are deleted."""
+    _new_versions([_version_key(object_id) for object_id in object_ids])
+
+
+def invalidate_permissions():
+    """Prevent any cached values from being read. Call after roles or
+    permissions change, which may remove access to cached values."""
+    _new_versions([PERMISSIONS_KEY])
@@ -0,0 +1,112 @@
+from flask import Blueprint, request, current_app
+from flask.views import MethodView
+from marshmallow import ValidationError
+import pandas as pd
+
+
+from sfa_api.schema import (ValuesBatchRequestSchema, ValuesBatchObjectSchema,
+                            timeseries_to_json)
+from sfa_api.utils.errors import BadAPIRequest
+from sfa_api.utils.storage import get_storage
+from sfa_api import json
+
+
+VALUE_COLUMNS = {
+    'observation': ['quality_flag', 'timestamp', 'value'],
+    'forecast': ['timestamp', 'value'],
+    'cdf_forecast': ['timestamp', 'value'],
+}
+
+
+def _validate_batch_objects(objects):
+    """Check the number of objects, the period of each object and the
+    total period of all objects are within the configured limits"""
+    max_objects = current_app.config['MAX_BATCH_OBJECTS']
+    if len(objects) > max_objects:
+        raise BadAPIRequest(objects=[
+            f'Values for at most {max_objects} objects may be '
+            'requested per request'])
+    max_range = current_app.config['MAX_DATA_RANGE_DAYS']
+    errors = {}
+    for i, obj in enumerate(objects):
+        if obj['end'] < obj['start']:
+            errors[str(i)] = {'end': ['end must be after start']}
+        elif obj['end'] - obj['start'] > max_range:
+            errors[str(i)] = {'end': [
+                f'Only {max_range.days} days of data may be requested '
+                'per object']}
+    if errors:
+        raise BadAPIRequest(objects=errors)
+    max_total = current_app.config['MAX_BATCH_DATA_RANGE_DAYS']
+    total = sum((obj['end'] - obj['start'] for obj in objects),
+                pd.Timedelta(0))
+    if total > max_total:
+        raise BadAPIRequest(objects=[
+            f'At most {max_total.days} days of data, summed over all '
+            'objects, may be requested per request'])
+
+
+class ValuesBatchView(MethodView):
+    def post(self, *args):
+        """
+        ---
+        summary: Get values of many objects.
+        description: |
+          Get the values of many observations, forecasts, and
+          probabilistic forecast constant values in a single request.
+          Each requested object is read for its own start and end,
+          limited to the same number of days as the single object
+          value endpoints. The number of days of all objects together
+          is also limited, so a request for many objects may need to
+          be split into several requests.
+        tags:
+        - Values
+        requestBody:
+          required: True
+          content:
+            application/json:
+              schema:
+                $ref: '#/components/schemas/ValuesBatchRequest'
+        responses:
+          200:
+            description: Values retrieved successfully.
+            content:
+              application/json:
+                schema:
+                  $ref: '#/components/schemas/ValuesBatch'
+          400:
+            $ref: '#/components/responses/400-BadRequest'
+          401:
+            $ref: '#/components/responses/401-Unauthorized'
+          404:
+            description: |
+              Any of the objects do not exist or the user does not
+              have permission to read their values.
+        """
+        data = request.get_json()
+        try:
+            objects = ValuesBatchRequestSchema().load(data)['objects']
+        except ValidationError as err:
+            raise BadAPIRequest(err.messages)
+        _validate_batch_objects(objects)
+        storage = get_storage()
+        values = storage.read_values_batch(objects)
+        dumped = ValuesBatchObjectSchema(many=True).dump(objects)
+        # splice the JSON of the values into the JSON of each object
+        # instead of loading it to be dumped again by jsonify. 'values'
+        # sorts after the other keys, as jsonify would place it
+        out = []
+        for obj, obj_values in zip(dumped, values):
+            meta_json = json.dumps(obj, separators=(',', ':'))
+            values_json = timeseries_to_json(
+                obj_values, VALUE_COLUMNS[obj['type']])
+            out.append(f'{meta_json[:-1]},"values":{values_json}}}')
+        return current_app.response_class(
+            '{"objects":[' + ','.join(out) + ']}\n',
+            mimetype='application/json')
+
+
+values_blp = Blueprint(
+    'values', 'values', url_prefix='/values',
+)
+values_blp.add_url_rule('/batch', view_func=ValuesBatchView.as_view('batch'))